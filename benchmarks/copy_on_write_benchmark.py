@@ -0,0 +1,89 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measures the time and memory it takes to apply a codec settings template to many inputs, the way it used to be
+# done (a deep copy of the template's args for every input) and with copy on write settings.
+#
+# Run from the src directory:
+#     PYTHONPATH=. python ../benchmarks/copy_on_write_benchmark.py [number_of_inputs]
+
+
+import copy
+import sys
+import time
+import tracemalloc
+
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.x264 import X264
+
+
+DEFAULT_NUMBER_OF_INPUTS = 10000
+
+
+def get_x264_template():
+    x264 = X264()
+    x264.preset = 5
+    x264.advanced_enabled = True
+    x264.keyint = 120
+    x264.bframes = 5
+    x264.ref = 4
+    x264.aq_strength = 1.2
+    return x264
+
+
+def deep_copy_settings(settings):
+    settings_copy = object.__new__(type(settings))
+    settings_copy.__dict__.update(copy.deepcopy(settings.__dict__))
+    return settings_copy
+
+
+def copy_on_write_settings(settings):
+    return settings.copy()
+
+
+def apply_template(copy_settings_func, number_of_inputs):
+    video_template, audio_template = get_x264_template(), Aac()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+
+    applied_settings = [(copy_settings_func(video_template), copy_settings_func(audio_template))
+                        for _ in range(number_of_inputs)]
+
+    elapsed_time = time.perf_counter() - start_time
+    current_size, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del applied_settings
+    return elapsed_time, current_size, peak_size
+
+
+def main():
+    number_of_inputs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_INPUTS
+
+    print('applying an x264 and aac template to ' + str(number_of_inputs) + ' inputs')
+    print('{:<16}{:>12}{:>16}{:>16}'.format('copy', 'time (ms)', 'retained (KiB)', 'peak (KiB)'))
+    for copy_name, copy_settings_func in (('deep copy', deep_copy_settings),
+                                          ('copy on write', copy_on_write_settings)):
+        elapsed_time, current_size, peak_size = apply_template(copy_settings_func, number_of_inputs)
+        print('{:<16}{:>12.1f}{:>16.1f}{:>16.1f}'.format(copy_name,
+                                                        elapsed_time * 1000,
+                                                        current_size / 1024,
+                                                        peak_size / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measures how many times per second Settings.get_args() can be called for two pass x264 and x265 settings, when
+# nothing changed since the last call and when a setting changed before every call.
+#
+# Run from the src directory:
+#     PYTHONPATH=. python ../benchmarks/get_args_benchmark.py [number_of_calls]
+
+
+import sys
+import time
+
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.ffmpeg.x264 import X264
+from render_watch.ffmpeg.x265 import X265
+
+
+DEFAULT_NUMBER_OF_CALLS = 20000
+
+
+def get_x264_settings():
+    x264 = X264()
+    x264.bitrate = 5000
+    x264.preset = 6
+    x264.advanced_enabled = True
+    x264.keyint = 240
+    x264.bframes = 3
+    x264.ref = 4
+    x264.aq_mode = 2
+    x264.encode_pass = 1
+    x264.stats = '/tmp/x264_stats.log'
+    return x264
+
+
+def get_x265_settings():
+    x265 = X265()
+    x265.bitrate = 4000
+    x265.preset = 6
+    x265.advanced_enabled = True
+    x265.keyint = 240
+    x265.bframes = 4
+    x265.ref = 3
+    x265.encode_pass = 1
+    x265.stats = '/tmp/x265_stats.log'
+    return x265
+
+
+def get_two_pass_settings(video_settings):
+    ffmpeg = Settings()
+    ffmpeg.input_file = '/media/videos/input_file.mkv'
+    ffmpeg.output_directory = '/media/videos/output/'
+    ffmpeg.temp_file_name = 'input_file'
+    ffmpeg.setup_subtitles_settings()
+    ffmpeg.video_stream_index = '0'
+    ffmpeg.audio_stream_index = '1'
+    ffmpeg.video_settings = video_settings
+    ffmpeg.audio_settings = Aac()
+    ffmpeg.picture_settings.crop = 1920, 800, 0, 140
+    ffmpeg.picture_settings.scale = 1280, 534
+    ffmpeg.general_settings.frame_rate = 1
+    ffmpeg.trim_settings = TrimSettings()
+    ffmpeg.trim_settings.start_time = 30
+    ffmpeg.trim_settings.trim_duration = 600
+    return ffmpeg
+
+
+def get_calls_per_second(ffmpeg, number_of_calls, is_changed_every_call):
+    start_time = time.perf_counter()
+
+    for call in range(number_of_calls):
+        if is_changed_every_call:
+            ffmpeg.trim_settings.start_time = call % 60
+
+        ffmpeg.get_args()
+
+    return number_of_calls / (time.perf_counter() - start_time)
+
+
+def main():
+    number_of_calls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_CALLS
+
+    print('{:<18}{:>18}{:>22}'.format('settings', 'unchanged calls/s', 'changed calls/s'))
+    for settings_name, video_settings in (('x264 two pass', get_x264_settings()),
+                                          ('x265 two pass', get_x265_settings())):
+        ffmpeg = get_two_pass_settings(video_settings)
+        unchanged_calls_per_second = get_calls_per_second(ffmpeg, number_of_calls, False)
+        changed_calls_per_second = get_calls_per_second(ffmpeg, number_of_calls, True)
+        print('{:<18}{:>18.0f}{:>22.0f}'.format(settings_name, unchanged_calls_per_second, changed_calls_per_second))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measures the Python hot paths that run for every line of ffmpeg and ffprobe output, every task, and every refresh of
+# the active page: how many operations per second they run and how much memory each call allocates. Runs without GTK
+# or ffmpeg installed, the paths are fed the ffmpeg and ffprobe output in fixtures/ and settings like the ones used to
+# encode a Blu-ray remux. The fixtures were recorded with ffmpeg 6.0 from a 1080p H.264 input with TrueHD and AC-3
+# audio and four PGS subtitle streams.
+#
+# Allocations are measured with tracemalloc, which doesn't count allocations, so "alloc B/op" is the peak of the
+# memory a call allocated and "kept B/op" is what it allocated that was still alive after it returned.
+#
+# Run from the src directory:
+#     PYTHONPATH=. python ../benchmarks/micro_benchmarks.py [--filter TEXT] [--repeat N]
+#
+# Record the fixtures again from an input file with a real ffmpeg and ffprobe:
+#     PYTHONPATH=. python ../benchmarks/micro_benchmarks.py --record input.mkv
+
+
+import argparse
+import itertools
+import os
+import subprocess
+import timeit
+import tracemalloc
+
+from render_watch.app_formatting import format_converter
+from render_watch.encoding.encoder import Encoder
+from render_watch.encoding.headless_task import HeadlessTask
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.input_information import InputInformation
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.ffmpeg.x264 import X264
+from render_watch.ffmpeg.x265 import X265
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FFPROBE_FIXTURE = 'ffprobe_bluray_remux.txt'
+X264_ENCODE_FIXTURE = 'ffmpeg_x264_encode.txt'
+X265_ENCODE_FIXTURE = 'ffmpeg_x265_encode.txt'
+RECORD_ENCODE_DURATION_IN_SECONDS = 60
+INPUT_FILE_PATH = '/media/videos/input_file.mkv'
+NUMBER_OF_CHUNKS = 8
+TIME_LEFT_ESTIMATES_IN_SECONDS = (0, 7.5, 42.25, 599.9, 3600, 7903.456, 45296.8)
+DEFAULT_REPEAT = 5
+DEFAULT_ALLOCATION_CALLS = 200
+
+
+def read_fixture_lines(fixture_name):
+    # Stripped the same way the encoder and InputInformation strip the lines they read from ffmpeg and ffprobe.
+    with open(os.path.join(FIXTURES_DIRECTORY, fixture_name)) as fixture_file:
+        return [line.strip() for line in fixture_file]
+
+
+def get_input_information(ffprobe_lines):
+    input_information = InputInformation()
+
+    for line in ffprobe_lines:
+        InputInformation._process_input_information(line, input_information)
+
+    return input_information
+
+
+def get_media_info(ffprobe_lines):
+    # _get_media_info() reads the input's file size, so the fixture stands in for the input file.
+    ffmpeg = Settings()
+    ffmpeg.input_file = os.path.join(FIXTURES_DIRECTORY, FFPROBE_FIXTURE)
+    return InputInformation._get_media_info(ffmpeg, get_input_information(ffprobe_lines))
+
+
+def get_x264_settings():
+    x264 = X264()
+    x264.bitrate = 5000
+    x264.preset = 6
+    x264.advanced_enabled = True
+    x264.keyint = 240
+    x264.bframes = 3
+    x264.ref = 4
+    x264.aq_mode = 2
+    x264.encode_pass = 1
+    x264.stats = '/tmp/x264_stats.log'
+    return x264
+
+
+def get_x265_settings():
+    x265 = X265()
+    x265.crf = 22
+    x265.preset = 6
+    x265.advanced_enabled = True
+    x265.keyint = 240
+    x265.min_keyint = 23
+    x265.bframes = 4
+    x265.ref = 3
+    x265.aq_mode = 2
+    x265.aq_strength = 1.0
+    x265.rc_lookahead = 25
+    x265.psy_rd = 2.0
+    x265.psy_rdoq = 1.0
+    x265.me = 2
+    x265.subme = 3
+    x265.deblock = -1, -1
+    return x265
+
+
+def get_settings(media_info, video_settings):
+    ffmpeg = Settings()
+    ffmpeg.input_file = INPUT_FILE_PATH
+    ffmpeg.media_info = media_info
+    ffmpeg.output_directory = '/media/videos/output/'
+    ffmpeg.temp_file_name = 'input_file'
+    ffmpeg.setup_subtitles_settings()
+    ffmpeg.video_stream_index = '0'
+    ffmpeg.audio_stream_index = '2'
+    ffmpeg.video_settings = video_settings
+    ffmpeg.audio_settings = Aac()
+    ffmpeg.picture_settings.crop = 1920, 800, 0, 140
+    ffmpeg.picture_settings.scale = 1280, 534
+    ffmpeg.trim_settings = TrimSettings()
+    ffmpeg.trim_settings.start_time = 30
+    ffmpeg.trim_settings.trim_duration = 600
+
+    # Keeps the first English subtitles and burns in the Spanish ones.
+    subtitles_settings = ffmpeg.subtitles_settings
+    english_stream, _, spanish_stream, _ = media_info.subtitle_streams
+    subtitles_settings.use_stream(english_stream.info)
+    subtitles_settings.use_stream(spanish_stream.info)
+    subtitles_settings.set_stream_method_burn_in(spanish_stream.info)
+    return ffmpeg
+
+
+def get_encode_status_benchmark(ffmpeg, fixture_name):
+    headless_task = HeadlessTask(ffmpeg, ApplicationPreferences())
+    duration_in_seconds = ffmpeg.trim_settings.trim_duration
+    fixture_lines = itertools.cycle(read_fixture_lines(fixture_name))
+
+    def update_encode_status():
+        Encoder._update_active_row_encode_status(headless_task, next(fixture_lines), 0, 1, duration_in_seconds)
+    return update_encode_status
+
+
+def get_ffprobe_parsing_benchmark(ffprobe_lines):
+    def process_input_information():
+        get_input_information(ffprobe_lines)
+    return process_input_information
+
+
+def get_changed_args_benchmark(ffmpeg):
+    start_times = itertools.cycle(range(60))
+
+    def get_changed_args():
+        ffmpeg.trim_settings.start_time = next(start_times)
+        ffmpeg.get_args()
+    return get_changed_args
+
+
+def get_timecode_benchmark():
+    time_left_estimates = itertools.cycle(TIME_LEFT_ESTIMATES_IN_SECONDS)
+
+    def get_timecode():
+        format_converter.get_timecode_from_seconds(next(time_left_estimates))
+    return get_timecode
+
+
+def get_chunks_update_benchmark(ffmpeg):
+    # Headless tasks aggregate their chunks' encode status with the same helpers as the active page's rows.
+    application_preferences = ApplicationPreferences()
+    application_preferences.parallel_tasks = str(NUMBER_OF_CHUNKS)  # Only the preferences' string values are set.
+    headless_task = HeadlessTask(ffmpeg, application_preferences)
+    headless_task.get_encoder_tasks(True)
+
+    if len(headless_task.chunk_list) != NUMBER_OF_CHUNKS:
+        raise SystemExit('expected ' + str(NUMBER_OF_CHUNKS) + ' chunks, got ' + str(len(headless_task.chunk_list)))
+
+    for chunk_index, headless_chunk in enumerate(headless_task.chunk_list):
+        if chunk_index < 2:
+            headless_chunk.finished = True
+            headless_chunk.progress = 1.0
+        elif chunk_index < 6:
+            headless_chunk.progress = 0.1 * chunk_index
+            headless_chunk.speed = 0.4 + (0.05 * chunk_index)
+            headless_chunk.bitrate = 5000 + (100 * chunk_index)
+            headless_chunk.file_size = 4000000 * chunk_index
+            headless_chunk.time = 90 - (10 * chunk_index)
+            headless_chunk.current_time = 7.5 * chunk_index
+
+    return headless_task.update_chunks_task_information
+
+
+def get_micro_benchmarks():
+    ffprobe_lines = read_fixture_lines(FFPROBE_FIXTURE)
+    media_info = get_media_info(ffprobe_lines)
+    x264_ffmpeg = get_settings(media_info, get_x264_settings())
+    x265_ffmpeg = get_settings(media_info, get_x265_settings())
+
+    return [
+        ('Encoder status, x264 output', 'line', get_encode_status_benchmark(x264_ffmpeg, X264_ENCODE_FIXTURE)),
+        ('Encoder status, x265 output', 'line', get_encode_status_benchmark(x265_ffmpeg, X265_ENCODE_FIXTURE)),
+        ('InputInformation, ffprobe output', 'input', get_ffprobe_parsing_benchmark(ffprobe_lines)),
+        ('Settings.get_args, unchanged', 'call', x264_ffmpeg.get_args),
+        ('Settings.get_args, changed', 'call', get_changed_args_benchmark(get_settings(media_info, get_x264_settings()))),
+        ('Settings.get_copy', 'call', x264_ffmpeg.get_copy),
+        ('X265._generate_advanced_args', 'call', x265_ffmpeg.video_settings._generate_advanced_args),
+        ('PictureSettings.ffmpeg_args', 'call', lambda: x264_ffmpeg.picture_settings.ffmpeg_args),
+        ('format_converter.get_timecode_from_seconds', 'call', get_timecode_benchmark()),
+        ('Chunks status, ' + str(NUMBER_OF_CHUNKS) + ' chunks', 'update', get_chunks_update_benchmark(x264_ffmpeg))
+    ]
+
+
+def get_operations_per_second(function, repeat):
+    timer = timeit.Timer(function)
+    number_of_calls, _ = timer.autorange()
+    return number_of_calls / min(timer.repeat(repeat=repeat, number=number_of_calls))
+
+
+def get_bytes_allocated_per_call(function, number_of_calls):
+    # Clearing the traces before each call resets the peak, and frees of memory allocated before the call are ignored.
+    total_peak_size = 0
+    total_kept_size = 0
+
+    tracemalloc.start()
+    try:
+        for _ in range(number_of_calls):
+            tracemalloc.clear_traces()
+            function()
+            kept_size, peak_size = tracemalloc.get_traced_memory()
+            total_peak_size += peak_size
+            total_kept_size += kept_size
+    finally:
+        tracemalloc.stop()
+
+    return total_peak_size / number_of_calls, total_kept_size / number_of_calls
+
+
+def record_fixtures(input_file_path):
+    _record_fixture(Settings.FFPROBE_ARGS + [input_file_path], FFPROBE_FIXTURE)
+
+    for video_codec, fixture_name in (('libx264', X264_ENCODE_FIXTURE), ('libx265', X265_ENCODE_FIXTURE)):
+        _record_fixture(Settings.FFMPEG_INIT_ARGS + ['-t', str(RECORD_ENCODE_DURATION_IN_SECONDS),
+                                                     '-i', input_file_path,
+                                                     '-map', '0:v:0', '-map', '0:a:0?',
+                                                     '-c:v', video_codec, '-c:a', 'aac',
+                                                     '-f', 'null', '-'],
+                        fixture_name)
+
+
+def _record_fixture(args, fixture_name):
+    # Read the same way the encoder reads ffmpeg, so progress lines that end with a carriage return are split.
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+    if process.returncode:
+        raise SystemExit(' '.join(args) + ' failed:\n' + process.stdout)
+
+    with open(os.path.join(FIXTURES_DIRECTORY, fixture_name), 'w') as fixture_file:
+        fixture_file.write(process.stdout)
+
+    print('recorded ' + fixture_name)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measures the Python hot paths of Render Watch.')
+    parser.add_argument('--filter', default='', help='Only run the micro benchmarks with names that contain TEXT.',
+                        metavar='TEXT')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timing runs, the fastest one is used.')
+    parser.add_argument('--record', help='Record the fixtures from INPUT_FILE with ffprobe and ffmpeg.',
+                        metavar='INPUT_FILE')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.record:
+        record_fixtures(args.record)
+        return
+
+    print('{:<44}{:>8}{:>14}{:>12}{:>14}{:>14}'.format('hot path', 'per', 'ops/s', 'us/op', 'alloc B/op', 'kept B/op'))
+    for name, unit, function in get_micro_benchmarks():
+        if args.filter.lower() not in name.lower():
+            continue
+
+        operations_per_second = get_operations_per_second(function, args.repeat)
+        peak_size, kept_size = get_bytes_allocated_per_call(function, DEFAULT_ALLOCATION_CALLS)
+        print('{:<44}{:>8}{:>14.0f}{:>12.2f}{:>14.0f}{:>14.0f}'.format(name,
+                                                                       unit,
+                                                                       operations_per_second,
+                                                                       1000000 / operations_per_second,
+                                                                       peak_size,
+                                                                       kept_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measures how much memory the ffmpeg settings of queued tasks take, by making copies of a probed input's settings
+# the way chunks, folder children, benchmarks, and previews do.
+#
+# Run from the src directory:
+#     PYTHONPATH=. python ../benchmarks/queued_tasks_memory_benchmark.py [number_of_tasks]
+
+
+import sys
+import time
+import tracemalloc
+
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.x264 import X264
+
+
+DEFAULT_NUMBER_OF_TASKS = 10000
+
+
+def get_probed_settings():
+    video_streams = (StreamInfo(index='0', codec_name='h264', width=1920, height=1080, frame_rate='23.98',
+                                info='h264,1920x1080(23.98)'),)
+    audio_streams = tuple(StreamInfo(index=str(index), codec_name='ac3', channels='6', sample_rate='48000',
+                                     info='ac3,6 channels,48000hz')
+                          for index in range(1, 4))
+    subtitle_streams = tuple(StreamInfo(index=str(index), codec_name='hdmv_pgs_subtitle', language='eng',
+                                        info='[' + str(index) + ']eng:hdmv_pgs_subtitle')
+                             for index in range(4, 10))
+
+    ffmpeg = Settings()
+    ffmpeg.input_file = '/media/videos/input_file.mkv'
+    ffmpeg.output_directory = '/media/videos/output/'
+    ffmpeg.temp_file_name = 'input_file'
+    ffmpeg.media_info = MediaInfo(resolution='1920x1080', width=1920, height=1080, fps='23.98', duration=7200,
+                                  file_size='25.0GB', codec_video='h264', codec_audio='ac3', channels='6',
+                                  sample_rate='48000', video_streams=video_streams, audio_streams=audio_streams,
+                                  subtitle_streams=subtitle_streams)
+    ffmpeg.setup_subtitles_settings()
+    ffmpeg.video_settings = X264()
+    ffmpeg.audio_settings = Aac()
+    return ffmpeg
+
+
+def main():
+    number_of_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_TASKS
+    ffmpeg = get_probed_settings()
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+
+    queued_tasks = [ffmpeg.get_copy() for _ in range(number_of_tasks)]
+
+    elapsed_time = time.perf_counter() - start_time
+    current_size, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('queued tasks: ' + str(len(queued_tasks)))
+    print('time: {:.1f} ms'.format(elapsed_time * 1000))
+    print('retained: {:.1f} KiB ({:.0f} bytes per task)'.format(current_size / 1024, current_size / number_of_tasks))
+    print('peak: {:.1f} KiB'.format(peak_size / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measures how many row widget trees can be built per second from the glade files, the way rows used to be built
+# (Gtk.Builder.add_from_file on the whole file) and from the cached UI fragments.
+#
+# Run from the src directory:
+#     PYTHONPATH=. python ../benchmarks/row_creation_benchmark.py [number_of_rows]
+
+
+import os
+import sys
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from render_watch.helpers import ui_template_helper
+
+
+ROWS = (
+    ('inputs row', 'rows_ui.glade', ('inputs_listbox_row_box', 'active_listbox_row_box', 'completed_listbox_row_box')),
+    ('chunk row', 'chunk_ui.glade', ('chunk_listbox_row_box',)),
+    ('subtitle stream row', 'rows_ui.glade', ('subtitle_stream_row_box',)),
+    ('per codec row', 'rows_ui.glade', ('per_codec_listbox_row_box',))
+)
+DEFAULT_NUMBER_OF_ROWS = 200
+
+
+def build_from_file(glade_file_name, object_ids):
+    gtk_builder = Gtk.Builder()
+    gtk_builder.add_from_file(os.path.join(ui_template_helper.UI_DATA_DIRECTORY, glade_file_name))
+    return gtk_builder.get_object(object_ids[0])
+
+
+def build_from_fragment(glade_file_name, object_ids):
+    gtk_builder = Gtk.Builder()
+    gtk_builder.add_from_string(ui_template_helper.get_ui_fragment(glade_file_name, *object_ids))
+    return gtk_builder.get_object(object_ids[0])
+
+
+def get_rows_per_second(build_row_func, glade_file_name, object_ids, number_of_rows):
+    build_row_func(glade_file_name, object_ids)  # Warm up, so the fragment is cached before timing.
+
+    start_time = time.perf_counter()
+    for _ in range(number_of_rows):
+        build_row_func(glade_file_name, object_ids).destroy()
+    return number_of_rows / (time.perf_counter() - start_time)
+
+
+def main():
+    number_of_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_ROWS
+
+    print('{:<22}{:>14}{:>14}{:>10}'.format('row', 'before rows/s', 'after rows/s', 'speedup'))
+    for row_name, glade_file_name, object_ids in ROWS:
+        before_rows_per_second = get_rows_per_second(build_from_file, glade_file_name, object_ids, number_of_rows)
+        after_rows_per_second = get_rows_per_second(build_from_fragment, glade_file_name, object_ids, number_of_rows)
+        print('{:<22}{:>14.1f}{:>14.1f}{:>9.2f}x'.format(row_name,
+                                                        before_rows_per_second,
+                                                        after_rows_per_second,
+                                                        after_rows_per_second / before_rows_per_second))
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,8 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
+from render_watch.app_handlers.refresh_clock import RefreshClock
+from render_watch.app_handlers.row_scheduler import RowScheduler
 from render_watch.signals.active_page.add_task_signal import AddTaskSignal
 from render_watch.signals.active_page.preview_encode_signal import PreviewEncodeSignal
 from render_watch.signals.active_page.pause_all_tasks_signal import PauseAllTasksSignal
@@ -34,6 +36,8 @@ class ActivePageHandlers:
         self.application_preferences = application_preferences
         self.main_window_handlers = None
         self.completed_page_handlers = None
+        self.refresh_clock = RefreshClock(application_preferences)
+        self.row_scheduler = RowScheduler()
 
         self._setup_signals(main_window_handlers, completed_page_handlers, application_preferences)
         self._setup_widgets(gtk_builder)
@@ -58,6 +62,9 @@ class ActivePageHandlers:
         self.preview_encode_switch = gtk_builder.get_object('preview_encode_switch')
 
         self.active_list.set_header_func(self._active_list_update_header_func, None)
+        main_window = gtk_builder.get_object('main_window')
+        self.refresh_clock.watch_window(main_window)
+        main_window.connect('destroy', self._on_main_window_destroy)
 
     def __getattr__(self, signal_name):
         """
@@ -84,18 +91,36 @@ class ActivePageHandlers:
 
                 active_page_listbox_row.set_header(active_page_listbox_row_header)
 
+    def _on_main_window_destroy(self, main_window):  # Unused parameters needed for this signal
+        self.row_scheduler.shutdown()
+
     def get_rows(self):
         return self.active_list.get_children()
 
     def is_live_thumbnails_enabled(self):
         return self.preview_encode_switch.get_active()
 
+    def get_output_file_paths(self):
+        output_file_paths = set()
+
+        for active_row in self.get_rows():
+            ffmpeg = active_row.ffmpeg
+            output_file_paths.add(ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container)
+
+        return output_file_paths
+
     def add_row(self, active_row):
-        self.active_list.add(active_row)
-        active_row.show_all()
-        active_row.hide_chunks_menubutton()
+        self.add_rows([active_row])
+
+    def add_rows(self, active_rows):
+        for active_row in active_rows:
+            self.active_list.add(active_row)
+            active_row.show_all()
+            active_row.hide_chunks_menubutton()
+            self.refresh_clock.add_row(active_row)
 
     def remove_row(self, active_row):
+        self.refresh_clock.remove_row(active_row)
         self.active_list.remove(active_row)
 
     def set_page_options_state(self, is_state_enabled):
@@ -17,12 +17,11 @@
 
 
 import threading
-import time
 import logging
 
 from render_watch.encoding import preview
-from render_watch.helpers import encoder_helper
-from render_watch.app_formatting import format_converter
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log, time_phase
+from render_watch.helpers import encoder_helper, task_progress_helper
 from render_watch.signals.active_row.pause_task_signal import PauseTaskSignal
 from render_watch.signals.active_row.resume_task_signal import ResumeTaskSignal
 from render_watch.signals.active_row.stop_task_signal import StopTaskSignal
@@ -34,6 +33,9 @@ class ActiveRow(Gtk.ListBoxRow):
     Handles the functionality for an individual active task on the active page.
     """
 
+    PROC_TIMER_INTERVAL = 1
+    NAME_CHANGER_INTERVAL = 5
+
     def __init__(self,
                  ffmpeg,
                  input_information_popover,
@@ -41,13 +43,15 @@ class ActiveRow(Gtk.ListBoxRow):
                  preview_thumbnail_file_path,
                  active_page_handlers,
                  application_preferences,
-                 live_thumbnail_enabled=True):
+                 live_thumbnail_enabled=True,
+                 job_store=None):
         Gtk.ListBoxRow.__init__(self)
         self._ffmpeg = ffmpeg
         self._folder_path = None
         self.application_preferences = application_preferences
         self.chunk_row_list = []
         self.audio_chunk_row = None
+        self.is_chunk = False
         self.watch_folder = None
         self.input_information_popover = input_information_popover
         self.preview_thumbnail_file_path = preview_thumbnail_file_path
@@ -61,6 +65,8 @@ class ActiveRow(Gtk.ListBoxRow):
         self.video_chunks_done = False
         self.audio_chunk_done = False
         self.live_thumbnail = live_thumbnail_enabled
+        self.job_store = job_store
+        self.job_id = None
         self.task_information = {
             'progress': 0.0,
             'speed': 0.0,
@@ -70,10 +76,12 @@ class ActiveRow(Gtk.ListBoxRow):
             'current_time': 0,
             'total_time': 0
         }
-        self.proc_timer_thread = threading.Thread(target=self._start_proc_timer, args=(), daemon=True)
-        self.name_changer_timer_thread = threading.Thread(target=self._start_name_changer_timer, args=(), daemon=True)
         self.task_threading_event = threading.Event()
         self._thread_lock = threading.Lock()
+        self._timers_lock = threading.Lock()
+        self._is_timers_scheduled = False
+        self._thumbnail_future = None
+        self._applied_labels_snapshot = {}
 
         self._setup_signals()
         self._setup_widgets(gtk_builder)
@@ -108,6 +116,14 @@ class ActiveRow(Gtk.ListBoxRow):
         self._setup_listbox_row()
         self.add(self.active_listbox_row_box)
 
+        self._label_setters = {
+            'progress': self.active_listbox_row_progressbar.set_fraction,
+            'speed': self.active_listbox_row_speed_value_label.set_text,
+            'bitrate': self.active_listbox_row_bitrate_value_label.set_text,
+            'filesize': self.active_listbox_row_file_size_value_label.set_text,
+            'time': self.active_listbox_row_encode_time_value_label.set_text
+        }
+
         self.active_listbox_row_pause_button.connect('clicked', self.pause_signal.on_pause_button_clicked)
         self.active_listbox_row_start_button.connect('clicked', self.start_signal.on_start_button_clicked)
         self.active_listbox_row_stop_button.connect('clicked', self.stop_signal.on_stop_button_clicked)
@@ -122,36 +138,23 @@ class ActiveRow(Gtk.ListBoxRow):
         else:
             self.thumbnail.set_from_file(self.preview_thumbnail_file_path)
 
-        self._update_labels()
         self.task_threading_event.set()
 
-    def _update_labels(self):
-        with self._thread_lock:
-            GLib.idle_add(self._update_progress)
-            GLib.idle_add(self._update_speed_value_text)
-            GLib.idle_add(self._update_bitrate_value_text)
-            GLib.idle_add(self._update_filesize_value_text)
-            GLib.idle_add(self._update_time_value_text)
-
-    def _update_progress(self):
-        progress = self.task_information['progress']
-        self.active_listbox_row_progressbar.set_fraction(progress)
-
-    def _update_speed_value_text(self):
-        speed = self.task_information['speed']
-        self.active_listbox_row_speed_value_label.set_text(str(speed) + 'x')
-
-    def _update_bitrate_value_text(self):
-        bitrate = self.task_information['bitrate']
-        self.active_listbox_row_bitrate_value_label.set_text(str(bitrate) + 'kbps')
+    def refresh_widgets(self):
+        """
+        Applies this task's latest progress to its widgets, only setting the values that changed since the last refresh.
+        Called from the main loop by the active page's refresh clock.
+        """
+        if self.chunk_row_list:
+            self._chunk_update_task_information()
+            self._chunk_refresh_widgets()
 
-    def _update_filesize_value_text(self):
-        filesize = self.task_information['filesize']
-        self.active_listbox_row_file_size_value_label.set_text(format_converter.get_file_size_from_bytes(filesize))
+        labels_snapshot = task_progress_helper.get_task_labels_snapshot(self.task_information)
+        changed_labels = task_progress_helper.get_changed_labels(labels_snapshot, self._applied_labels_snapshot)
+        for label_name, label_value in changed_labels.items():
+            self._label_setters[label_name](label_value)
 
-    def _update_time_value_text(self):
-        time_value = self.task_information['time']
-        self.active_listbox_row_encode_time_value_label.set_text(format_converter.get_timecode_from_seconds(time_value))
+        self._applied_labels_snapshot = labels_snapshot
 
     def update_thumbnail(self):
         with self._thread_lock:
@@ -204,34 +207,61 @@ class ActiveRow(Gtk.ListBoxRow):
         self.started = True
         self.active_listbox_row_progressbar.set_sensitive(True)
         self.active_listbox_row_task_state_stack.set_sensitive(True)
-        self._setup_proc_timer_thread()
-        self._setup_name_changer_timer_thread()
-
-    def _setup_proc_timer_thread(self):
-        if not self.proc_timer_thread.is_alive():
-            self.proc_timer_thread = threading.Thread(target=self._start_proc_timer, args=(), daemon=True)
-            self.proc_timer_thread.start()
-
-    def _setup_name_changer_timer_thread(self):
-        if (self.ffmpeg.folder_state or self.watch_folder is not None) \
-                and not self.name_changer_timer_thread.is_alive():
-            self.name_changer_timer_thread = threading.Thread(target=self._start_name_changer_timer,
-                                                              args=(),
-                                                              daemon=True)
-            self.name_changer_timer_thread.start()
-
-    def _start_name_changer_timer(self):
-        while not (self.finished or self.stopped or self.idle):
-            GLib.idle_add(self.active_listbox_row_file_name_stack.set_visible_child, self.active_listbox_row_folder_file_name_label)
-            time.sleep(5)
-            GLib.idle_add(self.active_listbox_row_file_name_stack.set_visible_child, self.active_listbox_row_file_name_label)
-            time.sleep(5)
+        self._schedule_timers()
+
+    def _schedule_timers(self):
+        with self._timers_lock:
+            if self._is_timers_scheduled:
+                return
+
+            self._is_timers_scheduled = True
+
+        self.row_scheduler.schedule_periodic(self, self.PROC_TIMER_INTERVAL, self._on_proc_timer_tick)
+
+        if self.ffmpeg.folder_state or self.watch_folder is not None:
+            GLib.idle_add(self.active_listbox_row_file_name_stack.set_visible_child,
+                          self.active_listbox_row_folder_file_name_label)
+            self.row_scheduler.schedule_periodic(self, self.NAME_CHANGER_INTERVAL, self._on_name_changer_tick)
+
+        self._run_thumbnail_update()
+
+    def _cancel_timers(self):
+        with self._timers_lock:
+            self._is_timers_scheduled = False
+
+        self.row_scheduler.cancel_jobs(self)
+
+    def _on_proc_timer_tick(self):
+        if not self.paused:
+            self.proc_time += 1
+            self._run_thumbnail_update()
+
+            if self.job_id is not None:
+                self.job_store.set_job_progress(self.job_id, self.progress)
+
+        return True
+
+    def _on_name_changer_tick(self):
+        file_name_stack = self.active_listbox_row_file_name_stack
+
+        if file_name_stack.get_visible_child() is self.active_listbox_row_folder_file_name_label:
+            file_name_stack.set_visible_child(self.active_listbox_row_file_name_label)
+        else:
+            file_name_stack.set_visible_child(self.active_listbox_row_folder_file_name_label)
+
+        return True
+
+    def _run_thumbnail_update(self):
+        if self._thumbnail_future is None or self._thumbnail_future.done():
+            self._thumbnail_future = self.row_scheduler.run_in_background(self.update_thumbnail)
 
     def set_idle_state(self):
         """
         Sets this task's widgets to the encode idle state.
         """
         self.idle = True
+        self.progress = 0.0
+        self._cancel_timers()
 
         self.active_listbox_row_progressbar.set_fraction(0.0)
         self.active_listbox_row_progressbar.set_sensitive(False)
@@ -241,28 +271,27 @@ class ActiveRow(Gtk.ListBoxRow):
         """
         Sets this task's widgets to the encode finished state.
         """
-        threading.Thread(target=self._finish_and_remove_active_listbox_row, args=()).start()
-
-    def _finish_and_remove_active_listbox_row(self):
         self.finished = True
+        self._cancel_timers()
+        self._popdown_popovers()
 
-        GLib.idle_add(self._popdown_popovers)
+        if not self.stopped:  # Needed because stop button already removes this from active page listbox
+            self._remove_job()
+            self.active_page_handlers.remove_row(self)
 
-        self._wait_for_info_threads()
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            job_timing_log.write_job(self)
 
-        if not self.stopped:  # Needed because stop button already removes this from active page listbox
-            GLib.idle_add(self.active_page_handlers.remove_row, self)
+    def _remove_job(self):
+        if self.job_id is not None:
+            self.job_store.remove_job(self.job_id)
+            self.job_id = None
 
     def _popdown_popovers(self):
         self.input_information_popover.popdown()
         self.chunks_popover.popdown()
 
-    def _wait_for_info_threads(self):
-        if self.proc_timer_thread is not None and self.proc_timer_thread.is_alive():
-            self.proc_timer_thread.join()
-        if self.name_changer_timer_thread is not None and self.name_changer_timer_thread.is_alive():
-            self.name_changer_timer_thread.join()
-
     def chunk_set_start_state(self):
         """
         Sets this chunk row's widgets to the encoder start state.
@@ -280,123 +309,34 @@ class ActiveRow(Gtk.ListBoxRow):
                 if not chunk_row.finished or self.stopped:
                     return
             if not self.video_chunks_done:
-                encoder_helper.concatenate_video_chunks(self.chunk_row_list, self.ffmpeg, self.application_preferences)
+                with time_phase(self, JobTiming.CONCAT_PHASE):
+                    encoder_helper.concatenate_video_chunks(self.chunk_row_list,
+                                                            self.ffmpeg,
+                                                            self.application_preferences)
                 self.video_chunks_done = True
 
             if not self.audio_chunk_row.finished or self.stopped:
                 return
             if not self.audio_chunk_done:
-                encoder_helper.mux_audio_chunk(self.audio_chunk_row, self.ffmpeg, self.application_preferences)
+                with time_phase(self, JobTiming.MUX_PHASE):
+                    encoder_helper.mux_audio_chunk(self.audio_chunk_row, self.ffmpeg, self.application_preferences)
                 self.audio_chunk_done = True
 
             GLib.idle_add(self.set_finished_state)
 
-    def _chunk_update_progress(self):
-        with self._thread_lock:
-            total_progress = 0.0
-
-            for chunk_row in self.chunk_row_list:
-                total_progress += chunk_row.progress
+    def _chunk_update_task_information(self):
+        self.bitrate = task_progress_helper.get_chunks_bitrate(self.chunk_row_list)
+        self.speed = task_progress_helper.get_chunks_speed(self.chunk_row_list)
+        self.file_size = task_progress_helper.get_chunks_file_size(self.chunk_row_list)
+        self.time = task_progress_helper.get_chunks_time_estimate(self.chunk_row_list)
+        self.current_time = task_progress_helper.get_chunks_current_time(self.chunk_row_list)
+        self.progress = task_progress_helper.get_chunks_progress(self.chunk_row_list)
 
-            total_progress /= len(self.chunk_row_list)
-            self.progress = total_progress
-
-    def _chunk_update_speed(self):
-        with self._thread_lock:
-            total_speed = 0.0
-
-            for chunk_row in self.chunk_row_list:
-                total_speed += chunk_row.speed
-
-            self.speed = round(total_speed, 2)
-
-    def _chunk_update_bitrate(self):
-        with self._thread_lock:
-            total_bitrate = 0.0
-
-            for chunk_row in self.chunk_row_list:
-                total_bitrate += chunk_row.bitrate
-
-            total_bitrate /= len(self.chunk_row_list)
-            self.bitrate = round(total_bitrate, 1)
-
-    def _chunk_update_file_size(self):
-        with self._thread_lock:
-            total_file_size = 0.0
-
-            for chunk_row in self.chunk_row_list:
-                total_file_size += chunk_row.file_size
-
-            self.file_size = total_file_size
-
-    def _chunk_update_time(self):
-        with self._thread_lock:
-            longest_time_estimate = 0
-            number_of_chunks_idle = 0
-
-            for chunk_row in self.chunk_row_list:
-                if chunk_row.time == 0:
-                    number_of_chunks_idle += 1
-                elif chunk_row.time > longest_time_estimate:
-                    longest_time_estimate = chunk_row.time
-
-            time_estimate = longest_time_estimate * (number_of_chunks_idle + 1)
-            self.time = time_estimate
-
-    def _chunk_update_current_time(self):
-        with self._thread_lock:
-            total_time = 0
-
-            for chunk_row in self.chunk_row_list:
-                if chunk_row.finished and not chunk_row.stopped:
-                    total_time += chunk_row.ffmpeg.trim_settings.trim_duration
-                else:
-                    total_time += chunk_row.current_time
-
-            self.current_time = total_time
-
-    def _chunk_update_labels(self):
+    def _chunk_refresh_widgets(self):
         for chunk_row in self.chunk_row_list:
-            GLib.idle_add(chunk_row.update_labels)
+            chunk_row.refresh_widgets()
         if self.audio_chunk_row is not None:
-            GLib.idle_add(self.audio_chunk_row.update_labels)
-        self._chunk_update_bitrate()
-        self._chunk_update_speed()
-        self._chunk_update_file_size()
-        self._chunk_update_time()
-        self._chunk_update_current_time()
-        self._chunk_update_progress()
-        self._update_labels()
-
-    def _start_proc_timer(self):
-        update_row_thumbnail_thread = threading.Thread(target=self.update_thumbnail, args=(), daemon=True)
-        update_row_thumbnail_thread.start()
-
-        self._update_thumbnail_and_labels_until_finished(update_row_thumbnail_thread)
-        self._update_active_row_labels()
-        self._wait_for_update_row_thumbnail_thread(update_row_thumbnail_thread)
-
-    def _update_thumbnail_and_labels_until_finished(self, update_row_thumbnail_thread):
-        while not (self.finished or self.stopped or self.idle):
-            if self.paused:
-                self.task_threading_event.wait()
-
-            self._update_active_row_labels()
-            self._re_run_update_row_thumbnail_thread(update_row_thumbnail_thread)
-
-            time.sleep(1)
-            self.proc_time += 1
-
-    def _update_active_row_labels(self):
-        if self.chunk_row_list:
-            self._chunk_update_labels()
-        else:
-            self._update_labels()
-
-    def _re_run_update_row_thumbnail_thread(self, update_row_thumbnail_thread):
-        if not update_row_thumbnail_thread.is_alive():
-            update_row_thumbnail_thread = threading.Thread(target=self.update_thumbnail, args=(), daemon=True)
-            update_row_thumbnail_thread.start()
+            self.audio_chunk_row.refresh_widgets()
 
     def set_encoding_state(self):
         """
@@ -417,6 +357,7 @@ class ActiveRow(Gtk.ListBoxRow):
         Stops and removes this task from it's parent Gtk.Listbox.
         """
         self.stopped = True
+        self._remove_job()
 
         if self.watch_folder is not None:
             self.watch_folder.stop_and_remove_instance(self._folder_path)
@@ -424,7 +365,7 @@ class ActiveRow(Gtk.ListBoxRow):
         GLib.idle_add(self.start_signal.on_start_button_clicked, None)
         GLib.idle_add(self._popdown_popovers)
 
-        self._wait_for_info_threads()
+        self._cancel_timers()
 
         GLib.idle_add(self.active_page_handlers.remove_row, self)
 
@@ -434,11 +375,6 @@ class ActiveRow(Gtk.ListBoxRow):
     def signal_start_button(self):
         self.start_signal.on_start_button_clicked(self.active_listbox_row_start_button)
 
-    @staticmethod
-    def _wait_for_update_row_thumbnail_thread(update_row_thumbnail_thread):
-        if update_row_thumbnail_thread.is_alive():
-            update_row_thumbnail_thread.join()
-
     @property
     def ffmpeg(self):
         return self._ffmpeg
@@ -448,6 +384,10 @@ class ActiveRow(Gtk.ListBoxRow):
         self._ffmpeg = ffmpeg
         GLib.idle_add(self.active_listbox_row_folder_file_name_label.set_text, ffmpeg.filename)
 
+    @property
+    def row_scheduler(self):
+        return self.active_page_handlers.row_scheduler
+
     @property
     def thumbnail(self):
         return self.active_listbox_row_preview_icon
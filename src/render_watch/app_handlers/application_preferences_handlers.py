@@ -16,9 +16,6 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import os
-
-
 from render_watch.app_handlers.temporary_files_row import TemporaryFilesRow
 from render_watch.app_handlers.clear_temporary_files_row import ClearTemporaryFilesRow
 from render_watch.app_handlers.dark_mode_row import DarkModeRow
@@ -29,10 +26,14 @@ from render_watch.app_handlers.per_codec_vp9_row import PerCodecVp9Row
 from render_watch.app_handlers.concurrent_nvenc_tasks_row import ConcurrentNvencTasksRow
 from render_watch.app_handlers.simultaneous_nvenc_tasks_row import SimultaneousNvencTasksRow
 from render_watch.app_handlers.overwrite_outputs_row import OverwriteOutputsRow
+from render_watch.app_handlers.resumable_encodes_row import ResumableEncodesRow
 from render_watch.app_handlers.run_watch_folders_concurrently_row import RunWatchFoldersConcurrentlyRow
 from render_watch.app_handlers.wait_for_tasks_row import WaitForTasksRow
 from render_watch.app_handlers.move_watch_folder_tasks_to_done_row import MoveWatchFolderTasksToDoneRow
+from render_watch.app_handlers.tuning_profile_row import TuningProfileRow
+from render_watch.encoding.tuning_profile import TuningProfile
 from render_watch.startup.application_preferences import ApplicationPreferences
+from render_watch.helpers import ui_template_helper
 from render_watch.signals.application_preferences.per_codec_parallel_tasks_signal import PerCodecParallelTasksSignal
 from render_watch.startup import Gtk
 
@@ -50,6 +51,8 @@ class ApplicationPreferencesHandlers:
         self.original_per_codec_x264_value = application_preferences.per_codec_parallel_tasks['x264']
         self.original_per_codec_x265_value = application_preferences.per_codec_parallel_tasks['x265']
         self.original_per_codec_vp9_value = application_preferences.per_codec_parallel_tasks['vp9']
+        self.original_tuning_profile_enabled = application_preferences.is_tuning_profile_enabled
+        self.host_tuning_profile = TuningProfile.load(TuningProfile.get_host_profile_path())
 
         self._setup_signals(application_preferences)
         self._setup_widgets(gtk_builder, gtk_settings, main_window_handlers, application_preferences)
@@ -62,11 +65,8 @@ class ApplicationPreferencesHandlers:
         ]
 
     def _setup_widgets(self, gtk_builder, gtk_settings, main_window_handlers, application_preferences):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        rows_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/rows_ui.glade')
-
         options_rows_gtk_builder = Gtk.Builder()
-        options_rows_gtk_builder.add_from_file(rows_ui_file_path)
+        options_rows_gtk_builder.add_from_string(ui_template_helper.get_ui_definition('rows_ui.glade'))
 
         self.temporary_files_list = gtk_builder.get_object('temporary_files_list')
         self.temporary_files_restart_stack = options_rows_gtk_builder.get_object('temporary_files_restart_stack')
@@ -120,6 +120,7 @@ class ApplicationPreferencesHandlers:
                                             application_preferences)
         self._add_encoder_page_options_rows(options_rows_gtk_builder, application_preferences)
         self._add_watch_folder_page_options_rows(options_rows_gtk_builder, application_preferences)
+        self.update_tuning_profile_state(application_preferences.is_tuning_profile_enabled)
 
     # Unused parameters needed for this function
     @staticmethod
@@ -163,7 +164,11 @@ class ApplicationPreferencesHandlers:
     def _add_concurrent_tasks_options_rows(self,
                                            gtk_builder, application_preferences):
         self.parallel_tasks_all_codecs_row = ParallelTasksAllCodecsRow(gtk_builder, self, application_preferences)
+        self.parallel_tasks_tuning_profile_row = TuningProfileRow(self,
+                                                                  application_preferences,
+                                                                  self.host_tuning_profile)
 
+        self.concurrent_tasks_list.add(self.parallel_tasks_tuning_profile_row)
         self.concurrent_tasks_list.add(self.parallel_tasks_all_codecs_row)
         self.concurrent_tasks_list.show_all()
 
@@ -171,7 +176,9 @@ class ApplicationPreferencesHandlers:
         self.per_codec_x264_row = PerCodecX264Row(self, application_preferences)
         self.per_codec_x265_row = PerCodecX265Row(self, application_preferences)
         self.per_codec_vp9_row = PerCodecVp9Row(self, application_preferences)
+        self.per_codec_tuning_profile_row = TuningProfileRow(self, application_preferences, self.host_tuning_profile)
 
+        self.per_codec_list.add(self.per_codec_tuning_profile_row)
         self.per_codec_list.add(self.per_codec_x264_row)
         self.per_codec_list.add(self.per_codec_x265_row)
         self.per_codec_list.add(self.per_codec_vp9_row)
@@ -187,8 +194,10 @@ class ApplicationPreferencesHandlers:
 
     def _add_overwrite_outputs_options_rows(self, gtk_builder, application_preferences):
         self.overwrite_outputs_row = OverwriteOutputsRow(gtk_builder, application_preferences)
+        self.resumable_encodes_row = ResumableEncodesRow(gtk_builder, application_preferences)
 
         self.encoder_outputs_list.add(self.overwrite_outputs_row)
+        self.encoder_outputs_list.add(self.resumable_encodes_row)
         self.encoder_outputs_list.show_all()
 
     def _add_watch_folder_page_options_rows(self, gtk_builder, application_preferences):
@@ -224,7 +233,8 @@ class ApplicationPreferencesHandlers:
         """
         Shows the "restart required" icon when the concurrent tasks settings are changed.
         """
-        if self.concurrent_tasks_combobox.get_active() == self.original_concurrent_tasks_index:
+        if self.concurrent_tasks_combobox.get_active() == self.original_concurrent_tasks_index \
+                and not self._has_tuning_profile_enabled_changed():
             self.concurrent_tasks_restart_stack.set_visible_child(self.concurrent_tasks_restart_blank_label)
         else:
             self.concurrent_tasks_restart_stack.set_visible_child(self.concurrent_tasks_restart_icon)
@@ -259,7 +269,8 @@ class ApplicationPreferencesHandlers:
         """
         if self._has_per_codec_x264_value_changed() \
                 or self._has_per_codec_x265_value_changed() \
-                or self._has_per_codec_vp9_value_changed():
+                or self._has_per_codec_vp9_value_changed() \
+                or self._has_tuning_profile_enabled_changed():
             self.per_codec_warning_stack.set_visible_child(self.per_codec_restart_icon)
         else:
             self.per_codec_warning_stack.set_visible_child(self.per_codec_restart_blank_label)
@@ -285,6 +296,32 @@ class ApplicationPreferencesHandlers:
 
         return per_codec_vp9_index != original_per_codec_vp9_index
 
+    def _has_tuning_profile_enabled_changed(self):
+        return self.parallel_tasks_tuning_profile_row.tuning_profile_switch.get_active() \
+               != self.original_tuning_profile_enabled
+
+    def update_tuning_profile_state(self, is_tuning_profile_enabled):
+        """
+        Matches both Use Tuned Values switches and makes the tasks options that the host's tuning profile replaces
+        insensitive while it's used.
+
+        :param is_tuning_profile_enabled: Whether the Use Tuned Values option is on.
+        """
+        self.parallel_tasks_tuning_profile_row.tuning_profile_switch.set_active(is_tuning_profile_enabled)
+        self.per_codec_tuning_profile_row.tuning_profile_switch.set_active(is_tuning_profile_enabled)
+
+        tuning_profile = self.host_tuning_profile if is_tuning_profile_enabled else None
+        self.concurrent_tasks_combobox.set_sensitive(tuning_profile is None or tuning_profile.parallel_tasks is None)
+        self.per_codec_x264_row.per_codec_combobox.set_sensitive(
+            tuning_profile is None or 'x264' not in tuning_profile.per_codec_parallel_tasks)
+        self.per_codec_x265_row.per_codec_combobox.set_sensitive(
+            tuning_profile is None or 'x265' not in tuning_profile.per_codec_parallel_tasks)
+        self.per_codec_vp9_row.per_codec_combobox.set_sensitive(
+            tuning_profile is None or 'vp9' not in tuning_profile.per_codec_parallel_tasks)
+
+        self.update_concurrent_tasks_restart_state()
+        self.update_per_codec_value_restart_state()
+
     def update_nvenc_concurrent_tasks_restart_state(self, concurrent_nvenc_tasks_text):
         """
         Shows the restart required image when the NVENC concurrent settings are changed.
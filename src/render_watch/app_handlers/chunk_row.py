@@ -16,10 +16,8 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import threading
-import os
-
 from render_watch.app_formatting import format_converter
+from render_watch.helpers import ui_template_helper
 from render_watch.startup import Gtk
 
 
@@ -33,6 +31,7 @@ class ChunkRow(Gtk.ListBoxRow):
         self.ffmpeg = ffmpeg_chunk
         self.chunk_number = chunk_number
         self.active_row = active_row
+        self.is_chunk = True
         self.finished = False
         self.task_information = {
             'progress': 0.0,
@@ -42,15 +41,13 @@ class ChunkRow(Gtk.ListBoxRow):
             'time': 0,
             'current_time': 0,
         }
+        self._applied_progress = None
 
         self._setup_widgets()
 
     def _setup_widgets(self):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        chunk_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/chunk_ui.glade')
-
         gtk_builder = Gtk.Builder()
-        gtk_builder.add_from_file(chunk_ui_file_path)
+        gtk_builder.add_from_string(ui_template_helper.get_ui_fragment('chunk_ui.glade', 'chunk_listbox_row_box'))
 
         self.chunk_listbox_row_box = gtk_builder.get_object('chunk_listbox_row_box')
         self.chunk_identifier_label = gtk_builder.get_object('chunk_identifier_label')
@@ -91,13 +88,17 @@ class ChunkRow(Gtk.ListBoxRow):
     def set_finished_state(self):
         self.finished = True
 
-        threading.Thread(target=self.active_row.chunk_set_finished_state, args=()).start()
+        self.active_row.row_scheduler.run_in_background(self.active_row.chunk_set_finished_state)
 
     def update_thumbnail(self):
         self.active_row.update_thumbnail()
 
-    def update_labels(self):  # Needs this name for active row / chunk row interoperability
-        self.chunk_progressbar.set_fraction(self.progress)
+    def refresh_widgets(self):  # Needs this name for active row / chunk row interoperability
+        progress = self.progress
+
+        if progress != self._applied_progress:
+            self.chunk_progressbar.set_fraction(progress)
+            self._applied_progress = progress
 
     @property
     def paused(self):
@@ -16,12 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import threading
-
-from render_watch.encoding import preview
+from render_watch.encoding.thumbnail_service import get_thumbnail_service
 from render_watch.app_formatting import format_converter
 from render_watch.signals.completed_row.remove_signal import RemoveSignal
-from render_watch.startup import Gtk, GLib
+from render_watch.startup import Gtk
 
 
 class CompletedRow(Gtk.ListBoxRow):
@@ -79,7 +77,10 @@ class CompletedRow(Gtk.ListBoxRow):
         if ffmpeg.folder_state:
             self.completed_listbox_row_preview_icon.set_from_icon_name('folder-symbolic', 96)
         else:
-            threading.Thread(target=self._start_update_thumbnail_thread, args=(ffmpeg,)).start()
+            get_thumbnail_service().request_thumbnail(ffmpeg,
+                                                      self.application_preferences,
+                                                      self._set_thumbnail,
+                                                      is_visible=False)
 
     def _setup_labels(self, output_file_path, total_task_duration):
         self.completed_listbox_row_file_name_label.set_text(self.active_listbox_row.file_name)
@@ -94,9 +95,9 @@ class CompletedRow(Gtk.ListBoxRow):
             self.active_listbox_row.active_listbox_row_file_size_value_label.get_text())
         self.completed_listbox_row_encode_time_value_label.set_text(total_task_duration)
 
-    def _start_update_thumbnail_thread(self, ffmpeg):
-        thumbnail_file_path = preview.generate_crop_preview_file(ffmpeg, self.application_preferences, 96)
-        GLib.idle_add(self.completed_listbox_row_preview_icon.set_from_file, thumbnail_file_path)
+    def _set_thumbnail(self, thumbnail_file_path):
+        if thumbnail_file_path:
+            self.completed_listbox_row_preview_icon.set_from_file(thumbnail_file_path)
 
     def signal_remove_button(self):
         self.remove_signal.on_remove_button_clicked(self.completed_listbox_row_remove_button)
@@ -46,6 +46,7 @@ class InputsPageHandlers:
                                                                  main_window_handlers,
                                                                  application_preferences)
         self.preview_page_handlers = preview_page_handlers
+        self._rows_by_input_file = {}
 
         self._setup_signals(main_window_handlers,
                             active_page_handlers,
@@ -224,12 +225,27 @@ class InputsPageHandlers:
     def is_auto_crop_selected(self):
         return self.auto_crop_inputs_checkbutton.get_active()
 
+    def is_input_file_imported(self, input_file):
+        return input_file in self._rows_by_input_file
+
     def add_row(self, inputs_page_listbox_row):
-        self.inputs_list.add(inputs_page_listbox_row)
+        self.add_rows([inputs_page_listbox_row])
+
+    def add_rows(self, inputs_page_listbox_rows):
+        for inputs_page_listbox_row in inputs_page_listbox_rows:
+            self._rows_by_input_file[inputs_page_listbox_row.ffmpeg.input_file] = inputs_page_listbox_row
+            self.inputs_list.add(inputs_page_listbox_row)
+
         self.start_all_button.set_sensitive(True)
         self.remove_all_button.set_sensitive(True)
 
     def remove_row(self, inputs_page_listbox_row):
+        input_file = inputs_page_listbox_row.ffmpeg.input_file
+
+        if self._rows_by_input_file.get(input_file) is inputs_page_listbox_row:
+            del self._rows_by_input_file[input_file]
+
+        inputs_page_listbox_row.cancel_preview_thumbnail()
         self.inputs_list.remove(inputs_page_listbox_row)
 
     def remove_all_rows(self):
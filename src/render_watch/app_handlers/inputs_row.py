@@ -17,11 +17,10 @@
 
 
 import threading
-import os
 
 from render_watch.ffmpeg import general_settings
-from render_watch.encoding import preview
-from render_watch.helpers import encoder_helper
+from render_watch.encoding.thumbnail_service import get_thumbnail_service
+from render_watch.helpers import encoder_helper, directory_helper, ui_template_helper
 from render_watch.app_formatting import format_converter
 from render_watch.app_handlers.active_row import ActiveRow
 from render_watch.app_handlers.chunk_row import ChunkRow
@@ -37,8 +36,13 @@ from render_watch.startup import Gtk, GLib
 class InputsRow(Gtk.ListBoxRow):
     """
     Handles the functionality for an individual input task on the inputs page.
+
+    Rows start out as a lightweight placeholder and only build their widgets and thumbnail the first time they're
+    drawn, so importing thousands of inputs doesn't build thousands of widget trees that are never shown.
     """
 
+    PLACEHOLDER_HEIGHT = 106
+
     def __init__(self,
                  ffmpeg,
                  inputs_page_handlers,
@@ -53,9 +57,12 @@ class InputsRow(Gtk.ListBoxRow):
         self.active_page_handlers = active_page_handlers
         self.encoder_queue = encoder_queue
         self.main_window_handlers = main_window_handlers
+        self._is_widgets_setup = False
+        self._thumbnail_request = None
 
         self._setup_signals(inputs_page_handlers)
-        self._setup_widgets()
+        self._setup_default_streams()
+        self._setup_placeholder()
 
     def _setup_signals(self, inputs_page_handlers):
         self.audio_stream_signal = AudioStreamSignal(self)
@@ -65,12 +72,54 @@ class InputsRow(Gtk.ListBoxRow):
         self.start_signal = StartSignal(self)
         self.video_stream_signal = VideoStreamSignal(self)
 
+    def _setup_default_streams(self):
+        # Settings restored from the job store already have their streams chosen.
+        if self.ffmpeg.folder_state or self.ffmpeg.video_stream_index is not None:
+            return
+
+        VideoStreamSignal.set_video_stream(self.ffmpeg, 0)
+
+        if self.ffmpeg.media_info.audio_streams:
+            AudioStreamSignal.set_audio_stream(self.ffmpeg, 0)
+
+    def _setup_placeholder(self):
+        self.placeholder_label = Gtk.Label(label=self.ffmpeg.filename, xalign=0)
+        self.placeholder_label.set_margin_start(15)
+        self.placeholder_label.set_margin_end(15)
+        self.set_size_request(-1, self.PLACEHOLDER_HEIGHT)
+        self.add(self.placeholder_label)
+
+        self._placeholder_draw_handler_id = self.connect('draw', self._on_placeholder_draw)
+
+    # Unused parameters needed for this signal
+    def _on_placeholder_draw(self, inputs_row, cairo_context):
+        GLib.idle_add(self._setup_visible_row)
+        return False
+
+    def _setup_visible_row(self):
+        if self._is_widgets_setup:
+            return
+
+        self._setup_widgets()
+
+        if not self.ffmpeg.folder_state:
+            self.setup_preview_thumbnail()
+
     def _setup_widgets(self):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        rows_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/rows_ui.glade')
+        if self._is_widgets_setup:
+            return
+
+        self._is_widgets_setup = True
+        self.disconnect(self._placeholder_draw_handler_id)
+        self.remove(self.placeholder_label)
+        self.placeholder_label.destroy()
+        self.set_size_request(-1, -1)
 
         self.gtk_builder = Gtk.Builder()
-        self.gtk_builder.add_from_file(rows_ui_file_path)
+        self.gtk_builder.add_from_string(ui_template_helper.get_ui_fragment('rows_ui.glade',
+                                                                            'inputs_listbox_row_box',
+                                                                            'active_listbox_row_box',
+                                                                            'completed_listbox_row_box'))
 
         self.inputs_listbox_row_box = self.gtk_builder.get_object('inputs_listbox_row_box')
         self.inputs_listbox_row_preview_icon = self.gtk_builder.get_object('inputs_listbox_row_preview_icon')
@@ -124,8 +173,6 @@ class InputsRow(Gtk.ListBoxRow):
     def _setup_row_state(self):
         if self.ffmpeg.folder_state:
             self._setup_folder_state()
-        else:
-            threading.Thread(target=self.setup_preview_thumbnail, args=()).start()
 
     def _setup_folder_state(self):
         self.streams_stack.set_visible_child(self.folder_type_buttonbox)
@@ -133,10 +180,24 @@ class InputsRow(Gtk.ListBoxRow):
 
     def setup_preview_thumbnail(self):
         """
-        Generates and applies a preview thumbnail.
+        Queues a preview thumbnail on the thumbnail service and applies it once it's ready.
+        """
+        self.cancel_preview_thumbnail()
+        self._thumbnail_request = get_thumbnail_service().request_thumbnail(self.ffmpeg,
+                                                                            self.application_preferences,
+                                                                            self._set_preview_thumbnail)
+
+    def _set_preview_thumbnail(self, thumbnail_file_path):
+        if thumbnail_file_path:
+            self.inputs_listbox_row_preview_icon.set_from_file(thumbnail_file_path)
+
+    def cancel_preview_thumbnail(self):
+        """
+        Drops the row's queued preview thumbnail, if it hasn't been made yet.
         """
-        output_file = preview.generate_crop_preview_file(self.ffmpeg, self.application_preferences, preview_height=96)
-        GLib.idle_add(self.inputs_listbox_row_preview_icon.set_from_file, output_file)
+        if self._thumbnail_request is not None:
+            self._thumbnail_request.cancel()
+            self._thumbnail_request = None
 
     def _setup_streams(self):
         if self.ffmpeg.folder_state:
@@ -148,31 +209,44 @@ class InputsRow(Gtk.ListBoxRow):
     def _setup_video_stream_combobox(self):
         self.video_stream_combobox.remove_all()
 
-        for index, items in enumerate(self.ffmpeg.input_file_info['video_streams'].items()):
-            self.video_stream_combobox.append_text('[' + str(index) + ']' + items[1]['info'])
+        for index, video_stream in enumerate(self.ffmpeg.media_info.video_streams):
+            self.video_stream_combobox.append_text('[' + str(index) + ']' + video_stream.info)
 
         self.video_stream_combobox.set_entry_text_column(0)
-        self.video_stream_combobox.set_active(0)
+        self.video_stream_combobox.set_active(self._get_stream_position(self.ffmpeg.media_info.video_streams,
+                                                                        self.ffmpeg.video_stream_index))
         self.signal_video_stream_combobox()
 
     def _setup_audio_stream_combobox(self):
         self.audio_stream_combobox.remove_all()
 
-        if not self.ffmpeg.input_file_info['audio_streams']:
+        if not self.ffmpeg.media_info.audio_streams:
             self.audio_stream_combobox.set_sensitive(False)
             return
 
-        for index, items in enumerate(self.ffmpeg.input_file_info['audio_streams'].items()):
-            self.audio_stream_combobox.append_text('[' + str(index) + ']' + items[1]['info'])
+        for index, audio_stream in enumerate(self.ffmpeg.media_info.audio_streams):
+            self.audio_stream_combobox.append_text('[' + str(index) + ']' + audio_stream.info)
 
         self.audio_stream_combobox.set_entry_text_column(0)
-        self.audio_stream_combobox.set_active(0)
+        self.audio_stream_combobox.set_active(self._get_stream_position(self.ffmpeg.media_info.audio_streams,
+                                                                        self.ffmpeg.audio_stream_index))
         self.signal_audio_stream_combobox()
 
+    @staticmethod
+    def _get_stream_position(streams, stream_index):
+        for position, stream in enumerate(streams):
+            if stream.index == stream_index:
+                return position
+        return 0
+
     def setup_labels(self):
         """
         Sets up labels for task's title, input info., and info. popover labels.
+        Rows that haven't been drawn yet set up their labels when their widgets are built.
         """
+        if not self._is_widgets_setup:
+            return
+
         self.inputs_listbox_row_file_name_label.set_text(self.ffmpeg.filename)
         self._setup_info_popover()
         self._setup_inputs_row_info()
@@ -307,81 +381,72 @@ class InputsRow(Gtk.ListBoxRow):
         GLib.idle_add(self._add_task_to_active_page)
 
     def _fix_same_name_occurrences(self):
-        file_name = self.ffmpeg.filename
-        output_file_path = self.ffmpeg.output_directory + self.ffmpeg.filename + self.ffmpeg.output_container
-        counter = 0
-
-        while True:
-            if self.ffmpeg.input_file == output_file_path:
-                output_file_path = self._fix_same_output_and_input_file_paths(file_name, counter)
-            elif not self.application_preferences.is_overwrite_outputs_enabled and os.path.exists(output_file_path):
-                output_file_path = self._fix_output_file_already_exists(file_name, counter)
-            else:
-                output_file_path_found = False
-
-                for active_task in self.active_page_handlers.get_rows():
-                    task_file_name = active_task.ffmpeg.filename
-                    task_output_directory = active_task.ffmpeg.output_directory
-                    task_output_container = active_task.ffmpeg.output_container
-                    task_output_file_path = task_output_directory + task_file_name + task_output_container
-
-                    if output_file_path == task_output_file_path:
-                        self.ffmpeg.filename = file_name + '_' + str(counter)
-                        output_file_path = self.ffmpeg.output_directory \
-                                           + self.ffmpeg.filename \
-                                           + self.ffmpeg.output_container
-                        output_file_path_found = True
-                if not output_file_path_found:
-                    break
-
-            counter += 1
-
-    def _fix_same_output_and_input_file_paths(self, file_name, counter):
-        self.ffmpeg.filename = file_name + '_' + str(counter)
-        return self.ffmpeg.output_directory + self.ffmpeg.filename + self.ffmpeg.output_container
-
-    def _fix_output_file_already_exists(self, file_name, counter):
-        self.ffmpeg.filename = file_name + '_' + str(counter)
-        return self.ffmpeg.output_directory + self.ffmpeg.filename + self.ffmpeg.output_container
+        directory_helper.fix_same_name_occurences_in_batch([self.ffmpeg],
+                                                           self.active_page_handlers.get_output_file_paths(),
+                                                           self.application_preferences)
 
     def _add_task_to_active_page(self):
-        input_information_popover = self.inputs_listbox_row_task_info_button.get_popover()
-        preview_thumbnail_file_path = self.inputs_listbox_row_preview_icon.get_property('file')
-        active_page_task = ActiveRow(self.ffmpeg,
-                                     input_information_popover,
-                                     self.gtk_builder,
-                                     preview_thumbnail_file_path,
-                                     self.active_page_handlers,
-                                     self.application_preferences)
+        active_page_task = self.create_active_row()
 
         self.active_page_handlers.add_row(active_page_task)
         self.inputs_page_handlers.remove_row(self)
         threading.Thread(target=self._add_active_page_task_to_encoder, args=(active_page_task,)).start()
 
+    def create_active_row(self):
+        """
+        Returns a new active page task for this input, building the row's widgets first if it was never drawn.
+        Must be called from the main loop.
+        """
+        self._setup_widgets()
+
+        input_information_popover = self.inputs_listbox_row_task_info_button.get_popover()
+        preview_thumbnail_file_path = self.inputs_listbox_row_preview_icon.get_property('file')
+        return ActiveRow(self.ffmpeg,
+                         input_information_popover,
+                         self.gtk_builder,
+                         preview_thumbnail_file_path,
+                         self.active_page_handlers,
+                         self.application_preferences,
+                         job_store=self.encoder_queue.job_store)
+
     def _add_active_page_task_to_encoder(self, active_page_task):
-        if self.main_window_handlers.is_chunk_processing_selected() and not self.ffmpeg.folder_state:
-            self._add_active_page_task_chunks_to_encoder(active_page_task)
-        else:
-            self.encoder_queue.add_active_row(active_page_task)
+        self.encoder_queue.add_active_rows(self.get_encoder_rows(active_page_task))
+
+    def get_encoder_rows(self, active_page_task, is_chunked=None):
+        """
+        Returns the rows to send to the encoder queue for the active page task: its chunk rows when chunk processing
+        is selected, otherwise the active page task itself.
 
-    def _add_active_page_task_chunks_to_encoder(self, active_page_task):
+        :param active_page_task: Active row returned by create_active_row().
+        :param is_chunked: (Default None) Whether to split the task into chunks, None uses the selected processing.
+        """
+        if is_chunked is None:
+            is_chunked = self.main_window_handlers.is_chunk_processing_selected()
+
+        if is_chunked and not self.ffmpeg.folder_state:
+            return self._get_active_page_task_chunk_rows(active_page_task)
+        return [active_page_task]
+
+    def _get_active_page_task_chunk_rows(self, active_page_task):
         chunks = encoder_helper.get_chunks(self.ffmpeg, self.application_preferences)
 
-        if chunks:
-            for index, ffmpeg in enumerate(chunks):
-                chunk_row = ChunkRow(ffmpeg, (index + 1), active_page_task)
+        if not chunks:
+            return [active_page_task]
 
-                if (index + 1) == len(chunks):
-                    GLib.idle_add(active_page_task.add_audio_chunk_row, chunk_row)
-                else:
-                    GLib.idle_add(active_page_task.add_chunk_row, chunk_row)
+        chunk_rows = []
+        for index, ffmpeg in enumerate(chunks):
+            chunk_row = ChunkRow(ffmpeg, (index + 1), active_page_task)
 
-                self.encoder_queue.add_active_row(chunk_row)
-        else:
-            self.encoder_queue.add_active_row(active_page_task)
+            if (index + 1) == len(chunks):
+                GLib.idle_add(active_page_task.add_audio_chunk_row, chunk_row)
+            else:
+                GLib.idle_add(active_page_task.add_chunk_row, chunk_row)
+
+            chunk_rows.append(chunk_row)
+        return chunk_rows
 
     def signal_start_button(self):
-        self.start_signal.on_start_button_clicked(self.inputs_listbox_row_start_button)
+        self.start_signal.on_start_button_clicked(None)
 
     def signal_video_stream_combobox(self):
         self.video_stream_signal.on_video_stream_combobox_changed(self.video_stream_combobox)
@@ -0,0 +1,92 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+
+from render_watch.app_handlers.inputs_row import InputsRow
+from render_watch.startup import GLib
+
+
+class JobRestorer:
+    """
+    Puts the jobs that didn't finish the last time the application ran back on the active page and in the encoder queue.
+
+    Jobs that were running are started over from the beginning. Active rows are created on the main loop a few at a
+    time, the same way the inputs page's start all button does.
+    """
+
+    ACTIVE_ROWS_BATCH_SIZE = 20
+
+    def __init__(self, main_window_handlers):
+        self.main_window_handlers = main_window_handlers
+
+    def restore_jobs(self):
+        """
+        Restores the job store's unfinished jobs in a background thread.
+        """
+        threading.Thread(target=self._restore_jobs, daemon=True).start()
+
+    def _restore_jobs(self):
+        encoder_queue = self.main_window_handlers.encoder_queue
+        jobs = encoder_queue.get_unfinished_jobs()
+
+        if jobs:
+            logging.info('--- RESTORING ' + str(len(jobs)) + ' UNFINISHED JOBS ---')
+
+        for batch_index in range(0, len(jobs), self.ACTIVE_ROWS_BATCH_SIZE):
+            jobs_batch = jobs[batch_index:batch_index + self.ACTIVE_ROWS_BATCH_SIZE]
+            inputs_rows_batch, active_rows_batch = self._add_batch_to_active_page(jobs_batch)
+
+            encoder_rows = []
+            for job, inputs_row, active_row in zip(jobs_batch, inputs_rows_batch, active_rows_batch):
+                active_row.job_id = job.job_id
+                encoder_rows.extend(inputs_row.get_encoder_rows(active_row, job.is_chunked))
+
+            encoder_queue.add_active_rows(encoder_rows)
+
+    def _add_batch_to_active_page(self, jobs_batch):
+        # Waits for the main loop to create the batch, so the next batch isn't queued until the UI has caught up.
+        inputs_rows_batch = []
+        active_rows_batch = []
+        batch_added_event = threading.Event()
+
+        GLib.idle_add(self._create_active_rows_batch,
+                      jobs_batch,
+                      inputs_rows_batch,
+                      active_rows_batch,
+                      batch_added_event)
+        batch_added_event.wait()
+
+        return inputs_rows_batch, active_rows_batch
+
+    def _create_active_rows_batch(self, jobs_batch, inputs_rows_batch, active_rows_batch, batch_added_event):
+        try:
+            for job in jobs_batch:
+                inputs_row = InputsRow(job.ffmpeg,
+                                       self.main_window_handlers.inputs_page_handlers,
+                                       self.main_window_handlers.active_page_handlers,
+                                       self.main_window_handlers,
+                                       self.main_window_handlers.encoder_queue,
+                                       self.main_window_handlers.application_preferences)
+                inputs_rows_batch.append(inputs_row)
+                active_rows_batch.append(inputs_row.create_active_row())
+
+            self.main_window_handlers.active_page_handlers.add_rows(active_rows_batch)
+        finally:
+            batch_added_event.set()
@@ -21,6 +21,7 @@ from render_watch.ffmpeg.settings import GeneralSettings
 from render_watch.app_handlers.completed_page_handlers import CompletedPageHandlers
 from render_watch.app_handlers.active_page_handlers import ActivePageHandlers
 from render_watch.app_handlers.inputs_page_handlers import InputsPageHandlers
+from render_watch.app_handlers.job_restorer import JobRestorer
 from render_watch.signals.main_window.about_application_signal import AboutApplicationSignal
 from render_watch.signals.main_window.add_inputs_signal import AddInputsSignal
 from render_watch.signals.main_window.apply_settings_all_signal import ApplySettingsAllSignal
@@ -60,6 +61,9 @@ class MainWindowHandlers:
         self._setup_signals()
         self._setup_widgets(gtk_builder)
 
+        self.job_restorer = JobRestorer(self)
+        self.job_restorer.restore_jobs()
+
     def _setup_signals(self):
         self.about_application_signal = AboutApplicationSignal(self)
         self.add_input_signal = AddInputsSignal(self,
@@ -16,10 +16,9 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import os
-
 from render_watch.startup.application_preferences import ApplicationPreferences
 from render_watch.signals.application_preferences.per_codec_parallel_tasks_signal import PerCodecParallelTasksSignal
+from render_watch.helpers import ui_template_helper
 from render_watch.helpers.ui_helper import UIHelper
 from render_watch.startup import Gtk
 
@@ -39,11 +38,8 @@ class PerCodecVp9Row(Gtk.ListBoxRow):
                                                                            application_preferences)
 
     def _setup_widgets(self, application_preferences):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        rows_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/rows_ui.glade')
-
         gtk_builder = Gtk.Builder()
-        gtk_builder.add_from_file(rows_ui_file_path)
+        gtk_builder.add_from_string(ui_template_helper.get_ui_fragment('rows_ui.glade', 'per_codec_listbox_row_box'))
 
         self.per_codec_listbox_row_box = gtk_builder.get_object('per_codec_listbox_row_box')
         self.per_codec_label = gtk_builder.get_object('per_codec_label')
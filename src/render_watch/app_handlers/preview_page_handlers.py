@@ -23,6 +23,7 @@ from render_watch.encoding import preview
 from render_watch.app_formatting import format_converter
 from render_watch.signals.preview.duration_signal import DurationSignal
 from render_watch.signals.preview.live_preview_signal import LivePreviewSignal
+from render_watch.signals.preview.loop_preview_signal import LoopPreviewSignal
 from render_watch.signals.preview.viewport_size_signal import ViewportSizeSignal
 from render_watch.signals.preview.preview_location_signal import PreviewLocationSignal
 from render_watch.startup import GLib, GdkPixbuf
@@ -50,10 +51,11 @@ class PreviewPageHandlers:
 
         self.duration_signal = DurationSignal(self)
         self.live_preview_signal = LivePreviewSignal(self)
+        self.loop_preview_signal = LoopPreviewSignal(application_preferences)
         self.viewport_size_signal = ViewportSizeSignal(self)
         self.preview_location_signal = PreviewLocationSignal(self)
         self.signals_list = (
-            self.duration_signal, self.live_preview_signal,
+            self.duration_signal, self.live_preview_signal, self.loop_preview_signal,
             self.viewport_size_signal, self.preview_location_signal
         )
 
@@ -75,6 +77,9 @@ class PreviewPageHandlers:
         self.preview_viewport = gtk_builder.get_object('preview_viewport')
         self.preview_selection_box = gtk_builder.get_object('preview_selection_box')
         self.preview_wrong_codec_label = gtk_builder.get_object('preview_wrong_codec_label')
+        self.preview_loop_checkbutton = gtk_builder.get_object('preview_loop_checkbutton')
+
+        self.preview_loop_checkbutton.set_active(application_preferences.is_vid_preview_loop_enabled)
 
     def __getattr__(self, signal_name):
         """
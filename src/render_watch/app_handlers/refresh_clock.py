@@ -0,0 +1,120 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from render_watch.startup import GLib, Gdk
+
+
+class RefreshClock:
+    """
+    Refreshes the widgets of every active row from a single main loop timeout.
+
+    Rows only set the widget values that changed since the last tick.
+    The tick rate comes from the application's preferences and drops while the main window is hidden.
+    """
+
+    HIDDEN_REFRESH_INTERVAL_MILLISECONDS = 5000
+    HIDDEN_WINDOW_STATES = Gdk.WindowState.ICONIFIED | Gdk.WindowState.WITHDRAWN
+
+    def __init__(self, application_preferences):
+        self.application_preferences = application_preferences
+        self._rows = []
+        self._timeout_id = None
+        self._is_window_hidden = False
+
+    def watch_window(self, window):
+        """
+        Lowers the refresh rate while the given window is minimized or hidden.
+
+        :param window: Main window.
+        """
+        window.connect('window-state-event', self._on_window_state_event)
+
+    # Unused parameters needed for this signal
+    def _on_window_state_event(self, window, window_state_event):
+        is_window_hidden = bool(window_state_event.new_window_state & self.HIDDEN_WINDOW_STATES)
+
+        if is_window_hidden != self._is_window_hidden:
+            self._is_window_hidden = is_window_hidden
+
+            if not is_window_hidden:
+                self._refresh_rows()
+            self.update_refresh_rate()
+
+        return False
+
+    def add_row(self, row):
+        """
+        Starts refreshing the row's widgets on every tick.
+
+        :param row: Row that implements refresh_widgets().
+        """
+        if row in self._rows:
+            return
+
+        self._rows.append(row)
+        row.refresh_widgets()
+
+        if self._timeout_id is None:
+            self._start_timeout()
+
+    def remove_row(self, row):
+        """
+        Applies the row's final values to its widgets and stops refreshing it.
+
+        :param row: Row that was added with add_row().
+        """
+        if row not in self._rows:
+            return
+
+        row.refresh_widgets()
+        self._rows.remove(row)
+
+        if not self._rows:
+            self._stop_timeout()
+
+    def update_refresh_rate(self):
+        """
+        Restarts the tick with the current refresh interval.
+        """
+        if self._timeout_id is not None:
+            self._stop_timeout()
+            self._start_timeout()
+
+    def get_refresh_interval(self):
+        """
+        Returns the number of milliseconds between ticks.
+        """
+        if self._is_window_hidden:
+            return self.HIDDEN_REFRESH_INTERVAL_MILLISECONDS
+        return 1000 // self.application_preferences.ui_refresh_rate
+
+    def _start_timeout(self):
+        self._timeout_id = GLib.timeout_add(self.get_refresh_interval(), self._on_tick)
+
+    def _stop_timeout(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _on_tick(self):
+        self._refresh_rows()
+        return GLib.SOURCE_CONTINUE
+
+    def _refresh_rows(self):
+        for row in self._rows:
+            row.refresh_widgets()
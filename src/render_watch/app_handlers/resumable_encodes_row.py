@@ -0,0 +1,44 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from render_watch.signals.application_preferences.resumable_encodes_signal import ResumableEncodesSignal
+from render_watch.startup import Gtk
+
+
+class ResumableEncodesRow(Gtk.ListBoxRow):
+    """
+    Creates a Gtk.ListboxRow for the resumable encodes option in the application preferences dialog.
+    """
+
+    def __init__(self, gtk_builder, application_preferences):
+        Gtk.ListBoxRow.__init__(self)
+        self._setup_signals(application_preferences)
+        self._setup_widgets(gtk_builder, application_preferences)
+
+    def _setup_signals(self, application_preferences):
+        self.resumable_encodes_signal = ResumableEncodesSignal(application_preferences)
+
+    def _setup_widgets(self, gtk_builder, application_preferences):
+        self.resumable_encodes_row_box = gtk_builder.get_object('resumable_encodes_row_box')
+        self.resumable_encodes_switch = gtk_builder.get_object('resumable_encodes_switch')
+        self.resumable_encodes_switch.set_active(application_preferences.is_resumable_encodes_enabled)
+
+        self.add(self.resumable_encodes_row_box)
+
+        self.resumable_encodes_switch.connect('state-set',
+                                              self.resumable_encodes_signal.on_resumable_encodes_switch_state_set)
@@ -0,0 +1,132 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from render_watch.startup import GLib
+
+
+class RowScheduler:
+    """
+    Runs the periodic and background work of every active row.
+
+    Periodic jobs are main loop timeouts and blocking work runs on one shared thread pool, so rows don't need
+    threads of their own. Jobs are tracked by the row that owns them and are cancelled together.
+    """
+
+    BACKGROUND_WORKERS = 4
+
+    def __init__(self):
+        self._periodic_jobs = {}
+        self._background_futures = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.BACKGROUND_WORKERS,
+                                            thread_name_prefix='row_scheduler')
+
+    def schedule_periodic(self, owner, interval_in_seconds, callback):
+        """
+        Runs the callback on the main loop every interval until it returns False or the owner's jobs are cancelled.
+        Safe to call from any thread.
+
+        :param owner: Object the job belongs to.
+        :param interval_in_seconds: Seconds between runs.
+        :param callback: Function that returns True to keep running.
+        """
+        periodic_job = _PeriodicJob(callback)
+
+        with self._lock:
+            owner_jobs = self._periodic_jobs.setdefault(owner, [])
+            owner_jobs[:] = [job for job in owner_jobs if not job.is_cancelled]
+            owner_jobs.append(periodic_job)
+
+        GLib.timeout_add_seconds(interval_in_seconds, periodic_job.run)
+        return periodic_job
+
+    def cancel_jobs(self, owner):
+        """
+        Cancels all of the owner's periodic jobs. A cancelled job's callback doesn't run again.
+
+        :param owner: Object the jobs belong to.
+        """
+        with self._lock:
+            owner_jobs = self._periodic_jobs.pop(owner, [])
+
+        for periodic_job in owner_jobs:
+            periodic_job.is_cancelled = True
+
+    def run_in_background(self, function, *args):
+        """
+        Runs the function on the shared thread pool and returns its future.
+
+        :param function: Blocking function to run.
+        :param args: Arguments for the function.
+        """
+        future = self._executor.submit(self._run_background_job, function, args)
+
+        with self._lock:
+            self._background_futures.add(future)
+        future.add_done_callback(self._remove_background_future)
+
+        return future
+
+    def _remove_background_future(self, future):
+        with self._lock:
+            self._background_futures.discard(future)
+
+    @staticmethod
+    def _run_background_job(function, args):
+        try:
+            return function(*args)
+        except:
+            logging.exception('--- ROW SCHEDULER BACKGROUND JOB FAILED ---')
+
+    def shutdown(self):
+        """
+        Cancels every periodic job and any background work that hasn't started.
+        """
+        with self._lock:
+            owners = list(self._periodic_jobs)
+            background_futures = list(self._background_futures)
+
+        for owner in owners:
+            self.cancel_jobs(owner)
+
+        # Cancelled here instead of with shutdown(cancel_futures=True), which needs Python 3.9.
+        for future in background_futures:
+            future.cancel()
+
+        self._executor.shutdown(wait=False)
+
+
+class _PeriodicJob:
+    def __init__(self, callback):
+        self.callback = callback
+        self.is_cancelled = False
+
+    def run(self):
+        if self.is_cancelled:
+            return GLib.SOURCE_REMOVE
+
+        if self.callback():
+            return GLib.SOURCE_CONTINUE
+
+        self.is_cancelled = True
+        return GLib.SOURCE_REMOVE
@@ -262,7 +262,7 @@ class SettingsSidebarHandlers:
     def _setup_audio_codec(self, audio_settings):
         if not self.inputs_page_handlers.is_apply_all_selected():
             ffmpeg = self.inputs_page_handlers.get_selected_row_ffmpeg()
-            if not ffmpeg.input_file_info['audio_streams'] and not ffmpeg.folder_state:
+            if not ffmpeg.media_info.audio_streams and not ffmpeg.folder_state:
                 self._reset_audio_codec_combobox()
                 self.audio_codec_combobox.set_sensitive(False)
             else:
@@ -16,8 +16,7 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import os
-
+from render_watch.helpers import ui_template_helper
 from render_watch.helpers.ui_helper import UIHelper
 from render_watch.signals.subtitles.subtitle_streams_signal import RemoveSubtitleStreamSignal, \
     ChangedSubtitleStreamSignal, ChangeStreamMethodSignal
@@ -47,11 +46,8 @@ class StreamRow(Gtk.ListBoxRow):
         self.remove_subtitle_stream_signal = RemoveSubtitleStreamSignal(self, self.subtitle_handlers)
 
     def _setup_widgets(self):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        rows_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/rows_ui.glade')
-
         gtk_builder = Gtk.Builder()
-        gtk_builder.add_from_file(rows_ui_file_path)
+        gtk_builder.add_from_string(ui_template_helper.get_ui_fragment('rows_ui.glade', 'subtitle_stream_row_box'))
 
         self.subtitle_stream_row_box = gtk_builder.get_object('subtitle_stream_row_box')
         self.subtitle_stream_combobox = gtk_builder.get_object('subtitle_stream_combobox')
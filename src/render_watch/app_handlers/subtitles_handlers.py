@@ -16,12 +16,11 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-import os
 import threading
 
 from render_watch.app_handlers.subtitle_stream_row import StreamRow
 from render_watch.signals.subtitles.subtitle_streams_signal import AddSubtitleStreamSignal
-from render_watch.startup import Gtk, GLib
+from render_watch.startup import GLib
 
 
 class SubtitlesHandlers:
@@ -44,12 +43,6 @@ class SubtitlesHandlers:
         ]
 
     def _setup_widgets(self, gtk_builder):
-        this_modules_file_path = os.path.dirname(os.path.abspath(__file__))
-        rows_ui_file_path = os.path.join(this_modules_file_path, '../render_watch_data/rows_ui.glade')
-
-        self.options_rows_gtk_builder = Gtk.Builder()
-        self.options_rows_gtk_builder.add_from_file(rows_ui_file_path)
-
         self.subtitle_settings_stack = gtk_builder.get_object('subtitle_settings_stack')
         self.subtitle_settings_box = gtk_builder.get_object('subtitle_settings_box')
         self.subtitle_settings_not_available_label = gtk_builder.get_object('subtitle_settings_not_available_label')
@@ -0,0 +1,74 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from render_watch.signals.application_preferences.tuning_profile_signal import TuningProfileSignal
+from render_watch.helpers import ui_template_helper
+from render_watch.startup import Gtk
+
+
+class TuningProfileRow(Gtk.ListBoxRow):
+    """
+    Creates a Gtk.ListboxRow for the use tuned values option in the application preferences dialog.
+    """
+
+    def __init__(self, application_preferences_handlers, application_preferences, host_tuning_profile):
+        """
+        :param application_preferences_handlers: Preferences dialog's handlers.
+        :param application_preferences: Application's preferences.
+        :param host_tuning_profile: This host's tuning profile, or None if autotune hasn't been run on this host.
+        """
+        Gtk.ListBoxRow.__init__(self)
+        self._setup_signals(application_preferences_handlers, application_preferences)
+        self._setup_widgets(application_preferences, host_tuning_profile)
+
+    def _setup_signals(self, application_preferences_handlers, application_preferences):
+        self.tuning_profile_signal = TuningProfileSignal(application_preferences_handlers, application_preferences)
+
+    def _setup_widgets(self, application_preferences, host_tuning_profile):
+        gtk_builder = Gtk.Builder()
+        gtk_builder.add_from_string(ui_template_helper.get_ui_fragment('rows_ui.glade', 'tuning_profile_row_box'))
+
+        self.tuning_profile_row_box = gtk_builder.get_object('tuning_profile_row_box')
+        self.tuning_profile_subtext_label = gtk_builder.get_object('tuning_profile_subtext_label')
+        self.tuning_profile_switch = gtk_builder.get_object('tuning_profile_switch')
+        self.tuning_profile_switch.set_active(application_preferences.is_tuning_profile_enabled)
+
+        if host_tuning_profile is None:
+            self.tuning_profile_subtext_label.set_text('Run render-watch --autotune to find the number of tasks for '
+                                                       'this machine')
+            self.tuning_profile_switch.set_sensitive(False)
+        else:
+            self.tuning_profile_subtext_label.set_text('Runs the tasks that render-watch --autotune found for this '
+                                                       'machine (' + self._get_tuning_profile_text(host_tuning_profile)
+                                                       + ') instead of the values below')
+
+        self.add(self.tuning_profile_row_box)
+
+        self.tuning_profile_switch.connect('state-set', self.tuning_profile_signal.on_tuning_profile_switch_state_set)
+
+    @staticmethod
+    def _get_tuning_profile_text(host_tuning_profile):
+        tuning_profile_values = []
+
+        if host_tuning_profile.parallel_tasks is not None:
+            tuning_profile_values.append('parallel: ' + str(host_tuning_profile.parallel_tasks))
+
+        for codec, number_of_tasks in host_tuning_profile.per_codec_parallel_tasks.items():
+            tuning_profile_values.append(codec + ': ' + str(number_of_tasks))
+
+        return ', '.join(tuning_profile_values)
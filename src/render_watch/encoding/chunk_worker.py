@@ -0,0 +1,311 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import os
+import socket
+import threading
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.encoder import Encoder
+from render_watch.encoding.headless_task import _TaskInformation
+from render_watch.helpers import chunk_transfer_helper, ffmpeg_helper, settings_file_helper
+
+
+class _WorkerChunk(_TaskInformation):
+    """
+    Chunk that a worker encodes for the coordinator, in place of an active page row.
+    """
+
+    def __init__(self, ffmpeg):
+        _TaskInformation.__init__(self)
+        self.ffmpeg = ffmpeg
+        self.paused = False
+        self.stopped = False
+        self.started = False
+        self.failed = False
+        self.finished = False
+        self.task_threading_event = threading.Event()
+        self.finished_event = threading.Event()
+
+        self.task_threading_event.set()
+
+    def set_start_state(self):
+        self.started = True
+
+    def set_finished_state(self):
+        self.finished = True
+        self.finished_event.set()
+
+
+class InputCache:
+    """
+    Keeps the inputs that were streamed from the coordinator, so a worker only receives each input once.
+    """
+
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+        self._input_locks = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_directory, exist_ok=True)
+
+    def get_input_file_path(self, input_file_path, input_file_size, socket_file):
+        """
+        Returns the path of the cached input, asking the coordinator for it first if it isn't cached yet.
+
+        :param input_file_path: Input's path on the coordinator.
+        :param input_file_size: Input's size in bytes.
+        :param socket_file: Coordinator connection's binary file.
+        """
+        cache_file_name = chunk_transfer_helper.get_input_cache_file_name(input_file_path, input_file_size)
+        cache_file_path = os.path.join(self.cache_directory, cache_file_name)
+
+        with self._lock:
+            input_lock = self._input_locks.setdefault(cache_file_name, threading.Lock())
+
+        with input_lock:  # Other connections wait for an input that's being received instead of receiving it again.
+            if not os.path.isfile(cache_file_path):
+                logging.info('--- RECEIVING INPUT: ' + input_file_path + ' ---')
+
+                daemon_client.write_message(socket_file, {'command': 'fetch_input'})
+                response = daemon_client.read_message(socket_file)
+                if response is None:
+                    raise ConnectionError('coordinator closed the connection')
+
+                chunk_transfer_helper.receive_file(socket_file, response['size'], cache_file_path)
+
+        return cache_file_path
+
+
+class ChunkWorker:
+    """
+    Connects to a chunk coordinator and encodes the chunks it sends, one at a time.
+
+    Inputs are read from the same path as on the coordinator when they're there with the same size, otherwise they're
+    streamed from the coordinator into the input cache. The worker reports the chunk's progress every second and gets
+    back whether to keep going, pause, or stop. Reconnects when the connection is lost.
+    """
+
+    PROGRESS_INTERVAL_IN_SECONDS = 1
+    RECONNECT_DELAY_IN_SECONDS = 5
+
+    def __init__(self, coordinator_address, worker_name, work_directory, input_cache, token=None, stream_inputs=False):
+        """
+        :param coordinator_address: "host:port" of the coordinator.
+        :param worker_name: Name the coordinator knows this worker by, connections with the same name are one worker.
+        :param work_directory: Directory that chunks are encoded into.
+        :param input_cache: InputCache for streamed inputs.
+        :param token: (Default None) Token to register with.
+        :param stream_inputs: (Default False) Always stream inputs, even if they're found at the coordinator's path.
+        """
+        self.coordinator_address = chunk_transfer_helper.parse_address(coordinator_address)
+        self.worker_name = worker_name
+        self.work_directory = work_directory
+        self.input_cache = input_cache
+        self.token = token
+        self.stream_inputs = stream_inputs
+        self._chunk = None
+        self._coordinator_socket = None
+        self._stopped_event = threading.Event()
+
+        os.makedirs(work_directory, exist_ok=True)
+
+    def run(self):
+        """
+        Encodes the coordinator's chunks until stop() is called.
+        """
+        while not self._stopped_event.is_set():
+            try:
+                self._run_connection()
+            except PermissionError as exception:
+                logging.error('--- COORDINATOR REFUSED WORKER: ' + str(exception) + ' ---')
+            except OSError as exception:
+                if not self._stopped_event.is_set():
+                    logging.warning('--- COORDINATOR CONNECTION FAILED: ' + str(exception) + ' ---')
+
+            self._stopped_event.wait(self.RECONNECT_DELAY_IN_SECONDS)
+
+    def stop(self):
+        """
+        Stops the chunk that's being encoded and disconnects from the coordinator.
+        """
+        self._stopped_event.set()
+
+        chunk = self._chunk
+        if chunk is not None:
+            chunk.stopped = True
+            chunk.task_threading_event.set()
+        elif self._coordinator_socket is not None:
+            try:
+                self._coordinator_socket.shutdown(socket.SHUT_RDWR)  # Wakes up the connection waiting for a chunk.
+            except OSError:
+                pass
+
+    def _run_connection(self):
+        with socket.create_connection(self.coordinator_address) as coordinator_socket, \
+                coordinator_socket.makefile('rwb') as socket_file:
+            self._coordinator_socket = coordinator_socket
+            daemon_client.write_message(socket_file, {'command': 'register',
+                                                      'name': self.worker_name,
+                                                      'token': self.token})
+            response = daemon_client.read_message(socket_file)
+            if not response or not response.get('ok'):
+                raise PermissionError((response or {}).get('error', 'coordinator refused the worker'))
+
+            logging.info('--- CONNECTED TO COORDINATOR: ' + str(self.coordinator_address) + ' ---')
+
+            while not self._stopped_event.is_set():
+                message = daemon_client.read_message(socket_file)
+                if message is None:
+                    return
+
+                if message.get('command') == 'encode':
+                    self._encode_chunk(message, socket_file)
+
+    def _encode_chunk(self, message, socket_file):
+        try:
+            ffmpeg = settings_file_helper.get_ffmpeg_from_state(message.get('ffmpeg'))
+            input_file_size = message.get('input_size')
+            self._check_chunk_message(ffmpeg, input_file_size)
+        except ValueError as exception:
+            logging.error('--- INVALID CHUNK FROM COORDINATOR: ' + str(exception) + ' ---')
+
+            daemon_client.write_message(socket_file, {'event': 'failed', 'error': str(exception)})
+            return
+
+        input_file_path = self._get_input_file_path(ffmpeg.input_file, input_file_size, socket_file)
+        self._setup_chunk_ffmpeg(ffmpeg, input_file_path)
+
+        chunk = _WorkerChunk(ffmpeg)
+        self._chunk = chunk
+        output_file_path = ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container
+
+        try:
+            threading.Thread(target=self._run_encoder, args=(chunk,), daemon=True).start()
+            self._send_chunk_progress(chunk, socket_file)
+            self._send_chunk_result(chunk, output_file_path, socket_file)
+        finally:
+            self._chunk = None
+            self._remove_chunk_files(ffmpeg, output_file_path)
+
+    @staticmethod
+    def _check_chunk_message(ffmpeg, input_file_size):
+        # Chunk files are written into the work directory, so their names can't point anywhere else.
+        file_names = [ffmpeg.filename]
+        if ffmpeg.is_video_settings_2_pass():
+            file_names.append(ffmpeg.temp_file_name)
+
+        for file_name in file_names:
+            if not isinstance(file_name, str) or file_name in ('', '.', '..') or os.path.basename(file_name) != file_name:
+                raise ValueError('invalid chunk file name: ' + repr(file_name))
+
+        if not isinstance(input_file_size, int) or isinstance(input_file_size, bool) or input_file_size < 0:
+            raise ValueError('invalid input size: ' + repr(input_file_size))
+
+    def _get_input_file_path(self, input_file_path, input_file_size, socket_file):
+        if not self.stream_inputs \
+                and os.path.isfile(input_file_path) \
+                and os.path.getsize(input_file_path) == input_file_size:
+            return input_file_path  # Shared path
+
+        return self.input_cache.get_input_file_path(input_file_path, input_file_size, socket_file)
+
+    def _setup_chunk_ffmpeg(self, ffmpeg, input_file_path):
+        filename = ffmpeg.filename
+        ffmpeg.input_file = input_file_path
+        ffmpeg.filename = filename  # Setting the input file changes the output's file name.
+        ffmpeg.output_directory = os.path.join(self.work_directory, '')
+
+        if ffmpeg.is_video_settings_2_pass():
+            ffmpeg.video_settings.stats = os.path.join(self.work_directory, ffmpeg.temp_file_name + '.log')
+
+    @staticmethod
+    def _run_encoder(chunk):
+        ffmpeg = chunk.ffmpeg
+
+        try:
+            ffmpeg_args = ffmpeg_helper.get_parsed_ffmpeg_args(ffmpeg)
+            Encoder.start_encode_process(chunk,
+                                         ffmpeg_args,
+                                         ffmpeg_helper.get_duration_in_seconds(ffmpeg),
+                                         len(ffmpeg_args))
+        except Exception:
+            logging.exception('--- FAILED TO ENCODE CHUNK: ' + ffmpeg.filename + ' ---')
+
+            chunk.failed = True
+            chunk.set_finished_state()
+
+    def _send_chunk_progress(self, chunk, socket_file):
+        try:
+            while not chunk.finished_event.wait(self.PROGRESS_INTERVAL_IN_SECONDS):
+                daemon_client.write_message(socket_file, {
+                    'event': 'progress',
+                    'progress': chunk.progress,
+                    'speed': chunk.speed,
+                    'bitrate': chunk.bitrate,
+                    'file_size': chunk.file_size,
+                    'time_left': chunk.time,
+                    'current_time': chunk.current_time
+                })
+                response = daemon_client.read_message(socket_file)
+                if response is None:
+                    raise ConnectionError('coordinator closed the connection')
+
+                self._apply_chunk_action(chunk, response.get('action'))
+        except OSError:
+            self._apply_chunk_action(chunk, 'stop')
+            chunk.finished_event.wait()
+            raise
+
+    @staticmethod
+    def _apply_chunk_action(chunk, action):
+        if action == 'stop':
+            chunk.stopped = True
+            chunk.task_threading_event.set()
+        elif action == 'pause' and not chunk.paused:
+            chunk.paused = True
+            chunk.task_threading_event.clear()
+        elif action == 'continue' and chunk.paused:
+            chunk.paused = False
+            chunk.task_threading_event.set()
+
+    @staticmethod
+    def _send_chunk_result(chunk, output_file_path, socket_file):
+        if chunk.stopped:
+            daemon_client.write_message(socket_file, {'event': 'stopped'})
+        elif chunk.failed or not os.path.isfile(output_file_path):
+            daemon_client.write_message(socket_file, {'event': 'failed',
+                                                      'error': 'ffmpeg failed to encode ' + chunk.ffmpeg.filename})
+        else:
+            daemon_client.write_message(socket_file, {'event': 'finished',
+                                                      'size': os.path.getsize(output_file_path)})
+            chunk_transfer_helper.send_file(socket_file, output_file_path)
+
+    @staticmethod
+    def _remove_chunk_files(ffmpeg, output_file_path):
+        file_paths = [output_file_path]
+
+        if ffmpeg.is_video_settings_2_pass():
+            file_paths.append(ffmpeg.video_settings.stats)
+
+        for file_path in file_paths:
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
@@ -0,0 +1,451 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+import time
+
+
+_concurrency_controller = None
+
+DEFAULT_PIXELS_PER_FRAME = 1920 * 1080
+
+
+def set_concurrency_controller(concurrency_controller):
+    """
+    Makes the encoder ask the controller before it starts an ffmpeg process and report each process's progress to it.
+    Encodes aren't controlled until this is called.
+
+    :param concurrency_controller: ConcurrencyController, or None to stop controlling encodes.
+    """
+    global _concurrency_controller
+
+    _concurrency_controller = concurrency_controller
+
+
+def get_concurrency_controller():
+    """
+    Returns the ConcurrencyController that was set with set_concurrency_controller(), or None if encodes aren't
+    controlled.
+    """
+    return _concurrency_controller
+
+
+def get_pixels_per_frame(ffmpeg):
+    """
+    Returns how many pixels each of a task's output frames has, from its scale, crop, or input resolution. Returns
+    DEFAULT_PIXELS_PER_FRAME when the input's resolution isn't known.
+
+    :param ffmpeg: ffmpeg settings.
+    """
+    picture_settings = ffmpeg.picture_settings
+
+    if picture_settings.scale:
+        width, height = picture_settings.scale
+    elif picture_settings.crop:
+        width, height, _, _ = picture_settings.crop
+    else:
+        width, height = ffmpeg.width_origin, ffmpeg.height_origin
+
+    if not isinstance(width, int) or not isinstance(height, int) or width < 1 or height < 1:
+        return DEFAULT_PIXELS_PER_FRAME
+    return width * height
+
+
+def get_cpu_times():
+    """
+    Returns the whole system's busy and total CPU time since boot, in clock ticks, or None if /proc/stat can't be read.
+    Other programs' CPU use is included, since it slows the encodes down the same way.
+    """
+    try:
+        with open('/proc/stat') as stat_file:
+            cpu_times = [int(cpu_time) for cpu_time in stat_file.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+
+    idle_time = cpu_times[3] + (cpu_times[4] if len(cpu_times) > 4 else 0)  # idle and iowait
+    total_time = sum(cpu_times[:8])  # Guest time is already counted in user time.
+    return total_time - idle_time, total_time
+
+
+def get_memory_available():
+    """
+    Returns the fraction of the system's memory that's available without swapping, or None if /proc/meminfo can't be
+    read.
+    """
+    memory_info = {}
+
+    try:
+        with open('/proc/meminfo') as meminfo_file:
+            for line in meminfo_file:
+                name, value = line.split(':', 1)
+                memory_info[name] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    if not memory_info.get('MemTotal') or 'MemAvailable' not in memory_info:
+        return None
+    return memory_info['MemAvailable'] / memory_info['MemTotal']
+
+
+class ControllerSample:
+    """
+    Stores what the concurrency controller measured over one interval.
+    """
+
+    def __init__(self, throughput, cpu_utilization, memory_available, demand):
+        """
+        :param throughput: Pixels per second that the encodes got through, which is the sum of each encode's fps times
+            its pixels per frame.
+        :param cpu_utilization: Fraction of the system's CPU time that was busy, or None if it isn't known.
+        :param memory_available: Fraction of the system's memory that's available, or None if it isn't known.
+        :param demand: Encodes that are running, throttled, or waiting for a slot.
+        """
+        self.throughput = throughput
+        self.cpu_utilization = cpu_utilization
+        self.memory_available = memory_available
+        self.demand = demand
+
+
+class ConcurrencyController:
+    """
+    Adjusts how many encodes run at the same time to keep the encoders' throughput at its peak while the job mix and
+    the system's load change.
+
+    Every interval, the controller measures the encodes' throughput in pixels per second, the system's CPU use, and
+    its available memory, and changes the number of slots AIMD style:
+
+    * While encodes are waiting, the CPU isn't saturated, and there's memory to spare, one slot is added.
+    * If the added slot didn't make the throughput higher by at least MIN_GAIN, it's taken away again and no slot is
+      added for PROBE_BACKOFF_INTERVALS. If the throughput dropped by more than MIN_GAIN, the slots are cut by
+      DECREASE_FACTOR instead.
+    * If available memory drops below MIN_MEMORY_AVAILABLE, the slots are cut by DECREASE_FACTOR. They aren't cut
+      again until the settling interval passed and the encodes over the slots finished.
+
+    Throughput is averaged over HYSTERESIS_INTERVALS, and the interval right after a change isn't measured while the
+    encodes settle, so short spikes don't make the slots swing back and forth.
+
+    When there are more running encodes than slots, the newest ones are throttled with SIGSTOP, which frees their CPU
+    time but not their memory. Throttled encodes get SIGCONT before new encodes are admitted. Slots cut for memory
+    pressure don't throttle anything: the running encodes finish and no new ones are admitted until they fit in the
+    slots. NVENC encodes run on the GPU and aren't controlled.
+    """
+
+    SAMPLE_INTERVAL_IN_SECONDS = 5
+    HYSTERESIS_INTERVALS = 2
+    MIN_GAIN = 0.05
+    DECREASE_FACTOR = 0.75
+    CPU_SATURATION = 0.95
+    MIN_MEMORY_AVAILABLE = 0.1
+    PROBE_BACKOFF_INTERVALS = 12
+    WAIT_TIMEOUT_IN_SECONDS = 1
+    MEMORY_PRESSURE_REASON = 'memory pressure'
+
+    def __init__(self, number_of_slots, max_slots, min_slots=1):
+        """
+        :param number_of_slots: Encodes that can run at the same time to begin with.
+        :param max_slots: Most encodes that can run at the same time.
+        :param min_slots: (Default 1) Fewest encodes that can run at the same time.
+        """
+        self.max_slots = max_slots
+        self.min_slots = min_slots
+        self._number_of_slots = min(max(number_of_slots, min_slots), max_slots)
+        self._throttling_slots = self._number_of_slots  # Encodes above these are throttled.
+        self._condition = threading.Condition()
+        self._active_tasks = []
+        self._throttled_tasks = []
+        self._waiting_tasks = 0
+        self._task_frames = {}
+        self._finished_pixels = 0
+        self._samples = []
+        self._reference_throughput = None
+        self._last_change = 0
+        self._is_settling = False
+        self._probe_backoff = 0
+        self._stopped_event = threading.Event()
+
+    @property
+    def number_of_slots(self):
+        """
+        Returns how many encodes can run at the same time.
+        """
+        return self._number_of_slots
+
+    def start(self):
+        """
+        Starts measuring the encodes and adjusting the number of slots every SAMPLE_INTERVAL_IN_SECONDS.
+        """
+        logging.info('--- ADAPTIVE CONCURRENCY: ' + str(self._number_of_slots) + ' SLOTS, MAX '
+                     + str(self.max_slots) + ' ---')
+
+        threading.Thread(target=self._run_controller_thread, daemon=True).start()
+
+    def stop(self):
+        """
+        Stops adjusting the number of slots and lets every throttled encode continue.
+        """
+        self._stopped_event.set()
+        self._set_number_of_slots(self.max_slots)
+
+    def _run_controller_thread(self):
+        last_cpu_times = get_cpu_times()
+        last_sample_time = time.monotonic()
+
+        while not self._stopped_event.wait(self.SAMPLE_INTERVAL_IN_SECONDS):
+            cpu_times = get_cpu_times()
+            sample_time = time.monotonic()
+
+            sample = self._get_sample(last_cpu_times, cpu_times, sample_time - last_sample_time)
+            last_cpu_times = cpu_times
+            last_sample_time = sample_time
+
+            try:
+                self._run_decision(sample)
+            except Exception:
+                logging.exception('--- ADAPTIVE CONCURRENCY FAILED TO DECIDE ---')
+
+    def _get_sample(self, last_cpu_times, cpu_times, elapsed_time_in_seconds):
+        cpu_utilization = None
+        if last_cpu_times is not None and cpu_times is not None and cpu_times[1] > last_cpu_times[1]:
+            cpu_utilization = (cpu_times[0] - last_cpu_times[0]) / (cpu_times[1] - last_cpu_times[1])
+
+        with self._condition:
+            encoded_pixels = self._finished_pixels
+            self._finished_pixels = 0
+
+            for active_row, task_frames in self._task_frames.items():
+                encoded_pixels += self._get_new_pixels(active_row, task_frames)
+                task_frames[1] = task_frames[0]
+
+            demand = len(self._active_tasks) + len(self._throttled_tasks) + self._waiting_tasks
+
+        return ControllerSample(encoded_pixels / elapsed_time_in_seconds if elapsed_time_in_seconds > 0 else 0.0,
+                                cpu_utilization,
+                                get_memory_available(),
+                                demand)
+
+    @staticmethod
+    def _get_new_pixels(active_row, task_frames):
+        frame, sampled_frame = task_frames
+        if frame < sampled_frame:  # A new pass started counting from zero.
+            sampled_frame = 0
+        return (frame - sampled_frame) * get_pixels_per_frame(active_row.ffmpeg)
+
+    def _run_decision(self, sample):
+        decision = self._decide(sample)
+
+        logging.debug('--- ADAPTIVE CONCURRENCY SAMPLE: ' + self._get_sample_text(sample) + ' ---')
+
+        if decision is not None:
+            number_of_slots, reason = decision
+            logging.info('--- ADAPTIVE CONCURRENCY: ' + str(self._number_of_slots) + ' -> ' + str(number_of_slots)
+                         + ' SLOTS, ' + reason + ' (' + self._get_sample_text(sample) + ') ---')
+
+            self._set_number_of_slots(number_of_slots, reason != self.MEMORY_PRESSURE_REASON)
+
+    @staticmethod
+    def _get_sample_text(sample):
+        return ('throughput ' + str(round(sample.throughput / 1000000, 1)) + ' Mpx/s'
+                + ', cpu ' + ('%d%%' % round(sample.cpu_utilization * 100)
+                              if sample.cpu_utilization is not None else 'unknown')
+                + ', memory available ' + ('%d%%' % round(sample.memory_available * 100)
+                                           if sample.memory_available is not None else 'unknown')
+                + ', demand ' + str(sample.demand))
+
+    def _decide(self, sample):
+        """
+        Returns the new number of slots and the reason for changing it, or None to keep the slots as they are.
+
+        :param sample: ControllerSample of the last interval.
+        """
+        if sample.memory_available is not None and sample.memory_available < self.MIN_MEMORY_AVAILABLE:
+            self._probe_backoff = self.PROBE_BACKOFF_INTERVALS
+
+            if self._is_settling or self._get_number_of_running_tasks() > self._number_of_slots:
+                # The last cut didn't free any memory yet, the encodes over the slots are still running.
+                self._is_settling = False
+                return None
+            if self._number_of_slots > self.min_slots:
+                return self._change_slots(self._get_decreased_slots(), self.MEMORY_PRESSURE_REASON)
+            return None
+
+        if self._probe_backoff:
+            self._probe_backoff -= 1
+
+        if self._is_settling:
+            self._is_settling = False
+            return None
+
+        if sample.demand < self._number_of_slots:
+            # Idle slots don't say anything about how fast the slots that are in use would be with more of them.
+            self._samples.clear()
+            self._last_change = 0
+            return None
+
+        self._samples.append(sample)
+        del self._samples[:-self.HYSTERESIS_INTERVALS]
+        if len(self._samples) < self.HYSTERESIS_INTERVALS:
+            return None
+
+        throughput = self._get_average_throughput()
+
+        if self._last_change > 0 and self._reference_throughput:
+            self._last_change = 0
+
+            if throughput < self._reference_throughput * (1 - self.MIN_GAIN):
+                self._probe_backoff = self.PROBE_BACKOFF_INTERVALS
+                return self._change_slots(self._get_decreased_slots(), 'throughput dropped')
+            if throughput < self._reference_throughput * (1 + self.MIN_GAIN):
+                self._probe_backoff = self.PROBE_BACKOFF_INTERVALS
+                return self._change_slots(self._number_of_slots - 1, 'no throughput gain')
+
+        if self._is_probe_allowed(sample):
+            return self._change_slots(self._number_of_slots + 1, 'probe')
+        return None
+
+    def _is_probe_allowed(self, sample):
+        if self._probe_backoff or self._number_of_slots >= self.max_slots or sample.demand <= self._number_of_slots:
+            return False
+        if self._get_average_cpu_utilization() >= self.CPU_SATURATION:
+            return False
+        return sample.memory_available is None or sample.memory_available >= self.MIN_MEMORY_AVAILABLE * 2
+
+    def _get_number_of_running_tasks(self):
+        with self._condition:
+            return len(self._active_tasks) + len(self._throttled_tasks)
+
+    def _get_average_throughput(self):
+        return sum(sample.throughput for sample in self._samples) / len(self._samples)
+
+    def _get_average_cpu_utilization(self):
+        cpu_utilizations = [sample.cpu_utilization for sample in self._samples if sample.cpu_utilization is not None]
+        return sum(cpu_utilizations) / len(cpu_utilizations) if cpu_utilizations else 0.0
+
+    def _get_decreased_slots(self):
+        return max(self.min_slots, min(self._number_of_slots - 1, int(self._number_of_slots * self.DECREASE_FACTOR)))
+
+    def _change_slots(self, number_of_slots, reason):
+        self._reference_throughput = self._get_average_throughput() if self._samples else None
+        self._last_change = number_of_slots - self._number_of_slots
+        self._is_settling = True
+        self._samples.clear()
+        return number_of_slots, reason
+
+    def _set_number_of_slots(self, number_of_slots, is_throttling=True):
+        # Without throttling, encodes over the new slots keep running and only new encodes wait.
+        with self._condition:
+            self._number_of_slots = number_of_slots
+            if is_throttling:
+                self._throttling_slots = number_of_slots
+            else:
+                self._throttling_slots = max(self._throttling_slots, number_of_slots)
+
+            self._rebalance_slots()
+
+    def _rebalance_slots(self):
+        # Newest encodes are throttled first, and throttled encodes get their slot back before waiting encodes start.
+        while len(self._active_tasks) > self._throttling_slots:
+            active_row = self._active_tasks.pop()
+            self._throttled_tasks.append(active_row)
+
+            logging.info('--- ADAPTIVE CONCURRENCY THROTTLED: ' + active_row.ffmpeg.input_file + ' ---')
+
+        while len(self._active_tasks) < self._number_of_slots and self._throttled_tasks:
+            active_row = self._throttled_tasks.pop()
+            self._active_tasks.append(active_row)
+
+            logging.info('--- ADAPTIVE CONCURRENCY RESUMED: ' + active_row.ffmpeg.input_file + ' ---')
+
+        self._condition.notify_all()
+
+    @staticmethod
+    def _is_controlled(active_row):
+        return not active_row.ffmpeg.is_video_settings_nvenc()
+
+    def admit_task(self, active_row):
+        """
+        Waits until there's a free slot for an encode, or until the task is stopped. Returns right away for encodes that
+        aren't controlled.
+
+        :param active_row: Task or chunk row that's about to start an ffmpeg process.
+        """
+        if not self._is_controlled(active_row):
+            return
+
+        with self._condition:
+            self._waiting_tasks += 1
+            try:
+                while len(self._active_tasks) + len(self._throttled_tasks) >= self._number_of_slots \
+                        and not active_row.stopped:
+                    self._condition.wait(self.WAIT_TIMEOUT_IN_SECONDS)
+            finally:
+                self._waiting_tasks -= 1
+
+            self._active_tasks.append(active_row)
+            self._task_frames[active_row] = [0, 0]
+
+    def task_finished(self, active_row):
+        """
+        Frees an encode's slot after its ffmpeg process exits.
+
+        :param active_row: Task or chunk row that was admitted with admit_task().
+        """
+        with self._condition:
+            task_frames = self._task_frames.pop(active_row, None)
+            if task_frames is not None:
+                self._finished_pixels += self._get_new_pixels(active_row, task_frames)
+
+            if active_row in self._active_tasks:
+                self._active_tasks.remove(active_row)
+            elif active_row in self._throttled_tasks:
+                self._throttled_tasks.remove(active_row)
+            else:
+                return
+
+            self._rebalance_slots()
+
+    def set_task_frame(self, active_row, frame):
+        """
+        Stores how many frames an encode's ffmpeg process has encoded so far.
+
+        :param active_row: Task or chunk row that was admitted with admit_task().
+        :param frame: Frame number from ffmpeg's progress.
+        """
+        with self._condition:
+            task_frames = self._task_frames.get(active_row)
+            if task_frames is not None:
+                task_frames[0] = frame
+
+    def is_task_throttled(self, active_row):
+        """
+        Checks if an encode should be stopped with SIGSTOP until it gets its slot back.
+
+        :param active_row: Task or chunk row.
+        """
+        with self._condition:
+            return active_row in self._throttled_tasks
+
+    def wait_while_throttled(self, active_row):
+        """
+        Waits until a throttled encode gets its slot back, or until the task is stopped.
+
+        :param active_row: Task or chunk row.
+        """
+        with self._condition:
+            while active_row in self._throttled_tasks and not active_row.stopped:
+                self._condition.wait(self.WAIT_TIMEOUT_IN_SECONDS)
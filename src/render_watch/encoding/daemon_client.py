@@ -0,0 +1,283 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import base64
+import json
+import os
+import pickle
+import socket
+import threading
+
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+SOCKET_FILE_NAME = 'daemon.sock'
+
+
+def get_default_socket_path():
+    """
+    Returns the path of the daemon's Unix socket in the application's data directory.
+    """
+    return os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY, SOCKET_FILE_NAME)
+
+
+def encode_ffmpeg(ffmpeg):
+    """
+    Returns ffmpeg settings as a string that can be sent in a JSON message.
+
+    :param ffmpeg: ffmpeg settings.
+    """
+    return base64.b64encode(pickle.dumps(ffmpeg, pickle.HIGHEST_PROTOCOL)).decode('ascii')
+
+
+def decode_ffmpeg(encoded_ffmpeg):
+    """
+    Returns the ffmpeg settings in a string made by encode_ffmpeg().
+
+    :param encoded_ffmpeg: String made by encode_ffmpeg().
+    """
+    return pickle.loads(base64.b64decode(encoded_ffmpeg))
+
+
+def write_message(socket_file, message):
+    """
+    Writes a JSON message and the newline that ends it.
+
+    :param socket_file: Writable binary file made from a socket.
+    :param message: Dictionary to send.
+    """
+    socket_file.write(json.dumps(message).encode() + b'\n')
+    socket_file.flush()
+
+
+def read_message(socket_file):
+    """
+    Reads the next JSON message. Returns None when the other end closed the connection.
+
+    :param socket_file: Readable binary file made from a socket.
+    """
+    line = socket_file.readline()
+
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon couldn't do what a request asked for.
+    """
+
+
+class DaemonClient:
+    """
+    Sends requests to a running daemon over its Unix socket.
+
+    Requests are sent one at a time over one connection, progress events are read over a connection of their own.
+    Raises OSError if the daemon isn't running or the connection was lost.
+    """
+
+    def __init__(self, socket_path=None):
+        """
+        :param socket_path: (Default None) Path of the daemon's socket, None uses the default socket path.
+        """
+        self.socket_path = socket_path or get_default_socket_path()
+        self._request_socket = None
+        self._request_file = None
+        self._request_lock = threading.Lock()
+        self._events_socket = None
+
+    @staticmethod
+    def is_daemon_running(socket_path=None):
+        """
+        Checks if a daemon is accepting connections on the socket.
+
+        :param socket_path: (Default None) Path of the daemon's socket, None uses the default socket path.
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as daemon_socket:
+                daemon_socket.connect(socket_path or get_default_socket_path())
+        except OSError:
+            return False
+        return True
+
+    def _connect(self):
+        daemon_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            daemon_socket.connect(self.socket_path)
+        except OSError:
+            daemon_socket.close()
+            raise
+
+        return daemon_socket
+
+    def request(self, command, **parameters):
+        """
+        Sends a request and returns the daemon's response. Raises DaemonError if the request failed.
+
+        :param command: Name of the request's command.
+        :param parameters: The command's parameters.
+        """
+        request = {'command': command}
+        request.update(parameters)
+
+        with self._request_lock:
+            if self._request_socket is None:
+                self._request_socket = self._connect()
+                self._request_file = self._request_socket.makefile('rwb')
+
+            try:
+                write_message(self._request_file, request)
+                response = read_message(self._request_file)
+            except OSError:
+                self._close_request_socket()
+                raise
+
+            if response is None:
+                self._close_request_socket()
+                raise ConnectionError('daemon closed the connection')
+
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', 'request failed'))
+        return response
+
+    def submit_inputs(self,
+                      inputs,
+                      output_directory,
+                      settings=None,
+                      preset=None,
+                      is_chunked=False,
+                      watch_folder=False,
+                      recursive_folder=False,
+                      auto_crop=False):
+        """
+        Submits input files or folders encoded with a settings dictionary or preset. Returns the submitted jobs' IDs
+        and the inputs that were skipped.
+
+        :param inputs: Absolute paths of the input files or folders.
+        :param output_directory: Directory to write the outputs to.
+        :param settings: (Default None) Settings dictionary, see settings_file_helper.get_ffmpeg_template().
+        :param preset: (Default None) Name of a preset in the daemon's presets directory, used instead of settings.
+        :param is_chunked: (Default False) Split the jobs into chunks.
+        :param watch_folder: (Default False) Watch folder inputs for new files.
+        :param recursive_folder: (Default False) Include the sub-folders of folder inputs.
+        :param auto_crop: (Default False) Crop the black bars from the inputs.
+        """
+        response = self.request('submit',
+                                inputs=inputs,
+                                output_dir=output_directory,
+                                settings=settings,
+                                preset=preset,
+                                chunks=is_chunked,
+                                watch=watch_folder,
+                                recursive=recursive_folder,
+                                auto_crop=auto_crop)
+        return response['job_ids'], response['skipped']
+
+    def submit_ffmpeg(self, ffmpeg_list, is_chunked=False):
+        """
+        Submits tasks that already have all of their ffmpeg settings, like the active page's tasks. Returns the
+        submitted jobs' IDs in the same order.
+
+        :param ffmpeg_list: List of ffmpeg settings.
+        :param is_chunked: (Default False) Split the jobs into chunks.
+        """
+        response = self.request('submit',
+                                ffmpeg=[encode_ffmpeg(ffmpeg) for ffmpeg in ffmpeg_list],
+                                chunks=is_chunked)
+        return response['job_ids']
+
+    def list_jobs(self, include_settings=False):
+        """
+        Returns the daemon's jobs as dictionaries, in the order they were submitted.
+
+        :param include_settings: (Default False) Include each job's encoded ffmpeg settings.
+        """
+        return self.request('list', include_settings=include_settings)['jobs']
+
+    def pause(self, job_id):
+        self.request('pause', job_id=job_id)
+
+    def resume(self, job_id):
+        self.request('resume', job_id=job_id)
+
+    def stop(self, job_id):
+        self.request('stop', job_id=job_id)
+
+    def reprioritize(self, job_id, position):
+        """
+        Moves a queued job to a new position in its encode queue, 0 runs it next.
+
+        :param job_id: ID of the job.
+        :param position: New position in the queue.
+        """
+        self.request('reprioritize', job_id=job_id, position=position)
+
+    def set_parallel(self, is_parallel_tasks_enabled, is_per_codec_parallel_tasks_enabled=None):
+        """
+        Turns the daemon's parallel tasks on or off.
+
+        :param is_parallel_tasks_enabled: Run tasks in parallel.
+        :param is_per_codec_parallel_tasks_enabled: (Default None) Use the per codec limits, None leaves it unchanged.
+        """
+        self.request('set_parallel',
+                     enabled=is_parallel_tasks_enabled,
+                     per_codec=is_per_codec_parallel_tasks_enabled)
+
+    def get_events(self):
+        """
+        Yields the daemon's progress events as dictionaries until the connection is closed.
+        """
+        self._events_socket = self._connect()
+
+        with self._events_socket.makefile('rwb') as events_file:
+            write_message(events_file, {'command': 'events'})
+
+            while True:
+                try:
+                    message = read_message(events_file)
+                except (OSError, ValueError):
+                    return
+
+                if message is None:
+                    return
+
+                if 'event' in message:
+                    yield message
+
+    def close(self):
+        """
+        Closes the connections to the daemon. The daemon's jobs keep running.
+        """
+        with self._request_lock:
+            self._close_request_socket()
+
+        if self._events_socket is not None:
+            try:
+                self._events_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._events_socket.close()
+
+    def _close_request_socket(self):
+        if self._request_socket is not None:
+            self._request_file.close()
+            self._request_socket.close()
+            self._request_socket = None
+            self._request_file = None
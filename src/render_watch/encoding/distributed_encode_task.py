@@ -0,0 +1,370 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import hmac
+import itertools
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.encoder import Encoder
+from render_watch.encoding.job_timing_log import JobTiming, time_phase
+from render_watch.helpers import chunk_transfer_helper, settings_file_helper
+
+
+class _WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs a chunk worker's connection until the worker disconnects or the coordinator stops.
+    """
+
+    def handle(self):
+        self.server.distributed_encode_task.run_worker_connection(self.connection, self.rfile, self.wfile)
+
+
+class _CoordinatorServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DistributedEncodeTask:
+    """
+    Queues chunk tasks and sends them to chunk workers on other machines over TCP.
+
+    Every worker connection takes one chunk at a time from the queue. The worker encodes the chunk from the same input
+    path when it can read it (a shared path), otherwise the coordinator streams the input to it first. Encoded chunks
+    are sent back into the coordinator's temp directory, so the chunk's task concatenates and muxes them as usual.
+    A chunk that fails on a worker, or whose worker disconnects, is retried on a different worker. Once it failed on
+    every connected worker, or on too many workers, the coordinator encodes it locally. Chunks are also encoded
+    locally, one at a time, when no worker was connected for NO_WORKERS_TIMEOUT_IN_SECONDS.
+
+    Messages are JSON lines, see daemon_client.write_message(). File contents follow the message that gives their size.
+    Chunk settings are sent as JSON, see settings_file_helper.get_ffmpeg_state(). Workers must register with the
+    coordinator's token, which is required when the coordinator listens on an address other than loopback.
+    """
+
+    MAX_WORKER_ATTEMPTS = 3
+    WORKER_TIMEOUT_IN_SECONDS = 60
+    RETRY_DELAY_IN_SECONDS = 1
+    NO_WORKERS_TIMEOUT_IN_SECONDS = 60
+
+    def __init__(self, encoder_queue, address, token=None):
+        """
+        Starts listening for chunk workers. Raises OSError if the address can't be used, and ValueError if the address
+        is invalid or isn't a loopback address and there's no token.
+
+        :param encoder_queue: Encoder queue that runs chunks locally when no worker can.
+        :param address: "host:port" to listen on, see chunk_transfer_helper.parse_address().
+        :param token: (Default None) Token that workers must register with, None lets any local worker register.
+        """
+        server_address = chunk_transfer_helper.parse_address(address)
+        if not token and not chunk_transfer_helper.is_loopback_host(server_address[0]):
+            raise ValueError('a token (--token or RENDER_WATCH_TOKEN) is required to listen on ' + server_address[0])
+
+        self.encoder_queue = encoder_queue
+        self.token = token
+        self.distributed_tasks_queue = queue.Queue()
+        self._worker_connections = {}
+        self._failed_worker_names = {}
+        self._workers_lock = threading.Lock()
+        self._chunk_ids = itertools.count(1)
+        self._stopped_event = threading.Event()
+
+        self._server = _CoordinatorServer(server_address, _WorkerRequestHandler)
+        self._server.distributed_encode_task = self
+
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._run_local_fallback_thread, daemon=True).start()
+        logging.info('--- CHUNK COORDINATOR LISTENING: ' + str(self.address) + ' ---')
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def get_worker_names(self):
+        """
+        Returns the names of the connected workers.
+        """
+        with self._workers_lock:
+            return set(self._worker_connections)
+
+    def run_worker_connection(self, connection, rfile, wfile):
+        """
+        Registers a worker's connection and sends it chunks until it disconnects or the coordinator stops.
+
+        :param connection: Worker's socket.
+        :param rfile: Readable binary file of the connection.
+        :param wfile: Writable binary file of the connection.
+        """
+        connection.settimeout(self.WORKER_TIMEOUT_IN_SECONDS)
+
+        try:
+            worker_name = self._register_worker(rfile, wfile)
+        except (OSError, ValueError):
+            logging.exception('--- CHUNK WORKER FAILED TO REGISTER ---')
+            return
+
+        if worker_name is None:
+            return
+
+        try:
+            self._parse_distributed_tasks_queue(worker_name, rfile, wfile)
+        finally:
+            self._unregister_worker(worker_name)
+
+    def _register_worker(self, rfile, wfile):
+        message = daemon_client.read_message(rfile)
+
+        if not isinstance(message, dict) or message.get('command') != 'register':
+            return None
+
+        if self.token and not hmac.compare_digest(str(message.get('token')), self.token):
+            daemon_client.write_message(wfile, {'ok': False, 'error': 'invalid token'})
+            logging.warning('--- CHUNK WORKER REJECTED: ' + str(message.get('name')) + ' ---')
+
+            return None
+
+        worker_name = str(message.get('name'))
+        with self._workers_lock:
+            self._worker_connections[worker_name] = self._worker_connections.get(worker_name, 0) + 1
+
+        daemon_client.write_message(wfile, {'ok': True})
+        logging.info('--- CHUNK WORKER CONNECTED: ' + worker_name + ' ---')
+
+        return worker_name
+
+    def _unregister_worker(self, worker_name):
+        with self._workers_lock:
+            self._worker_connections[worker_name] -= 1
+
+            if not self._worker_connections[worker_name]:
+                del self._worker_connections[worker_name]
+
+        logging.info('--- CHUNK WORKER DISCONNECTED: ' + worker_name + ' ---')
+
+    def _parse_distributed_tasks_queue(self, worker_name, rfile, wfile):
+        while True:
+            chunk_row = self.distributed_tasks_queue.get()
+            if not chunk_row:
+                self.distributed_tasks_queue.task_done()
+                break
+
+            try:
+                if self._is_chunk_row_waiting_for_another_worker(chunk_row, worker_name):
+                    self.distributed_tasks_queue.put(chunk_row)
+                    time.sleep(self.RETRY_DELAY_IN_SECONDS)
+                    continue
+
+                self.encoder_queue.add_to_running_tasks(chunk_row)
+                try:
+                    if self._is_chunk_row_failed_on_workers(chunk_row, worker_name):
+                        self._run_local_encode_task(chunk_row)
+                    else:
+                        with time_phase(chunk_row, JobTiming.REMOTE_ENCODE_PHASE):
+                            self._run_distributed_encode_task(chunk_row, worker_name, rfile, wfile)
+                finally:
+                    self.encoder_queue.remove_from_running_tasks(chunk_row)
+            except OSError:
+                logging.exception('--- LOST CONNECTION TO CHUNK WORKER: ' + worker_name + ' ---')
+
+                self._retry_chunk_row(chunk_row, worker_name)
+                return
+            except (ValueError, TypeError, AttributeError, KeyError):
+                logging.exception('--- INVALID MESSAGE FROM CHUNK WORKER: ' + worker_name + ' ---')
+
+                self._retry_chunk_row(chunk_row, worker_name)
+                return
+            finally:
+                self.distributed_tasks_queue.task_done()
+
+    def _run_local_fallback_thread(self):
+        # Without any worker, nothing else takes chunks from the queue.
+        last_worker_time = time.monotonic()
+
+        while not self._stopped_event.wait(self.RETRY_DELAY_IN_SECONDS):
+            if self.get_worker_names():
+                last_worker_time = time.monotonic()
+                continue
+            if (time.monotonic() - last_worker_time) < self.NO_WORKERS_TIMEOUT_IN_SECONDS:
+                continue
+
+            try:
+                chunk_row = self.distributed_tasks_queue.get_nowait()
+            except queue.Empty:
+                continue
+
+            try:
+                if chunk_row:
+                    self.encoder_queue.add_to_running_tasks(chunk_row)
+                    try:
+                        self._run_local_encode_task(chunk_row)
+                    finally:
+                        self.encoder_queue.remove_from_running_tasks(chunk_row)
+            except Exception:
+                logging.exception('--- FAILED TO ENCODE CHUNK LOCALLY ---')
+            finally:
+                self.distributed_tasks_queue.task_done()
+
+    def _is_chunk_row_waiting_for_another_worker(self, chunk_row, worker_name):
+        with self._workers_lock:
+            failed_worker_names = self._failed_worker_names.get(chunk_row, set())
+
+            if worker_name not in failed_worker_names or len(failed_worker_names) >= self.MAX_WORKER_ATTEMPTS:
+                return False
+            return any(name not in failed_worker_names for name in self._worker_connections)
+
+    def _is_chunk_row_failed_on_workers(self, chunk_row, worker_name):
+        with self._workers_lock:
+            failed_worker_names = self._failed_worker_names.get(chunk_row, set())
+            return worker_name in failed_worker_names or len(failed_worker_names) >= self.MAX_WORKER_ATTEMPTS
+
+    def _retry_chunk_row(self, chunk_row, worker_name):
+        with self._workers_lock:
+            self._failed_worker_names.setdefault(chunk_row, set()).add(worker_name)
+
+        chunk_row.progress = 0.0
+        self.distributed_tasks_queue.put(chunk_row)
+
+    def _run_local_encode_task(self, chunk_row):
+        if chunk_row.stopped:
+            return
+
+        logging.info('--- ENCODING CHUNK LOCALLY: ' + chunk_row.ffmpeg.filename + ' ---')
+
+        self._forget_chunk_row(chunk_row)
+        chunk_row.set_start_state()
+        self.encoder_queue.run_encode_task(chunk_row)
+
+    def _run_distributed_encode_task(self, chunk_row, worker_name, rfile, wfile):
+        if chunk_row.stopped:
+            return
+
+        ffmpeg = chunk_row.ffmpeg
+        try:
+            input_file_size = os.path.getsize(ffmpeg.input_file)
+        except OSError:
+            logging.exception('--- CHUNK INPUT NOT FOUND: ' + ffmpeg.input_file + ' ---')
+
+            chunk_row.failed = True
+            Encoder.finish_encode_process(chunk_row)
+            return
+
+        daemon_client.write_message(wfile, {
+            'command': 'encode',
+            'chunk_id': next(self._chunk_ids),
+            'ffmpeg': settings_file_helper.get_ffmpeg_state(ffmpeg),
+            'input_size': input_file_size
+        })
+        chunk_row.set_start_state()
+
+        event_message = self._run_worker_chunk_messages(chunk_row, input_file_size, rfile, wfile)
+
+        if event_message['event'] == 'finished' or chunk_row.stopped:
+            self._forget_chunk_row(chunk_row)
+            Encoder.finish_encode_process(chunk_row)
+        else:
+            logging.warning('--- CHUNK FAILED ON WORKER '
+                            + worker_name
+                            + ': '
+                            + ffmpeg.filename
+                            + ' ---\n'
+                            + str(event_message.get('error')))
+
+            self._retry_chunk_row(chunk_row, worker_name)
+
+    def _run_worker_chunk_messages(self, chunk_row, input_file_size, rfile, wfile):
+        # Answers the worker's requests until it sends the chunk's finished, failed, or stopped event.
+        ffmpeg = chunk_row.ffmpeg
+
+        while True:
+            message = daemon_client.read_message(rfile)
+            if message is None:
+                raise ConnectionError('chunk worker closed the connection')
+            if not isinstance(message, dict):
+                raise ValueError('chunk worker sent a message that isn\'t a JSON object')
+
+            if message.get('command') == 'fetch_input':
+                daemon_client.write_message(wfile, {'size': input_file_size})
+                chunk_transfer_helper.send_file(wfile, ffmpeg.input_file)
+            elif message.get('event') == 'progress':
+                self._set_chunk_row_status(chunk_row, message)
+                daemon_client.write_message(wfile, {'action': self._get_chunk_row_action(chunk_row)})
+            elif message.get('event') == 'finished':
+                chunk_transfer_helper.receive_file(rfile,
+                                                   message['size'],
+                                                   ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container)
+                return message
+            elif message.get('event') in ('failed', 'stopped'):
+                return message
+
+    @staticmethod
+    def _set_chunk_row_status(chunk_row, status):
+        chunk_row.progress = status['progress']
+        chunk_row.speed = status['speed']
+        chunk_row.bitrate = status['bitrate']
+        chunk_row.file_size = status['file_size']
+        chunk_row.time = status['time_left']
+        chunk_row.current_time = status['current_time']
+
+    @staticmethod
+    def _get_chunk_row_action(chunk_row):
+        if chunk_row.stopped:
+            return 'stop'
+        if chunk_row.paused:
+            return 'pause'
+        return 'continue'
+
+    def _forget_chunk_row(self, chunk_row):
+        with self._workers_lock:
+            self._failed_worker_names.pop(chunk_row, None)
+
+    def add_task(self, active_row):
+        """
+        Adds a chunk row to the queue that the workers take chunks from.
+        """
+        self.distributed_tasks_queue.put(active_row)
+
+    def set_stop_state(self):
+        """
+        Stops listening for workers and disconnects the connected workers once their current chunks are done.
+        """
+        self._stopped_event.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+        with self._workers_lock:
+            number_of_connections = sum(self._worker_connections.values())
+
+        for index in range(number_of_connections):
+            self.distributed_tasks_queue.put(False)
+
+    def is_queue_empty(self):
+        return self.distributed_tasks_queue.empty()
+
+    def join_queue(self):
+        self.distributed_tasks_queue.join()
+
+    def get_queues(self):
+        return (self.distributed_tasks_queue,)
+
+    def empty_queue(self):
+        while not self.is_queue_empty():
+            self.distributed_tasks_queue.get()
@@ -21,9 +21,13 @@ import os
 import signal
 import logging
 import re
+import time
 
 from render_watch.app_formatting import format_converter
-from render_watch.startup import GLib
+from render_watch.encoding.concurrency_controller import get_concurrency_controller
+from render_watch.encoding.encoder_metrics import get_encoder_metrics
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log
+from render_watch.helpers import main_loop_helper, profiling_helper
 
 
 class Encoder:
@@ -32,7 +36,12 @@ class Encoder:
     """
 
     @staticmethod
-    def start_encode_process(active_row, ffmpeg_args, duration_in_seconds, encode_passes, folder_state=False):
+    def start_encode_process(active_row,
+                             ffmpeg_args,
+                             duration_in_seconds,
+                             encode_passes,
+                             folder_state=False,
+                             on_encode_finished=None):
         """
         Runs a process using ffmpeg arguments to encode a single task.
 
@@ -41,36 +50,86 @@ class Encoder:
         :param duration_in_seconds: Task's input file duration.
         :param encode_passes: Number of encode passes.
         :param folder_state:(Default False) Processes the task as a folder for it's input.
+        :param on_encode_finished: (Default None) Function that's run after the encode succeeds, before the task is set
+        to the finished state. The task fails if the function returns False.
         """
+        encoder_metrics = get_encoder_metrics()
+        job_timing_log = get_job_timing_log()
+        concurrency_controller = get_concurrency_controller()
+
         for encode_pass, args in enumerate(ffmpeg_args):
-            with subprocess.Popen(args,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.STDOUT,
-                                  universal_newlines=True,
-                                  bufsize=1) as encode_process:
-                while True:
-                    if active_row.stopped and encode_process.poll() is None:
-                        os.kill(encode_process.pid, signal.SIGKILL)
-                        break
-                    elif active_row.paused and encode_process.poll() is None:
-                        Encoder._pause_encode_process(encode_process, active_row)
-
-                    process_stdout = encode_process.stdout.readline().strip()
-                    if process_stdout == '' and encode_process.poll() is not None:
-                        break
-                    stdout_last_line = process_stdout
-
-                    try:
-                        Encoder._update_active_row_encode_status(active_row,
-                                                                 process_stdout,
-                                                                 encode_pass,
-                                                                 encode_passes,
-                                                                 duration_in_seconds)
-                    except Exception as exception:
-                        logging.exception(exception)
-                        continue
+            if concurrency_controller is not None:
+                concurrency_controller.admit_task(active_row)
+
+            pass_start_time = time.monotonic()
+            try:
+                with subprocess.Popen(args,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT,
+                                      universal_newlines=True,
+                                      bufsize=1) as encode_process:
+                    if encoder_metrics is not None:
+                        encoder_metrics.process_started()
+
+                    while True:
+                        if active_row.stopped and encode_process.poll() is None:
+                            os.kill(encode_process.pid, signal.SIGKILL)
+                            break
+                        elif active_row.paused and encode_process.poll() is None:
+                            Encoder._pause_encode_process(encode_process, active_row)
+                        elif concurrency_controller is not None and encode_process.poll() is None \
+                                and concurrency_controller.is_task_throttled(active_row):
+                            Encoder._throttle_encode_process(encode_process, active_row, concurrency_controller)
+
+                        process_stdout = encode_process.stdout.readline().strip()
+                        if process_stdout == '' and encode_process.poll() is not None:
+                            break
+                        stdout_last_line = process_stdout
+
+                        try:
+                            Encoder._update_active_row_encode_status(active_row,
+                                                                     process_stdout,
+                                                                     encode_pass,
+                                                                     encode_passes,
+                                                                     duration_in_seconds)
+
+                            if encoder_metrics is not None:
+                                Encoder._update_fps_value(encoder_metrics, active_row, process_stdout)
+                            if concurrency_controller is not None:
+                                Encoder._update_frame_value(concurrency_controller, active_row, process_stdout)
+                        except Exception as exception:
+                            logging.exception(exception)
+                            continue
+            finally:
+                if concurrency_controller is not None:
+                    concurrency_controller.task_finished(active_row)
+
+            if encoder_metrics is not None:
+                encoder_metrics.process_finished(bool(encode_process.returncode) and not active_row.stopped)
+
+            if job_timing_log is not None:
+                job_timing_log.add_phase(active_row,
+                                         JobTiming.PASS_PHASE_FORMAT % (encode_pass + 1),
+                                         pass_start_time,
+                                         time.monotonic())
 
         Encoder._update_active_row_finished_state(active_row, encode_process, stdout_last_line)
+        Encoder.finish_encode_process(active_row, folder_state, on_encode_finished)
+
+    @staticmethod
+    def finish_encode_process(active_row, folder_state=False, on_encode_finished=None):
+        """
+        Runs the task's finishing function and sets the task to the finished state. Used directly for tasks that have
+        nothing left to encode.
+
+        :param active_row: Gtk.ListboxRow from the active page.
+        :param folder_state: (Default False) Processes the task as a folder for it's input.
+        :param on_encode_finished: (Default None) Function that's run if the task wasn't stopped and didn't fail.
+        """
+        if on_encode_finished is not None and not active_row.stopped and not active_row.failed:
+            if not on_encode_finished():
+                active_row.failed = True
+
         Encoder._set_active_row_finished_state(active_row, folder_state)
 
     @staticmethod
@@ -80,6 +139,13 @@ class Encoder:
         os.kill(encode_process.pid, signal.SIGCONT)
 
     @staticmethod
+    def _throttle_encode_process(encode_process, active_row, concurrency_controller):
+        os.kill(encode_process.pid, signal.SIGSTOP)
+        concurrency_controller.wait_while_throttled(active_row)
+        os.kill(encode_process.pid, signal.SIGCONT)
+
+    @staticmethod
+    @profiling_helper.timed_span('Encoder._update_active_row_encode_status')
     def _update_active_row_encode_status(active_row,
                                          process_stdout,
                                          current_encode_pass,
@@ -142,6 +208,20 @@ class Encoder:
         else:
             return float(speed)
 
+    @staticmethod
+    def _update_fps_value(encoder_metrics, active_row, process_stdout):
+        fps_match = re.search('fps=\s*(\d+\.?\d*)', process_stdout)
+
+        if fps_match:
+            encoder_metrics.set_task_fps(active_row, float(fps_match.group(1)))
+
+    @staticmethod
+    def _update_frame_value(concurrency_controller, active_row, process_stdout):
+        frame_match = re.search('frame=\s*(\d+)', process_stdout)
+
+        if frame_match:
+            concurrency_controller.set_task_frame(active_row, int(frame_match.group(1)))
+
     @staticmethod
     def _update_encode_progress(active_row,
                                 current_encode_pass,
@@ -197,4 +277,4 @@ class Encoder:
         active_row.progress = 1.0
 
         if not folder_state:
-            GLib.idle_add(active_row.set_finished_state)
+            main_loop_helper.run_on_main_loop(active_row.set_finished_state)
@@ -0,0 +1,292 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import threading
+import time
+import weakref
+
+from render_watch.encoding import tuning_profile
+from render_watch.encoding.concurrency_controller import get_concurrency_controller
+
+
+_encoder_metrics = None
+
+
+def set_encoder_metrics(encoder_metrics):
+    """
+    Makes the encoder and encoder queue report to the metrics. Metrics aren't collected until this is called.
+
+    :param encoder_metrics: EncoderMetrics, or None to stop collecting metrics.
+    """
+    global _encoder_metrics
+
+    _encoder_metrics = encoder_metrics
+
+
+def get_encoder_metrics():
+    """
+    Returns the EncoderMetrics that was set with set_encoder_metrics(), or None if metrics aren't collected.
+    """
+    return _encoder_metrics
+
+
+class _Histogram:
+    """
+    Counts observed values in cumulative buckets, the way Prometheus histograms do.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.bucket_counts[index] += 1
+
+        self.count += 1
+        self.sum += value
+
+    def get_lines(self, name):
+        lines = []
+        for bucket, bucket_count in zip(self.buckets, self.bucket_counts):
+            lines.append(name + '_bucket{le="' + str(bucket) + '"} ' + str(bucket_count))
+        lines.append(name + '_bucket{le="+Inf"} ' + str(self.count))
+        lines.append(name + '_sum ' + str(self.sum))
+        lines.append(name + '_count ' + str(self.count))
+        return lines
+
+
+class EncoderMetrics:
+    """
+    Collects the encoder's throughput, queue depth, and resource use, and formats them in the Prometheus text format.
+
+    The encoder queue and encoder report events as they happen, which only stores a timestamp or adds to a counter.
+    Per task values, queue depths, and slot use are read from the encoder queue when the metrics are formatted.
+    """
+
+    DURATION_BUCKETS_IN_SECONDS = (1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200, 14400)
+
+    def __init__(self, encoder_queue, application_preferences):
+        """
+        :param encoder_queue: Encoder queue to read running tasks and queue depths from.
+        :param application_preferences: Application's preferences.
+        """
+        self.encoder_queue = encoder_queue
+        self.application_preferences = application_preferences
+        self._queued_times = weakref.WeakKeyDictionary()
+        self._started_times = weakref.WeakKeyDictionary()
+        self._tasks_fps = weakref.WeakKeyDictionary()
+        self._wait_time_histogram = _Histogram(self.DURATION_BUCKETS_IN_SECONDS)
+        self._run_time_histogram = _Histogram(self.DURATION_BUCKETS_IN_SECONDS)
+        self._tasks_total = {'finished': 0, 'failed': 0, 'stopped': 0}
+        self._bytes_written_total = 0
+        self._running_processes = 0
+        self._processes_started_total = 0
+        self._processes_failed_total = 0
+        self._lock = threading.Lock()
+
+    def task_queued(self, active_row):
+        """
+        Records when a task was added to an encode task queue.
+
+        :param active_row: Task or chunk row.
+        """
+        with self._lock:
+            self._queued_times[active_row] = time.monotonic()
+
+    def task_started(self, active_row):
+        """
+        Records how long a task waited in its queue before it started.
+
+        :param active_row: Task or chunk row.
+        """
+        current_time = time.monotonic()
+
+        with self._lock:
+            queued_time = self._queued_times.pop(active_row, None)
+            if queued_time is not None:
+                self._wait_time_histogram.observe(current_time - queued_time)
+
+            self._started_times[active_row] = current_time
+
+    def task_finished(self, active_row):
+        """
+        Records how long a task ran, how it ended, and how many bytes it wrote.
+
+        :param active_row: Task or chunk row.
+        """
+        current_time = time.monotonic()
+
+        with self._lock:
+            started_time = self._started_times.pop(active_row, None)
+            if started_time is not None:
+                self._run_time_histogram.observe(current_time - started_time)
+
+            self._tasks_fps.pop(active_row, None)
+
+            if active_row.stopped:
+                self._tasks_total['stopped'] += 1
+            elif getattr(active_row, 'failed', False):
+                self._tasks_total['failed'] += 1
+            else:
+                self._tasks_total['finished'] += 1
+                self._bytes_written_total += int(active_row.file_size or 0)
+
+    def set_task_fps(self, active_row, fps):
+        """
+        Stores the frames per second of a task's encode process, which the task rows don't keep.
+
+        :param active_row: Task or chunk row.
+        :param fps: Frames per second from ffmpeg's progress output.
+        """
+        self._tasks_fps[active_row] = fps
+
+    def process_started(self):
+        """
+        Counts an ffmpeg encode process that was started.
+        """
+        with self._lock:
+            self._running_processes += 1
+            self._processes_started_total += 1
+
+    def process_finished(self, is_failed):
+        """
+        Counts an ffmpeg encode process that exited.
+
+        :param is_failed: Whether the process exited with an error without being stopped.
+        """
+        with self._lock:
+            self._running_processes -= 1
+
+            if is_failed:
+                self._processes_failed_total += 1
+
+    def get_text(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+
+        self._add_running_tasks_lines(lines)
+        self._add_queue_lines(lines)
+
+        with self._lock:
+            self._add_metric_lines(lines, 'render_watch_tasks_total', 'counter', 'Tasks that ended, by result.',
+                                   [('result="' + result + '"', count) for result, count in self._tasks_total.items()])
+            self._add_metric_lines(lines, 'render_watch_bytes_written_total', 'counter',
+                                   'Bytes written by tasks that finished.', [('', self._bytes_written_total)])
+            self._add_metric_lines(lines, 'render_watch_ffmpeg_processes', 'gauge',
+                                   'Running ffmpeg encode processes.', [('', self._running_processes)])
+            self._add_metric_lines(lines, 'render_watch_ffmpeg_processes_started_total', 'counter',
+                                   'ffmpeg encode processes started.', [('', self._processes_started_total)])
+            self._add_metric_lines(lines, 'render_watch_ffmpeg_processes_failed_total', 'counter',
+                                   'ffmpeg encode processes that exited with an error.',
+                                   [('', self._processes_failed_total)])
+
+            self._add_histogram_lines(lines, 'render_watch_task_wait_seconds',
+                                      'Time tasks waited in an encode task queue.', self._wait_time_histogram)
+            self._add_histogram_lines(lines, 'render_watch_task_run_seconds',
+                                      'Time tasks took to encode.', self._run_time_histogram)
+
+        return '\n'.join(lines) + '\n'
+
+    def _add_running_tasks_lines(self, lines):
+        running_tasks = self.encoder_queue.get_running_tasks()
+
+        task_values = {'progress': [], 'speed': [], 'bitrate_kbps': [], 'bytes_written': [], 'fps': []}
+        for active_row in running_tasks:
+            labels = 'input="' + _escape_label_value(active_row.ffmpeg.input_file) \
+                     + '",output="' + _escape_label_value(active_row.ffmpeg.filename + active_row.ffmpeg.output_container) \
+                     + '"'
+            task_values['progress'].append((labels, active_row.progress))
+            task_values['speed'].append((labels, active_row.speed))
+            task_values['bitrate_kbps'].append((labels, active_row.bitrate))
+            task_values['bytes_written'].append((labels, active_row.file_size))
+            task_values['fps'].append((labels, self._tasks_fps.get(active_row, 0.0)))
+
+        for value_name, values in task_values.items():
+            self._add_metric_lines(lines, 'render_watch_task_' + value_name, 'gauge',
+                                   'Running task\'s ' + value_name.replace('_', ' ') + '.', values)
+
+        self._add_metric_lines(lines, 'render_watch_running_tasks', 'gauge', 'Running tasks.',
+                               [('', len(running_tasks))])
+        self._add_metric_lines(lines, 'render_watch_speed', 'gauge', 'Combined speed of the running tasks.',
+                               [('', sum(speed for labels, speed in task_values['speed']))])
+        self._add_metric_lines(lines, 'render_watch_fps', 'gauge', 'Combined frames per second of the running tasks.',
+                               [('', sum(fps for labels, fps in task_values['fps']))])
+
+        number_of_slots = self._get_number_of_slots()
+        self._add_metric_lines(lines, 'render_watch_slots', 'gauge', 'Tasks that can run at once.',
+                               [('', number_of_slots)])
+        self._add_metric_lines(lines, 'render_watch_slot_utilization', 'gauge',
+                               'Fraction of the slots running an ffmpeg process.',
+                               [('', min(self._running_processes / number_of_slots, 1.0))])
+
+    def _get_number_of_slots(self):
+        if not self.encoder_queue.is_parallel_tasks_enabled:
+            return 1
+
+        concurrency_controller = get_concurrency_controller()
+        if concurrency_controller is not None:
+            return concurrency_controller.number_of_slots
+        if self.encoder_queue.is_per_codec_parallel_tasks_enabled:
+            return max(sum(tuning_profile.get_per_codec_parallel_tasks(self.application_preferences, codec)
+                           for codec in tuning_profile.CODECS), 1)
+        return max(tuning_profile.get_parallel_tasks(self.application_preferences), 1)
+
+    def _add_queue_lines(self, lines):
+        queue_depths = []
+        for encode_task_name, encode_task in self.encoder_queue.get_encode_tasks().items():
+            try:
+                queue_depth = sum(encode_task_queue.qsize() for encode_task_queue in encode_task.get_queues())
+            except AttributeError:  # The per codec queues are still being set up
+                queue_depth = 0
+
+            queue_depths.append(('encode_task="' + encode_task_name + '"', queue_depth))
+
+        self._add_metric_lines(lines, 'render_watch_queue_depth', 'gauge', 'Tasks waiting in each encode task queue.',
+                               queue_depths)
+
+        distributed_encode_task = self.encoder_queue.distributed_encode_task
+        if distributed_encode_task is not None:
+            self._add_metric_lines(lines, 'render_watch_chunk_workers', 'gauge', 'Connected chunk workers.',
+                                   [('', len(distributed_encode_task.get_worker_names()))])
+
+    @staticmethod
+    def _add_metric_lines(lines, name, metric_type, help_text, values):
+        lines.append('# HELP ' + name + ' ' + help_text)
+        lines.append('# TYPE ' + name + ' ' + metric_type)
+
+        for labels, value in values:
+            if labels:
+                lines.append(name + '{' + labels + '} ' + str(float(value or 0)))
+            else:
+                lines.append(name + ' ' + str(float(value or 0)))
+
+    @staticmethod
+    def _add_histogram_lines(lines, name, help_text, histogram):
+        lines.append('# HELP ' + name + ' ' + help_text)
+        lines.append('# TYPE ' + name + ' histogram')
+        lines.extend(histogram.get_lines(name))
+
+
+def _escape_label_value(label_value):
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
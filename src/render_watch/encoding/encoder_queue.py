@@ -15,16 +15,23 @@
 # You should have received a copy of the GNU General Public License
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+import os
 import threading
 import time
 
 from render_watch.encoding.encoder import Encoder
+from render_watch.encoding.encoder_metrics import get_encoder_metrics
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log, time_phase
 from render_watch.encoding.standard_encode_task import StandardEncodeTask
 from render_watch.encoding.parallel_encode_task import ParallelEncodeTask
 from render_watch.encoding.per_codec_parallel_encode_task import PerCodecParallelEncodeTask
 from render_watch.encoding.parallel_nvenc_encode_task import ParallelNvencEncodeTask
 from render_watch.encoding.folder_encode_task import FolderEncodeTask
-from render_watch.helpers import ffmpeg_helper
+from render_watch.encoding.distributed_encode_task import DistributedEncodeTask
+from render_watch.encoding.job_store import JobStore
+from render_watch.encoding import tuning_profile
+from render_watch.helpers import ffmpeg_helper, segment_helper
+from render_watch.startup.application_preferences import ApplicationPreferences
 
 
 class EncoderQueue:
@@ -32,7 +39,16 @@ class EncoderQueue:
     Queues Gtk.ListboxRow widgets from the active page to sends them to the encoder.
     """
 
-    def __init__(self, application_preferences):
+    def __init__(self, application_preferences, job_store=None):
+        """
+        Starts the encode task queues.
+
+        :param application_preferences: Application's preferences.
+        :param job_store: (Default None) Job store to keep queued tasks in, None uses the application's job store.
+        """
+        if application_preferences.tuning_profile is None:
+            application_preferences.tuning_profile = tuning_profile.get_host_profile(application_preferences)
+
         self.application_preferences = application_preferences
         self.is_parallel_tasks_enabled = False
         self.is_per_codec_parallel_tasks_enabled = application_preferences.is_per_codec_parallel_tasks_enabled
@@ -43,6 +59,22 @@ class EncoderQueue:
         self.per_codec_parallel_encode_task = PerCodecParallelEncodeTask(self, application_preferences)
         self.parallel_nvenc_encode_task = ParallelNvencEncodeTask(self)
         self.folder_encode_task = FolderEncodeTask(self, application_preferences)
+        self.distributed_encode_task = None
+
+        if job_store is None:
+            job_store = JobStore(os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
+                                              JobStore.DATABASE_FILE_NAME))
+        self.job_store = job_store
+
+    def start_distributed_encode_task(self, address, token=None):
+        """
+        Sends chunk rows to chunk workers instead of encoding them locally. Raises OSError if the address can't be used,
+        and ValueError if the address is invalid or isn't a loopback address and there's no token.
+
+        :param address: "host:port" to listen for chunk workers on.
+        :param token: (Default None) Token that workers must register with, None lets any local worker register.
+        """
+        self.distributed_encode_task = DistributedEncodeTask(self, address, token)
 
     def add_active_row(self, active_row):
         """
@@ -50,8 +82,47 @@ class EncoderQueue:
 
         :param active_row: Gtk.ListboxRow from the active page's Gtk.Listbox.
         """
+        self.add_active_rows([active_row])
+
+    def add_active_rows(self, active_rows):
+        """
+        Adds a batch of Gtk.ListboxRows from the active page into their encode task queues, in order.
+        Tasks that aren't in the job store yet are added to it in one transaction.
+
+        :param active_rows: List of Gtk.ListboxRows (or their chunk rows) from the active page's Gtk.Listbox.
+        """
+        self._add_jobs(active_rows)
+
+        for active_row in active_rows:
+            self._queue_active_row(active_row)
+
+    def _add_jobs(self, active_rows):
+        new_tasks = {}
+        for active_row in active_rows:
+            task = getattr(active_row, 'active_row', active_row)  # Chunk rows belong to an active page task.
+
+            if task.job_id is None and task not in new_tasks:
+                new_tasks[task] = task is not active_row
+
+        if new_tasks:
+            job_ids = self.job_store.add_jobs([(task.ffmpeg, is_chunked) for task, is_chunked in new_tasks.items()])
+
+            for task, job_id in zip(new_tasks, job_ids):
+                task.job_id = job_id
+
+    def _queue_active_row(self, active_row):
+        encoder_metrics = get_encoder_metrics()
+        if encoder_metrics is not None:
+            encoder_metrics.task_queued(active_row)
+
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            job_timing_log.task_queued(active_row)
+
         if active_row.ffmpeg.watch_folder:
             self.folder_encode_task.add_task(active_row)
+        elif self._is_distributed_task_valid(active_row):
+            self.distributed_encode_task.add_task(active_row)
         elif self._is_per_codec_parallel_tasks_valid():
             self.per_codec_parallel_encode_task.add_task(active_row)
         elif self.is_parallel_tasks_enabled:
@@ -59,6 +130,9 @@ class EncoderQueue:
         else:
             self.standard_encode_task.add_task(active_row)
 
+    def _is_distributed_task_valid(self, active_row):
+        return self.distributed_encode_task is not None and active_row.is_chunk
+
     def _is_per_codec_parallel_tasks_valid(self):
         return self.is_per_codec_parallel_tasks_enabled and self.is_parallel_tasks_enabled
 
@@ -72,12 +146,35 @@ class EncoderQueue:
         with self._running_tasks_lock:
             self.running_tasks.append(active_row)
 
+        encoder_metrics = get_encoder_metrics()
+        if encoder_metrics is not None:
+            encoder_metrics.task_started(active_row)
+
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            job_timing_log.task_started(active_row)
+
+        task = getattr(active_row, 'active_row', active_row)
+        if task.job_id is not None:
+            self.job_store.set_job_state(task.job_id, JobStore.RUNNING_STATE)
+
     def remove_from_running_tasks(self, active_row):
         try:
             with self._running_tasks_lock:
                 self.running_tasks.remove(active_row)
         except ValueError:
             logging.exception('--- TASK NOT IN RUNNING TASKS LIST ---')
+        else:
+            encoder_metrics = get_encoder_metrics()
+            if encoder_metrics is not None:
+                encoder_metrics.task_finished(active_row)
+
+    def get_running_tasks(self):
+        """
+        Returns a copy of the list of running tasks.
+        """
+        with self._running_tasks_lock:
+            return list(self.running_tasks)
 
     def start_folder_task(self, active_row):
         self.folder_encode_task.start_folder_task(active_row)
@@ -129,18 +226,46 @@ class EncoderQueue:
         self.parallel_encode_task.join_queue()
         self.parallel_nvenc_encode_task.join_queue()
 
-    @staticmethod
-    def run_encode_task(active_row):
+    def run_encode_task(self, active_row):
         if active_row.stopped:
             return
 
         ffmpeg = active_row.ffmpeg
 
+        if segment_helper.is_ffmpeg_resumable(ffmpeg, self.application_preferences):
+            self._run_segmented_encode_task(active_row)
+            return
+
         duration_in_seconds = ffmpeg_helper.get_duration_in_seconds(ffmpeg)
         ffmpeg_args = ffmpeg_helper.get_parsed_ffmpeg_args(ffmpeg)
         encode_passes = len(ffmpeg_args)
         Encoder.start_encode_process(active_row, ffmpeg_args, duration_in_seconds, encode_passes)
 
+    def _run_segmented_encode_task(self, active_row):
+        # Continues after the segments that were completed before the task was stopped, then joins all of them.
+        ffmpeg = active_row.ffmpeg
+        segments_directory = segment_helper.get_segments_directory(ffmpeg, self.application_preferences)
+        completed_segments = segment_helper.get_completed_segments(segments_directory)
+        remaining_duration = segment_helper.get_remaining_duration(ffmpeg, completed_segments)
+
+        def join_segments():
+            with time_phase(active_row, JobTiming.JOIN_SEGMENTS_PHASE):
+                return segment_helper.join_segments(ffmpeg, segments_directory)
+
+        if completed_segments:
+            logging.info('--- RESUMING ENCODE AFTER SEGMENT '
+                         + str(completed_segments)
+                         + ': '
+                         + ffmpeg.input_file
+                         + ' ---')
+
+        if remaining_duration <= 0:
+            Encoder.finish_encode_process(active_row, on_encode_finished=join_segments)
+            return
+
+        ffmpeg_args = (segment_helper.get_segment_encode_args(ffmpeg, segments_directory, completed_segments),)
+        Encoder.start_encode_process(active_row, ffmpeg_args, remaining_duration, 1, on_encode_finished=join_segments)
+
     @staticmethod
     def run_folder_encode_task(active_row, child_ffmpeg, watch_folder=False):
         active_row.ffmpeg = child_ffmpeg
@@ -152,6 +277,59 @@ class EncoderQueue:
         encode_passes = len(ffmpeg_args)
         Encoder.start_encode_process(active_row, ffmpeg_args, duration_in_seconds, encode_passes, folder_state=True)
 
+    def move_queued_task(self, active_row, position):
+        """
+        Moves a task that's waiting in its encode task queue to a new position in that queue. A chunked task's queued
+        chunks are moved together. Returns whether any of the task's rows were still waiting.
+
+        :param active_row: Task to move, chunk rows are found through the task they belong to.
+        :param position: New position in the queue, 0 runs the task next.
+        """
+        is_task_moved = False
+
+        for task_queue in self._get_encode_queues():
+            with task_queue.mutex:
+                queued_rows = [row for row in task_queue.queue if getattr(row, 'active_row', row) is active_row]
+
+                for row in queued_rows:
+                    task_queue.queue.remove(row)
+
+                insert_position = min(max(position, 0), len(task_queue.queue))
+                for offset, row in enumerate(queued_rows):
+                    task_queue.queue.insert(insert_position + offset, row)
+
+            is_task_moved = is_task_moved or bool(queued_rows)
+
+        return is_task_moved
+
+    def _get_encode_queues(self):
+        encode_queues = []
+        for encode_task in self.get_encode_tasks().values():
+            encode_queues.extend(encode_task.get_queues())
+        return encode_queues
+
+    def get_encode_tasks(self):
+        """
+        Returns the encode tasks by name. The distributed encode task is only included once it's started.
+        """
+        encode_tasks = {
+            'standard': self.standard_encode_task,
+            'per_codec': self.per_codec_parallel_encode_task,
+            'parallel': self.parallel_encode_task,
+            'nvenc': self.parallel_nvenc_encode_task,
+            'folder': self.folder_encode_task
+        }
+
+        if self.distributed_encode_task is not None:
+            encode_tasks['distributed'] = self.distributed_encode_task
+        return encode_tasks
+
+    def get_unfinished_jobs(self):
+        """
+        Returns the job store's jobs that didn't finish the last time the application ran.
+        """
+        return self.job_store.get_unfinished_jobs()
+
     def kill(self):
         """
         Stops all running encode tasks and empties all encode queues.
@@ -167,6 +345,9 @@ class EncoderQueue:
         self.parallel_nvenc_encode_task.empty_queue()
         self.folder_encode_task.empty_queue()
 
+        if self.distributed_encode_task is not None:
+            self.distributed_encode_task.empty_queue()
+
     def _set_encode_queues_stop_state(self):
         self.standard_encode_task.set_stop_state()
         self.per_codec_parallel_encode_task.set_stop_state()
@@ -174,6 +355,9 @@ class EncoderQueue:
         self.parallel_nvenc_encode_task.set_stop_state()
         self.folder_encode_task.set_stop_state()
 
+        if self.distributed_encode_task is not None:
+            self.distributed_encode_task.set_stop_state()
+
     def _stop_running_tasks(self):
         for active_row in self.running_tasks:
             active_row.task_threading_event.set()
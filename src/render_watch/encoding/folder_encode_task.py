@@ -25,10 +25,9 @@ import queue
 from concurrent.futures import ThreadPoolExecutor
 
 from render_watch.app_formatting.alias import AliasGenerator
-from render_watch.helpers import encoder_helper, directory_helper, auto_crop_helper
+from render_watch.helpers import encoder_helper, directory_helper, auto_crop_helper, main_loop_helper
 from render_watch.ffmpeg.input_information import InputInformation
 from render_watch.encoding.watch_folder import WatchFolder
-from render_watch.startup import GLib
 
 
 class FolderEncodeTask:
@@ -101,7 +100,7 @@ class FolderEncodeTask:
                 break
 
             if self.watch_folder.is_instance_empty(folder_path):
-                GLib.idle_add(active_row.set_idle_state)
+                main_loop_helper.run_on_main_loop(active_row.set_idle_state)
             active_row.started = False
 
             file_path = self.watch_folder.get_instance(folder_path)
@@ -205,6 +204,9 @@ class FolderEncodeTask:
     def join_queue(self):
         self.folder_tasks_queue.join()
 
+    def get_queues(self):
+        return (self.folder_tasks_queue,)
+
     def empty_queue(self):
         while not self.is_queue_empty():
             self.folder_tasks_queue.get()
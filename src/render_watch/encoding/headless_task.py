@@ -0,0 +1,280 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import threading
+
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log, time_phase
+from render_watch.helpers import encoder_helper, task_progress_helper
+
+
+class _TaskInformation:
+    """
+    Stores a task's encode status the same way the active page's rows do, so the encoder can update it.
+    """
+
+    def __init__(self):
+        self.task_information = {
+            'progress': 0.0,
+            'speed': 0.0,
+            'bitrate': 0.0,
+            'filesize': 0.0,
+            'time': 0,
+            'current_time': 0
+        }
+
+    @property
+    def current_time(self):
+        return self.task_information['current_time']
+
+    @current_time.setter
+    def current_time(self, current_time_in_seconds):
+        if current_time_in_seconds:
+            self.task_information['current_time'] = current_time_in_seconds
+
+    @property
+    def progress(self):
+        return self.task_information['progress']
+
+    @progress.setter
+    def progress(self, progress_value):
+        if progress_value is None:
+            return
+
+        self.task_information['progress'] = progress_value
+
+    @property
+    def speed(self):
+        return self.task_information['speed']
+
+    @speed.setter
+    def speed(self, speed_value):
+        if speed_value:
+            self.task_information['speed'] = speed_value
+
+    @property
+    def bitrate(self):
+        return self.task_information['bitrate']
+
+    @bitrate.setter
+    def bitrate(self, bitrate_value):
+        if bitrate_value:
+            self.task_information['bitrate'] = bitrate_value
+
+    @property
+    def file_size(self):
+        return self.task_information['filesize']
+
+    @file_size.setter
+    def file_size(self, file_size_value):
+        if file_size_value:
+            self.task_information['filesize'] = file_size_value
+
+    @property
+    def time(self):
+        return self.task_information['time']
+
+    @time.setter
+    def time(self, time_value):
+        if time_value:
+            self.task_information['time'] = time_value
+
+
+class HeadlessTask(_TaskInformation):
+    """
+    Task that's sent to the encoder queue in headless mode, in place of an active page row.
+
+    Has the same state flags and methods that the encoder uses on active page rows, without any widgets. Chunked tasks
+    are split into HeadlessChunks that concatenate and mux their outputs the same way active page rows do.
+    """
+
+    def __init__(self, ffmpeg, application_preferences, job_store=None):
+        _TaskInformation.__init__(self)
+        self.ffmpeg = ffmpeg
+        self.application_preferences = application_preferences
+        self._folder_path = ffmpeg.input_file  # Folder tasks change ffmpeg to each file they encode.
+        self.chunk_list = []
+        self.audio_chunk = None
+        self.is_chunk = False
+        self.watch_folder = None
+        self.paused = False
+        self.stopped = False
+        self.started = False
+        self.failed = False
+        self.idle = False
+        self.finished = False
+        self.video_chunks_done = False
+        self.audio_chunk_done = False
+        self.job_store = job_store
+        self.job_id = None
+        self.task_threading_event = threading.Event()
+        self.finished_event = threading.Event()
+        self._thread_lock = threading.Lock()
+
+    def get_encoder_tasks(self, is_chunked):
+        """
+        Returns the tasks to send to the encoder queue for this task: its chunks when it's chunked and can be split,
+        otherwise this task itself.
+
+        :param is_chunked: Whether to split this task into chunks.
+        """
+        if is_chunked and not self.ffmpeg.folder_state:
+            chunks = encoder_helper.get_chunks(self.ffmpeg, self.application_preferences)
+
+            if chunks:
+                self.chunk_list = [HeadlessChunk(ffmpeg, (index + 1), self) for index, ffmpeg in enumerate(chunks[:-1])]
+                self.audio_chunk = HeadlessChunk(chunks[-1], len(chunks), self)
+                return self.chunk_list + [self.audio_chunk]
+
+        return [self]
+
+    def update_chunks_task_information(self):
+        """
+        Updates this task's encode status from its chunks' encode status.
+        """
+        if not self.chunk_list:
+            return
+
+        self.bitrate = task_progress_helper.get_chunks_bitrate(self.chunk_list)
+        self.speed = task_progress_helper.get_chunks_speed(self.chunk_list)
+        self.file_size = task_progress_helper.get_chunks_file_size(self.chunk_list)
+        self.time = task_progress_helper.get_chunks_time_estimate(self.chunk_list)
+        self.current_time = task_progress_helper.get_chunks_current_time(self.chunk_list)
+        self.progress = task_progress_helper.get_chunks_progress(self.chunk_list)
+
+    def pause(self):
+        """
+        Pauses this task's encode, the same way an active page row's pause button does.
+        """
+        self.paused = True
+        self.task_threading_event.clear()
+
+    def resume(self):
+        """
+        Resumes this task's paused encode.
+        """
+        self.paused = False
+        self.task_threading_event.set()
+
+    def stop(self):
+        """
+        Stops this task and sets it to the finished state, whether it's running or still waiting in the encoder queue.
+        Stopped tasks are removed from the job store.
+        """
+        self.stopped = True
+        self._remove_job()
+
+        if self.watch_folder is not None:
+            self.watch_folder.stop_and_remove_instance(self._folder_path)
+
+        self.resume()
+        self.set_finished_state()
+
+    def set_start_state(self):
+        self.idle = False
+        self.started = True
+
+    def set_idle_state(self):
+        self.idle = True
+        self.progress = 0.0
+
+    def set_finished_state(self):
+        self.finished = True
+
+        if not self.stopped:
+            self._remove_job()
+
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            job_timing_log.write_job(self)
+
+        self.finished_event.set()
+
+    def _remove_job(self):
+        if self.job_id is not None:
+            self.job_store.remove_job(self.job_id)
+            self.job_id = None
+
+    def chunk_set_start_state(self):
+        with self._thread_lock:
+            if not self.started:
+                self.set_start_state()
+
+    def chunk_set_finished_state(self):
+        with self._thread_lock:
+            for chunk in self.chunk_list:
+                if not chunk.finished or self.stopped:
+                    return
+            if not self.video_chunks_done:
+                with time_phase(self, JobTiming.CONCAT_PHASE):
+                    encoder_helper.concatenate_video_chunks(self.chunk_list, self.ffmpeg, self.application_preferences)
+                self.video_chunks_done = True
+
+            if not self.audio_chunk.finished or self.stopped:
+                return
+            if not self.audio_chunk_done:
+                with time_phase(self, JobTiming.MUX_PHASE):
+                    encoder_helper.mux_audio_chunk(self.audio_chunk, self.ffmpeg, self.application_preferences)
+                self.audio_chunk_done = True
+
+            self.set_finished_state()
+
+
+class HeadlessChunk(_TaskInformation):
+    """
+    Chunk of a HeadlessTask that's sent to the encoder queue in headless mode, in place of a chunk row.
+    """
+
+    def __init__(self, ffmpeg_chunk, chunk_number, active_row):
+        _TaskInformation.__init__(self)
+        self.ffmpeg = ffmpeg_chunk
+        self.chunk_number = chunk_number
+        self.active_row = active_row  # Named like chunk rows' parent so the encoder queue finds the task it belongs to.
+        self.is_chunk = True
+        self.finished = False
+
+    def set_start_state(self):
+        self.active_row.chunk_set_start_state()
+
+    def set_finished_state(self):
+        self.finished = True
+
+        threading.Thread(target=self.active_row.chunk_set_finished_state, daemon=True).start()
+
+    @property
+    def paused(self):
+        return self.active_row.paused
+
+    @property
+    def stopped(self):
+        return self.active_row.stopped
+
+    @stopped.setter
+    def stopped(self, is_stopped):
+        self.active_row.stopped = is_stopped
+
+    @property
+    def failed(self):
+        return self.active_row.failed
+
+    @failed.setter
+    def failed(self, is_failed):
+        self.active_row.failed = is_failed
+
+    @property
+    def task_threading_event(self):
+        return self.active_row.task_threading_event
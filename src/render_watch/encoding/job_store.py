@@ -0,0 +1,238 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class Job:
+    """
+    Stores a job that was loaded from the job store.
+    """
+
+    def __init__(self, job_id, ffmpeg, is_chunked, progress):
+        self.job_id = job_id
+        self.ffmpeg = ffmpeg
+        self.is_chunked = is_chunked
+        self.progress = progress
+
+
+class JobStore:
+    """
+    Keeps the encoder queue's jobs in an SQLite database so they survive restarts and crashes.
+
+    A job is added when its task is sent to the encoder queue and removed when the task finishes or is stopped. Jobs
+    hold their pickled ffmpeg settings, whether they were split into chunks, their state, and their progress. Progress
+    is written in batches every few seconds instead of on every update.
+    """
+
+    DATABASE_FILE_NAME = 'jobs.db'
+    SCHEMA_VERSION = 1
+    PROGRESS_FLUSH_INTERVAL_IN_SECONDS = 5
+
+    QUEUED_STATE = 'queued'
+    RUNNING_STATE = 'running'
+
+    def __init__(self, database_file_path):
+        self._connection = sqlite3.connect(database_file_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._job_states = {}
+        self._pending_progress = {}
+        self._closed_event = threading.Event()
+        self._progress_flush_thread = None
+
+        self._setup_database()
+
+    def _setup_database(self):
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+
+            schema_version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+            if schema_version != self.SCHEMA_VERSION:
+                if schema_version:
+                    logging.warning('--- DROPPING JOBS FROM AN OLDER JOB STORE ---')
+
+                self._connection.execute('DROP TABLE IF EXISTS jobs')
+                self._connection.execute('PRAGMA user_version=' + str(self.SCHEMA_VERSION))
+
+            self._connection.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                                     'job_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                     'state TEXT NOT NULL, '
+                                     'is_chunked INTEGER NOT NULL, '
+                                     'progress REAL NOT NULL DEFAULT 0.0, '
+                                     'settings BLOB NOT NULL, '
+                                     'added_time REAL NOT NULL, '
+                                     'updated_time REAL NOT NULL)')
+
+    def add_job(self, ffmpeg, is_chunked):
+        """
+        Adds a queued job and returns its job ID.
+
+        :param ffmpeg: ffmpeg settings of the job's task.
+        :param is_chunked: Whether the task is split into chunks.
+        """
+        return self.add_jobs([(ffmpeg, is_chunked)])[0]
+
+    def add_jobs(self, jobs):
+        """
+        Adds queued jobs in one transaction and returns their job IDs in the same order.
+
+        :param jobs: List of (ffmpeg settings, is chunked) tuples.
+        """
+        current_time = time.time()
+        rows = [(self.QUEUED_STATE, is_chunked, pickle.dumps(ffmpeg, pickle.HIGHEST_PROTOCOL), current_time, current_time)
+                for ffmpeg, is_chunked in jobs]
+        job_ids = []
+
+        with self._lock:
+            if self._is_closed():
+                return [None] * len(jobs)
+
+            with self._connection:
+                for row in rows:
+                    cursor = self._connection.execute('INSERT INTO jobs '
+                                                      '(state, is_chunked, settings, added_time, updated_time) '
+                                                      'VALUES (?, ?, ?, ?, ?)',
+                                                      row)
+                    job_ids.append(cursor.lastrowid)
+                    self._job_states[cursor.lastrowid] = self.QUEUED_STATE
+
+        return job_ids
+
+    def set_job_state(self, job_id, state):
+        """
+        Changes a job's state. Does nothing if the job is already in that state.
+
+        :param job_id: ID of the job.
+        :param state: QUEUED_STATE or RUNNING_STATE.
+        """
+        with self._lock:
+            if self._is_closed() or self._job_states.get(job_id) == state:
+                return
+
+            with self._connection:
+                self._connection.execute('UPDATE jobs SET state = ?, updated_time = ? WHERE job_id = ?',
+                                         (state, time.time(), job_id))
+            self._job_states[job_id] = state
+
+    def set_job_progress(self, job_id, progress):
+        """
+        Stores a job's progress. Progress is written to the database with the next batch.
+
+        :param job_id: ID of the job.
+        :param progress: Progress of the job's task, from 0.0 to 1.0.
+        """
+        with self._lock:
+            if self._is_closed():
+                return
+
+            self._pending_progress[job_id] = progress
+
+            if self._progress_flush_thread is None:
+                self._progress_flush_thread = threading.Thread(target=self._run_progress_flush_thread, daemon=True)
+                self._progress_flush_thread.start()
+
+    def _run_progress_flush_thread(self):
+        while not self._closed_event.wait(self.PROGRESS_FLUSH_INTERVAL_IN_SECONDS):
+            self.flush_progress()
+
+    def flush_progress(self):
+        """
+        Writes the progress that's waiting for the next batch to the database.
+        """
+        with self._lock:
+            self._flush_progress()
+
+    def _flush_progress(self):
+        if self._is_closed() or not self._pending_progress:
+            return
+
+        current_time = time.time()
+        rows = [(progress, current_time, job_id) for job_id, progress in self._pending_progress.items()]
+        self._pending_progress.clear()
+
+        with self._connection:
+            self._connection.executemany('UPDATE jobs SET progress = ?, updated_time = ? WHERE job_id = ?', rows)
+
+    def remove_job(self, job_id):
+        """
+        Removes a job that finished or was stopped.
+
+        :param job_id: ID of the job.
+        """
+        with self._lock:
+            if self._is_closed():
+                return
+
+            self._pending_progress.pop(job_id, None)
+            self._job_states.pop(job_id, None)
+
+            with self._connection:
+                self._connection.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def get_unfinished_jobs(self):
+        """
+        Returns every job that hasn't finished, in the order they were added. Jobs that were running when the
+        application last closed are queued again. Jobs with settings that can't be loaded anymore are removed.
+        """
+        with self._lock:
+            if self._is_closed():
+                return []
+
+            with self._connection:
+                self._connection.execute('UPDATE jobs SET state = ? WHERE state = ?',
+                                         (self.QUEUED_STATE, self.RUNNING_STATE))
+                rows = self._connection.execute('SELECT job_id, is_chunked, progress, settings '
+                                                'FROM jobs ORDER BY job_id').fetchall()
+
+        jobs = []
+        for job_id, is_chunked, progress, settings in rows:
+            try:
+                jobs.append(Job(job_id, pickle.loads(settings), bool(is_chunked), progress))
+            except Exception:
+                logging.exception('--- FAILED TO LOAD JOB ' + str(job_id) + ' ---')
+
+                self.remove_job(job_id)
+                continue
+
+            with self._lock:
+                self._job_states[job_id] = self.QUEUED_STATE
+
+        return jobs
+
+    def close(self):
+        """
+        Writes any waiting progress and closes the database. Jobs that haven't finished stay in the database for the
+        next time the application starts.
+        """
+        with self._lock:
+            if self._is_closed():
+                return
+
+            self._flush_progress()
+            self._closed_event.set()
+            self._connection.close()
+            self._connection = None
+
+    def _is_closed(self):
+        return self._connection is None
+
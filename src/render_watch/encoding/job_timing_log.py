@@ -0,0 +1,285 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import weakref
+
+
+_job_timing_log = None
+
+
+def set_job_timing_log(job_timing_log):
+    """
+    Makes the encoder, encoder queue, and tasks record their phases in the job timing log. Phases aren't timed until
+    this is called.
+
+    :param job_timing_log: JobTimingLog, or None to stop timing jobs.
+    """
+    global _job_timing_log
+
+    _job_timing_log = job_timing_log
+
+
+def get_job_timing_log():
+    """
+    Returns the JobTimingLog that was set with set_job_timing_log(), or None if jobs aren't timed.
+    """
+    return _job_timing_log
+
+
+@contextlib.contextmanager
+def time_phase(active_row, phase):
+    """
+    Records how long the code in the with statement takes as one of a task's phases. Does nothing if jobs aren't timed.
+
+    :param active_row: Task or chunk row.
+    :param phase: Name of the phase.
+    """
+    job_timing_log = get_job_timing_log()
+
+    if job_timing_log is None:
+        yield
+        return
+
+    start_time = time.monotonic()
+    try:
+        yield
+    finally:
+        job_timing_log.add_phase(active_row, phase, start_time, time.monotonic())
+
+
+class JobTiming:
+    """
+    Stores the phases of one job with monotonic start and end times.
+    """
+
+    PROBE_PHASE = 'probe'
+    AUTO_CROP_PHASE = 'auto_crop'
+    QUEUE_WAIT_PHASE = 'queue_wait'
+    NVENC_WAIT_PHASE = 'nvenc_wait'
+    PASS_PHASE_FORMAT = 'pass_%d'
+    REMOTE_ENCODE_PHASE = 'remote_encode'
+    JOIN_SEGMENTS_PHASE = 'join_segments'
+    CONCAT_PHASE = 'concat'
+    MUX_PHASE = 'mux'
+
+    def __init__(self):
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def add_phase(self, phase, start_time, end_time, chunk_number=None):
+        """
+        Adds a phase that ran from start_time to end_time.
+
+        :param phase: Name of the phase.
+        :param start_time: time.monotonic() when the phase started.
+        :param end_time: time.monotonic() when the phase ended.
+        :param chunk_number: (Default None) Number of the chunk the phase belongs to.
+        """
+        phase_record = {'phase': phase, 'start': start_time, 'end': end_time, 'duration': end_time - start_time}
+        if chunk_number is not None:
+            phase_record['chunk'] = chunk_number
+
+        with self._lock:
+            self.phases.append(phase_record)
+
+    @contextlib.contextmanager
+    def time_phase(self, phase):
+        """
+        Records how long the code in the with statement takes as one of this job's phases.
+
+        :param phase: Name of the phase.
+        """
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, start_time, time.monotonic())
+
+    def get_phases(self):
+        with self._lock:
+            return sorted(self.phases, key=lambda phase_record: phase_record['start'])
+
+
+class JobTimingLog:
+    """
+    Appends one JSON line per job to a rotating file, with the job's phases, final speed, output size, and exit status.
+
+    Tasks and their chunks report their phases as they happen. A task's queue wait ends when it starts running, or
+    when another one of its phases starts first, like waiting for NVENC. The job's line is written when the task is set
+    to the finished state.
+    """
+
+    FILE_NAME = 'job_timings.jsonl'
+    MAX_FILE_SIZE_IN_BYTES = 5 * 1024 * 1024
+    BACKUP_COUNT = 3
+
+    def __init__(self, file_path):
+        """
+        :param file_path: File to append the job lines to. Older lines are rotated to file_path.1, file_path.2, etc.
+        """
+        self.file_path = file_path
+        self._job_timings = weakref.WeakKeyDictionary()
+        self._queued_times = weakref.WeakKeyDictionary()
+        self._written_tasks = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+        self._file_handler = logging.handlers.RotatingFileHandler(file_path,
+                                                                  maxBytes=self.MAX_FILE_SIZE_IN_BYTES,
+                                                                  backupCount=self.BACKUP_COUNT,
+                                                                  delay=True)
+        self._file_handler.setFormatter(logging.Formatter('%(message)s'))
+        self._logger = logging.getLogger('render_watch.job_timings')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._file_handler)
+
+    def add_job(self, task, job_timing):
+        """
+        Uses the phases that were timed before the task was created, like probing its input, for the task's job.
+
+        :param task: Task that was created for the job.
+        :param job_timing: JobTiming with the phases.
+        """
+        with self._lock:
+            self._job_timings[task] = job_timing
+
+    def _get_job_timing(self, active_row):
+        task = getattr(active_row, 'active_row', active_row)  # Chunks are timed with the task they belong to.
+
+        with self._lock:
+            if task in self._written_tasks:  # Stopped tasks are written before their encode process ends.
+                return None
+
+            job_timing = self._job_timings.get(task)
+            if job_timing is None:
+                job_timing = self._job_timings[task] = JobTiming()
+            return job_timing
+
+    def task_queued(self, active_row):
+        """
+        Starts a task's or chunk's queue wait.
+
+        :param active_row: Task or chunk row.
+        """
+        with self._lock:
+            self._queued_times[active_row] = time.monotonic()
+
+    def task_started(self, active_row):
+        """
+        Ends a task's or chunk's queue wait.
+
+        :param active_row: Task or chunk row.
+        """
+        self._end_queue_wait(active_row, time.monotonic())
+
+    def _end_queue_wait(self, active_row, end_time):
+        with self._lock:
+            queued_time = self._queued_times.pop(active_row, None)
+
+        if queued_time is not None:
+            self._add_phase(active_row, JobTiming.QUEUE_WAIT_PHASE, queued_time, end_time)
+
+    def add_phase(self, active_row, phase, start_time, end_time):
+        """
+        Adds a phase of a task or chunk that ran from start_time to end_time.
+
+        :param active_row: Task or chunk row.
+        :param phase: Name of the phase.
+        :param start_time: time.monotonic() when the phase started.
+        :param end_time: time.monotonic() when the phase ended.
+        """
+        self._end_queue_wait(active_row, start_time)
+        self._add_phase(active_row, phase, start_time, end_time)
+
+    def _add_phase(self, active_row, phase, start_time, end_time):
+        job_timing = self._get_job_timing(active_row)
+
+        if job_timing is not None:
+            job_timing.add_phase(phase, start_time, end_time, getattr(active_row, 'chunk_number', None))
+
+    def write_job(self, task):
+        """
+        Writes the task's job line. Does nothing if the job's line was already written.
+
+        :param task: Task that was set to the finished state.
+        """
+        end_time = time.monotonic()
+
+        with self._lock:
+            if task in self._written_tasks:
+                return
+
+            job_timing = self._job_timings.pop(task, None) or JobTiming()
+            self._queued_times.pop(task, None)
+            self._written_tasks.add(task)
+
+        phases = job_timing.get_phases()
+        start_time = phases[0]['start'] if phases else end_time
+        job_record = {
+            'time': time.time(),
+            'input': task.ffmpeg.input_file,
+            'output': self._get_output_file_path(task),
+            'job_id': task.job_id,
+            'chunked': bool(getattr(task, 'chunk_list', None) or getattr(task, 'chunk_row_list', None)),
+            'status': self._get_status(task),
+            'speed': task.speed,
+            'output_size': self._get_output_size(task),
+            'start': start_time,
+            'end': end_time,
+            'wall_time': end_time - start_time,
+            'phases': phases
+        }
+
+        try:
+            self._logger.info(json.dumps(job_record))
+        except Exception:
+            logging.exception('--- FAILED TO WRITE JOB TIMINGS: ' + task.ffmpeg.input_file + ' ---')
+
+    @staticmethod
+    def _get_output_file_path(task):
+        ffmpeg = task.ffmpeg
+        return ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container
+
+    @staticmethod
+    def _get_status(task):
+        if task.stopped:
+            return 'stopped'
+        if task.failed:
+            return 'failed'
+        return 'finished'
+
+    @staticmethod
+    def _get_output_size(task):
+        try:
+            return os.path.getsize(JobTimingLog._get_output_file_path(task))
+        except (OSError, TypeError):
+            return int(task.file_size or 0)
+
+    def close(self):
+        """
+        Closes the log file.
+        """
+        self._logger.removeHandler(self._file_handler)
+        self._file_handler.close()
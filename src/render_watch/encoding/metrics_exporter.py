@@ -0,0 +1,129 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import http.server
+import logging
+import os
+import threading
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Responds to scrapes of the /metrics path with the encoder's metrics.
+    """
+
+    def do_GET(self):
+        if self.path.split('?')[0] != MetricsExporter.METRICS_PATH:
+            self.send_error(404)
+            return
+
+        metrics_text = self.server.encoder_metrics.get_text().encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', MetricsExporter.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(metrics_text)))
+        self.end_headers()
+        self.wfile.write(metrics_text)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes happen every few seconds and would fill the log.
+
+
+class MetricsExporter:
+    """
+    Exports the encoder's metrics in the Prometheus text format on a localhost HTTP port, to a file that's rewritten
+    every few seconds, or both.
+
+    The file is replaced in one step, so tools that read it, like node_exporter's textfile collector, never see a
+    partly written file.
+    """
+
+    METRICS_PATH = '/metrics'
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    LISTEN_HOST = '127.0.0.1'
+    FILE_WRITE_INTERVAL_IN_SECONDS = 5
+
+    def __init__(self, encoder_metrics, port=None, file_path=None):
+        """
+        :param encoder_metrics: EncoderMetrics to export.
+        :param port: (Default None) Localhost port to serve the metrics on.
+        :param file_path: (Default None) File to write the metrics to.
+        """
+        self.encoder_metrics = encoder_metrics
+        self.port = port
+        self.file_path = file_path
+        self._metrics_server = None
+        self._stopped_event = threading.Event()
+        self._file_lock = threading.Lock()
+
+    def is_enabled(self):
+        """
+        Returns whether a port or a file to export the metrics to was given.
+        """
+        return self.port is not None or self.file_path is not None
+
+    def start(self):
+        """
+        Starts serving and writing the metrics. Raises OSError if the port can't be used.
+        """
+        if self.port is not None:
+            self._metrics_server = http.server.ThreadingHTTPServer((self.LISTEN_HOST, self.port),
+                                                                   _MetricsRequestHandler)
+            self._metrics_server.daemon_threads = True
+            self._metrics_server.encoder_metrics = self.encoder_metrics
+
+            threading.Thread(target=self._metrics_server.serve_forever, daemon=True).start()
+
+            logging.info('--- SERVING METRICS ON ' + self.LISTEN_HOST + ':' + str(self.port) + ' ---')
+
+        if self.file_path is not None:
+            threading.Thread(target=self._run_file_write_thread, daemon=True).start()
+
+    def _run_file_write_thread(self):
+        while True:
+            self.write_file()
+
+            if self._stopped_event.wait(self.FILE_WRITE_INTERVAL_IN_SECONDS):
+                break
+
+    def write_file(self):
+        """
+        Replaces the metrics file with the current metrics.
+        """
+        temp_file_path = self.file_path + '.tmp'
+
+        try:
+            with self._file_lock:
+                with open(temp_file_path, 'w') as temp_file:
+                    temp_file.write(self.encoder_metrics.get_text())
+
+                os.replace(temp_file_path, self.file_path)
+        except OSError:
+            logging.exception('--- FAILED TO WRITE METRICS FILE: ' + self.file_path + ' ---')
+
+    def stop(self):
+        """
+        Stops serving the metrics and writes the metrics file one last time.
+        """
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server.server_close()
+
+        if self.file_path is not None and not self._stopped_event.is_set():
+            self._stopped_event.set()
+            self.write_file()
@@ -22,7 +22,8 @@ import queue
 
 from concurrent.futures import ThreadPoolExecutor
 
-from render_watch.startup import GLib
+from render_watch.encoding import tuning_profile
+from render_watch.helpers import main_loop_helper
 
 
 class ParallelEncodeTask:
@@ -33,7 +34,7 @@ class ParallelEncodeTask:
     def __init__(self, encoder_queue, application_preferences):
         self.encoder_queue = encoder_queue
         self.parallel_tasks_queue = queue.Queue()
-        self.number_of_tasks = application_preferences.parallel_tasks
+        self.number_of_tasks = tuning_profile.get_parallel_tasks(application_preferences)
 
         self.parallel_tasks_startup_thread = threading.Thread(target=self._start_parallel_tasks_thread,
                                                               args=(),
@@ -60,7 +61,7 @@ class ParallelEncodeTask:
                     logging.exception('--- FAILED TO RUN PARALLEL TASK PROCESS ---')
                 finally:
                     if active_row.ffmpeg.folder_state and not active_row.ffmpeg.watch_folder:
-                        GLib.idle_add(active_row.set_finished_state)
+                        main_loop_helper.run_on_main_loop(active_row.set_finished_state)
                     if not active_row.ffmpeg.watch_folder:
                         self.encoder_queue.remove_from_running_tasks(active_row)
 
@@ -103,6 +104,9 @@ class ParallelEncodeTask:
     def join_queue(self):
         self.parallel_tasks_queue.join()
 
+    def get_queues(self):
+        return (self.parallel_tasks_queue,)
+
     def empty_queue(self):
         while not self.is_queue_empty():
             self.parallel_tasks_queue.get()
@@ -23,8 +23,9 @@ import queue
 
 from concurrent.futures import ThreadPoolExecutor
 
+from render_watch.encoding.job_timing_log import JobTiming, time_phase
 from render_watch.helpers.nvidia_helper import NvidiaHelper
-from render_watch.startup import GLib
+from render_watch.helpers import main_loop_helper
 
 
 class ParallelNvencEncodeTask:
@@ -65,7 +66,7 @@ class ParallelNvencEncodeTask:
             self._run_parallel_nvenc_encode_task(active_row)
 
             if active_row.ffmpeg.folder_state and not active_row.ffmpeg.watch_folder:
-                GLib.idle_add(active_row.set_finished_state)
+                main_loop_helper.run_on_main_loop(active_row.set_finished_state)
             if not active_row.ffmpeg.watch_folder:
                 self.encoder_queue.remove_from_running_tasks(active_row)
 
@@ -73,11 +74,12 @@ class ParallelNvencEncodeTask:
 
     @staticmethod
     def wait_until_nvenc_available(active_row):
-        while True:
-            if NvidiaHelper.is_nvenc_available() or active_row.stopped:
-                break
+        with time_phase(active_row, JobTiming.NVENC_WAIT_PHASE):
+            while True:
+                if NvidiaHelper.is_nvenc_available() or active_row.stopped:
+                    break
 
-            time.sleep(3)
+                time.sleep(3)
 
     def _run_parallel_nvenc_encode_task(self, active_row):
         if active_row.stopped:
@@ -110,6 +112,9 @@ class ParallelNvencEncodeTask:
     def join_queue(self):
         self.parallel_nvenc_tasks_queue.join()
 
+    def get_queues(self):
+        return (self.parallel_nvenc_tasks_queue,)
+
     def empty_queue(self):
         while not self.is_queue_empty():
             self.parallel_nvenc_tasks_queue.get()
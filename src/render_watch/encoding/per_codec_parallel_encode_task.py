@@ -23,8 +23,9 @@ import queue
 from concurrent.futures import ThreadPoolExecutor
 from itertools import repeat
 
+from render_watch.encoding import tuning_profile
 from render_watch.helpers.nvidia_helper import NvidiaHelper
-from render_watch.startup import GLib
+from render_watch.helpers import main_loop_helper
 
 
 class PerCodecParallelEncodeTask:
@@ -53,7 +54,7 @@ class PerCodecParallelEncodeTask:
 
     def _setup_x264_codec_queue(self, application_preferences):
         self.x264_codec_queue = queue.Queue()
-        self.number_of_x264_tasks = application_preferences.per_codec_parallel_tasks['x264']
+        self.number_of_x264_tasks = tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x264')
 
         with ThreadPoolExecutor(max_workers=self.number_of_x264_tasks) as future_executor:
             future_executor.map(self._parse_per_codec_queue,
@@ -62,7 +63,7 @@ class PerCodecParallelEncodeTask:
 
     def _setup_x265_codec_queue(self, application_preferences):
         self.x265_codec_queue = queue.Queue()
-        self.number_of_x265_tasks = application_preferences.per_codec_parallel_tasks['x265']
+        self.number_of_x265_tasks = tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x265')
 
         with ThreadPoolExecutor(max_workers=self.number_of_x265_tasks) as future_executor:
             future_executor.map(self._parse_per_codec_queue,
@@ -83,7 +84,7 @@ class PerCodecParallelEncodeTask:
 
     def _setup_vp9_codec_queue(self, application_preferences):
         self.vp9_codec_queue = queue.Queue()
-        self.number_of_vp9_tasks = application_preferences.per_codec_parallel_tasks['vp9']
+        self.number_of_vp9_tasks = tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'vp9')
 
         with ThreadPoolExecutor(max_workers=self.number_of_vp9_tasks) as future_executor:
             future_executor.map(self._parse_per_codec_queue,
@@ -124,7 +125,7 @@ class PerCodecParallelEncodeTask:
                 finally:
                     if not nvenc_skip:
                         if active_row.ffmpeg.folder_state and not active_row.ffmpeg.watch_folder:
-                            GLib.idle_add(active_row.set_finished_state)
+                            main_loop_helper.run_on_main_loop(active_row.set_finished_state)
                         if not active_row.ffmpeg.watch_folder:
                             self.encoder_queue.remove_from_running_tasks(active_row)
 
@@ -212,18 +213,20 @@ class PerCodecParallelEncodeTask:
             codec_queue.put(False)
 
     def is_queue_empty(self):
-        return self.x264_codec_queue.empty() \
-               and self.x265_codec_queue.empty() \
-               and self.nvenc_codec_queue.empty() \
-               and self.vp9_codec_queue.empty() \
-               and self.copy_codec_queue.empty()
+        return all(codec_queue.empty() for codec_queue in self.get_queues())
 
     def join_queue(self):
-        self.x264_codec_queue.join()
-        self.x265_codec_queue.join()
-        self.nvenc_codec_queue.join()
-        self.vp9_codec_queue.join()
-        self.copy_codec_queue.join()
+        # The NVENC queue only exists when NVENC is supported.
+        for codec_queue in self.get_queues():
+            codec_queue.join()
+
+    def get_queues(self):
+        codec_queues = [self.x264_codec_queue, self.x265_codec_queue, self.vp9_codec_queue, self.copy_codec_queue]
+
+        if NvidiaHelper.is_nvenc_supported():
+            codec_queues.append(self.nvenc_codec_queue)
+
+        return codec_queues
 
     def empty_queue(self):
         self._empty_codec_queue(self.x264_codec_queue)
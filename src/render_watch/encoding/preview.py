@@ -18,16 +18,29 @@
 
 import subprocess
 import logging
+import threading
+import time
 import re
+import os
 import copy
 
 from render_watch.app_formatting import format_converter
+from render_watch.encoding.preview_cache import PreviewCache
 from render_watch.ffmpeg.settings import Settings
 from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.helpers import ffmpeg_helper, profiling_helper
 from render_watch.helpers.logging_helper import LoggingHelper
 from render_watch.startup import GLib
 
 
+PIPED_PREVIEW_OUTPUT_ARGS = ['-f', 'matroska', 'pipe:1']
+PIPED_PREVIEW_INPUT = 'pipe:0'
+VID_PREVIEW_POLL_INTERVAL = 0.1
+
+_preview_caches = {}
+_preview_caches_lock = threading.Lock()
+
+
 def run_preview_process(generate_preview_func):
     def process_args(*args, **kwargs):
         args_list, output_file = generate_preview_func(*args, **kwargs)
@@ -41,21 +54,17 @@ def run_preview_process(generate_preview_func):
                     bufsize=1) as process:
                 process_return_code = process.wait()
             if process_return_code != 0:
-                output_args = ''
-
-                for index, arg in enumerate(args):
-                    output_args += arg
-
-                    if index != len(args) - 1:
-                        output_args += ' '
-
-                logging.error('--- PREVIEW FAILED ---\n' + output_args)
+                _log_preview_process_failure(args)
 
                 return None
         return output_file
     return process_args
 
 
+def _log_preview_process_failure(args):
+    logging.error('--- PREVIEW FAILED ---\n' + ' '.join(args))
+
+
 @run_preview_process
 def generate_crop_preview_file(ffmpeg, preferences, preview_height=None, start_time=None):
     """
@@ -66,13 +75,28 @@ def generate_crop_preview_file(ffmpeg, preferences, preview_height=None, start_t
     :param preview_height: (Default None) Specifies a specific height for the preview image (maintains aspect ratio).
     :param start_time: (Default None) Specifies what time in the video to make the preview image.
     """
+    return get_crop_preview_args_list(ffmpeg, preferences, preview_height, start_time)
+
+
+def get_crop_preview_args_list(ffmpeg, preferences, preview_height=None, start_time=None, output_file_path=None):
+    """
+    Returns the ffmpeg args list for a crop preview image and the image's file path, without running them.
+
+    :param ffmpeg: ffmpeg settings.
+    :param preferences: Application preferences.
+    :param preview_height: (Default None) Specifies a specific height for the preview image (maintains aspect ratio).
+    :param start_time: (Default None) Specifies what time in the video to make the preview image.
+    :param output_file_path: (Default None) Specifies where to write the preview image instead of the temp directory.
+    """
     origin_width, origin_height = ffmpeg.width_origin, ffmpeg.height_origin
     preview_width, preview_height = _get_crop_preview_dimensions(ffmpeg, origin_width, origin_height, preview_height)
 
     if start_time is None:
         start_time = _get_crop_preview_start_time(ffmpeg)
 
-    output_file_path = preferences.temp_directory + '/' + ffmpeg.temp_file_name + '_crop_preview.tiff'
+    if output_file_path is None:
+        output_file_path = preferences.temp_directory + '/' + ffmpeg.temp_file_name + '_crop_preview.tiff'
+
     crop_preview_args = _get_crop_preview_args(ffmpeg,
                                                start_time,
                                                preview_width,
@@ -81,6 +105,39 @@ def generate_crop_preview_file(ffmpeg, preferences, preview_height=None, start_t
     return (crop_preview_args,), output_file_path
 
 
+@profiling_helper.timed_span('preview.generate_thumbnail_file')
+def generate_thumbnail_file(ffmpeg, application_preferences, thumbnail_cache, thumbnail_height):
+    """
+    Creates a crop preview thumbnail and returns the image's file path.
+    Thumbnails are kept in the thumbnail cache, keyed by the input file, the preview time and the thumbnail's size.
+
+    :param ffmpeg: ffmpeg settings.
+    :param application_preferences: Application preferences.
+    :param thumbnail_cache: PreviewCache that stores thumbnails.
+    :param thumbnail_height: Height of the thumbnail (maintains aspect ratio).
+    """
+    # Every thumbnail worker writes its own file, so two requests for the same settings never write to the same file.
+    output_file = application_preferences.temp_directory + '/' + ffmpeg.temp_file_name + '_thumbnail_' \
+        + str(threading.get_ident()) + '.png'
+    args_list, output_file = get_crop_preview_args_list(ffmpeg,
+                                                        application_preferences,
+                                                        preview_height=thumbnail_height,
+                                                        output_file_path=output_file)
+
+    canonical_args_list = [ffmpeg_helper.get_canonical_ffmpeg_args(args, output_file) for args in args_list]
+    thumbnail_cache_key = PreviewCache.get_key(canonical_args_list,
+                                               ffmpeg.input_file,
+                                               _get_crop_preview_start_time(ffmpeg))
+    cached_output_file = thumbnail_cache.get(thumbnail_cache_key, '.png')
+    if cached_output_file:
+        return cached_output_file
+
+    output_file = _run_preview_args_list(args_list, output_file)
+    if output_file is None:
+        return None
+    return thumbnail_cache.put(thumbnail_cache_key, output_file)
+
+
 def _get_crop_preview_start_time(ffmpeg):
     return ffmpeg.duration_origin / 2
 
@@ -164,10 +221,11 @@ def _get_trim_preview_args(ffmpeg, start_time, output_file_path):
     return args
 
 
-@run_preview_process
 def generate_preview_file(ffmpeg, start_time, application_preferences):
     """
     Creates a preview image at the start time and returns the image's file path.
+    Previews are cached by their effective settings, so a preview that was already made is returned without encoding.
+    Single pass encodes are piped straight into the image extractor instead of going through a temp file.
 
     :param ffmpeg: The ffmpeg settings object.
     :param start_time: Time in the video to make a preview.
@@ -177,16 +235,96 @@ def generate_preview_file(ffmpeg, start_time, application_preferences):
     output_file = application_preferences.temp_directory + '/' + ffmpeg_copy.temp_file_name + '_preview.tiff'
     preview_width, preview_height = _get_preview_dimensions(ffmpeg_copy)
     _setup_preview_ffmpeg_settings(ffmpeg_copy, start_time, application_preferences)
-    
-    args_list = []
+
     preview_ffmpeg_args = _get_preview_ffmpeg_settings_args(ffmpeg_copy)
-    preview_args = _get_preview_args(ffmpeg_copy, preview_width, preview_height, output_file)
-    for args in preview_ffmpeg_args:
-        args_list.append(args)
-    args_list.append(preview_args)
+    if len(preview_ffmpeg_args) == 1:
+        args_list = _get_piped_preview_args_list(preview_ffmpeg_args[0], preview_width, preview_height, output_file)
+        run_preview_func = _run_piped_preview_process
+    else:
+        encoded_file = ffmpeg_copy.output_directory + ffmpeg_copy.filename + ffmpeg_copy.output_container
+        args_list = list(preview_ffmpeg_args)
+        args_list.append(_get_preview_args(encoded_file, preview_width, preview_height, output_file))
+        run_preview_func = _run_preview_args_list
+
+    preview_cache = _get_preview_cache(application_preferences)
+    preview_cache_key = _get_preview_cache_key(ffmpeg_copy, args_list, output_file, start_time, application_preferences)
+    cached_output_file = preview_cache.get(preview_cache_key, '.tiff')
+    if cached_output_file:
+        return cached_output_file
+
+    output_file = run_preview_func(args_list, output_file)
+    if output_file is None:
+        return None
+    return preview_cache.put(preview_cache_key, output_file)
+
+
+@run_preview_process
+def _run_preview_args_list(args_list, output_file):
     return args_list, output_file
 
 
+def _get_piped_preview_args_list(encode_args, preview_width, preview_height, output_file):
+    piped_encode_args = _get_piped_preview_encode_args(encode_args)
+    preview_args = _get_preview_args(PIPED_PREVIEW_INPUT, preview_width, preview_height, output_file)
+    return [piped_encode_args, preview_args]
+
+
+def _get_piped_preview_encode_args(encode_args):
+    # Drop the output file path and any mp4 only flags, then write a streamable container to stdout.
+    piped_encode_args = encode_args[:-1]
+
+    if '-movflags' in piped_encode_args:
+        movflags_index = piped_encode_args.index('-movflags')
+        del piped_encode_args[movflags_index:movflags_index + 2]
+
+    piped_encode_args.extend(PIPED_PREVIEW_OUTPUT_ARGS)
+    return piped_encode_args
+
+
+def _run_piped_preview_process(args_list, output_file):
+    encode_args, preview_args = args_list
+
+    with subprocess.Popen(encode_args,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL) as encode_process:
+        with subprocess.Popen(preview_args,
+                              stdin=encode_process.stdout,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL) as preview_process:
+            encode_process.stdout.close()  # Lets the encoder see a broken pipe if the extractor exits early.
+            preview_return_code = preview_process.wait()
+        encode_return_code = encode_process.wait()
+
+    if encode_return_code != 0:
+        _log_preview_process_failure(encode_args)
+
+        return None
+    if preview_return_code != 0:
+        _log_preview_process_failure(preview_args)
+
+        return None
+    return output_file
+
+
+def _get_preview_cache(application_preferences):
+    cache_directory = os.path.join(application_preferences.temp_directory, PreviewCache.CACHE_DIRECTORY_NAME)
+
+    with _preview_caches_lock:
+        if cache_directory not in _preview_caches:
+            _preview_caches[cache_directory] = PreviewCache(cache_directory)
+        return _preview_caches[cache_directory]
+
+
+def _get_preview_cache_key(ffmpeg, args_list, output_file, start_time, application_preferences):
+    canonical_args_list = []
+    for args in args_list:
+        canonical_args_list.append(ffmpeg_helper.get_canonical_ffmpeg_args(args,
+                                                                           output_file,
+                                                                           application_preferences.temp_directory,
+                                                                           ffmpeg.temp_file_name))
+    return PreviewCache.get_key(canonical_args_list, ffmpeg.input_file, start_time)
+
+
 def _setup_preview_ffmpeg_settings(ffmpeg, start_time, application_preferences):
     ffmpeg.trim_settings = _get_preview_trim_settings(ffmpeg, start_time)
     ffmpeg.output_directory = application_preferences.temp_directory + '/'
@@ -234,10 +372,10 @@ def _get_preview_ffmpeg_settings_args(ffmpeg):
     return ffmpeg_args
 
 
-def _get_preview_args(ffmpeg, preview_width, preview_height, output_file_path):
+def _get_preview_args(preview_input, preview_width, preview_height, output_file_path):
     preview_args = Settings.FFMPEG_INIT_ARGS.copy()
     preview_args.append('-i')
-    preview_args.append(ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container)
+    preview_args.append(preview_input)
     preview_args.append('-f')
     preview_args.append('image2')
     preview_args.append('-an')
@@ -258,6 +396,9 @@ def start_vid_preview(ffmpeg,
     """
     Encodes a video preview and plays the preview using ffplay.
 
+    When looping previews are disabled, the final encode pass is piped into ffplay so the preview
+    starts playing while it's still encoding. Otherwise the whole preview is encoded before ffplay loops it.
+
     :param ffmpeg: ffmpeg settings.
     :param start_time: The time in the video to start the preview.
     :param preview_duration: The duration of the video preview.
@@ -270,7 +411,14 @@ def start_vid_preview(ffmpeg,
     output_file = application_preferences.temp_directory + '/' + file_name + ffmpeg_copy.output_container
     _setup_vid_preview_ffmpeg_settings(ffmpeg_copy, file_name, start_time, preview_duration, application_preferences)
 
-    is_vid_preview_successful = _run_vid_preview_encode_process(ffmpeg_copy,
+    if application_preferences.is_vid_preview_loop_enabled:
+        _start_looping_vid_preview(ffmpeg_copy, output_file, preview_duration, preview_page_handlers, stop_preview)
+    else:
+        _start_streaming_vid_preview(ffmpeg_copy, preview_duration, preview_page_handlers, stop_preview)
+
+
+def _start_looping_vid_preview(ffmpeg, output_file, preview_duration, preview_page_handlers, stop_preview):
+    is_vid_preview_successful = _run_vid_preview_encode_process(ffmpeg,
                                                                 preview_duration,
                                                                 preview_page_handlers,
                                                                 stop_preview)
@@ -280,6 +428,25 @@ def start_vid_preview(ffmpeg,
         _run_vid_preview_process(output_file, stop_preview)
 
 
+def _start_streaming_vid_preview(ffmpeg, preview_duration, preview_page_handlers, stop_preview):
+    ffmpeg_args = _get_vid_preview_ffmpeg_args(ffmpeg)
+    passes = len(ffmpeg_args)
+
+    for encode_pass, args in enumerate(ffmpeg_args[:-1]):
+        if not _run_vid_preview_encode_pass(ffmpeg, args, encode_pass, passes, preview_duration,
+                                            preview_page_handlers, stop_preview):
+            _reset_vid_preview_widgets(preview_page_handlers)
+            return
+
+    _run_streaming_vid_preview_process(ffmpeg,
+                                       ffmpeg_args[-1],
+                                       passes - 1,
+                                       passes,
+                                       preview_duration,
+                                       preview_page_handlers,
+                                       stop_preview)
+
+
 def _setup_vid_preview_ffmpeg_settings(ffmpeg, file_name, start_time, preview_duration, application_preferences):
     ffmpeg.trim_settings = _get_vid_preview_trim_settings(start_time, preview_duration)
     ffmpeg.filename = file_name
@@ -299,44 +466,107 @@ def _reset_vid_preview_widgets(preview_page_handlers):
 
 def _run_vid_preview_encode_process(ffmpeg, preview_duration, preview_page_handlers, stop_preview):
     ffmpeg_args = _get_vid_preview_ffmpeg_args(ffmpeg)
-    process_return_code = -1
 
     for encode_pass, args in enumerate(ffmpeg_args):
-        with subprocess.Popen(
-                args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1) as vid_preview_encode_process:
-            while True:
-                if stop_preview():
-                    vid_preview_encode_process.terminate()
-                    break
-
-                process_stdout = vid_preview_encode_process.stdout.readline().strip()
-                if process_stdout == '' and vid_preview_encode_process.poll() is not None:
-                    break
-
-                try:
-                    current_timecode = re.search('time=\d+:\d+:\d+\.\d+|time=\s+\d+:\d+:\d+\.\d+',
-                                                 process_stdout).group().split('=')[1]
-                    current_time_in_seconds = format_converter.get_seconds_from_timecode(current_timecode)
-
-                    if encode_pass == 0:
-                        progress = (current_time_in_seconds / preview_duration) / len(ffmpeg_args)
-                    else:
-                        progress = .5 + ((current_time_in_seconds / preview_duration) / len(ffmpeg_args))
-
-                    GLib.idle_add(preview_page_handlers.set_progress_fraction, progress)
-                except:
-                    continue
-
-            process_return_code = vid_preview_encode_process.wait()
-        if process_return_code != 0:
-            LoggingHelper.log_encoder_error(ffmpeg, '--- VIDEO PREVIEW ENCODE PROCESS FAILED ---')
+        if not _run_vid_preview_encode_pass(ffmpeg, args, encode_pass, len(ffmpeg_args), preview_duration,
+                                            preview_page_handlers, stop_preview):
+            return False
+    return True
+
+
+def _run_vid_preview_encode_pass(ffmpeg,
+                                 args,
+                                 encode_pass,
+                                 passes,
+                                 preview_duration,
+                                 preview_page_handlers,
+                                 stop_preview):
+    with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1) as vid_preview_encode_process:
+        _read_vid_preview_encode_progress(vid_preview_encode_process,
+                                          vid_preview_encode_process.stdout,
+                                          encode_pass,
+                                          passes,
+                                          preview_duration,
+                                          preview_page_handlers,
+                                          stop_preview)
+        process_return_code = vid_preview_encode_process.wait()
+
+    if process_return_code != 0:
+        LoggingHelper.log_encoder_error(ffmpeg, '--- VIDEO PREVIEW ENCODE PROCESS FAILED ---')
     return process_return_code == 0
 
 
+def _read_vid_preview_encode_progress(vid_preview_encode_process,
+                                      process_output,
+                                      encode_pass,
+                                      passes,
+                                      preview_duration,
+                                      preview_page_handlers,
+                                      stop_preview):
+    while True:
+        if stop_preview():
+            vid_preview_encode_process.terminate()
+            break
+
+        process_stdout = process_output.readline().strip()
+        if process_stdout == '' and vid_preview_encode_process.poll() is not None:
+            break
+
+        try:
+            current_timecode = re.search('time=\d+:\d+:\d+\.\d+|time=\s+\d+:\d+:\d+\.\d+',
+                                         process_stdout).group().split('=')[1]
+            current_time_in_seconds = format_converter.get_seconds_from_timecode(current_timecode)
+            progress = (encode_pass + (current_time_in_seconds / preview_duration)) / passes
+
+            GLib.idle_add(preview_page_handlers.set_progress_fraction, progress)
+        except:
+            continue
+
+
+def _run_streaming_vid_preview_process(ffmpeg,
+                                       args,
+                                       encode_pass,
+                                       passes,
+                                       preview_duration,
+                                       preview_page_handlers,
+                                       stop_preview):
+    encode_args = _get_piped_preview_encode_args(args)
+    preview_args = _get_vid_preview_args(PIPED_PREVIEW_INPUT, is_looping=False)
+
+    with subprocess.Popen(
+            encode_args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1) as vid_preview_encode_process:
+        with subprocess.Popen(
+                preview_args,
+                stdin=vid_preview_encode_process.stdout,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL) as vid_preview_process:
+            vid_preview_encode_process.stdout.close()  # Lets the encoder see a broken pipe if ffplay is closed.
+            _read_vid_preview_encode_progress(vid_preview_encode_process,
+                                              vid_preview_encode_process.stderr,
+                                              encode_pass,
+                                              passes,
+                                              preview_duration,
+                                              preview_page_handlers,
+                                              stop_preview)
+            encode_return_code = vid_preview_encode_process.wait()
+            _reset_vid_preview_widgets(preview_page_handlers)
+
+            is_vid_preview_closed = vid_preview_process.poll() is not None
+            if encode_return_code != 0 and not is_vid_preview_closed and not stop_preview():
+                LoggingHelper.log_encoder_error(ffmpeg, '--- VIDEO PREVIEW ENCODE PROCESS FAILED ---')
+
+            _wait_for_vid_preview_process(vid_preview_process, stop_preview)
+
+
 def _get_vid_preview_ffmpeg_args(ffmpeg):
     ffmpeg_args = [ffmpeg.get_args()]
     if '&&' in ffmpeg_args[0]:
@@ -355,22 +585,31 @@ def _run_vid_preview_process(output_file_path, stop_preview):
             stderr=subprocess.STDOUT,
             universal_newlines=True,
             bufsize=1) as vid_preview_process:
-        while vid_preview_process.poll() is None:
-            if stop_preview():
-                vid_preview_process.terminate()
-                break
+        _wait_for_vid_preview_process(vid_preview_process, stop_preview)
 
     process_return_code = vid_preview_process.poll()
     if process_return_code != 0:
         logging.error('--- VIDEO PREVIEW FAILED ---\n' + str(preview_args))
 
 
-def _get_vid_preview_args(output_file_path):
+def _wait_for_vid_preview_process(vid_preview_process, stop_preview):
+    while vid_preview_process.poll() is None:
+        if stop_preview():
+            vid_preview_process.terminate()
+            break
+
+        time.sleep(VID_PREVIEW_POLL_INTERVAL)
+
+
+def _get_vid_preview_args(preview_input, is_looping=True):
     preview_args = Settings.FFPLAY_INIT_ARGS.copy()
     preview_args.append('-i')
-    preview_args.append(output_file_path)
-    preview_args.append('-loop')
-    preview_args.append('0')
+    preview_args.append(preview_input)
+
+    if is_looping:
+        preview_args.append('-loop')
+        preview_args.append('0')
+
     preview_args.append('-loglevel')
     preview_args.append('quiet')
     return preview_args
@@ -0,0 +1,180 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+
+class PreviewCache:
+    """
+    Stores preview results in a directory, keyed by a hash of the settings that produced them.
+    Least recently used entries are removed once the directory grows past its size limit.
+    """
+
+    CACHE_DIRECTORY_NAME = 'preview_cache'
+    PART_FILE_EXTENSION = '.part'
+    DEFAULT_MAX_SIZE_IN_BYTES = 256 * 1048576
+
+    def __init__(self, cache_directory, max_size_in_bytes=DEFAULT_MAX_SIZE_IN_BYTES):
+        self.cache_directory = cache_directory
+        self.max_size_in_bytes = max_size_in_bytes
+        self._entries = OrderedDict()
+        self._total_size_in_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_directory, exist_ok=True)
+        self._load_existing_entries()
+
+    def _load_existing_entries(self):
+        existing_entries = []
+        for file_name in os.listdir(self.cache_directory):
+            file_path = os.path.join(self.cache_directory, file_name)
+            if file_name.endswith(self.PART_FILE_EXTENSION):
+                continue
+
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            existing_entries.append((file_stat.st_mtime, file_name, file_stat.st_size))
+
+        for _, file_name, file_size in sorted(existing_entries):
+            self._entries[file_name] = file_size
+            self._total_size_in_bytes += file_size
+
+    @staticmethod
+    def get_key(canonical_args_list, input_file_path, start_time):
+        """
+        Returns a hash that identifies a preview result.
+
+        :param canonical_args_list: List of ffmpeg args lists with output paths removed.
+        :param input_file_path: File path of the preview's input.
+        :param start_time: Time in the input that the preview was made at.
+        """
+        key_hash = hashlib.sha256()
+
+        for args in canonical_args_list:
+            key_hash.update('\x1f'.join(args).encode())
+            key_hash.update(b'\x1e')
+
+        key_hash.update(PreviewCache._get_input_identity(input_file_path).encode())
+        key_hash.update(str(start_time).encode())
+        return key_hash.hexdigest()
+
+    @staticmethod
+    def _get_input_identity(input_file_path):
+        try:
+            input_file_stat = os.stat(input_file_path)
+        except OSError:
+            return input_file_path
+        return input_file_path + '|' + str(input_file_stat.st_size) + '|' + str(input_file_stat.st_mtime_ns)
+
+    @staticmethod
+    def _remove_part_file(part_file_path):
+        try:
+            os.remove(part_file_path)
+        except OSError:
+            pass
+
+    def _get_entry_file_path(self, file_name):
+        return os.path.join(self.cache_directory, file_name)
+
+    def get(self, key, file_extension):
+        """
+        Returns the cached file path for the key, or None if there's no cached result.
+
+        :param key: Hash returned by get_key().
+        :param file_extension: Extension of the cached file, including the leading '.'.
+        """
+        file_name = key + file_extension
+
+        with self._lock:
+            if file_name not in self._entries:
+                return None
+
+            file_path = self._get_entry_file_path(file_name)
+            if not os.path.exists(file_path):
+                self._total_size_in_bytes -= self._entries.pop(file_name)
+                return None
+
+            self._entries.move_to_end(file_name)
+
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        return file_path
+
+    def put(self, key, file_path):
+        """
+        Moves the file into the cache and returns its new file path. If it can't be cached, returns the file's path if
+        it still exists, otherwise None.
+
+        :param key: Hash returned by get_key().
+        :param file_path: Preview result to store in the cache.
+        """
+        file_name = key + os.path.splitext(file_path)[1]
+        cached_file_path = self._get_entry_file_path(file_name)
+
+        # Moved under a name of its own first, the temp directory can be on another file system where a move is a
+        # copy, and renamed into place so puts of the same key never leave a partly copied file.
+        part_file_path = cached_file_path + '.' + str(threading.get_ident()) + self.PART_FILE_EXTENSION
+
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            shutil.move(file_path, part_file_path)
+            os.replace(part_file_path, cached_file_path)
+            file_size = os.path.getsize(cached_file_path)
+        except OSError:
+            logging.warning('--- FAILED TO CACHE PREVIEW: ' + file_path + ' ---')
+
+            self._remove_part_file(part_file_path)
+            if os.path.exists(file_path):
+                return file_path
+            return None
+
+        with self._lock:
+            if file_name in self._entries:
+                self._total_size_in_bytes -= self._entries.pop(file_name)
+
+            self._entries[file_name] = file_size
+            self._total_size_in_bytes += file_size
+            self._remove_least_recently_used_entries()
+        return cached_file_path
+
+    def _remove_least_recently_used_entries(self):
+        while self._total_size_in_bytes > self.max_size_in_bytes and len(self._entries) > 1:
+            file_name, file_size = self._entries.popitem(last=False)
+            self._total_size_in_bytes -= file_size
+
+            try:
+                os.remove(self._get_entry_file_path(file_name))
+            except OSError:
+                continue
+
+    @property
+    def size_in_bytes(self):
+        return self._total_size_in_bytes
+
+    def __len__(self):
+        return len(self._entries)
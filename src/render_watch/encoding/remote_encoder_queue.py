@@ -0,0 +1,260 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import logging
+import threading
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.job_store import Job, JobStore
+from render_watch.encoding.task_reporter import TaskReporter
+from render_watch.helpers import main_loop_helper
+
+
+class RemoteEncoderQueue:
+    """
+    Sends the active page's tasks to a running daemon instead of encoding them in this process.
+
+    Has the same interface as the EncoderQueue, so the application's UI attaches to the daemon as a client. The daemon's
+    progress events are applied to the active page's rows, and the rows' pause, resume, and stop buttons are sent to
+    the daemon. Closing the application only disconnects from the daemon, its encodes keep running.
+    """
+
+    CONTROLS_INTERVAL_IN_SECONDS = 0.5
+
+    def __init__(self, daemon_client_instance, application_preferences):
+        """
+        Starts applying the daemon's progress events.
+
+        :param daemon_client_instance: DaemonClient connected to the running daemon.
+        :param application_preferences: Application's preferences.
+        """
+        self.daemon_client = daemon_client_instance
+        self.application_preferences = application_preferences
+        self.job_store = JobStore(':memory:')  # The daemon keeps the jobs, active rows only need a job store to use.
+        self._is_parallel_tasks_enabled = False
+        self._is_per_codec_parallel_tasks_enabled = application_preferences.is_per_codec_parallel_tasks_enabled
+        self._active_rows = {}
+        self._paused_job_ids = set()
+        self._restored_job_states = {}
+        self._active_rows_lock = threading.Lock()
+        self._stopped_event = threading.Event()
+
+        threading.Thread(target=self._run_events_thread, daemon=True).start()
+        threading.Thread(target=self._run_controls_thread, daemon=True).start()
+
+    @property
+    def is_parallel_tasks_enabled(self):
+        return self._is_parallel_tasks_enabled
+
+    @is_parallel_tasks_enabled.setter
+    def is_parallel_tasks_enabled(self, is_parallel_tasks_enabled):
+        self._is_parallel_tasks_enabled = is_parallel_tasks_enabled
+        self._send_parallel_tasks_state()
+
+    @property
+    def is_per_codec_parallel_tasks_enabled(self):
+        return self._is_per_codec_parallel_tasks_enabled
+
+    @is_per_codec_parallel_tasks_enabled.setter
+    def is_per_codec_parallel_tasks_enabled(self, is_per_codec_parallel_tasks_enabled):
+        self._is_per_codec_parallel_tasks_enabled = is_per_codec_parallel_tasks_enabled
+        self._send_parallel_tasks_state()
+
+    def _send_parallel_tasks_state(self):
+        try:
+            self.daemon_client.set_parallel(self._is_parallel_tasks_enabled, self._is_per_codec_parallel_tasks_enabled)
+        except (OSError, daemon_client.DaemonError):
+            logging.exception('--- FAILED TO SET THE DAEMON\'S PARALLEL TASKS ---')
+
+    def add_active_row(self, active_row):
+        """
+        Submits a Gtk.ListboxRow from the active page to the daemon.
+
+        :param active_row: Gtk.ListboxRow from the active page's Gtk.Listbox.
+        """
+        self.add_active_rows([active_row])
+
+    def add_active_rows(self, active_rows):
+        """
+        Submits the active page tasks that a batch of Gtk.ListboxRows belong to, in order. A task that's sent as chunk
+        rows is split into chunks by the daemon. Tasks that already have a job ID were restored from the daemon and
+        are only tracked.
+
+        :param active_rows: List of Gtk.ListboxRows (or their chunk rows) from the active page's Gtk.Listbox.
+        """
+        tasks = {}
+        for active_row in active_rows:
+            task = getattr(active_row, 'active_row', active_row)  # Chunk rows belong to an active page task.
+            tasks.setdefault(task, task is not active_row)
+
+        for task, is_chunked in tasks.items():
+            if task.job_id is None:
+                try:
+                    task.job_id = self.daemon_client.submit_ffmpeg([task.ffmpeg], is_chunked)[0]
+                except (OSError, daemon_client.DaemonError):
+                    logging.exception('--- FAILED TO SUBMIT TASK TO THE DAEMON: ' + task.ffmpeg.input_file + ' ---')
+
+                    task.failed = True
+                    main_loop_helper.run_on_main_loop(task.set_finished_state)
+                    continue
+
+            with self._active_rows_lock:
+                self._active_rows[task.job_id] = task
+
+            self._set_restored_state(task)
+
+    def _set_restored_state(self, task):
+        # Events are only sent when a job changes, so restored rows start in the state the daemon listed them in.
+        restored_job_state = self._restored_job_states.pop(task.job_id, None)
+
+        if restored_job_state == TaskReporter.PAUSED_STATE:
+            task.paused = True
+            task.task_threading_event.clear()
+            main_loop_helper.run_on_main_loop(task.set_paused_state)
+
+        if restored_job_state in (TaskReporter.RUNNING_STATE, TaskReporter.PAUSED_STATE):
+            main_loop_helper.run_on_main_loop(task.set_start_state)
+        elif restored_job_state == TaskReporter.IDLE_EVENT:
+            main_loop_helper.run_on_main_loop(task.set_idle_state)
+
+    def get_unfinished_jobs(self):
+        """
+        Returns the daemon's jobs that haven't finished, so the active page can show them.
+        """
+        try:
+            daemon_jobs = self.daemon_client.list_jobs(include_settings=True)
+        except (OSError, daemon_client.DaemonError):
+            logging.exception('--- FAILED TO LIST THE DAEMON\'S JOBS ---')
+
+            return []
+
+        jobs = []
+        for daemon_job in daemon_jobs:
+            if daemon_job['state'] not in (TaskReporter.QUEUED_STATE,
+                                           TaskReporter.RUNNING_STATE,
+                                           TaskReporter.PAUSED_STATE,
+                                           TaskReporter.IDLE_EVENT):
+                continue
+
+            if daemon_job['state'] == TaskReporter.PAUSED_STATE:
+                self._paused_job_ids.add(daemon_job['job_id'])
+            self._restored_job_states[daemon_job['job_id']] = daemon_job['state']
+
+            jobs.append(Job(daemon_job['job_id'],
+                            daemon_client.decode_ffmpeg(daemon_job['ffmpeg']),
+                            daemon_job['is_chunked'],
+                            daemon_job['progress']))
+        return jobs
+
+    def _run_events_thread(self):
+        try:
+            for event_message in self.daemon_client.get_events():
+                with self._active_rows_lock:
+                    active_row = self._active_rows.get(event_message['job_id'])
+
+                if active_row is not None:
+                    self._apply_event(active_row, event_message)
+        except OSError:
+            logging.exception('--- LOST CONNECTION TO THE DAEMON ---')
+
+    def _apply_event(self, active_row, event_message):
+        event = event_message['event']
+
+        if event == TaskReporter.STOPPED_EVENT:
+            self._forget_active_row(event_message['job_id'])
+
+            if not active_row.stopped:  # Stopped by another client.
+                threading.Thread(target=active_row.stop_and_remove_row, daemon=True).start()
+            return
+
+        self._set_task_information(active_row, event_message)
+        for chunk_row, chunk_status in zip(active_row.chunk_row_list + [active_row.audio_chunk_row],
+                                           event_message.get('chunks', [])):
+            self._set_task_information(chunk_row, chunk_status)
+            chunk_row.finished = chunk_status['finished']
+
+        if event in (TaskReporter.STARTED_EVENT, TaskReporter.PROGRESS_EVENT):
+            if not active_row.started or active_row.idle:
+                main_loop_helper.run_on_main_loop(active_row.set_start_state)
+        elif event == TaskReporter.IDLE_EVENT:
+            main_loop_helper.run_on_main_loop(active_row.set_idle_state)
+        elif event in (TaskReporter.FINISHED_EVENT, TaskReporter.FAILED_EVENT):
+            self._forget_active_row(event_message['job_id'])
+
+            active_row.failed = event == TaskReporter.FAILED_EVENT
+            main_loop_helper.run_on_main_loop(active_row.set_finished_state)
+
+    @staticmethod
+    def _set_task_information(row, status):
+        row.progress = status['progress']
+        row.speed = status['speed']
+        row.bitrate = status['bitrate']
+        row.file_size = status['file_size']
+        row.time = status['time_left']
+        row.current_time = status['current_time']
+
+    def _forget_active_row(self, job_id):
+        with self._active_rows_lock:
+            self._active_rows.pop(job_id, None)
+
+    def _run_controls_thread(self):
+        # Active rows clear their job ID when they're stopped, so rows are found by the job ID they were tracked with.
+        while not self._stopped_event.wait(self.CONTROLS_INTERVAL_IN_SECONDS):
+            with self._active_rows_lock:
+                active_rows = list(self._active_rows.items())
+
+            for job_id, active_row in active_rows:
+                try:
+                    self._send_active_row_controls(job_id, active_row)
+                except daemon_client.DaemonError as exception:  # The job finished before the request got there.
+                    logging.info('--- DAEMON JOB ' + str(job_id) + ' NOT CHANGED: ' + str(exception) + ' ---')
+                except OSError:
+                    logging.exception('--- FAILED TO CONTROL DAEMON JOB ' + str(job_id) + ' ---')
+
+    def _send_active_row_controls(self, job_id, active_row):
+        if active_row.stopped:
+            self._forget_active_row(job_id)
+            self.daemon_client.stop(job_id)
+        elif active_row.paused and job_id not in self._paused_job_ids:
+            self._paused_job_ids.add(job_id)
+            self.daemon_client.pause(job_id)
+        elif not active_row.paused and job_id in self._paused_job_ids:
+            self._paused_job_ids.discard(job_id)
+            self.daemon_client.resume(job_id)
+
+    def move_queued_task(self, active_row, position):
+        """
+        Moves a task that's waiting in the daemon's encode queue to a new position in that queue. Returns whether the
+        task was still waiting.
+
+        :param active_row: Task to move.
+        :param position: New position in the queue, 0 runs the task next.
+        """
+        try:
+            self.daemon_client.reprioritize(active_row.job_id, position)
+        except daemon_client.DaemonError:
+            return False
+        return True
+
+    def kill(self):
+        """
+        Disconnects from the daemon. The daemon's encodes keep running.
+        """
+        self._stopped_event.set()
+        self.daemon_client.close()
+        self.job_store.close()
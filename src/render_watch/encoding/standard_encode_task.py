@@ -21,7 +21,7 @@ import queue
 
 from concurrent.futures import ThreadPoolExecutor
 
-from render_watch.startup import GLib
+from render_watch.helpers import main_loop_helper
 
 
 class StandardEncodeTask:
@@ -53,7 +53,7 @@ class StandardEncodeTask:
             self._run_standard_encode_task(active_row)
 
             if active_row.ffmpeg.folder_state and not active_row.ffmpeg.watch_folder:
-                GLib.idle_add(active_row.set_finished_state)
+                main_loop_helper.run_on_main_loop(active_row.set_finished_state)
             if not active_row.ffmpeg.watch_folder:
                 self.encoder_queue.remove_from_running_tasks(active_row)
 
@@ -89,6 +89,9 @@ class StandardEncodeTask:
     def join_queue(self):
         self.standard_tasks_queue.join()
 
+    def get_queues(self):
+        return (self.standard_tasks_queue,)
+
     def empty_queue(self):
         while not self.is_queue_empty():
             self.standard_tasks_queue.get()
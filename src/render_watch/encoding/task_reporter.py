@@ -0,0 +1,146 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+class TaskReporter:
+    """
+    Finds the headless tasks whose state, input file, or progress percent changed since they were last reported.
+    """
+
+    STARTED_EVENT = 'started'
+    PROGRESS_EVENT = 'progress'
+    IDLE_EVENT = 'idle'
+    FINISHED_EVENT = 'finished'
+    FAILED_EVENT = 'failed'
+    STOPPED_EVENT = 'stopped'
+
+    QUEUED_STATE = 'queued'
+    RUNNING_STATE = 'running'
+    PAUSED_STATE = 'paused'
+
+    def __init__(self):
+        self._reported_tasks_status = {}
+
+    def get_events(self, tasks):
+        """
+        Returns a list of (event, task) tuples for the tasks that changed since the last call. A task's started event
+        comes right before its first progress event for each input file.
+
+        :param tasks: List of HeadlessTasks.
+        """
+        events = []
+
+        for task in tasks:
+            task.update_chunks_task_information()
+
+            event = self.get_task_event(task)
+            status = (event, task.ffmpeg.input_file, int(task.progress * 100))
+            reported_status = self._reported_tasks_status.get(task)
+
+            if event is None or status == reported_status:
+                continue
+
+            if event == self.PROGRESS_EVENT and (reported_status is None or reported_status[:2] != status[:2]):
+                events.append((self.STARTED_EVENT, task))
+
+            events.append((event, task))
+            self._reported_tasks_status[task] = status
+
+        return events
+
+    def forget_task(self, task):
+        """
+        Stops tracking a task that won't be reported anymore.
+
+        :param task: HeadlessTask.
+        """
+        self._reported_tasks_status.pop(task, None)
+
+    @staticmethod
+    def get_task_event(task):
+        """
+        Returns the event that describes the task's current state, or None if the task hasn't started.
+
+        :param task: HeadlessTask.
+        """
+        if task.finished:
+            if task.stopped:
+                return TaskReporter.STOPPED_EVENT
+            if task.failed:
+                return TaskReporter.FAILED_EVENT
+            return TaskReporter.FINISHED_EVENT
+
+        if task.idle:
+            return TaskReporter.IDLE_EVENT
+
+        if task.started:
+            return TaskReporter.PROGRESS_EVENT
+        return None
+
+    @staticmethod
+    def get_task_state(task):
+        """
+        Returns the task's state: queued, running, paused, idle, finished, failed, or stopped.
+
+        :param task: HeadlessTask.
+        """
+        event = TaskReporter.get_task_event(task)
+
+        if event is None:
+            return TaskReporter.QUEUED_STATE
+        if event == TaskReporter.PROGRESS_EVENT:
+            return TaskReporter.PAUSED_STATE if task.paused else TaskReporter.RUNNING_STATE
+        return event
+
+    @staticmethod
+    def get_task_status(task):
+        """
+        Returns the task's output file path and encode status as a dictionary.
+
+        :param task: HeadlessTask.
+        """
+        ffmpeg = task.ffmpeg
+        return {
+            'output': ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container,
+            'progress': round(task.progress, 4),
+            'speed': task.speed,
+            'bitrate': task.bitrate,
+            'file_size': task.file_size,
+            'time_left': task.time,
+            'current_time': task.current_time
+        }
+
+    @staticmethod
+    def get_chunks_status(task):
+        """
+        Returns the encode status of a chunked task's chunks, its audio chunk last. Returns an empty list if the task
+        isn't chunked.
+
+        :param task: HeadlessTask.
+        """
+        if not task.chunk_list:
+            return []
+
+        return [{
+            'progress': round(chunk.progress, 4),
+            'speed': chunk.speed,
+            'bitrate': chunk.bitrate,
+            'file_size': chunk.file_size,
+            'time_left': chunk.time,
+            'current_time': chunk.current_time,
+            'finished': chunk.finished
+        } for chunk in task.chunk_list + [task.audio_chunk]]
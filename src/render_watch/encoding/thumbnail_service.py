@@ -0,0 +1,139 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import itertools
+import logging
+import os
+import queue
+import threading
+
+from render_watch.encoding import preview
+from render_watch.encoding.preview_cache import PreviewCache
+from render_watch.startup import GLib
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class ThumbnailService:
+    """
+    Generates row thumbnails on a fixed number of worker threads.
+
+    Requests for rows that are on screen are handled before background requests, newest first, so the rows the user
+    just scrolled to get their thumbnails before the ones that scrolled past. Thumbnails are kept in a cache in the
+    application's config directory, so completed rows and re-imported inputs reuse the thumbnails made before.
+    """
+
+    WORKER_COUNT = 2
+    THUMBNAIL_HEIGHT = 96
+    CACHE_DIRECTORY_NAME = 'thumbnail_cache'
+    CACHE_MAX_SIZE_IN_BYTES = 64 * 1048576
+    VISIBLE_PRIORITY = 0
+    BACKGROUND_PRIORITY = 1
+
+    def __init__(self, cache_directory, worker_count=WORKER_COUNT):
+        self.thumbnail_cache = PreviewCache(cache_directory, self.CACHE_MAX_SIZE_IN_BYTES)
+        self.worker_count = worker_count
+        self._requests_queue = queue.PriorityQueue()
+        self._request_counter = itertools.count()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+
+    def request_thumbnail(self, ffmpeg, application_preferences, callback, is_visible=True):
+        """
+        Queues a thumbnail for the given ffmpeg settings. The callback is run on the main loop with the thumbnail's
+        file path, or None if the thumbnail couldn't be made. Returns the request so it can be cancelled.
+
+        :param ffmpeg: ffmpeg settings of the row.
+        :param application_preferences: Application preferences.
+        :param callback: Function that applies the thumbnail's file path.
+        :param is_visible: (Default True) Whether the row is currently on screen.
+        """
+        thumbnail_request = ThumbnailRequest(ffmpeg, application_preferences, callback)
+        self._requests_queue.put(self._get_queue_entry(thumbnail_request, is_visible))
+        self._start_workers()
+        return thumbnail_request
+
+    def _get_queue_entry(self, thumbnail_request, is_visible):
+        request_number = next(self._request_counter)
+
+        if is_visible:
+            return self.VISIBLE_PRIORITY, -request_number, thumbnail_request
+        return self.BACKGROUND_PRIORITY, request_number, thumbnail_request
+
+    def _start_workers(self):
+        with self._workers_lock:
+            while len(self._workers) < self.worker_count:
+                worker = threading.Thread(target=self._run_worker, name='thumbnail_service', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run_worker(self):
+        while True:
+            thumbnail_request = self._requests_queue.get()[-1]
+
+            if thumbnail_request.is_cancelled:
+                continue
+
+            try:
+                thumbnail_file_path = preview.generate_thumbnail_file(thumbnail_request.ffmpeg,
+                                                                      thumbnail_request.application_preferences,
+                                                                      self.thumbnail_cache,
+                                                                      self.THUMBNAIL_HEIGHT)
+            except:
+                logging.exception('--- THUMBNAIL FAILED: ' + thumbnail_request.ffmpeg.input_file + ' ---')
+
+                thumbnail_file_path = None
+
+            GLib.idle_add(thumbnail_request.apply, thumbnail_file_path)
+
+
+class ThumbnailRequest:
+    """
+    A queued thumbnail. Cancelled requests are skipped by the workers and don't run their callback.
+    """
+
+    def __init__(self, ffmpeg, application_preferences, callback):
+        self.ffmpeg = ffmpeg
+        self.application_preferences = application_preferences
+        self.callback = callback
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def apply(self, thumbnail_file_path):
+        if not self.is_cancelled:
+            self.callback(thumbnail_file_path)
+        return False
+
+
+_thumbnail_service = None
+_thumbnail_service_lock = threading.Lock()
+
+
+def get_thumbnail_service():
+    """
+    Returns the thumbnail service shared by all rows.
+    """
+    global _thumbnail_service
+
+    with _thumbnail_service_lock:
+        if _thumbnail_service is None:
+            cache_directory = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
+                                           ThumbnailService.CACHE_DIRECTORY_NAME)
+            _thumbnail_service = ThumbnailService(cache_directory)
+        return _thumbnail_service
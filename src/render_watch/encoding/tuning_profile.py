@@ -0,0 +1,175 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import logging
+import os
+import socket
+
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+CODECS = ('x264', 'x265', 'vp9')
+
+
+def get_host_profile(application_preferences):
+    """
+    Returns this host's tuning profile, or None if autotune hasn't been run on this host or the preferences' Use Tuned
+    Values option is off.
+
+    :param application_preferences: Application's preferences.
+    """
+    if not application_preferences.is_tuning_profile_enabled:
+        logging.info('--- TUNING PROFILE DISABLED IN PREFERENCES ---')
+
+        return None
+    return TuningProfile.load_host_profile()
+
+
+def get_parallel_tasks(application_preferences):
+    """
+    Returns how many parallel tasks run at the same time, from the host's tuning profile if it has a value, otherwise
+    from the preferences.
+
+    :param application_preferences: Application's preferences.
+    """
+    tuning_profile = application_preferences.tuning_profile
+
+    if tuning_profile is not None and tuning_profile.parallel_tasks is not None:
+        return tuning_profile.parallel_tasks
+    return int(application_preferences.parallel_tasks)
+
+
+def get_per_codec_parallel_tasks(application_preferences, codec):
+    """
+    Returns how many tasks of one codec run at the same time in the per codec mode, from the host's tuning profile if
+    it has a value for the codec, otherwise from the preferences.
+
+    :param application_preferences: Application's preferences.
+    :param codec: One of CODECS.
+    """
+    tuning_profile = application_preferences.tuning_profile
+
+    if tuning_profile is not None and codec in tuning_profile.per_codec_parallel_tasks:
+        return tuning_profile.per_codec_parallel_tasks[codec]
+    return int(application_preferences.per_codec_parallel_tasks[codec])
+
+
+class TuningProfile:
+    """
+    Stores how many tasks this host should run at the same time, as found by the autotune command.
+
+    A profile is kept for every host name, so a config directory that's shared between machines doesn't make one
+    machine use another machine's values. While the preferences' Use Tuned Values option is on, its values replace the
+    preferences' parallel tasks, and can be higher than the preferences allow.
+    """
+
+    FORMAT_VERSION = 1
+    TUNING_DIRECTORY = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY, 'tuning')
+
+    def __init__(self, parallel_tasks=None, per_codec_parallel_tasks=None, details=None):
+        """
+        :param parallel_tasks: (Default None) Tasks that run at the same time in the parallel mode, None uses the
+            preferences' value.
+        :param per_codec_parallel_tasks: (Default None) Dictionary of codec to the tasks of that codec that run at the
+            same time in the per codec mode, codecs that aren't in it use the preferences' value.
+        :param details: (Default None) Dictionary of how the values were found, like the measured throughput curves.
+        """
+        self.parallel_tasks = parallel_tasks
+        self.per_codec_parallel_tasks = per_codec_parallel_tasks or {}
+        self.details = details or {}
+
+    @staticmethod
+    def get_host_profile_path():
+        """
+        Returns the path of this host's tuning profile.
+        """
+        return os.path.join(TuningProfile.TUNING_DIRECTORY, socket.gethostname() + '.json')
+
+    @staticmethod
+    def load_host_profile():
+        """
+        Returns this host's tuning profile, or None if autotune hasn't been run on this host.
+        """
+        tuning_profile = TuningProfile.load(TuningProfile.get_host_profile_path())
+
+        if tuning_profile is not None:
+            logging.info('--- USING TUNING PROFILE: parallel tasks ' + str(tuning_profile.parallel_tasks)
+                         + ', per codec ' + str(tuning_profile.per_codec_parallel_tasks) + ' ---')
+
+        return tuning_profile
+
+    @staticmethod
+    def load(profile_file_path):
+        """
+        Returns the tuning profile in a file, or None if the file doesn't exist or isn't a valid profile.
+
+        :param profile_file_path: Path of the profile file.
+        """
+        try:
+            with open(profile_file_path) as profile_file:
+                profile = json.load(profile_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logging.exception('--- FAILED TO READ TUNING PROFILE: ' + profile_file_path + ' ---')
+
+            return None
+
+        try:
+            if profile['version'] != TuningProfile.FORMAT_VERSION:
+                raise ValueError('unknown version ' + str(profile['version']))
+
+            parallel_tasks = profile.get('parallel_tasks')
+            if parallel_tasks is not None:
+                parallel_tasks = TuningProfile._get_number_of_tasks(parallel_tasks)
+
+            per_codec_parallel_tasks = {}
+            for codec, number_of_tasks in profile.get('per_codec_parallel_tasks', {}).items():
+                if codec in CODECS:
+                    per_codec_parallel_tasks[codec] = TuningProfile._get_number_of_tasks(number_of_tasks)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logging.exception('--- INVALID TUNING PROFILE: ' + profile_file_path + ' ---')
+
+            return None
+
+        return TuningProfile(parallel_tasks, per_codec_parallel_tasks, profile.get('details'))
+
+    @staticmethod
+    def _get_number_of_tasks(value):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError('invalid number of tasks ' + repr(value))
+        return value
+
+    def save(self, profile_file_path):
+        """
+        Writes the profile to a file. Raises OSError if the file can't be written.
+
+        :param profile_file_path: Path of the profile file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(profile_file_path)), exist_ok=True)
+
+        temp_file_path = profile_file_path + '.part'
+        with open(temp_file_path, 'w') as profile_file:
+            json.dump({
+                'version': self.FORMAT_VERSION,
+                'parallel_tasks': self.parallel_tasks,
+                'per_codec_parallel_tasks': self.per_codec_parallel_tasks,
+                'details': self.details
+            }, profile_file, indent=2)
+        os.replace(temp_file_path, profile_file_path)
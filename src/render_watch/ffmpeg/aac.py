@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class Aac:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class Aac(CopyOnWriteSettings):
     """
     Stores all settings for the AAC codec.
     """
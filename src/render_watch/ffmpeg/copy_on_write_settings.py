@@ -0,0 +1,65 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
+
+
+class CopyOnWriteSettings(RevisionedSettings):
+    """
+    Lets codec settings share their args dictionaries with their copies until one of them is changed.
+
+    copy() makes a new settings object that points at the same dictionaries, so copying doesn't depend on how many
+    args are set. Codec settings are only changed through attribute assignments (including property setters), so the
+    first assignment on a shared object gives it its own dictionaries before the change is made.
+    """
+
+    _is_state_shared = False
+
+    def __setattr__(self, name, value):
+        if self._is_state_shared:
+            self._detach_shared_state()
+
+        super().__setattr__(name, value)
+
+    def _detach_shared_state(self):
+        state = self.__dict__
+
+        for name, value in state.items():
+            if isinstance(value, (dict, list, set)):
+                state[name] = value.copy()
+
+        object.__setattr__(self, '_is_state_shared', False)
+
+    def copy(self):
+        """
+        Returns a copy of these settings that shares this object's args until either of them is changed. The copy keeps
+        this object's revision until it's changed.
+        """
+        settings_copy = object.__new__(type(self))
+        settings_copy.__dict__.update(self.__dict__)
+
+        object.__setattr__(self, '_is_state_shared', True)
+        object.__setattr__(settings_copy, '_is_state_shared', True)
+        return settings_copy
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        # The args dictionaries only hold strings, numbers and None, so sharing them until a change is a deep copy.
+        return self.copy()
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class GeneralSettings:
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
+
+
+class GeneralSettings(RevisionedSettings):
     """
     Stores all settings for general settings.
     """
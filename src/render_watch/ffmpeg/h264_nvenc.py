@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class H264Nvenc:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class H264Nvenc(CopyOnWriteSettings):
     """
     Stores all settings for the H264 NVENC codec.
     """
@@ -16,10 +16,11 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
 from render_watch.helpers.nvidia_helper import NvidiaHelper
 
 
-class HevcNvenc:
+class HevcNvenc(CopyOnWriteSettings):
     """
     Stores all settings for the HEVC NVENC codec.
     """
@@ -21,6 +21,7 @@ import os
 import logging
 
 from render_watch.app_formatting import format_converter
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
 from render_watch.ffmpeg.settings import Settings
 
 
@@ -42,9 +43,10 @@ class InputInformation:
         self.language = None
         self.index = None
         self.audio_done, self.video_done, self.duration_done = False, False, False
-        self.video_streams = {}
-        self.audio_streams = {}
-        self.subtitle_streams = {}
+        self.input_duration = None
+        self.video_streams = []
+        self.audio_streams = []
+        self.subtitle_streams = []
 
     def reset_stream_information(self):
         self.width, self.height = None, None
@@ -68,7 +70,8 @@ class InputInformation:
     @staticmethod
     def generate_input_information(ffmpeg):
         """
-        Runs ffprobe to get information about ffmpeg setting's input file.
+        Runs ffprobe to get information about ffmpeg setting's input file and gives the ffmpeg settings a new media info
+        record. Copies of the ffmpeg settings share that record.
 
         :param ffmpeg: ffmpeg settings.
         """
@@ -86,13 +89,11 @@ class InputInformation:
                 if stdout == '':
                     break
 
-                InputInformation._process_input_information(stdout, ffmpeg, input_information)
+                InputInformation._process_input_information(stdout, input_information)
 
-        InputInformation._set_file_size_item(ffmpeg)
-        InputInformation._set_processed_streams(ffmpeg, input_information)
-        InputInformation._set_non_critical_input_information(ffmpeg)
+        ffmpeg.media_info = InputInformation._get_media_info(ffmpeg, input_information)
 
-        logging.info('--- INPUT FILE INFO ---\n' + str(ffmpeg.input_file_info))
+        logging.info('--- INPUT FILE INFO ---\n' + str(ffmpeg.media_info))
         return InputInformation._is_information_valid(ffmpeg)
 
     @staticmethod
@@ -102,80 +103,65 @@ class InputInformation:
         return args
 
     @staticmethod
-    def _process_input_information(stdout, ffmpeg, input_information):
+    def _process_input_information(stdout, input_information):
         if stdout == '[STREAM]':
             input_information.reset_stream_information()
         elif stdout == '[/STREAM]':
-            InputInformation._add_stream_information_to_ffmpeg_settings(ffmpeg, input_information)
+            InputInformation._add_stream_information(input_information)
         elif stdout == '[/FORMAT]':
-            ffmpeg.duration_origin = input_information.duration
+            input_information.input_duration = input_information.duration
 
         InputInformation._process_stream_information_item(stdout, input_information)
 
     @staticmethod
-    def _add_stream_information_to_ffmpeg_settings(ffmpeg, input_information):
+    def _add_stream_information(input_information):
         try:
             if input_information.is_video_codec():
-                InputInformation._add_video_stream_information_to_ffmpeg_settings(ffmpeg, input_information)
+                InputInformation._add_video_stream_information(input_information)
             elif input_information.is_audio_codec():
-                InputInformation._add_audio_stream_information_to_ffmpeg_settings(ffmpeg, input_information)
+                InputInformation._add_audio_stream_information(input_information)
             elif input_information.is_subtitle_codec():
-                InputInformation._add_subtitle_stream_information_to_ffmpeg_settings(input_information)
+                InputInformation._add_subtitle_stream_information(input_information)
         except:
             pass
 
     @staticmethod
-    def _add_video_stream_information_to_ffmpeg_settings(ffmpeg, input_information):
-        index = input_information.index
+    def _add_video_stream_information(input_information):
         codec_name = input_information.codec_name
         width = input_information.width
         height = input_information.height
         frame_rate = input_information.frame_rate
         stream_info = codec_name + ',' + str(width) + 'x' + str(height) + '(' + frame_rate + ')'
-        input_information.video_streams[index] = {
-            'codec_name': codec_name,
-            'width': width,
-            'height': height,
-            'frame_rate': frame_rate,
-            'info': stream_info
-        }
-
-        ffmpeg.codec_video_origin = codec_name
-        ffmpeg.framerate_origin = frame_rate
-        ffmpeg.width_origin = width
-        ffmpeg.height_origin = height
-        ffmpeg.resolution_origin = width, height
+        input_information.video_streams.append(StreamInfo(index=input_information.index,
+                                                          codec_name=codec_name,
+                                                          width=width,
+                                                          height=height,
+                                                          frame_rate=frame_rate,
+                                                          info=stream_info))
 
     @staticmethod
-    def _add_audio_stream_information_to_ffmpeg_settings(ffmpeg, input_information):
-        index = input_information.index
+    def _add_audio_stream_information(input_information):
         codec_name = input_information.codec_name
         channels = input_information.channels
         sample_rate = input_information.sample_rate
         stream_info = codec_name + ',' + channels + ' channels,' + sample_rate + 'hz'
-        input_information.audio_streams[index] = {
-            'codec_name': codec_name,
-            'channels': channels,
-            'sample_rate': sample_rate,
-            'info': stream_info
-        }
-
-        ffmpeg.codec_audio_origin = codec_name
-        ffmpeg.audio_channels_origin = channels
-        ffmpeg.audio_sample_rate_origin = sample_rate
+        input_information.audio_streams.append(StreamInfo(index=input_information.index,
+                                                          codec_name=codec_name,
+                                                          channels=channels,
+                                                          sample_rate=sample_rate,
+                                                          info=stream_info))
 
     @staticmethod
-    def _add_subtitle_stream_information_to_ffmpeg_settings(input_information):
+    def _add_subtitle_stream_information(input_information):
         if input_information.codec_name in InputInformation.VALID_SUBTITLE_CODECS:
             index = input_information.index
             codec_name = input_information.codec_name
             language = input_information.language
             stream_info = '[' + index + ']' + language + ':' + codec_name
-            input_information.subtitle_streams[index] = {
-                'codec_name': codec_name,
-                'language': language,
-                'info': stream_info
-            }
+            input_information.subtitle_streams.append(StreamInfo(index=index,
+                                                                 codec_name=codec_name,
+                                                                 language=language,
+                                                                 info=stream_info))
 
     @staticmethod
     def _process_stream_information_item(stdout, input_information):
@@ -267,36 +253,50 @@ class InputInformation:
             pass
 
     @staticmethod
-    def _set_file_size_item(ffmpeg):
-        filesize = os.path.getsize(ffmpeg.input_file)
-        ffmpeg.file_size = format_converter.get_file_size_from_bytes(filesize)
+    def _get_media_info(ffmpeg, input_information):
+        # The last video and audio streams that ffprobe found are used until a different stream is chosen.
+        media_info = {
+            'duration': input_information.input_duration,
+            'file_size': InputInformation._get_file_size(ffmpeg),
+            'video_streams': tuple(input_information.video_streams),
+            'audio_streams': tuple(input_information.audio_streams),
+            'subtitle_streams': tuple(input_information.subtitle_streams)
+        }
 
-    @staticmethod
-    def _set_processed_streams(ffmpeg, input_information):
-        ffmpeg.input_file_info['video_streams'] = input_information.video_streams
-        ffmpeg.input_file_info['audio_streams'] = input_information.audio_streams
-        ffmpeg.input_file_info['subtitle_streams'] = input_information.subtitle_streams
+        if input_information.video_streams:
+            video_stream = input_information.video_streams[-1]
+            media_info['codec_video'] = video_stream.codec_name
+            media_info['fps'] = video_stream.frame_rate
+            media_info['width'] = video_stream.width
+            media_info['height'] = video_stream.height
+            media_info['resolution'] = str(video_stream.width) + 'x' + str(video_stream.height)
 
-    @staticmethod
-    def _set_non_critical_input_information(ffmpeg):
-        if ffmpeg.codec_video_origin is None:
-            ffmpeg.codec_video_origin = 'N/A'
+        if input_information.audio_streams:
+            audio_stream = input_information.audio_streams[-1]
+            media_info['codec_audio'] = audio_stream.codec_name
+            media_info['channels'] = audio_stream.channels
+            media_info['sample_rate'] = audio_stream.sample_rate
 
-        if ffmpeg.codec_audio_origin is None:
-            ffmpeg.codec_audio_origin = 'N/A'
+        InputInformation._set_non_critical_input_information(ffmpeg, media_info)
+        return MediaInfo(**media_info)
 
-        if ffmpeg.audio_channels_origin is None:
-            ffmpeg.audio_channels_origin = 'N/A'
+    @staticmethod
+    def _get_file_size(ffmpeg):
+        filesize = os.path.getsize(ffmpeg.input_file)
+        return format_converter.get_file_size_from_bytes(filesize)
 
-        if ffmpeg.audio_sample_rate_origin is None:
-            ffmpeg.audio_sample_rate_origin = 'N/A'
+    @staticmethod
+    def _set_non_critical_input_information(ffmpeg, media_info):
+        for field in ('codec_video', 'codec_audio', 'channels', 'sample_rate'):
+            if media_info.get(field) is None:
+                media_info[field] = 'N/A'
 
         if ffmpeg.folder_state:
-            ffmpeg.width_origin = 'N/A'
-            ffmpeg.height_origin = 'N/A'
-            ffmpeg.duration_origin = 'N/A'
-            ffmpeg.resolution_origin = 'N/A', 'N/A'
-            ffmpeg.framerate_origin = 'N/A'
+            media_info['width'] = 'N/A'
+            media_info['height'] = 'N/A'
+            media_info['duration'] = 'N/A'
+            media_info['resolution'] = 'N/AxN/A'
+            media_info['fps'] = 'N/A'
 
     @staticmethod
     def _is_information_valid(ffmpeg):
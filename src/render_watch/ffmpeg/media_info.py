@@ -0,0 +1,127 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+class _FrozenRecord:
+    """
+    Base for records that can't be changed once they're made.
+
+    Records are shared by reference between every ffmpeg settings object that uses them, so copying a record
+    returns the same record and changes are made by replacing the record with a new one from replace().
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.pop(name, None))
+
+        if fields:
+            raise TypeError('unknown ' + type(self).__name__ + ' fields: ' + ', '.join(fields))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(type(self).__name__ + ' can\'t be changed')
+
+    def __delattr__(self, name):
+        raise AttributeError(type(self).__name__ + ' can\'t be changed')
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return _make_record, (type(self), self._get_fields())
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._get_fields() == other._get_fields()
+
+    def __hash__(self):
+        return hash(self._get_fields())
+
+    def __repr__(self):
+        fields = ', '.join(name + '=' + repr(getattr(self, name)) for name in self.__slots__)
+        return type(self).__name__ + '(' + fields + ')'
+
+    def _get_fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def replace(self, **changes):
+        """
+        Returns a new record with the given fields changed.
+
+        :param changes: Names and new values of the fields to change.
+        """
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return type(self)(**fields)
+
+
+def _make_record(record_type, fields):
+    # Unpickles records through __init__() since their fields can't be set after they're made.
+    return record_type(**dict(zip(record_type.__slots__, fields)))
+
+
+class StreamInfo(_FrozenRecord):
+    """
+    Stores information about one of an input file's video, audio, or subtitle streams.
+    """
+
+    __slots__ = ('index', 'codec_name', 'width', 'height', 'frame_rate', 'channels', 'sample_rate', 'language', 'info')
+
+
+class MediaInfo(_FrozenRecord):
+    """
+    Stores the information about an input file that ffprobe found.
+
+    The codec, resolution, and sample rate fields describe the streams that are used for encoding, streams are tuples
+    of StreamInfo records in the order ffprobe found them.
+    """
+
+    __slots__ = ('resolution', 'width', 'height', 'fps', 'duration', 'file_size', 'codec_video', 'codec_audio',
+                 'channels', 'sample_rate', 'video_streams', 'audio_streams', 'subtitle_streams')
+
+    def __init__(self, **fields):
+        fields.setdefault('video_streams', ())
+        fields.setdefault('audio_streams', ())
+        fields.setdefault('subtitle_streams', ())
+        super().__init__(**fields)
+
+    def with_video_stream(self, video_stream):
+        """
+        Returns a new record that uses the given video stream's codec and dimensions.
+
+        :param video_stream: StreamInfo of one of this record's video streams.
+        """
+        return self.replace(codec_video=video_stream.codec_name,
+                            width=video_stream.width,
+                            height=video_stream.height,
+                            resolution=str(video_stream.width) + 'x' + str(video_stream.height))
+
+    def with_audio_stream(self, audio_stream):
+        """
+        Returns a new record that uses the given audio stream's codec and sample rate.
+
+        :param audio_stream: StreamInfo of one of this record's audio streams.
+        """
+        return self.replace(codec_audio=audio_stream.codec_name, sample_rate=audio_stream.sample_rate)
+
+
+EMPTY_MEDIA_INFO = MediaInfo()
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class Opus:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class Opus(CopyOnWriteSettings):
     """
     Stores all settings for the Opus codec.
     """
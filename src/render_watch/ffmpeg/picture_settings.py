@@ -18,10 +18,11 @@
 
 import re
 
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
 from render_watch.ffmpeg.subtitles_settings import SubtitlesSettings
 
 
-class PictureSettings:
+class PictureSettings(RevisionedSettings):
     """
     Stores all picture settings.
     """
@@ -144,5 +145,5 @@ class PictureSettings:
     def ffmpeg_args(self, ffmpeg_args):
         self._ffmpeg_args = ffmpeg_args
 
-    def setup_subtitles_settings(self, input_file_info):
-        self.subtitles_settings = SubtitlesSettings(input_file_info)
+    def setup_subtitles_settings(self, media_info):
+        self.subtitles_settings = SubtitlesSettings(media_info)
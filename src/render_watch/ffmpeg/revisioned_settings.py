@@ -0,0 +1,59 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import itertools
+
+
+_revision_counter = itertools.count(1)
+
+
+class RevisionedSettings:
+    """
+    Gives settings a revision number that changes every time the settings are changed.
+
+    Settings are changed through attribute assignments (including property setters), methods that change settings
+    without an assignment call mark_changed(). Revisions are taken from one counter for all settings, so two settings
+    objects only have the same revision when one is an unchanged copy of the other.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self.mark_changed()
+
+    def mark_changed(self):
+        """
+        Gives these settings a new revision number.
+        """
+        object.__setattr__(self, '_revision', next(_revision_counter))
+
+    def __setstate__(self, state):
+        # Revisions from the process that pickled these settings don't mean anything in this one.
+        dict_state, slots_state = state if isinstance(state, tuple) else (state, None)
+
+        if dict_state:
+            self.__dict__.update(dict_state)
+        for name, value in (slots_state or {}).items():
+            object.__setattr__(self, name, value)
+
+        self.mark_changed()
+
+    @property
+    def revision(self):
+        return self._revision
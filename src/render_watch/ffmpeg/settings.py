@@ -18,31 +18,39 @@
 
 import copy
 import logging
+import os
 
 from render_watch.ffmpeg.general_settings import GeneralSettings
+from render_watch.ffmpeg.media_info import EMPTY_MEDIA_INFO
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
 from render_watch.ffmpeg.picture_settings import PictureSettings
-from render_watch.helpers import ffmpeg_helper
+from render_watch.helpers import ffmpeg_helper, profiling_helper
 from render_watch.helpers.nvidia_helper import NvidiaHelper
 
 
-class Settings:
+class Settings(RevisionedSettings):
     """
     Stores all ffmpeg settings.
     """
 
     VALID_INPUT_CONTAINERS = ('mp4', 'mkv', 'm4v', 'avi', 'ts', 'm2ts', 'mpg', 'vob', 'mov', 'webm', 'wmv')
 
-    # FFMPEG_INIT_ARGS = ['ffmpeg', '-hide_banner', '-loglevel', 'quiet', '-stats', "-y"]
-    FFMPEG_INIT_ARGS = ['ffmpeg', '-hide_banner', '-stats', "-y"]
-    FFMPEG_INIT_AUTO_CROP_ARGS = ['ffmpeg', '-hide_banner', '-y']
-    FFMPEG_CONCATENATION_INIT_ARGS = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i']
+    # The binaries can be swapped for other builds, or for the fake ffmpeg used for load testing.
+    FFMPEG_BINARY = os.environ.get('RENDER_WATCH_FFMPEG') or 'ffmpeg'
+    FFPROBE_BINARY = os.environ.get('RENDER_WATCH_FFPROBE') or 'ffprobe'
+    FFPLAY_BINARY = os.environ.get('RENDER_WATCH_FFPLAY') or 'ffplay'
+
+    # FFMPEG_INIT_ARGS = [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'quiet', '-stats', "-y"]
+    FFMPEG_INIT_ARGS = [FFMPEG_BINARY, '-hide_banner', '-stats', "-y"]
+    FFMPEG_INIT_AUTO_CROP_ARGS = [FFMPEG_BINARY, '-hide_banner', '-y']
+    FFMPEG_CONCATENATION_INIT_ARGS = [FFMPEG_BINARY, '-y', '-f', 'concat', '-safe', '0', '-i']
 
     FFPROBE_ARGS = [
-        'ffprobe', '-hide_banner', '-loglevel', 'warning', '-show_entries',
+        FFPROBE_BINARY, '-hide_banner', '-loglevel', 'warning', '-show_entries',
         'stream=codec_name,codec_type,width,height,r_frame_rate,bit_rate,channels,sample_rate,index:stream_tags=language:format=duration'
     ]
 
-    FFPLAY_INIT_ARGS = ['ffplay']
+    FFPLAY_INIT_ARGS = [FFPLAY_BINARY]
 
     VIDEO_COPY_ARGS = ('-c:v', 'copy')
     AUDIO_COPY_ARGS = ('-c:a', 'copy')
@@ -57,23 +65,16 @@ class Settings:
     NVDEC_ARGS = ('-hwaccel', 'nvdec')
     NVDEC_OUT_FORMAT_ARGS = ('-hwaccel_output_format', 'cuda')
 
+    __slots__ = ('media_info', 'filename', 'no_audio', 'no_video', 'video_chunk', '_folder_state', 'recursive_folder',
+                 'watch_folder', 'folder_auto_crop', '_temp_file_name', '_input_file_path', 'output_directory',
+                 'video_settings', 'audio_settings', 'video_stream_index', 'audio_stream_index', '_picture_settings',
+                 'trim_settings', '_general_settings', 'input_container', '_output_container', '_revision',
+                 '_compiled_args')
+
     def __init__(self):
-        self.input_file_info = {
-            'filename': None,
-            'resolution': None,
-            'width': None,
-            'height': None,
-            'fps': None,
-            'duration': None,
-            'file_size': None,
-            'codec_video': None,
-            'codec_audio': None,
-            'channels': None,
-            'sample_rate': None,
-            'video_streams': None,
-            'audio_streams': None,
-            'subtitle_streams': None
-        }
+        self._compiled_args = {}
+        self.media_info = EMPTY_MEDIA_INFO  # Made by InputInformation and shared by every copy of these settings.
+        self.filename = None
         self.no_audio = False
         self.no_video = False
         self.video_chunk = False
@@ -94,6 +95,15 @@ class Settings:
         self.input_container = None
         self._output_container = None
 
+    def __getstate__(self):
+        # Compiled args are keyed by revisions, which start over in every process, so they're never pickled.
+        return None, {name: getattr(self, name)
+                      for name in self.__slots__ if name != '_compiled_args' and hasattr(self, name)}
+
+    def __setstate__(self, state):
+        object.__setattr__(self, '_compiled_args', {})
+        super().__setstate__(state)
+
     @property
     def input_file(self):
         """
@@ -176,118 +186,97 @@ class Settings:
     def is_output_container_set(self):
         return self.output_container in GeneralSettings.CONTAINERS_UI_LIST
 
-    @property
-    def filename(self):
-        return self.input_file_info['filename']
-
-    @filename.setter
-    def filename(self, name):
-        self.input_file_info['filename'] = name
-
     @property
     def resolution_origin(self):
-        return self.input_file_info['resolution']
-
-    @resolution_origin.setter
-    def resolution_origin(self, dimensions):
-        width, height = dimensions
-        self.input_file_info['resolution'] = str(width) + 'x' + str(height)
+        return self.media_info.resolution
 
     @property
     def width_origin(self):
-        return self.input_file_info['width']
-
-    @width_origin.setter
-    def width_origin(self, value):
-        self.input_file_info['width'] = value
+        return self.media_info.width
 
     @property
     def height_origin(self):
-        return self.input_file_info['height']
-
-    @height_origin.setter
-    def height_origin(self, value):
-        self.input_file_info['height'] = value
+        return self.media_info.height
 
     @property
     def framerate_origin(self):
-        return self.input_file_info['fps']
-
-    @framerate_origin.setter
-    def framerate_origin(self, value):
-        self.input_file_info['fps'] = value
+        return self.media_info.fps
 
     @property
     def duration_origin(self):
-        return self.input_file_info['duration']
-
-    @duration_origin.setter
-    def duration_origin(self, value):
-        self.input_file_info['duration'] = value
+        return self.media_info.duration
 
     @property
     def file_size(self):
-        return self.input_file_info['file_size']
-
-    @file_size.setter
-    def file_size(self, value):
-        self.input_file_info['file_size'] = value
+        return self.media_info.file_size
 
     @property
     def codec_video_origin(self):
-        return self.input_file_info['codec_video']
-
-    @codec_video_origin.setter
-    def codec_video_origin(self, name):
-        self.input_file_info['codec_video'] = name
+        return self.media_info.codec_video
 
     @property
     def codec_audio_origin(self):
-        return self.input_file_info['codec_audio']
-
-    @codec_audio_origin.setter
-    def codec_audio_origin(self, name):
-        self.input_file_info['codec_audio'] = name
+        return self.media_info.codec_audio
 
     @property
     def audio_channels_origin(self):
-        return self.input_file_info['channels']
-
-    @audio_channels_origin.setter
-    def audio_channels_origin(self, value):
-        self.input_file_info['channels'] = value
+        return self.media_info.channels
 
     @property
     def audio_sample_rate_origin(self):
-        return self.input_file_info['sample_rate']
-
-    @audio_sample_rate_origin.setter
-    def audio_sample_rate_origin(self, value):
-        self.input_file_info['sample_rate'] = value
+        return self.media_info.sample_rate
 
     def setup_subtitles_settings(self):
-        self.picture_settings.setup_subtitles_settings(self.input_file_info)
+        self.picture_settings.setup_subtitles_settings(self.media_info)
 
+    @profiling_helper.timed_span('Settings.get_args')
     def get_args(self, cmd_args_enabled=False):
         """
         Returns ffmpeg arguments for all settings applied.
 
+        The arguments are only generated again when these settings, or any of the settings they're made from, have
+        changed since the last call.
+
         :param cmd_args_enabled: (Default False) Generates arguments formatted to be
         directly copy/pasted into a terminal.
         """
+        revisions = self._get_revisions()
+        compiled_args = self._compiled_args.get(cmd_args_enabled)
+
+        if compiled_args is None or compiled_args[0] != revisions:
+            compiled_args = (revisions, tuple(self._generate_args(cmd_args_enabled, self.video_settings)))
+            self._compiled_args[cmd_args_enabled] = compiled_args
+
+        return list(compiled_args[1])
+
+    def _get_revisions(self):
+        revisions = [self._revision, self._picture_settings.revision, self._general_settings.revision]
+
+        for settings in (self.video_settings, self.audio_settings, self.trim_settings, self.subtitles_settings):
+            if settings is not None:
+                revisions.append(settings.revision)
+            else:
+                revisions.append(None)
+
+        return tuple(revisions)
+
+    def _generate_args(self, cmd_args_enabled, video_settings):
         ffmpeg_args = self.FFMPEG_INIT_ARGS.copy()
+        is_first_pass = self._is_first_pass(video_settings)
 
         self._apply_trim_start_args(ffmpeg_args)
         self._apply_nvdec_args(ffmpeg_args)
         self._apply_input_file_args(ffmpeg_args, cmd_args_enabled)
         self._apply_map_args(ffmpeg_args)
-        self._apply_video_settings_args(ffmpeg_args)
-        self._apply_audio_settings_args(ffmpeg_args)
+        self._apply_video_settings_args(ffmpeg_args, video_settings)
+        self._apply_audio_settings_args(ffmpeg_args, is_first_pass)
         self._apply_picture_settings_args(ffmpeg_args)
         self._apply_general_settings_args(ffmpeg_args)
         self._apply_trim_settings_args(ffmpeg_args)
         self._apply_output_file_args(ffmpeg_args, cmd_args_enabled)
-        self._apply_2pass_args(ffmpeg_args)
+
+        if is_first_pass:
+            self._apply_2pass_args(ffmpeg_args, cmd_args_enabled, video_settings)
 
         return ffmpeg_args
 
@@ -320,10 +309,10 @@ class Settings:
             input_file_path = '\"' + input_file_path + '\"'
         ffmpeg_args.append(input_file_path)
 
-    def _apply_video_settings_args(self, ffmpeg_args):
-        if self.video_settings:
-            ffmpeg_args.extend(self.generate_video_settings_args(self.video_settings.ffmpeg_args))
-            ffmpeg_args.extend(self.generate_video_settings_args(self.video_settings.get_ffmpeg_advanced_args()))
+    def _apply_video_settings_args(self, ffmpeg_args, video_settings):
+        if video_settings:
+            ffmpeg_args.extend(self.generate_video_settings_args(video_settings.ffmpeg_args))
+            ffmpeg_args.extend(self.generate_video_settings_args(video_settings.get_ffmpeg_advanced_args()))
         elif self.no_video:
             ffmpeg_args.append(self.VIDEO_NONE_ARG)
         else:
@@ -338,10 +327,10 @@ class Settings:
                 args.append(arg)
         return args
 
-    def _apply_audio_settings_args(self, ffmpeg_args):
-        if self.audio_settings is not None and not self.is_video_settings_2_pass():
+    def _apply_audio_settings_args(self, ffmpeg_args, is_first_pass):
+        if self.audio_settings is not None and not is_first_pass:
             ffmpeg_args.extend(self._generate_audio_settings_args())
-        elif self.no_audio or self.is_video_settings_2_pass():
+        elif self.no_audio or is_first_pass:
             ffmpeg_args.append(self.AUDIO_NONE_ARG)
         else:
             ffmpeg_args.extend(self.AUDIO_COPY_ARGS)
@@ -414,13 +403,12 @@ class Settings:
 
         ffmpeg_args.append(output_file_path)
 
-    def _apply_2pass_args(self, ffmpeg_args):
-        if self.is_video_settings_2_pass():
-            ffmpeg_copy = self.get_copy()
-            ffmpeg_copy.video_settings.encode_pass = 2
+    def _apply_2pass_args(self, ffmpeg_args, cmd_args_enabled, video_settings):
+        second_pass_video_settings = video_settings.copy()
+        second_pass_video_settings.encode_pass = 2
 
-            ffmpeg_args.append('&&')
-            ffmpeg_args.extend(ffmpeg_copy.get_args())
+        ffmpeg_args.append('&&')
+        ffmpeg_args.extend(self._generate_args(cmd_args_enabled, second_pass_video_settings))
 
     def is_video_settings_x264(self):
         return self.video_settings is not None and self.video_settings.codec_name == 'libx264'
@@ -437,8 +425,12 @@ class Settings:
         return video_enabled and is_using_nvenc
 
     def is_video_settings_2_pass(self):
-        if self.video_settings:
-            return self.video_settings.encode_pass == 1
+        return self._is_first_pass(self.video_settings)
+
+    @staticmethod
+    def _is_first_pass(video_settings):
+        if video_settings:
+            return video_settings.encode_pass == 1
         return False
 
     def is_audio_settings_aac(self):
@@ -447,6 +439,7 @@ class Settings:
     def is_audio_settings_opus(self):
         return self.audio_settings is not None and self.audio_settings.codec_name == 'libopus'
 
+    @profiling_helper.timed_span('Settings.get_copy')
     def get_copy(self):
         """
         Get separate copy of this ffmpeg settings object.
@@ -454,7 +447,7 @@ class Settings:
         ffmpeg_copy = Settings()
 
         try:
-            ffmpeg_copy.input_file_info = self.input_file_info.copy()
+            ffmpeg_copy.media_info = self.media_info
             ffmpeg_copy.input_file = self.input_file
             ffmpeg_copy.output_directory = self.output_directory
             ffmpeg_copy.filename = self.filename
@@ -474,10 +467,10 @@ class Settings:
                 ffmpeg_copy.output_container = self.output_container
 
             if self.video_settings is not None:
-                ffmpeg_copy.video_settings = copy.deepcopy(self.video_settings)
+                ffmpeg_copy.video_settings = self.video_settings.copy()
 
             if self.audio_settings is not None:
-                ffmpeg_copy.audio_settings = copy.deepcopy(self.audio_settings)
+                ffmpeg_copy.audio_settings = self.audio_settings.copy()
 
             if self.trim_settings is not None:
                 ffmpeg_copy.trim_settings = copy.deepcopy(self.trim_settings)
@@ -16,13 +16,16 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class SubtitlesSettings:
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
+
+
+class SubtitlesSettings(RevisionedSettings):
     """
     Stores all settings for subtitles settings.
     """
 
-    def __init__(self, input_file_info):
-        self.subtitle_streams = input_file_info['subtitle_streams']
+    def __init__(self, media_info):
+        self.subtitle_streams = media_info.subtitle_streams
         self.streams_available = {}
         self.streams_in_use = {}
         self._ffmpeg_args = {}
@@ -31,8 +34,8 @@ class SubtitlesSettings:
         self._setup_available_streams()
 
     def _setup_available_streams(self):
-        for index, stream_dictionary in self.subtitle_streams.items():
-            self.streams_available[index] = stream_dictionary['info']
+        for subtitle_stream in self.subtitle_streams:
+            self.streams_available[subtitle_stream.index] = subtitle_stream.info
 
     def use_stream(self, stream_info):
         streams_available_keys = list(self.streams_available.keys())
@@ -41,6 +44,7 @@ class SubtitlesSettings:
 
         self.streams_available.pop(key, 0)
         self.streams_in_use[key] = stream_info
+        self.mark_changed()
 
     def remove_stream(self, stream_info):
         streams_in_use_keys = list(self.streams_in_use.keys())
@@ -49,6 +53,7 @@ class SubtitlesSettings:
 
         self.streams_in_use.pop(key, 0)
         self.streams_available[key] = stream_info
+        self.mark_changed()
 
     def set_stream_method_burn_in(self, stream_info):
         streams_in_use_keys = list(self.streams_in_use.keys())
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class TrimSettings:
+from render_watch.ffmpeg.revisioned_settings import RevisionedSettings
+
+
+class TrimSettings(RevisionedSettings):
     """
     Stores all trim settings.
     """
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class VP9:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class VP9(CopyOnWriteSettings):
     """
     Stores all settings for the VP9 codec.
     """
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class X264:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class X264(CopyOnWriteSettings):
     """
     Stores all settings for the x264 codec.
     """
@@ -873,10 +876,4 @@ class X264:
         """
         Returns args string for all advanced settings.
         """
-        x264_advanced_args = ''
-        for setting, arg in self._ffmpeg_advanced_args.items():
-            if arg is not None:
-                x264_advanced_args += setting
-                x264_advanced_args += arg
-                x264_advanced_args += ':'
-        return x264_advanced_args
+        return ''.join(setting + arg + ':' for setting, arg in self._ffmpeg_advanced_args.items() if arg is not None)
@@ -16,7 +16,10 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
-class X265:
+from render_watch.ffmpeg.copy_on_write_settings import CopyOnWriteSettings
+
+
+class X265(CopyOnWriteSettings):
     """
     Stores all settings for the x265 codec.
     """
@@ -1047,10 +1050,4 @@ class X265:
         """
         Returns args string for all advanced settings.
         """
-        x265_advanced_settings = ''
-        for setting, arg in self._ffmpeg_advanced_args.items():
-            if arg is not None:
-                x265_advanced_settings += setting
-                x265_advanced_settings += arg
-                x265_advanced_settings += ':'
-        return x265_advanced_settings
+        return ''.join(setting + arg + ':' for setting, arg in self._ffmpeg_advanced_args.items() if arg is not None)
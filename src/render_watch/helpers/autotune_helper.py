@@ -0,0 +1,108 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+CONCURRENCY_LADDER = (1, 2, 3, 4, 6, 8, 12, 16)
+STEPS_WITHOUT_GAIN_TO_STOP = 2
+
+
+def get_concurrency_ladder(max_tasks):
+    """
+    Returns the numbers of tasks that autotune measures, in order, up to and including the max tasks. The steps get
+    further apart as they get higher, doubling every two steps after 16, since the throughput curve flattens out.
+
+    :param max_tasks: Highest number of tasks to measure.
+    """
+    ladder = [number_of_tasks for number_of_tasks in CONCURRENCY_LADDER if number_of_tasks < max_tasks]
+
+    number_of_tasks = CONCURRENCY_LADDER[-1]
+    while number_of_tasks < max_tasks:
+        if number_of_tasks > CONCURRENCY_LADDER[-1]:
+            ladder.append(number_of_tasks)
+        number_of_tasks = number_of_tasks * 3 // 2 if _is_power_of_two(number_of_tasks) else number_of_tasks * 4 // 3
+
+    ladder.append(max_tasks)
+    return ladder
+
+
+def _is_power_of_two(number):
+    return number & (number - 1) == 0
+
+
+def is_climb_finished(curve, min_gain):
+    """
+    Checks if autotune can stop measuring higher numbers of tasks, because the last few steps didn't get more
+    throughput than the best step by at least the min gain.
+
+    :param curve: List of (number of tasks, throughput) tuples, in the order they were measured.
+    :param min_gain: Fraction, like 0.05, that a step has to improve the throughput by to count as a gain.
+    """
+    best_throughput = 0.0
+    steps_without_gain = 0
+
+    for _, throughput in curve:
+        if throughput > best_throughput * (1 + min_gain):
+            steps_without_gain = 0
+        else:
+            steps_without_gain += 1
+        best_throughput = max(best_throughput, throughput)
+
+    return steps_without_gain >= STEPS_WITHOUT_GAIN_TO_STOP
+
+
+def get_knee(curve, min_gain):
+    """
+    Returns the knee of a throughput curve: the fewest tasks that get within the min gain of the best throughput.
+    Running more tasks than that uses more memory and temp space without getting much faster.
+
+    :param curve: List of (number of tasks, throughput) tuples.
+    :param min_gain: Fraction, like 0.05, of throughput that's worth running more tasks for.
+    """
+    if not curve:
+        return None
+
+    best_throughput = max(throughput for _, throughput in curve)
+
+    for number_of_tasks, throughput in sorted(curve):
+        if throughput * (1 + min_gain) >= best_throughput:
+            return number_of_tasks
+
+    return None
+
+
+def get_combined_curve(curves):
+    """
+    Returns one curve for a mix of codecs, from the curves of each codec. Each codec's throughput is divided by its
+    best throughput, so a fast codec doesn't outweigh a slow one, and the fractions are averaged over the numbers of
+    tasks that every curve measured.
+
+    :param curves: List of curves, which are lists of (number of tasks, throughput) tuples.
+    """
+    normalized_curves = []
+
+    for curve in curves:
+        best_throughput = max(throughput for _, throughput in curve)
+        if best_throughput > 0:
+            normalized_curves.append({number_of_tasks: throughput / best_throughput
+                                      for number_of_tasks, throughput in curve})
+
+    if not normalized_curves:
+        return []
+
+    common_numbers_of_tasks = set.intersection(*(set(curve) for curve in normalized_curves))
+    return [(number_of_tasks, sum(curve[number_of_tasks] for curve in normalized_curves) / len(normalized_curves))
+            for number_of_tasks in sorted(common_numbers_of_tasks)]
@@ -0,0 +1,164 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+
+from render_watch.ffmpeg.settings import Settings
+
+
+RESULTS_FORMAT_VERSION = 1
+
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '1080p': (1920, 1080),
+    '2160p': (3840, 2160)
+}
+SOURCE_PATTERNS = ('testsrc2', 'mandelbrot')
+SOURCE_FRAME_RATE = 30
+SOURCE_FILE_NAME_FORMAT = '%s_%s_%ds.mkv'
+
+# Fixed presets, so results from different releases encode the same way.
+CODEC_SETTINGS = {
+    'x264': {'crf': 23, 'preset': 3},  # veryfast
+    'x265': {'crf': 28, 'preset': 2},  # superfast
+    'vp9': {'bitrate': 0, 'crf': 33, 'quality': 1, 'speed': 6}  # good, cpu-used 5
+}
+AUDIO_SETTINGS = {'bitrate': 128}
+
+STANDARD_MODE = 'standard'
+PARALLEL_MODE = 'parallel'
+PER_CODEC_MODE = 'per_codec'
+CHUNKS_MODE = 'chunks'
+MODES = (STANDARD_MODE, PARALLEL_MODE, PER_CODEC_MODE, CHUNKS_MODE)
+
+
+def get_source_file_name(pattern, resolution, duration_in_seconds):
+    """
+    Returns the file name of a synthetic source.
+
+    :param pattern: One of SOURCE_PATTERNS.
+    :param resolution: One of RESOLUTIONS.
+    :param duration_in_seconds: Length of the source.
+    """
+    return SOURCE_FILE_NAME_FORMAT % (pattern, resolution, duration_in_seconds)
+
+
+def get_source_args(pattern, resolution, duration_in_seconds, output_file_path):
+    """
+    Returns the ffmpeg args that generate a synthetic source from a lavfi test pattern, with a sine wave for audio.
+    Sources are encoded at a high quality so decoding them costs about the same as decoding a real input.
+
+    :param pattern: One of SOURCE_PATTERNS.
+    :param resolution: One of RESOLUTIONS.
+    :param duration_in_seconds: Length of the source.
+    :param output_file_path: Path to write the source to.
+    """
+    width, height = RESOLUTIONS[resolution]
+
+    ffmpeg_args = Settings.FFMPEG_INIT_ARGS.copy()
+    ffmpeg_args.extend(['-f', 'lavfi',
+                        '-i', pattern + '=size=' + str(width) + 'x' + str(height) + ':rate=' + str(SOURCE_FRAME_RATE),
+                        '-f', 'lavfi',
+                        '-i', 'sine=frequency=440:sample_rate=48000',
+                        '-t', str(duration_in_seconds),
+                        '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '12', '-pix_fmt', 'yuv420p',
+                        '-c:a', 'aac', '-b:a', '192k',
+                        output_file_path])
+    return ffmpeg_args
+
+
+def get_ffmpeg_settings(codec):
+    """
+    Returns the settings file dictionary that a benchmark case encodes with.
+
+    :param codec: One of CODEC_SETTINGS.
+    """
+    return {
+        'output_container': '.mkv',
+        'video_codec': codec,
+        'video_settings': CODEC_SETTINGS[codec],
+        'audio_codec': 'aac',
+        'audio_settings': AUDIO_SETTINGS
+    }
+
+
+def get_case_name(resolution, codec, mode):
+    """
+    Returns the name that identifies a benchmark case in the results.
+
+    :param resolution: One of RESOLUTIONS.
+    :param codec: One of CODEC_SETTINGS.
+    :param mode: One of MODES.
+    """
+    return resolution + '/' + codec + '/' + mode
+
+
+def get_directory_size(directory_path):
+    """
+    Returns the size in bytes of every file in a directory and its sub-directories. Files that are removed while the
+    directory is being read are skipped.
+
+    :param directory_path: Path of the directory.
+    """
+    directory_size = 0
+
+    for root_path, _, file_names in os.walk(directory_path):
+        for file_name in file_names:
+            try:
+                directory_size += os.path.getsize(os.path.join(root_path, file_name))
+            except OSError:
+                continue
+
+    return directory_size
+
+
+def get_cpu_time():
+    """
+    Returns the CPU time in seconds used by this process and the child processes it waited for, like ffmpeg.
+    """
+    process_times = os.times()
+    return process_times.user + process_times.system + process_times.children_user + process_times.children_system
+
+
+def compare_results(baseline_results, results, max_regression):
+    """
+    Returns the cases that are in both results, as (case name, baseline wall time, wall time, change) tuples, and the
+    names of the cases that got slower by more than the max regression. Change is the fraction that the wall time
+    changed by, positive when the case got slower.
+
+    :param baseline_results: Results dictionary of an earlier run, like a previous release.
+    :param results: Results dictionary to compare with the baseline.
+    :param max_regression: Fraction, like 0.1, that a case's wall time can grow by before it's a regression.
+    """
+    baseline_cases = {case['name']: case for case in baseline_results.get('cases', [])}
+    comparisons = []
+    regressions = []
+
+    for case in results.get('cases', []):
+        baseline_case = baseline_cases.get(case['name'])
+        if baseline_case is None or not baseline_case['wall_time'] or case['failed_tasks'] \
+                or baseline_case['failed_tasks']:
+            continue
+
+        change = (case['wall_time'] - baseline_case['wall_time']) / baseline_case['wall_time']
+        comparisons.append((case['name'], baseline_case['wall_time'], case['wall_time'], change))
+
+        if change > max_regression:
+            regressions.append(case['name'])
+
+    return comparisons, regressions
@@ -0,0 +1,110 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import hashlib
+import ipaddress
+import os
+import shutil
+import socket
+
+
+TRANSFER_BUFFER_SIZE = 1024 * 1024
+DEFAULT_PORT = 7575
+
+
+def parse_address(address):
+    """
+    Returns a (host, port) tuple from a "host:port" string. The default port is used when the port is left out.
+    Raises ValueError if the port isn't a number.
+
+    :param address: Address string, like "192.168.1.10:7575" or "localhost".
+    """
+    host, separator, port = address.rpartition(':')
+
+    if not separator:
+        return address, DEFAULT_PORT
+    return host or 'localhost', int(port)
+
+
+def is_loopback_host(host):
+    """
+    Returns whether a host only resolves to loopback addresses, like "localhost" or "127.0.0.1". Hosts that can't be
+    resolved and wildcard addresses, like "0.0.0.0", aren't loopback hosts.
+
+    :param host: Host name or IP address.
+    """
+    try:
+        addresses = socket.getaddrinfo(host, None)
+    except (OSError, UnicodeError):
+        return False
+
+    return bool(addresses) and all(ipaddress.ip_address(address[4][0].split('%')[0]).is_loopback
+                                   for address in addresses)
+
+
+def send_file(socket_file, file_path):
+    """
+    Writes a file's contents to a connection. The file's size must be sent first so the other end knows where the
+    contents end.
+
+    :param socket_file: Writable binary file made from a socket.
+    :param file_path: File to send.
+    """
+    with open(file_path, 'rb') as input_file:
+        shutil.copyfileobj(input_file, socket_file, TRANSFER_BUFFER_SIZE)
+    socket_file.flush()
+
+
+def receive_file(socket_file, file_size, file_path):
+    """
+    Reads a file's contents from a connection into a file. The file is written under a temporary name and renamed
+    once all of it was received, so a lost connection never leaves a partial file at the file path.
+    Raises ConnectionError if the connection closes early.
+
+    :param socket_file: Readable binary file made from a socket.
+    :param file_size: Size of the file in bytes.
+    :param file_path: File to write.
+    """
+    partial_file_path = file_path + '.part'
+    bytes_left = file_size
+
+    try:
+        with open(partial_file_path, 'wb') as output_file:
+            while bytes_left:
+                data = socket_file.read(min(bytes_left, TRANSFER_BUFFER_SIZE))
+                if not data:
+                    raise ConnectionError('connection closed during file transfer')
+
+                output_file.write(data)
+                bytes_left -= len(data)
+    except OSError:
+        os.remove(partial_file_path)
+        raise
+
+    os.replace(partial_file_path, file_path)
+
+
+def get_input_cache_file_name(input_file_path, input_file_size):
+    """
+    Returns the file name a worker caches a streamed input under. Inputs with the same path and size share a name.
+
+    :param input_file_path: Input's path on the coordinator.
+    :param input_file_size: Input's size in bytes.
+    """
+    input_key = hashlib.sha1((input_file_path + '\n' + str(input_file_size)).encode()).hexdigest()
+    return input_key + os.path.splitext(input_file_path)[1]
@@ -143,6 +143,33 @@ def fix_same_name_occurences(ffmpeg, application_preferences):
         counter += 1
 
 
+def fix_same_name_occurences_in_batch(ffmpeg_batch, taken_output_file_paths, application_preferences):
+    """
+    Changes the output file names of a batch of tasks in one pass so that none of them overwrite an existing file,
+    their own input file, or another task's output file.
+
+    :param ffmpeg_batch: List of ffmpeg settings objects.
+    :param taken_output_file_paths: Set of output file paths used by other tasks. The batch's paths are added to it.
+    :param application_preferences: Application's preferences.
+    """
+    for ffmpeg in ffmpeg_batch:
+        counter = 0
+        original_file_name = ffmpeg.filename
+
+        while True:
+            output_file_path = ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container
+            if ffmpeg.input_file == output_file_path \
+                    or output_file_path in taken_output_file_paths \
+                    or _output_file_path_exists(output_file_path, application_preferences):
+                ffmpeg.filename = original_file_name + '_' + str(counter)
+            else:
+                break
+
+            counter += 1
+
+        taken_output_file_paths.add(output_file_path)
+
+
 def _output_file_path_exists(output_file_path, application_preferences):
     if application_preferences.is_overwrite_outputs_enabled:
         return False
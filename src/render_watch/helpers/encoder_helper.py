@@ -21,6 +21,7 @@ import logging
 
 from render_watch.ffmpeg.trim_settings import TrimSettings
 from render_watch.ffmpeg.settings import Settings
+from render_watch.encoding import tuning_profile
 from render_watch.helpers.nvidia_helper import NvidiaHelper
 
 
@@ -46,16 +47,16 @@ def _get_number_of_chunks(ffmpeg, application_preferences):
     if application_preferences.is_per_codec_parallel_tasks_enabled:
         return _get_per_codec_number_of_chunks(ffmpeg, application_preferences)
 
-    return application_preferences.parallel_tasks
+    return tuning_profile.get_parallel_tasks(application_preferences)
 
 
 def _get_per_codec_number_of_chunks(ffmpeg, application_preferences):
     if ffmpeg.is_video_settings_x264():
-        return application_preferences.per_codec_parallel_tasks['x264']
+        return tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x264')
     elif ffmpeg.is_video_settings_x265():
-        return application_preferences.per_codec_parallel_tasks['x265']
+        return tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x265')
     elif ffmpeg.is_video_settings_vp9():
-        return application_preferences.per_codec_parallel_tasks['vp9']
+        return tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'vp9')
     else:
         return 1
 
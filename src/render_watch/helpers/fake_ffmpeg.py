@@ -0,0 +1,589 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Stand-ins for ffmpeg and ffprobe that don't decode or encode anything, for load testing Render Watch.
+
+They take the same args that Render Watch gives the real binaries and print the same kind of output: ffprobe prints a
+fixed set of streams, and ffmpeg prints -stats lines (and -progress blocks) while a simulated encode moves forward at a
+fixed speed. Outputs are small placeholder files, including the segments and segment lists of the segment muxer.
+Nothing is random, so the same args always run the same way.
+
+Run them with "python -m render_watch.helpers.fake_ffmpeg [ffprobe] ARGS". To use them, set RENDER_WATCH_FFMPEG and
+RENDER_WATCH_FFPROBE to the ffmpeg and ffprobe scripts in tests/fake_ffmpeg/bin, which do that. They're configured with
+these environment variables:
+
+RENDER_WATCH_FAKE_DURATION: Duration in seconds of inputs that don't set their own (default 120). An input whose file
+starts with "duration=SECONDS", like the placeholders written by the fake ffmpeg, has that duration instead.
+RENDER_WATCH_FAKE_SPEED: How many seconds of video are encoded every second (default 1.0).
+RENDER_WATCH_FAKE_FAIL: Regular expression. Encodes with an arg that matches fail halfway through.
+RENDER_WATCH_FAKE_FAIL_RATE: Fraction of encodes, from 0.0 to 1.0, that fail halfway through. Picked from a hash of the
+args.
+RENDER_WATCH_FAKE_NVENC: Set to 1 to pretend NVENC, NVDEC, and npp are available.
+RENDER_WATCH_FAKE_STATS_INTERVAL: Seconds between -stats lines (default 0.5).
+
+Time spent stopped by SIGSTOP isn't counted, so a paused encode continues where it was after SIGCONT.
+"""
+
+
+import math
+import os
+import re
+import sys
+import time
+import zlib
+
+
+DURATION_ENV = 'RENDER_WATCH_FAKE_DURATION'
+SPEED_ENV = 'RENDER_WATCH_FAKE_SPEED'
+FAIL_ENV = 'RENDER_WATCH_FAKE_FAIL'
+FAIL_RATE_ENV = 'RENDER_WATCH_FAKE_FAIL_RATE'
+NVENC_ENV = 'RENDER_WATCH_FAKE_NVENC'
+STATS_INTERVAL_ENV = 'RENDER_WATCH_FAKE_STATS_INTERVAL'
+
+DEFAULT_DURATION_IN_SECONDS = 120.0
+DEFAULT_SPEED = 1.0
+DEFAULT_STATS_INTERVAL_IN_SECONDS = 0.5
+LAVFI_DURATION_IN_SECONDS = float('inf')  # Test sources, like "nullsrc", that don't set "d=" never end.
+COPY_SPEED = 100.0  # Test sources and stream copies, like joining chunks, run much faster than encodes.
+
+FRAME_RATE = 24
+BITRATE_IN_KILOBITS = 4000.0
+PLACEHOLDER_FORMAT = 'RENDER WATCH FAKE OUTPUT\nduration=%.6f\n'
+PLACEHOLDER_SIZE = 1024  # Render Watch skips inputs that round down to 0.0KB.
+PLACEHOLDER_DURATION_SIZE = 256
+
+FLAG_OPTIONS = ('-hide_banner', '-stats', '-nostats', '-y', '-n', '-an', '-vn', '-sn', '-dn', '-shortest', '-copyts',
+                '-re', '-nostdin', '-version', '-decoders', '-encoders', '-filters', '-codecs', '-formats')
+QUIET_LOG_LEVELS = ('quiet', 'panic', 'fatal', 'error', 'warning')
+NULL_OUTPUTS = ('-', '/dev/null')
+
+ENCODERS_LIST = (' V..... libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10',
+                 ' V..... libx265              libx265 H.265 / HEVC',
+                 ' V..... libvpx-vp9           libvpx VP9',
+                 ' A..... aac                  AAC (Advanced Audio Coding)',
+                 ' A..... libopus              libopus Opus')
+NVENC_ENCODERS_LIST = (' V..... h264_nvenc           NVIDIA NVENC H.264 encoder',
+                       ' V..... hevc_nvenc           NVIDIA NVENC hevc encoder')
+DECODERS_LIST = (' V....D h264                 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10',
+                 ' V....D hevc                 HEVC (High Efficiency Video Coding)',
+                 ' A....D aac                  AAC (Advanced Audio Coding)')
+NVDEC_DECODERS_LIST = (' V..... h264_cuvid           Nvidia CUVID H264 decoder',
+                       ' V..... hevc_cuvid           Nvidia CUVID HEVC decoder')
+FILTERS_LIST = (' ... cropdetect        V->V       Auto-detect crop size.',
+                ' ... scale             V->V       Scale the input video size and/or convert the image format.')
+NPP_FILTERS_LIST = (' ... scale_npp         V->V       NVIDIA Performance Primitives video scaling and format '
+                    'conversion',)
+VERSION_LINE = '%s version render-watch-fake Copyright (c) the Render Watch authors'
+NVIDIA_ARG_PATTERN = re.compile('nvenc|cuvid|nvdec|_npp|cuda')
+
+
+class FakeArgs:
+    """
+    Splits ffmpeg args into inputs and outputs, each with the options that came before them.
+    """
+
+    def __init__(self, args):
+        self.global_options = {}
+        self.inputs = []
+        self.outputs = []
+
+        options = {}
+        index = 0
+        while index < len(args):
+            arg = args[index]
+
+            if arg in FLAG_OPTIONS:
+                self.global_options[arg] = True
+            elif arg == '-i' and index + 1 < len(args):
+                self.inputs.append((args[index + 1], options))
+                options = {}
+                index += 1
+            elif arg.startswith('-') and arg not in NULL_OUTPUTS and index + 1 < len(args):
+                options[arg] = args[index + 1]
+                index += 1
+            else:
+                self.outputs.append((arg, options))
+                options = {}
+
+            index += 1
+
+    def has_option(self, option):
+        """
+        Returns whether an option was given anywhere in the args.
+
+        :param option: Option like "-progress".
+        """
+        if option in self.global_options:
+            return True
+
+        return any(option in options for _, options in self.inputs + self.outputs)
+
+    def get_option(self, option, default=None):
+        """
+        Returns the value of an option from the last input or output that has it.
+
+        :param option: Option like "-loglevel".
+        :param default: (Default None) Value returned when no input or output has the option.
+        """
+        for _, options in reversed(self.inputs + self.outputs):
+            if option in options:
+                return options[option]
+
+        return default
+
+
+def get_seconds(time_value):
+    """
+    Returns the seconds of an ffmpeg time value, which is either seconds or [HH:]MM:SS[.m...].
+
+    :param time_value: Time value like "90.5" or "00:01:30.50".
+    """
+    seconds = 0.0
+
+    for time_part in str(time_value).split(':'):
+        seconds = (seconds * 60) + float(time_part)
+
+    return seconds
+
+
+def get_timecode(seconds, decimal_places=2):
+    """
+    Returns seconds as an HH:MM:SS.cc timecode, like ffmpeg prints them. Endless durations are "N/A".
+
+    :param seconds: Seconds.
+    :param decimal_places: (Default 2) Number of decimal places for the seconds.
+    """
+    if math.isinf(seconds):
+        return 'N/A'
+
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    seconds_width = 3 + decimal_places if decimal_places else 2
+    return '%02d:%02d:%0*.*f' % (hours, minutes, seconds_width, decimal_places, seconds)
+
+
+def get_input_duration(input_path, input_options):
+    """
+    Returns the duration of an input, from its placeholder contents, its lavfi "d=" option, the files in its concat
+    list, or RENDER_WATCH_FAKE_DURATION.
+
+    :param input_path: Input file path or lavfi filter graph.
+    :param input_options: Options given before the input's "-i".
+    """
+    if input_options.get('-f') == 'lavfi':
+        duration_match = re.search(r'(?:^|:)d(?:uration)?=([\d.:]+)', input_path)
+        return get_seconds(duration_match.group(1)) if duration_match else LAVFI_DURATION_IN_SECONDS
+
+    if input_options.get('-f') == 'concat':
+        return _get_concatenation_duration(input_path)
+
+    try:
+        with open(input_path, 'rb') as input_file:
+            head = input_file.read(PLACEHOLDER_DURATION_SIZE).decode(errors='ignore')
+        duration_match = re.search(r'^duration=(\d+(?:\.\d+)?)$', head, re.MULTILINE)
+        if duration_match:
+            return float(duration_match.group(1))
+    except OSError:
+        pass
+
+    return float(os.environ.get(DURATION_ENV) or DEFAULT_DURATION_IN_SECONDS)
+
+
+def _get_concatenation_duration(concatenation_file_path):
+    concatenation_directory = os.path.dirname(concatenation_file_path)
+    duration = 0.0
+
+    with open(concatenation_file_path) as concatenation_file:
+        for line in concatenation_file:
+            file_match = re.match(r"\s*file\s+'(.*)'\s*$", line)
+            if file_match:
+                duration += get_input_duration(os.path.join(concatenation_directory, file_match.group(1)), {})
+
+    return duration
+
+
+def get_encode_duration(fake_args):
+    """
+    Returns how many seconds of the first input get encoded, after its -ss, -t, and -to input and output options and
+    any frame limit.
+
+    :param fake_args: Args of the encode.
+    """
+    if not fake_args.inputs:
+        return 0.0
+
+    input_path, input_options = fake_args.inputs[0]
+    input_start = get_seconds(input_options.get('-ss', 0))
+    duration = get_input_duration(input_path, input_options) - input_start
+
+    if '-t' in input_options:
+        duration = min(duration, get_seconds(input_options['-t']))
+    elif '-to' in input_options:
+        duration = min(duration, get_seconds(input_options['-to']) - input_start)
+
+    if fake_args.outputs:
+        output_options = fake_args.outputs[-1][1]
+        output_start = get_seconds(output_options.get('-ss', 0))
+
+        # Input seeking resets timestamps, so an output's -to is measured from the input's -ss.
+        if '-t' in output_options:
+            duration = min(duration - output_start, get_seconds(output_options['-t']))
+        elif '-to' in output_options:
+            duration = min(duration, get_seconds(output_options['-to'])) - output_start
+        else:
+            duration -= output_start
+
+        frames = output_options.get('-vframes', output_options.get('-frames:v'))
+        if frames is not None:
+            duration = min(duration, int(frames) / FRAME_RATE)
+
+    return max(duration, 0.0)
+
+
+def is_encode_failing(args):
+    """
+    Returns whether RENDER_WATCH_FAKE_FAIL or RENDER_WATCH_FAKE_FAIL_RATE make an encode fail.
+
+    :param args: Args of the encode.
+    """
+    fail_pattern = os.environ.get(FAIL_ENV)
+    if fail_pattern and any(re.search(fail_pattern, arg) for arg in args):
+        return True
+
+    fail_rate = float(os.environ.get(FAIL_RATE_ENV) or 0.0)
+    return (zlib.crc32('\0'.join(args).encode()) / 0xffffffff) < fail_rate
+
+
+def is_nvidia_enabled():
+    return os.environ.get(NVENC_ENV) == '1'
+
+
+def _is_output_written(output_path, output_options):
+    return not (output_options.get('-f') == 'null' or output_path in NULL_OUTPUTS or output_path.startswith('pipe:'))
+
+
+def _write_placeholder(output_path, duration):
+    with open(output_path, 'w') as output_file:
+        output_file.write((PLACEHOLDER_FORMAT % duration).ljust(PLACEHOLDER_SIZE - 1, '#') + '\n')
+
+
+class SegmentOutput:
+    """
+    Writes segments and a CSV segment list the same way ffmpeg's segment muxer does. Segments are listed once they're
+    closed.
+    """
+
+    def __init__(self, output_path, output_options):
+        self.output_path = output_path
+        self.segment_time = get_seconds(output_options.get('-segment_time', 2))
+        self.segment_number = int(output_options.get('-segment_start_number', 0))
+        self.segment_list_path = output_options.get('-segment_list')
+        self.segment_start = 0.0
+
+        self._open_segment()
+
+    def _get_segment_path(self):
+        return self.output_path % self.segment_number
+
+    def _open_segment(self):
+        _write_placeholder(self._get_segment_path(), 0.0)
+
+    def _close_segment(self, segment_end):
+        segment_path = self._get_segment_path()
+        _write_placeholder(segment_path, segment_end - self.segment_start)
+
+        if self.segment_list_path:
+            with open(self.segment_list_path, 'a') as segment_list_file:
+                segment_list_file.write('%s,%f,%f\n' % (os.path.basename(segment_path),
+                                                       self.segment_start,
+                                                       segment_end))
+
+    def update(self, position):
+        """
+        Closes every segment that ends before the encode's position and opens the segments after them.
+
+        :param position: Seconds encoded so far.
+        """
+        while position >= self.segment_start + self.segment_time:
+            segment_end = self.segment_start + self.segment_time
+            self._close_segment(segment_end)
+            self.segment_number += 1
+            self.segment_start = segment_end
+            self._open_segment()
+
+    def finish(self, position):
+        """
+        Closes the last segment.
+
+        :param position: Seconds encoded when the encode finished.
+        """
+        self.update(position)
+
+        if position > self.segment_start:
+            self._close_segment(position)
+        else:
+            os.remove(self._get_segment_path())
+
+
+class FakeEncode:
+    """
+    Moves a simulated encode forward at RENDER_WATCH_FAKE_SPEED and reports its progress like ffmpeg does.
+    """
+
+    def __init__(self, fake_args, is_failing):
+        self.fake_args = fake_args
+        self.duration = get_encode_duration(fake_args)
+        self.fail_position = self.duration / 2 if is_failing else None
+        self.speed = float(os.environ.get(SPEED_ENV) or DEFAULT_SPEED)
+        self.stats_interval = float(os.environ.get(STATS_INTERVAL_ENV) or DEFAULT_STATS_INTERVAL_IN_SECONDS)
+        self.position = 0.0
+        self.is_stats_enabled = not fake_args.has_option('-nostats')
+        self.progress_file = None
+        self.segment_outputs = []
+
+        is_test_source = fake_args.inputs and fake_args.inputs[0][1].get('-f') == 'lavfi'
+        is_stream_copy = fake_args.outputs and fake_args.outputs[-1][1].get('-c') == 'copy'
+        if is_test_source or is_stream_copy:
+            self.speed = max(self.speed, COPY_SPEED)
+
+    def run(self):
+        """
+        Runs the encode and returns ffmpeg's exit code.
+        """
+        self._open_outputs()
+        self._open_progress()
+
+        try:
+            end_position = self.duration if self.fail_position is None else self.fail_position
+
+            while self.position < end_position:
+                step_in_seconds = min(self.stats_interval, (end_position - self.position) / self.speed)
+                time.sleep(step_in_seconds)
+
+                # Only counts the time that was slept, so time spent stopped by SIGSTOP isn't counted.
+                self.position = min(self.position + (step_in_seconds * self.speed), end_position)
+                self._update_segment_outputs()
+                self._write_stats('\r', 'continue')
+
+            if self.fail_position is not None:
+                self._write_stats('\n', 'end')
+                _print_log('Error while encoding: Input/output error\nConversion failed!')
+
+                return 1
+
+            self._finish_outputs()
+            self._write_stats('\n', 'end')
+            _print_log('video:%dkB audio:0kB subtitle:0kB other streams:0kB global headers:0kB muxing overhead: 0.000000%%'
+                       % self._get_size_in_kilobytes())
+
+            return 0
+        finally:
+            if self.progress_file is not None and self.progress_file not in (sys.stdout, sys.stderr):
+                self.progress_file.close()
+
+    def _open_outputs(self):
+        for output_path, output_options in self.fake_args.outputs:
+            if not _is_output_written(output_path, output_options):
+                continue
+
+            if output_options.get('-f') == 'segment':
+                self.segment_outputs.append(SegmentOutput(output_path, output_options))
+            else:
+                _write_placeholder(output_path, 0.0)
+
+    def _open_progress(self):
+        progress_url = self.fake_args.get_option('-progress')
+
+        if progress_url == 'pipe:1':
+            self.progress_file = sys.stdout
+        elif progress_url == 'pipe:2':
+            self.progress_file = sys.stderr
+        elif progress_url:
+            self.progress_file = open(progress_url[len('file:'):] if progress_url.startswith('file:') else progress_url,
+                                      'w')
+
+    def _update_segment_outputs(self):
+        for segment_output in self.segment_outputs:
+            segment_output.update(self.position)
+
+    def _finish_outputs(self):
+        for segment_output in self.segment_outputs:
+            segment_output.finish(self.position)
+
+        for output_path, output_options in self.fake_args.outputs:
+            if _is_output_written(output_path, output_options) and output_options.get('-f') != 'segment':
+                _write_placeholder(output_path, self.position)
+
+    def _get_size_in_kilobytes(self):
+        return int(self.position * BITRATE_IN_KILOBITS / 8)
+
+    def _write_stats(self, line_end, progress_state):
+        frame = int(self.position * FRAME_RATE)
+        fps = FRAME_RATE * self.speed
+
+        if self.is_stats_enabled:
+            sys.stderr.write('frame=%5d fps=%.1f q=28.0 size=%8dkB time=%s bitrate=%6.1fkbits/s speed=%.2fx%s'
+                             % (frame,
+                                fps,
+                                self._get_size_in_kilobytes(),
+                                get_timecode(self.position),
+                                BITRATE_IN_KILOBITS,
+                                self.speed,
+                                line_end))
+            sys.stderr.flush()
+
+        if self.progress_file is not None:
+            self.progress_file.write('frame=%d\nfps=%.2f\nstream_0_0_q=28.0\nbitrate=%.1fkbits/s\ntotal_size=%d\n'
+                                     'out_time_us=%d\nout_time_ms=%d\nout_time=%s\ndup_frames=0\ndrop_frames=0\n'
+                                     'speed=%.3gx\nprogress=%s\n'
+                                     % (frame,
+                                        fps,
+                                        BITRATE_IN_KILOBITS,
+                                        self._get_size_in_kilobytes() * 1024,
+                                        self.position * 1000000,
+                                        self.position * 1000000,
+                                        get_timecode(self.position, 6),
+                                        self.speed,
+                                        progress_state))
+            self.progress_file.flush()
+
+
+def _print_log(message):
+    sys.stderr.write(message + '\n')
+    sys.stderr.flush()
+
+
+def _print_header(fake_args, duration):
+    for input_number, (input_path, input_options) in enumerate(fake_args.inputs):
+        _print_log('Input #%d, matroska,webm, from \'%s\':\n  Duration: %s, start: 0.000000, bitrate: %d kb/s'
+                   % (input_number,
+                      input_path,
+                      get_timecode(get_input_duration(input_path, input_options)),
+                      BITRATE_IN_KILOBITS))
+
+    for output_number, (output_path, _) in enumerate(fake_args.outputs):
+        _print_log('Output #%d, matroska, to \'%s\':\n  Duration: %s' % (output_number, output_path,
+                                                                       get_timecode(duration)))
+
+    _print_log('Press [q] to stop, [?] for help')
+
+
+def _print_list(listing, nvidia_listing):
+    for line in listing + (nvidia_listing if is_nvidia_enabled() else ()):
+        print(line)
+
+
+def _get_missing_input(fake_args):
+    for input_path, input_options in fake_args.inputs:
+        if input_options.get('-f') != 'lavfi' and not os.path.exists(input_path):
+            return input_path
+
+    return None
+
+
+def run_ffmpeg(args):
+    """
+    Runs the fake ffmpeg and returns its exit code.
+
+    :param args: Args after the binary.
+    """
+    fake_args = FakeArgs(args)
+
+    if fake_args.has_option('-version'):
+        print(VERSION_LINE % 'ffmpeg')
+        return 0
+    if fake_args.has_option('-encoders'):
+        _print_list(ENCODERS_LIST, NVENC_ENCODERS_LIST)
+        return 0
+    if fake_args.has_option('-decoders'):
+        _print_list(DECODERS_LIST, NVDEC_DECODERS_LIST)
+        return 0
+    if fake_args.has_option('-filters'):
+        _print_list(FILTERS_LIST, NPP_FILTERS_LIST)
+        return 0
+
+    missing_input = _get_missing_input(fake_args)
+    if missing_input is not None:
+        _print_log(missing_input + ': No such file or directory')
+        return 1
+
+    if not fake_args.outputs:
+        _print_log('At least one output file must be specified')
+        return 1
+
+    if not is_nvidia_enabled() and any(NVIDIA_ARG_PATTERN.search(arg) for arg in args):
+        _print_log('Cannot load libcuda.so.1\nError while opening encoder for output stream #0:0')
+        return 1
+
+    if fake_args.has_option('-n'):
+        for output_path, output_options in fake_args.outputs:
+            if _is_output_written(output_path, output_options) and os.path.exists(output_path):
+                _print_log('File \'' + output_path + '\' already exists. Exiting.')
+                return 1
+
+    fake_encode = FakeEncode(fake_args, is_encode_failing(args))
+
+    if fake_args.get_option('-loglevel') not in QUIET_LOG_LEVELS:
+        _print_header(fake_args, fake_encode.duration)
+
+    if fake_args.has_option('-vf') and 'cropdetect' in fake_args.get_option('-vf'):
+        _print_log('[Parsed_cropdetect_0 @ 0x0] x1:0 x2:1919 y1:140 y2:939 w:1920 h:800 x:0 y:140 pts:0 t:0.000000 '
+                   'crop=1920:800:0:140')
+
+    return fake_encode.run()
+
+
+def run_ffprobe(args):
+    """
+    Runs the fake ffprobe and returns its exit code. Every input has an h264 video stream and an aac audio stream.
+
+    :param args: Args after the binary.
+    """
+    fake_args = FakeArgs(args)
+    input_path = fake_args.outputs[-1][0] if fake_args.outputs else None
+
+    if input_path is None or not os.path.exists(input_path):
+        _print_log(str(input_path) + ': No such file or directory')
+        return 1
+
+    print('[STREAM]\nindex=0\ncodec_name=h264\ncodec_type=video\nwidth=1920\nheight=1080\nr_frame_rate=%d/1\n'
+          'bit_rate=N/A\n[/STREAM]\n'
+          '[STREAM]\nindex=1\ncodec_name=aac\ncodec_type=audio\nchannels=2\nsample_rate=48000\nbit_rate=192000\n'
+          'TAG:language=eng\n[/STREAM]\n'
+          '[FORMAT]\nduration=%f\n[/FORMAT]' % (FRAME_RATE, get_input_duration(input_path, {})))
+    return 0
+
+
+def main(args=None):
+    """
+    Runs the fake ffmpeg, or the fake ffprobe when the first arg is "ffprobe".
+
+    :param args: (Default None) Command line args after the module. Uses sys.argv when not given.
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    if args and args[0] == 'ffprobe':
+        sys.exit(run_ffprobe(args[1:]))
+
+    sys.exit(run_ffmpeg(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -48,3 +48,20 @@ def parse_input_file_extension(input_file_path):
         return 'N/A'
     else:
         return file_container
+
+
+def get_canonical_ffmpeg_args(ffmpeg_args, *removed_values):
+    """
+    Returns a copy of the ffmpeg args with the given values (output paths, temp file names) replaced by placeholders.
+    Two tasks with the same effective settings produce the same canonical args.
+
+    :param ffmpeg_args: List of ffmpeg args.
+    :param removed_values: Strings to remove from the args, in order of replacement.
+    """
+    canonical_args = []
+    for arg in ffmpeg_args:
+        for index, removed_value in enumerate(removed_values):
+            if removed_value:
+                arg = arg.replace(removed_value, '<' + str(index) + '>')
+        canonical_args.append(arg)
+    return canonical_args
@@ -0,0 +1,111 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import contextlib
+import os
+
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.input_information import InputInformation
+from render_watch.app_formatting.alias import AliasGenerator
+from render_watch.encoding.job_timing_log import JobTiming
+from render_watch.helpers import auto_crop_helper, encoder_helper
+from render_watch.signals.inputs_row.audio_stream_signal import AudioStreamSignal
+from render_watch.signals.inputs_row.video_stream_signal import VideoStreamSignal
+
+
+def create_ffmpeg(input_path,
+                  ffmpeg_template,
+                  output_directory,
+                  application_preferences,
+                  watch_folder=False,
+                  recursive_folder=False,
+                  auto_crop=False,
+                  job_timing=None):
+    """
+    Returns ffmpeg settings for an input file or folder that use the template's settings, the same way inputs are set
+    up when they're added to the inputs page with apply to all selected. Returns None if the input can't be encoded.
+
+    :param input_path: Absolute path of the input file or folder.
+    :param ffmpeg_template: ffmpeg settings to copy the codec and general settings from.
+    :param output_directory: Directory to write the output to.
+    :param application_preferences: Application's preferences.
+    :param watch_folder: (Default False) Watch a folder input for new files.
+    :param recursive_folder: (Default False) Include the sub-folders of a folder input.
+    :param auto_crop: (Default False) Crop the black bars from the input.
+    :param job_timing: (Default None) JobTiming to record how long probing and cropping the input take.
+    """
+    ffmpeg = Settings()
+
+    if os.path.isdir(input_path):
+        ffmpeg.input_folder(input_path)
+        ffmpeg.watch_folder = watch_folder
+        ffmpeg.recursive_folder = recursive_folder
+        ffmpeg.folder_auto_crop = auto_crop
+    elif os.path.isfile(input_path) and encoder_helper.is_file_extension_valid(input_path):
+        ffmpeg.input_file = input_path
+        ffmpeg.temp_file_name = AliasGenerator.generate_alias_from_name(ffmpeg.filename)
+    else:
+        return None
+
+    ffmpeg.output_directory = os.path.join(output_directory, '')
+
+    with _time_phase(job_timing, JobTiming.PROBE_PHASE):
+        if not InputInformation.generate_input_information(ffmpeg):
+            return None
+
+    _apply_ffmpeg_template_settings(ffmpeg, ffmpeg_template, application_preferences)
+
+    if auto_crop and not ffmpeg.folder_state:
+        with _time_phase(job_timing, JobTiming.AUTO_CROP_PHASE):
+            ffmpeg.picture_settings.auto_crop_enabled = auto_crop_helper.process_auto_crop(ffmpeg)
+
+    ffmpeg.setup_subtitles_settings()
+    _setup_default_streams(ffmpeg)
+    return ffmpeg
+
+
+def _time_phase(job_timing, phase):
+    if job_timing is None:
+        return contextlib.nullcontext()
+    return job_timing.time_phase(phase)
+
+
+def _apply_ffmpeg_template_settings(ffmpeg, ffmpeg_template, application_preferences):
+    if ffmpeg_template.video_settings:
+        ffmpeg.video_settings = ffmpeg_template.video_settings.copy()
+    ffmpeg.no_video = ffmpeg_template.no_video
+
+    if ffmpeg_template.audio_settings and ffmpeg.media_info.audio_streams:
+        ffmpeg.audio_settings = ffmpeg_template.audio_settings.copy()
+    ffmpeg.no_audio = ffmpeg_template.no_audio
+
+    ffmpeg.output_container = ffmpeg_template.output_container
+    ffmpeg.general_settings.ffmpeg_args = ffmpeg_template.general_settings.ffmpeg_args.copy()
+
+    if ffmpeg.is_video_settings_2_pass():
+        ffmpeg.video_settings.stats = application_preferences.temp_directory + '/' + ffmpeg.temp_file_name + '.log'
+
+
+def _setup_default_streams(ffmpeg):
+    if ffmpeg.folder_state:
+        return
+
+    VideoStreamSignal.set_video_stream(ffmpeg, 0)
+
+    if ffmpeg.media_info.audio_streams:
+        AudioStreamSignal.set_audio_stream(ffmpeg, 0)
@@ -0,0 +1,116 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import logging
+import os
+
+
+def get_log_file_paths(log_file_path, backup_count):
+    """
+    Returns the job timing log's file and its rotated backups that exist, oldest first.
+
+    :param log_file_path: Path of the job timing log.
+    :param backup_count: Number of rotated backups that are kept.
+    """
+    file_paths = [log_file_path + '.' + str(backup_number) for backup_number in range(backup_count, 0, -1)]
+    file_paths.append(log_file_path)
+    return [file_path for file_path in file_paths if os.path.isfile(file_path)]
+
+
+def read_job_records(file_paths):
+    """
+    Returns the job records in the job timing log files. Lines that aren't valid job records are skipped.
+
+    :param file_paths: Paths of job timing log files.
+    """
+    job_records = []
+
+    for file_path in file_paths:
+        with open(file_path) as log_file:
+            for line_number, line in enumerate(log_file, start=1):
+                try:
+                    job_record = json.loads(line)
+                except ValueError:
+                    logging.warning('--- SKIPPING INVALID JOB TIMING LINE '
+                                    + str(line_number)
+                                    + ': '
+                                    + file_path
+                                    + ' ---')
+                    continue
+
+                if isinstance(job_record, dict) and isinstance(job_record.get('phases'), list):
+                    job_records.append(job_record)
+
+    return job_records
+
+
+def summarize_job_records(job_records):
+    """
+    Returns where the jobs' time went: the number of jobs by status, their total wall time, and each phase's total,
+    mean per job that had it, and longest duration. Phases are sorted by their total, longest first.
+
+    Chunks encode at the same time, so a chunked job's phases can add up to more than its wall time.
+
+    :param job_records: Job records returned by read_job_records().
+    """
+    statuses = {}
+    phase_totals = {}
+    phase_jobs = {}
+    phase_maximums = {}
+    wall_time = 0.0
+
+    for job_record in job_records:
+        status = job_record.get('status', 'unknown')
+        statuses[status] = statuses.get(status, 0) + 1
+        wall_time += job_record.get('wall_time', 0.0)
+
+        job_phase_names = set()
+        for phase_record in job_record['phases']:
+            phase = phase_record['phase']
+            duration = phase_record['duration']
+            phase_totals[phase] = phase_totals.get(phase, 0.0) + duration
+            phase_maximums[phase] = max(phase_maximums.get(phase, 0.0), duration)
+            job_phase_names.add(phase)
+
+        for phase in job_phase_names:
+            phase_jobs[phase] = phase_jobs.get(phase, 0) + 1
+
+    phase_time = sum(phase_totals.values())
+    phases = []
+    for phase, total in sorted(phase_totals.items(), key=lambda phase_total: phase_total[1], reverse=True):
+        phases.append({
+            'phase': phase,
+            'total': total,
+            'share': (total / phase_time) if phase_time else 0.0,
+            'jobs': phase_jobs[phase],
+            'mean': total / phase_jobs[phase],
+            'max': phase_maximums[phase]
+        })
+
+    return {'jobs': len(job_records), 'statuses': statuses, 'wall_time': wall_time, 'phases': phases}
+
+
+def get_slowest_job_records(job_records, number_of_jobs):
+    """
+    Returns the job records with the longest wall time, longest first.
+
+    :param job_records: Job records returned by read_job_records().
+    :param number_of_jobs: Number of job records to return.
+    """
+    return sorted(job_records, key=lambda job_record: job_record.get('wall_time', 0.0), reverse=True)[:number_of_jobs]
@@ -0,0 +1,45 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+_idle_add = None
+
+
+def set_main_loop(idle_add):
+    """
+    Makes run_on_main_loop() queue functions on a main loop. The UI sets this to GLib.idle_add, headless mode doesn't
+    have a main loop and leaves it unset.
+
+    :param idle_add: Function that queues a function and its arguments on the main loop.
+    """
+    global _idle_add
+
+    _idle_add = idle_add
+
+
+def run_on_main_loop(function, *args):
+    """
+    Runs a task state change on the main loop, or right away in the calling thread when there's no main loop.
+    Lets the encoding engine change task states without depending on GTK.
+
+    :param function: Function to run.
+    :param args: Arguments for the function.
+    """
+    if _idle_add is None:
+        function(*args)
+    else:
+        _idle_add(function, *args)
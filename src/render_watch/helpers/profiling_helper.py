@@ -0,0 +1,290 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+
+PROFILE_ARG = '--profile'
+DUMP_SIGNAL = signal.SIGUSR1
+
+_sampling_profiler = None
+
+
+def start_profiling(output_directory):
+    """
+    Starts sampling every thread's stack and timing the timed spans until stop_profiling() is called.
+    Sending DUMP_SIGNAL to the process writes the profile without stopping.
+
+    :param output_directory: Directory to write the profile files to.
+    """
+    global _sampling_profiler
+
+    _sampling_profiler = SamplingProfiler(output_directory)
+    _sampling_profiler.start()
+
+
+def stop_profiling():
+    """
+    Stops profiling and writes the profile files. Does nothing if profiling wasn't started.
+    """
+    global _sampling_profiler
+
+    if _sampling_profiler is None:
+        return
+
+    _sampling_profiler.stop()
+    print('render-watch: wrote profile to ' + _sampling_profiler.output_directory, file=sys.stderr)
+
+    _sampling_profiler = None
+
+
+def timed_span(span_name):
+    """
+    Decorator that adds each call's duration to the named span while profiling. Calls the function directly otherwise.
+
+    :param span_name: Name of the span in the profile.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def run_timed_span(*args, **kwargs):
+            sampling_profiler = _sampling_profiler
+            if sampling_profiler is None:
+                return function(*args, **kwargs)
+
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                sampling_profiler.add_span(span_name, time.perf_counter() - start_time)
+        return run_timed_span
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread in the process and weighs each sample by the CPU time the thread used since
+    the previous sample, so threads that are waiting on a lock, a queue, or an ffmpeg process don't add to the profile.
+
+    Writes three files to the output directory:
+        cpu.collapsed: One line per thread and stack with its CPU time in microseconds, for flame graph tools.
+        functions.txt: Functions with the most CPU time, by their own time and by their time including callees.
+        spans.txt: Calls, total, mean, and longest duration of each timed span.
+
+    CPU time is read from /proc/self/task/<thread>/schedstat. Where that isn't available, samples are weighed by the
+    sample interval instead and the stacks are written to wall.collapsed.
+    """
+
+    SAMPLE_INTERVAL_IN_SECONDS = 0.01
+    TOP_FUNCTIONS = 40
+    THREAD_CPU_TIME_PATH_FORMAT = '/proc/self/task/%d/schedstat'
+
+    def __init__(self, output_directory):
+        """
+        :param output_directory: Directory to write the profile files to.
+        """
+        self.output_directory = output_directory
+        self._stack_weights = {}
+        self._spans = {}
+        self._code_labels = {}
+        self._thread_cpu_time_files = {}
+        self._thread_cpu_times = {}
+        self._is_cpu_time_available = os.path.exists(self.THREAD_CPU_TIME_PATH_FORMAT % threading.get_native_id())
+        self._lock = threading.Lock()
+        self._stopped_event = threading.Event()
+        self._dump_event = threading.Event()
+        self._sampler_thread = threading.Thread(target=self._run_sampler_thread, name='profiler', daemon=True)
+
+    def start(self):
+        """
+        Starts the sampler thread. Handles DUMP_SIGNAL when it's called from the main thread.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(DUMP_SIGNAL, self._on_dump_signal)
+
+        self._sampler_thread.start()
+
+    def _on_dump_signal(self, signal_number, frame):  # Unused parameters needed for this signal handler
+        self._dump_event.set()
+
+    def stop(self):
+        """
+        Stops the sampler thread and writes the profile files.
+        """
+        self._stopped_event.set()
+        self._sampler_thread.join()
+        self.write_profile()
+
+        for thread_cpu_time_file in self._thread_cpu_time_files.values():
+            os.close(thread_cpu_time_file)
+        self._thread_cpu_time_files.clear()
+
+    def _run_sampler_thread(self):
+        while not self._stopped_event.wait(self.SAMPLE_INTERVAL_IN_SECONDS):
+            try:
+                self._sample()
+            except Exception:
+                logging.exception('--- PROFILER SAMPLE FAILED ---')
+
+            if self._dump_event.is_set():
+                self._dump_event.clear()
+                self.write_profile()
+
+    def _sample(self):
+        sampler_thread_id = threading.get_ident()
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        sample_weight = int(self.SAMPLE_INTERVAL_IN_SECONDS * 1000000)
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler_thread_id:
+                continue
+
+            thread = threads.get(thread_id)
+            thread_name = thread.name if thread is not None else str(thread_id)
+
+            if self._is_cpu_time_available:
+                if thread is None or thread.native_id is None:
+                    continue
+
+                sample_weight = self._get_thread_cpu_time_used(thread.native_id)
+                if not sample_weight:
+                    continue
+
+            stack = self._get_stack(thread_name, frame)
+            with self._lock:
+                self._stack_weights[stack] = self._stack_weights.get(stack, 0) + sample_weight
+
+    def _get_thread_cpu_time_used(self, native_thread_id):
+        # Returns the microseconds of CPU time the thread used since the previous sample.
+        try:
+            thread_cpu_time_file = self._thread_cpu_time_files.get(native_thread_id)
+            if thread_cpu_time_file is None:
+                thread_cpu_time_file = os.open(self.THREAD_CPU_TIME_PATH_FORMAT % native_thread_id, os.O_RDONLY)
+                self._thread_cpu_time_files[native_thread_id] = thread_cpu_time_file
+
+            thread_cpu_time = int(os.pread(thread_cpu_time_file, 64, 0).split()[0]) // 1000
+        except (OSError, ValueError, IndexError):  # The thread ended
+            thread_cpu_time_file = self._thread_cpu_time_files.pop(native_thread_id, None)
+            if thread_cpu_time_file is not None:
+                os.close(thread_cpu_time_file)
+
+            self._thread_cpu_times.pop(native_thread_id, None)
+            return 0
+
+        previous_thread_cpu_time = self._thread_cpu_times.get(native_thread_id, thread_cpu_time)
+        self._thread_cpu_times[native_thread_id] = thread_cpu_time
+        return thread_cpu_time - previous_thread_cpu_time
+
+    def _get_stack(self, thread_name, frame):
+        stack = []
+
+        while frame is not None:
+            code = frame.f_code
+            code_label = self._code_labels.get(code)
+            if code_label is None:
+                code_label = os.path.basename(code.co_filename) + ':' + getattr(code, 'co_qualname', code.co_name)
+                self._code_labels[code] = code_label
+
+            stack.append(code_label)
+            frame = frame.f_back
+
+        stack.append(thread_name)
+        stack.reverse()
+        return ';'.join(stack)
+
+    def add_span(self, span_name, duration_in_seconds):
+        """
+        Adds a call's duration to a timed span.
+
+        :param span_name: Name of the span.
+        :param duration_in_seconds: Duration of the call.
+        """
+        with self._lock:
+            calls, total, longest = self._spans.get(span_name, (0, 0.0, 0.0))
+            self._spans[span_name] = (calls + 1, total + duration_in_seconds, max(longest, duration_in_seconds))
+
+    def write_profile(self):
+        """
+        Writes the profile files with everything that was sampled and timed so far.
+        """
+        with self._lock:
+            stack_weights = dict(self._stack_weights)
+            spans = dict(self._spans)
+
+        try:
+            os.makedirs(self.output_directory, exist_ok=True)
+
+            stacks_file_name = 'cpu.collapsed' if self._is_cpu_time_available else 'wall.collapsed'
+            self._write_file(stacks_file_name, self._get_collapsed_stacks_lines(stack_weights))
+            self._write_file('functions.txt', self._get_functions_lines(stack_weights))
+            self._write_file('spans.txt', self._get_spans_lines(spans))
+        except OSError:
+            logging.exception('--- FAILED TO WRITE PROFILE: ' + self.output_directory + ' ---')
+
+    def _write_file(self, file_name, lines):
+        with open(os.path.join(self.output_directory, file_name), 'w') as profile_file:
+            profile_file.writelines(line + '\n' for line in lines)
+
+    @staticmethod
+    def _get_collapsed_stacks_lines(stack_weights):
+        return [stack + ' ' + str(weight)
+                for stack, weight in sorted(stack_weights.items(), key=lambda item: item[1], reverse=True)]
+
+    def _get_functions_lines(self, stack_weights):
+        self_weights = {}
+        total_weights = {}
+
+        for stack, weight in stack_weights.items():
+            code_labels = stack.split(';')[1:]
+            if not code_labels:
+                continue
+
+            self_weights[code_labels[-1]] = self_weights.get(code_labels[-1], 0) + weight
+            for code_label in set(code_labels):
+                total_weights[code_label] = total_weights.get(code_label, 0) + weight
+
+        profile_weight = sum(stack_weights.values()) or 1
+        lines = ['profile: ' + str(round(profile_weight / 1000000, 3)) + 's']
+        for title, weights in (('by own time', self_weights), ('by time including callees', total_weights)):
+            lines.append('')
+            lines.append(title + ':')
+
+            top_weights = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:self.TOP_FUNCTIONS]
+            for code_label, weight in top_weights:
+                lines.append('{:>10.3f}s {:>6.1f}%  {}'.format(weight / 1000000,
+                                                                weight * 100 / profile_weight,
+                                                                code_label))
+
+        return lines
+
+    @staticmethod
+    def _get_spans_lines(spans):
+        lines = ['{:<48}{:>10}{:>14}{:>14}{:>14}'.format('span', 'calls', 'total ms', 'mean ms', 'max ms')]
+
+        for span_name, (calls, total, longest) in sorted(spans.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append('{:<48}{:>10}{:>14.3f}{:>14.3f}{:>14.3f}'.format(span_name,
+                                                                          calls,
+                                                                          total * 1000,
+                                                                          total * 1000 / calls,
+                                                                          longest * 1000))
+        return lines
@@ -0,0 +1,230 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import csv
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.helpers import ffmpeg_helper
+
+
+SEGMENT_DURATION_IN_SECONDS = 60
+MINIMUM_NUMBER_OF_SEGMENTS = 3
+SEGMENT_FILE_NAME_FORMAT = 'segment_%05d.mkv'
+SEGMENT_LIST_FILE_NAME_FORMAT = 'segments_%05d.csv'
+CONCATENATION_FILE_NAME = 'concat'
+CLOSED_GOP_ARGS = ('-forced-idr', '1')
+
+
+def is_ffmpeg_resumable(ffmpeg, application_preferences):
+    """
+    Checks if a task can be encoded in segments that let it continue where it left off after being stopped.
+    Only single pass video encodes without subtitle streams that are long enough for a few segments are resumable.
+
+    :param ffmpeg: ffmpeg settings.
+    :param application_preferences: Application's preferences.
+    """
+    if not application_preferences.is_resumable_encodes_enabled:
+        return False
+
+    if ffmpeg.folder_state or ffmpeg.watch_folder or ffmpeg.video_chunk or ffmpeg.no_video:
+        return False
+
+    if not ffmpeg.video_settings or ffmpeg.is_video_settings_2_pass():
+        return False
+
+    if ffmpeg.picture_settings.ffmpeg_args.get('-map'):
+        return False
+
+    duration_in_seconds = ffmpeg_helper.get_duration_in_seconds(ffmpeg)
+    return bool(duration_in_seconds) and duration_in_seconds >= (SEGMENT_DURATION_IN_SECONDS
+                                                                 * MINIMUM_NUMBER_OF_SEGMENTS)
+
+
+def get_segments_directory(ffmpeg, application_preferences):
+    """
+    Returns the temp directory that holds a task's segments. Tasks with the same input, settings, and output share
+    a directory, so starting a stopped task again finds the segments it already encoded.
+
+    :param ffmpeg: ffmpeg settings.
+    :param application_preferences: Application's preferences.
+    """
+    task_key = hashlib.sha1('\n'.join(ffmpeg.get_args()).encode()).hexdigest()
+    return os.path.join(application_preferences.temp_directory, 'segments', task_key)
+
+
+def get_completed_segments(segments_directory):
+    """
+    Returns how many segments, counting from the first one, were completely encoded.
+    Segments are only listed by the segment muxer once they're closed, so a segment that was being written when the
+    task was stopped isn't counted.
+
+    :param segments_directory: Directory returned by get_segments_directory().
+    """
+    listed_segments = set()
+
+    for segment_list_file_path in glob.glob(os.path.join(segments_directory, 'segments_*.csv')):
+        try:
+            with open(segment_list_file_path, newline='') as segment_list_file:
+                for row in csv.reader(segment_list_file):
+                    if row:
+                        listed_segments.add(row[0])
+        except OSError:
+            logging.exception('--- FAILED TO READ SEGMENT LIST: ' + segment_list_file_path + ' ---')
+
+    completed_segments = 0
+    while (SEGMENT_FILE_NAME_FORMAT % completed_segments) in listed_segments:
+        completed_segments += 1
+
+    return completed_segments
+
+
+def get_remaining_duration(ffmpeg, completed_segments):
+    """
+    Returns how many seconds of the task are left to encode after the completed segments.
+
+    :param ffmpeg: ffmpeg settings.
+    :param completed_segments: Number returned by get_completed_segments().
+    """
+    return ffmpeg_helper.get_duration_in_seconds(ffmpeg) - (completed_segments * SEGMENT_DURATION_IN_SECONDS)
+
+
+def get_segment_encode_args(ffmpeg, segments_directory, completed_segments):
+    """
+    Returns the ffmpeg args that encode the task's video into segments, starting after the completed segments.
+    Every segment starts on a forced IDR frame, so segments can be joined without re-encoding.
+
+    :param ffmpeg: ffmpeg settings.
+    :param segments_directory: Directory returned by get_segments_directory().
+    :param completed_segments: Number returned by get_completed_segments().
+    """
+    os.makedirs(segments_directory, exist_ok=True)
+
+    segment_ffmpeg = ffmpeg.get_copy()
+    segment_ffmpeg.audio_settings = None
+    segment_ffmpeg.no_audio = True
+    segment_ffmpeg.trim_settings = _get_remaining_trim_settings(ffmpeg, completed_segments)
+
+    ffmpeg_args = segment_ffmpeg.get_args()
+    ffmpeg_args.pop()  # Output file path
+
+    ffmpeg_args.append('-force_key_frames')
+    ffmpeg_args.append('expr:gte(t,n_forced*' + str(SEGMENT_DURATION_IN_SECONDS) + ')')
+
+    if not ffmpeg.is_video_settings_vp9():
+        ffmpeg_args.extend(CLOSED_GOP_ARGS)
+
+    ffmpeg_args.extend(['-f', 'segment',
+                        '-segment_time', str(SEGMENT_DURATION_IN_SECONDS),
+                        '-segment_start_number', str(completed_segments),
+                        '-reset_timestamps', '1',
+                        '-segment_list_type', 'csv',
+                        '-segment_list', os.path.join(segments_directory,
+                                                      SEGMENT_LIST_FILE_NAME_FORMAT % completed_segments),
+                        os.path.join(segments_directory, SEGMENT_FILE_NAME_FORMAT)])
+    return ffmpeg_args
+
+
+def _get_remaining_trim_settings(ffmpeg, completed_segments):
+    trim_settings = TrimSettings()
+    trim_start_time = ffmpeg.trim_settings.start_time if ffmpeg.trim_settings else None
+    trim_settings.start_time = (trim_start_time or 0) + (completed_segments * SEGMENT_DURATION_IN_SECONDS)
+    trim_settings.trim_duration = get_remaining_duration(ffmpeg, completed_segments)
+    return trim_settings
+
+
+def join_segments(ffmpeg, segments_directory):
+    """
+    Joins the task's completed segments and muxes them with the task's audio into the task's output.
+    Removes the segments once they're joined.
+
+    :param ffmpeg: ffmpeg settings.
+    :param segments_directory: Directory returned by get_segments_directory().
+    """
+    completed_segments = get_completed_segments(segments_directory)
+    concatenation_file_path = os.path.join(segments_directory, CONCATENATION_FILE_NAME)
+
+    try:
+        with open(concatenation_file_path, 'w') as concatenation_file:
+            for segment_number in range(completed_segments):
+                concatenation_file.write('file \'' + (SEGMENT_FILE_NAME_FORMAT % segment_number) + '\'\n')
+    except OSError:
+        logging.exception('--- FAILED TO JOIN SEGMENTS: ' + ffmpeg.filename + ' ---')
+
+        return False
+
+    ffmpeg_args = get_join_segments_args(ffmpeg, concatenation_file_path)
+    if not _run_join_segments_process(ffmpeg, ffmpeg_args):
+        return False
+
+    shutil.rmtree(segments_directory, ignore_errors=True)
+    return True
+
+
+def get_join_segments_args(ffmpeg, concatenation_file_path):
+    """
+    Returns the ffmpeg args that join the segments listed in the concatenation file and mux them with the task's
+    audio, which is encoded from the input in the same run.
+
+    :param ffmpeg: ffmpeg settings.
+    :param concatenation_file_path: Concat demuxer file that lists the segments.
+    """
+    ffmpeg_args = ffmpeg.FFMPEG_CONCATENATION_INIT_ARGS.copy()
+    ffmpeg_args.append(concatenation_file_path)
+
+    is_audio_enabled = not ffmpeg.no_audio and ffmpeg.audio_stream_index is not None
+    if is_audio_enabled:
+        if ffmpeg.trim_settings:
+            ffmpeg_args.extend(['-ss', ffmpeg.trim_settings.ffmpeg_args['-ss'],
+                                '-t', ffmpeg.trim_settings.ffmpeg_args['-to']])
+
+        ffmpeg_args.extend(['-i', ffmpeg.input_file])
+
+    ffmpeg_args.extend(['-map', '0:v:0', '-c:v', 'copy'])
+
+    if is_audio_enabled:
+        ffmpeg_args.extend(['-map', '1:' + str(ffmpeg.audio_stream_index)])
+
+        if ffmpeg.audio_settings is not None:
+            ffmpeg_args.extend(ffmpeg.generate_video_settings_args(ffmpeg.audio_settings.ffmpeg_args))
+        else:
+            ffmpeg_args.extend(ffmpeg.AUDIO_COPY_ARGS)
+
+    ffmpeg_args.append(ffmpeg.output_directory + ffmpeg.filename + ffmpeg.output_container)
+    return ffmpeg_args
+
+
+def _run_join_segments_process(ffmpeg, ffmpeg_args):
+    with subprocess.Popen(ffmpeg_args,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT,
+                          universal_newlines=True,
+                          bufsize=1) as process:
+        stdout_log = process.stdout.read()
+
+    if process.returncode:
+        logging.error('--- FAILED TO JOIN SEGMENTS: ' + ffmpeg.filename + ' ---\n' + stdout_log)
+
+        return False
+
+    return True
@@ -0,0 +1,330 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.general_settings import GeneralSettings
+from render_watch.ffmpeg.x264 import X264
+from render_watch.ffmpeg.x265 import X265
+from render_watch.ffmpeg.vp9 import VP9
+from render_watch.ffmpeg.h264_nvenc import H264Nvenc
+from render_watch.ffmpeg.hevc_nvenc import HevcNvenc
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.opus import Opus
+from render_watch.ffmpeg.media_info import MediaInfo
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+PRESETS_DIRECTORY = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY, 'presets')
+PRESET_FILE_EXTENSION = '.json'
+
+VIDEO_CODECS = {
+    'x264': X264,
+    'x265': X265,
+    'vp9': VP9,
+    'h264_nvenc': H264Nvenc,
+    'hevc_nvenc': HevcNvenc
+}
+AUDIO_CODECS = {
+    'aac': Aac,
+    'opus': Opus
+}
+COPY_CODEC = 'copy'
+NO_CODEC = 'none'
+
+FFMPEG_STATE_VALUES = ('filename', 'temp_file_name', 'output_directory', 'no_audio', 'no_video', 'video_chunk',
+                       'video_stream_index', 'audio_stream_index')
+MEDIA_INFO_STATE_VALUES = ('resolution', 'width', 'height', 'fps', 'duration', 'file_size', 'codec_video',
+                           'codec_audio', 'channels', 'sample_rate')
+PICTURE_STATE_VALUES = ('crop_arg', 'scale_arg')
+_FFMPEG_STATE_SETTINGS = ('input_file', 'output_container', 'media_info', 'video_codec', 'video_settings',
+                          'audio_codec', 'audio_settings', 'general_settings', 'trim_settings', 'picture_settings',
+                          'subtitles_settings')
+_UNSAVED_SETTINGS_VALUES = ('_revision', '_is_state_shared')
+
+
+def get_preset_file_path(preset_name):
+    """
+    Returns the settings file path of a preset in the application's presets directory.
+
+    :param preset_name: Name of the preset, without the file extension.
+    """
+    return os.path.join(PRESETS_DIRECTORY, preset_name + PRESET_FILE_EXTENSION)
+
+
+def load_ffmpeg_template(settings_file_path):
+    """
+    Reads a JSON settings file and returns ffmpeg settings to use as the template for every input. See
+    get_ffmpeg_template() for the settings file's keys.
+
+    Raises OSError if the file can't be read and ValueError if its settings aren't valid.
+
+    :param settings_file_path: Path of the JSON settings file.
+    """
+    with open(settings_file_path) as settings_file:
+        settings = json.load(settings_file)
+
+    return get_ffmpeg_template(settings)
+
+
+def get_ffmpeg_template(settings):
+    """
+    Returns ffmpeg settings to use as the template for every input, the same way the settings sidebar's settings are
+    used when apply to all is selected.
+
+    Settings have these keys, all of them optional:
+        "output_container": One of GeneralSettings.CONTAINERS_UI_LIST, like ".mkv". Defaults to the input's container.
+        "video_codec": One of VIDEO_CODECS, "copy", or "none". Defaults to "copy".
+        "video_settings": Video codec properties to set, like {"crf": 20, "preset": 6}.
+        "audio_codec": One of AUDIO_CODECS, "copy", or "none". Defaults to "copy".
+        "audio_settings": Audio codec properties to set, like {"bitrate": 192}.
+        "general_settings": General settings properties to set, like {"fast_start": true}.
+    Properties take the same values as the properties of the codec's settings class.
+
+    Raises ValueError if the settings aren't valid.
+
+    :param settings: Dictionary loaded from a JSON settings file or sent to the daemon.
+    """
+    if not isinstance(settings, dict):
+        raise ValueError('settings must be a JSON object')
+
+    output_container = settings.get('output_container')
+    if output_container is not None and output_container not in GeneralSettings.CONTAINERS_UI_LIST:
+        raise ValueError('unknown output container "' + str(output_container) + '", expected one of: '
+                         + ', '.join(GeneralSettings.CONTAINERS_UI_LIST))
+
+    ffmpeg_template = Settings()
+    ffmpeg_template.output_container = output_container
+    _setup_video_settings(ffmpeg_template, settings)
+    _setup_audio_settings(ffmpeg_template, settings)
+    _set_properties(ffmpeg_template.general_settings, settings.get('general_settings'), 'general')
+    return ffmpeg_template
+
+
+def _setup_video_settings(ffmpeg_template, settings):
+    video_codec = settings.get('video_codec', COPY_CODEC)
+
+    if video_codec == NO_CODEC:
+        ffmpeg_template.no_video = True
+    elif video_codec != COPY_CODEC:
+        ffmpeg_template.video_settings = _get_codec_settings(VIDEO_CODECS, video_codec, settings.get('video_settings'))
+
+
+def _setup_audio_settings(ffmpeg_template, settings):
+    audio_codec = settings.get('audio_codec', COPY_CODEC)
+
+    if audio_codec == NO_CODEC:
+        ffmpeg_template.no_audio = True
+    elif audio_codec != COPY_CODEC:
+        ffmpeg_template.audio_settings = _get_codec_settings(AUDIO_CODECS, audio_codec, settings.get('audio_settings'))
+
+
+def _get_codec_settings(codecs, codec_name, properties):
+    if codec_name not in codecs:
+        raise ValueError('unknown codec "' + str(codec_name) + '", expected one of: '
+                         + ', '.join(list(codecs) + [COPY_CODEC, NO_CODEC]))
+
+    codec_settings = codecs[codec_name]()
+    _set_properties(codec_settings, properties, codec_name)
+    return codec_settings
+
+
+def _set_properties(settings, properties, settings_name):
+    if properties is None:
+        return
+
+    if not isinstance(properties, dict):
+        raise ValueError(settings_name + ' settings must be a JSON object')
+
+    for property_name, value in properties.items():
+        if not isinstance(getattr(type(settings), property_name, None), property):
+            raise ValueError('unknown ' + settings_name + ' setting "' + property_name + '"')
+
+        setattr(settings, property_name, value)
+
+
+def get_ffmpeg_state(ffmpeg):
+    """
+    Returns all of a task's ffmpeg settings as a dictionary that can be sent as JSON, for get_ffmpeg_from_state().
+
+    Unlike a settings file, the state also has the task's input, file names, streams, trim, and picture settings, and
+    codec settings are kept as the args they store instead of their properties, so the settings are made again exactly.
+    Folder tasks and the input's stream list aren't kept.
+
+    :param ffmpeg: ffmpeg settings.
+    """
+    ffmpeg_state = {name: getattr(ffmpeg, name) for name in FFMPEG_STATE_VALUES}
+    ffmpeg_state['input_file'] = ffmpeg.input_file
+    ffmpeg_state['output_container'] = ffmpeg.output_container if ffmpeg.is_output_container_set() else None
+    ffmpeg_state['media_info'] = {name: getattr(ffmpeg.media_info, name) for name in MEDIA_INFO_STATE_VALUES}
+    ffmpeg_state['video_codec'] = _get_codec_name(VIDEO_CODECS, ffmpeg.video_settings)
+    ffmpeg_state['video_settings'] = _get_settings_state(ffmpeg.video_settings)
+    ffmpeg_state['audio_codec'] = _get_codec_name(AUDIO_CODECS, ffmpeg.audio_settings)
+    ffmpeg_state['audio_settings'] = _get_settings_state(ffmpeg.audio_settings)
+    ffmpeg_state['general_settings'] = _get_settings_state(ffmpeg.general_settings)
+    ffmpeg_state['trim_settings'] = _get_settings_state(ffmpeg.trim_settings)
+    ffmpeg_state['picture_settings'] = {name: getattr(ffmpeg.picture_settings, name) for name in PICTURE_STATE_VALUES}
+    ffmpeg_state['subtitles_settings'] = _get_subtitles_settings_state(ffmpeg.picture_settings.subtitles_settings)
+    return ffmpeg_state
+
+
+def _get_codec_name(codecs, codec_settings):
+    if codec_settings is None:
+        return None
+
+    for codec_name, codec_settings_class in codecs.items():
+        if type(codec_settings) is codec_settings_class:
+            return codec_name
+
+    raise ValueError('unknown codec settings ' + type(codec_settings).__name__)
+
+
+def _get_settings_state(settings):
+    if settings is None:
+        return None
+    return {name: value for name, value in vars(settings).items() if name not in _UNSAVED_SETTINGS_VALUES}
+
+
+def _get_subtitles_settings_state(subtitles_settings):
+    if subtitles_settings is None:
+        return None
+
+    return {
+        'streams_in_use': {str(index): stream_info for index, stream_info in subtitles_settings.streams_in_use.items()},
+        'burn_in_stream_index': subtitles_settings.burn_in_stream_index
+    }
+
+
+def get_ffmpeg_from_state(ffmpeg_state):
+    """
+    Returns the ffmpeg settings in a dictionary made by get_ffmpeg_state(). Only values that the settings have are set
+    and codecs must be one of VIDEO_CODECS or AUDIO_CODECS, so a state from another machine can't set anything else.
+
+    Raises ValueError if the state isn't valid.
+
+    :param ffmpeg_state: Dictionary made by get_ffmpeg_state() and loaded from JSON.
+    """
+    if not isinstance(ffmpeg_state, dict):
+        raise ValueError('ffmpeg state must be a JSON object')
+
+    try:
+        ffmpeg = Settings()
+        ffmpeg.media_info = MediaInfo(**_get_checked_values(ffmpeg_state.get('media_info', {}),
+                                                            MEDIA_INFO_STATE_VALUES,
+                                                            'media info'))
+        ffmpeg.input_file = str(ffmpeg_state['input_file'])
+
+        _get_checked_values(ffmpeg_state, FFMPEG_STATE_VALUES + _FFMPEG_STATE_SETTINGS, 'ffmpeg')
+        for name in FFMPEG_STATE_VALUES:
+            if name in ffmpeg_state:
+                setattr(ffmpeg, name, ffmpeg_state[name])
+
+        ffmpeg.output_container = ffmpeg_state.get('output_container')
+        if ffmpeg_state.get('output_container') is not None and not ffmpeg.is_output_container_set():
+            raise ValueError('unknown output container "' + str(ffmpeg_state['output_container']) + '"')
+
+        ffmpeg.video_settings = _get_codec_settings_from_state(VIDEO_CODECS,
+                                                               ffmpeg_state.get('video_codec'),
+                                                               ffmpeg_state.get('video_settings'))
+        ffmpeg.audio_settings = _get_codec_settings_from_state(AUDIO_CODECS,
+                                                               ffmpeg_state.get('audio_codec'),
+                                                               ffmpeg_state.get('audio_settings'))
+        _set_settings_state(ffmpeg.general_settings, ffmpeg_state.get('general_settings'), 'general')
+
+        if ffmpeg_state.get('trim_settings') is not None:
+            ffmpeg.trim_settings = TrimSettings()
+            _set_settings_state(ffmpeg.trim_settings, ffmpeg_state['trim_settings'], 'trim')
+
+        for name, value in _get_checked_values(ffmpeg_state.get('picture_settings', {}),
+                                               PICTURE_STATE_VALUES,
+                                               'picture').items():
+            setattr(ffmpeg.picture_settings, name, value)
+
+        ffmpeg.setup_subtitles_settings()
+        _set_subtitles_settings_state(ffmpeg.picture_settings.subtitles_settings,
+                                      ffmpeg_state.get('subtitles_settings'))
+    except (KeyError, TypeError, AttributeError) as exception:
+        raise ValueError('invalid ffmpeg state: ' + repr(exception))
+
+    return ffmpeg
+
+
+def _get_checked_values(state, value_names, settings_name):
+    if not isinstance(state, dict):
+        raise ValueError(settings_name + ' state must be a JSON object')
+
+    for name in state:
+        if name not in value_names:
+            raise ValueError('unknown ' + settings_name + ' value "' + str(name) + '"')
+
+    return state
+
+
+def _get_codec_settings_from_state(codecs, codec_name, settings_state):
+    if codec_name is None:
+        return None
+
+    codec_settings = _get_codec_settings(codecs, codec_name, None)
+    _set_settings_state(codec_settings, settings_state, codec_name)
+    return codec_settings
+
+
+def _set_settings_state(settings, settings_state, settings_name):
+    # Values are only replaced by values of the same kind, like args dictionaries by dictionaries of strings.
+    if settings_state is None:
+        return
+
+    default_state = _get_settings_state(settings)
+
+    for name, value in _get_checked_values(settings_state, default_state, settings_name).items():
+        default_value = default_state[name]
+
+        if isinstance(default_value, dict):
+            if not isinstance(value, dict) or not all(_is_arg_value(arg) for arg in value.values()):
+                raise ValueError(settings_name + ' value "' + name + '" must be a JSON object of args')
+        elif default_value is not None and type(value) is not type(default_value):
+            raise ValueError(settings_name + ' value "' + name + '" must be a ' + type(default_value).__name__)
+
+        setattr(settings, name, value)
+
+
+def _is_arg_value(arg):
+    return arg is None or isinstance(arg, (str, int, float))
+
+
+def _set_subtitles_settings_state(subtitles_settings, subtitles_settings_state):
+    if subtitles_settings_state is None:
+        return
+
+    _get_checked_values(subtitles_settings_state, ('streams_in_use', 'burn_in_stream_index'), 'subtitles')
+
+    streams_in_use = subtitles_settings_state.get('streams_in_use', {})
+    if not isinstance(streams_in_use, dict):
+        raise ValueError('subtitles streams in use must be a JSON object')
+
+    for index, stream_info in streams_in_use.items():
+        subtitles_settings.streams_in_use[int(index)] = str(stream_info)
+
+    burn_in_stream_index = subtitles_settings_state.get('burn_in_stream_index')
+    if burn_in_stream_index is not None:
+        subtitles_settings.burn_in_stream_index = int(burn_in_stream_index)
+
+    subtitles_settings.mark_changed()
@@ -0,0 +1,141 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from render_watch.app_formatting import format_converter
+
+
+def get_chunks_progress(chunk_rows):
+    """
+    Returns the average progress of all chunks.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    total_progress = 0.0
+
+    for chunk_row in chunk_rows:
+        total_progress += chunk_row.progress
+
+    return total_progress / len(chunk_rows)
+
+
+def get_chunks_speed(chunk_rows):
+    """
+    Returns the combined speed of all chunks.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    total_speed = 0.0
+
+    for chunk_row in chunk_rows:
+        total_speed += chunk_row.speed
+
+    return round(total_speed, 2)
+
+
+def get_chunks_bitrate(chunk_rows):
+    """
+    Returns the average bitrate of all chunks.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    total_bitrate = 0.0
+
+    for chunk_row in chunk_rows:
+        total_bitrate += chunk_row.bitrate
+
+    return round(total_bitrate / len(chunk_rows), 1)
+
+
+def get_chunks_file_size(chunk_rows):
+    """
+    Returns the combined file size of all chunks.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    total_file_size = 0.0
+
+    for chunk_row in chunk_rows:
+        total_file_size += chunk_row.file_size
+
+    return total_file_size
+
+
+def get_chunks_time_estimate(chunk_rows):
+    """
+    Returns the time left estimate for all chunks, assuming idle chunks take as long as the slowest running chunk.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    longest_time_estimate = 0
+    number_of_chunks_idle = 0
+
+    for chunk_row in chunk_rows:
+        if chunk_row.time == 0:
+            number_of_chunks_idle += 1
+        elif chunk_row.time > longest_time_estimate:
+            longest_time_estimate = chunk_row.time
+
+    return longest_time_estimate * (number_of_chunks_idle + 1)
+
+
+def get_chunks_current_time(chunk_rows):
+    """
+    Returns how many seconds of the input have been encoded across all chunks.
+
+    :param chunk_rows: List of chunk rows.
+    """
+    total_time = 0
+
+    for chunk_row in chunk_rows:
+        if chunk_row.finished and not chunk_row.stopped:
+            total_time += chunk_row.ffmpeg.trim_settings.trim_duration
+        else:
+            total_time += chunk_row.current_time
+
+    return total_time
+
+
+def get_task_labels_snapshot(task_information):
+    """
+    Returns the text/values shown by a task's widgets for the given task information.
+
+    :param task_information: Task information dictionary of an active row.
+    """
+    return {
+        'progress': task_information['progress'],
+        'speed': str(task_information['speed']) + 'x',
+        'bitrate': str(task_information['bitrate']) + 'kbps',
+        'filesize': format_converter.get_file_size_from_bytes(task_information['filesize']),
+        'time': format_converter.get_timecode_from_seconds(task_information['time'])
+    }
+
+
+def get_changed_labels(labels_snapshot, applied_labels_snapshot):
+    """
+    Returns the entries in the labels snapshot that differ from the previously applied snapshot.
+
+    :param labels_snapshot: Newest labels snapshot.
+    :param applied_labels_snapshot: Labels snapshot that's currently shown.
+    """
+    changed_labels = {}
+
+    for label_name, label_value in labels_snapshot.items():
+        if applied_labels_snapshot.get(label_name) != label_value:
+            changed_labels[label_name] = label_value
+
+    return changed_labels
@@ -0,0 +1,109 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import functools
+import os
+import xml.etree.ElementTree as ElementTree
+
+
+UI_DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'render_watch_data')
+
+
+@functools.lru_cache(maxsize=None)
+def get_ui_definition(glade_file_name):
+    """
+    Returns the contents of a glade file from the application's data directory. The file is only read once.
+
+    :param glade_file_name: File name of the glade file.
+    """
+    with open(os.path.join(UI_DATA_DIRECTORY, glade_file_name), 'r') as glade_file:
+        return glade_file.read()
+
+
+def get_ui_fragment(glade_file_name, *object_ids):
+    """
+    Returns a UI definition that only contains the given top level objects and the top level objects they refer to,
+    for use with Gtk.Builder.add_from_string(). Fragments are only made once for each glade file and set of objects.
+
+    :param glade_file_name: File name of the glade file.
+    :param object_ids: IDs of the top level objects to keep.
+    """
+    return _get_ui_fragment(glade_file_name, tuple(object_ids))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_ui_fragment(glade_file_name, object_ids):
+    interface = ElementTree.fromstring(get_ui_definition(glade_file_name))
+    top_level_objects = [child for child in interface if child.tag in ('object', 'template')]
+    owners = _get_top_level_owners(top_level_objects)
+    required_object_ids = _get_required_object_ids(top_level_objects, owners, object_ids)
+
+    fragment = ElementTree.Element(interface.tag, interface.attrib)
+    for child in interface:
+        if child.tag not in ('object', 'template') or child.get('id') in required_object_ids:
+            fragment.append(child)
+
+    return ElementTree.tostring(fragment, encoding='unicode')
+
+
+def _get_top_level_owners(top_level_objects):
+    # Maps the id of every object in the file to the id of the top level object that contains it.
+    owners = {}
+
+    for top_level_object in top_level_objects:
+        top_level_object_id = top_level_object.get('id')
+
+        for element in top_level_object.iter('object'):
+            if element.get('id'):
+                owners[element.get('id')] = top_level_object_id
+
+    return owners
+
+
+def _get_required_object_ids(top_level_objects, owners, object_ids):
+    top_level_objects_by_id = {top_level_object.get('id'): top_level_object for top_level_object in top_level_objects}
+    required_object_ids = set()
+    unvisited_object_ids = list(object_ids)
+
+    while unvisited_object_ids:
+        object_id = unvisited_object_ids.pop()
+
+        if object_id in required_object_ids:
+            continue
+        if object_id not in top_level_objects_by_id:
+            raise ValueError('\'' + object_id + '\' is not a top level object')
+
+        required_object_ids.add(object_id)
+
+        for reference in _get_object_references(top_level_objects_by_id[object_id]):
+            if reference in owners and owners[reference] not in required_object_ids:
+                unvisited_object_ids.append(owners[reference])
+
+    return required_object_ids
+
+
+def _get_object_references(top_level_object):
+    # Objects refer to each other by id in property values (popovers, radio button groups, adjustments, models)
+    # and in size group and accessibility entries.
+    for element in top_level_object.iter():
+        if element.tag == 'property' and element.text:
+            yield element.text.strip()
+        elif element.tag == 'widget' and element.get('name'):
+            yield element.get('name')
+        elif element.tag == 'relation' and element.get('target'):
+            yield element.get('target')
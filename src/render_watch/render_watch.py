@@ -16,12 +16,31 @@
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import atexit
+import logging
+import os
 import sys
 
-from render_watch.startup.application_ui import ApplicationUI
+from datetime import datetime
+
+from render_watch.startup.application_autotune import ApplicationAutotune
+from render_watch.startup.application_benchmark_suite import ApplicationBenchmarkSuite
+from render_watch.startup.application_cli import ApplicationCLI
+from render_watch.startup.application_daemon import ApplicationDaemon
+from render_watch.startup.application_worker import ApplicationWorker
 from render_watch.startup.application_preferences import ApplicationPreferences
 from render_watch.startup.application_requirements import ApplicationRequirements
+from render_watch.startup.application_timing_analyzer import ApplicationTimingAnalyzer
+from render_watch.encoding.daemon_client import DaemonClient
+from render_watch.encoding import encoder_metrics, job_timing_log, tuning_profile
+from render_watch.encoding.concurrency_controller import ConcurrencyController, set_concurrency_controller
 from render_watch.encoding.encoder_queue import EncoderQueue
+from render_watch.encoding.job_store import JobStore
+from render_watch.encoding.job_timing_log import JobTimingLog
+from render_watch.encoding.metrics_exporter import MetricsExporter
+from render_watch.encoding.remote_encoder_queue import RemoteEncoderQueue
+from render_watch.encoding.tuning_profile import TuningProfile
+from render_watch.helpers import profiling_helper
 from render_watch.helpers.logging_helper import LoggingHelper
 
 
@@ -34,16 +53,221 @@ class RenderWatch:
     def setup_and_run():
         """
         Starts the logger, loads application preferences, checks requirements for NVENC, starts the encoder queue,
-        and starts the application's UI.
+        and starts the application's UI. The UI attaches to the daemon instead when one is running.
         """
         LoggingHelper.setup_logging()
 
         application_preferences = RenderWatch._load_preferences()
         ApplicationRequirements.check_nvidia_requirements(application_preferences)
-        encoder_queue = EncoderQueue(application_preferences)
+
+        if DaemonClient.is_daemon_running():
+            logging.info('--- ATTACHING TO THE RUNNING DAEMON ---')
+
+            encoder_queue = RemoteEncoderQueue(DaemonClient(), application_preferences)
+        else:
+            try:
+                max_slots = os.environ.get('RENDER_WATCH_ADAPTIVE_CONCURRENCY')
+                RenderWatch._start_concurrency_controller(application_preferences,
+                                                          int(max_slots) if max_slots else None)
+            except ValueError:
+                logging.exception('--- FAILED TO START ADAPTIVE CONCURRENCY ---')
+
+            encoder_queue = EncoderQueue(application_preferences)
+            RenderWatch._start_job_timing_log()
+
+            try:
+                metrics_port = os.environ.get('RENDER_WATCH_METRICS_PORT')
+                RenderWatch._start_metrics_exporter(encoder_queue,
+                                                    application_preferences,
+                                                    int(metrics_port) if metrics_port else None,
+                                                    os.environ.get('RENDER_WATCH_METRICS_FILE'))
+            except (OSError, ValueError):
+                logging.exception('--- FAILED TO START THE METRICS EXPORTER ---')
 
         return RenderWatch._run_ui(encoder_queue, application_preferences)
 
+    @staticmethod
+    def setup_and_run_headless(cli_args):
+        """
+        Starts the logger, loads application preferences, checks requirements for NVENC, starts the encoder queue,
+        and encodes the command line's inputs without the application's UI. Headless tasks aren't kept in the
+        application's job store.
+
+        :param cli_args: Options returned by ApplicationCLI.parse_args().
+        """
+        LoggingHelper.setup_logging()
+
+        application_preferences = RenderWatch._load_preferences()
+        ApplicationRequirements.check_nvidia_requirements(application_preferences)
+        concurrency_controller = RenderWatch._start_concurrency_controller(application_preferences,
+                                                                           cli_args.adaptive_concurrency)
+        encoder_queue = EncoderQueue(application_preferences, job_store=JobStore(':memory:'))
+        RenderWatch._start_job_timing_log()
+
+        if not RenderWatch._start_distributed_encode_task(encoder_queue, cli_args):
+            return 2
+
+        try:
+            metrics_exporter = RenderWatch._start_metrics_exporter(encoder_queue,
+                                                                   application_preferences,
+                                                                   cli_args.metrics_port,
+                                                                   cli_args.metrics_file)
+        except OSError as exception:
+            print('render-watch: can\'t export metrics: ' + str(exception), file=sys.stderr)
+
+            RenderWatch._stop_encoder_queue(encoder_queue)
+            return 2
+
+        try:
+            return ApplicationCLI(encoder_queue, application_preferences, cli_args).run()
+        finally:
+            metrics_exporter.stop()
+            RenderWatch._stop_concurrency_controller(concurrency_controller)
+
+    @staticmethod
+    def setup_and_run_daemon(daemon_args):
+        """
+        Starts the logger, loads application preferences, checks requirements for NVENC, starts the encoder queue,
+        and serves jobs over the daemon's Unix socket without the application's UI.
+
+        :param daemon_args: Options returned by ApplicationDaemon.parse_args().
+        """
+        LoggingHelper.setup_logging()
+
+        application_preferences = RenderWatch._load_preferences()
+        ApplicationRequirements.check_nvidia_requirements(application_preferences)
+        job_store = JobStore(os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
+                                          ApplicationDaemon.JOB_STORE_FILE_NAME))
+        concurrency_controller = RenderWatch._start_concurrency_controller(application_preferences,
+                                                                           daemon_args.adaptive_concurrency)
+        encoder_queue = EncoderQueue(application_preferences, job_store=job_store)
+        RenderWatch._start_job_timing_log()
+
+        if not RenderWatch._start_distributed_encode_task(encoder_queue, daemon_args):
+            return 2
+
+        try:
+            metrics_exporter = RenderWatch._start_metrics_exporter(encoder_queue,
+                                                                   application_preferences,
+                                                                   daemon_args.metrics_port,
+                                                                   daemon_args.metrics_file)
+        except OSError as exception:
+            print('render-watch: can\'t export metrics: ' + str(exception), file=sys.stderr)
+
+            RenderWatch._stop_encoder_queue(encoder_queue)
+            return 2
+
+        try:
+            return ApplicationDaemon(encoder_queue, application_preferences, daemon_args).run()
+        finally:
+            metrics_exporter.stop()
+            RenderWatch._stop_concurrency_controller(concurrency_controller)
+
+    @staticmethod
+    def setup_and_run_worker(worker_args):
+        """
+        Starts the logger, loads application preferences, and encodes chunks for a coordinator without the
+        application's UI.
+
+        :param worker_args: Options returned by ApplicationWorker.parse_args().
+        """
+        LoggingHelper.setup_logging()
+
+        application_preferences = RenderWatch._load_preferences()
+
+        return ApplicationWorker(application_preferences, worker_args).run()
+
+    @staticmethod
+    def setup_and_run_benchmark_suite(benchmark_args):
+        """
+        Starts the logger, loads application preferences, checks requirements for NVENC, and runs the benchmark suite
+        without the application's UI.
+
+        :param benchmark_args: Options returned by ApplicationBenchmarkSuite.parse_args().
+        """
+        LoggingHelper.setup_logging()
+
+        application_preferences = RenderWatch._load_preferences()
+        ApplicationRequirements.check_nvidia_requirements(application_preferences)
+
+        return ApplicationBenchmarkSuite(application_preferences, benchmark_args).run()
+
+    @staticmethod
+    def setup_and_run_autotune(autotune_args):
+        """
+        Starts the logger, loads application preferences, checks requirements for NVENC, and runs the autotune without
+        the application's UI.
+
+        :param autotune_args: Options returned by ApplicationAutotune.parse_args().
+        """
+        LoggingHelper.setup_logging()
+
+        application_preferences = RenderWatch._load_preferences()
+        ApplicationRequirements.check_nvidia_requirements(application_preferences)
+
+        return ApplicationAutotune(application_preferences, autotune_args).run()
+
+    @staticmethod
+    def _start_distributed_encode_task(encoder_queue, args):
+        if args.coordinator is None:
+            return True
+
+        try:
+            encoder_queue.start_distributed_encode_task(args.coordinator, args.token)
+        except (OSError, ValueError) as exception:
+            print('render-watch: can\'t listen on ' + args.coordinator + ': ' + str(exception), file=sys.stderr)
+
+            RenderWatch._stop_encoder_queue(encoder_queue)
+            return False
+
+        return True
+
+    @staticmethod
+    def _start_metrics_exporter(encoder_queue, application_preferences, metrics_port, metrics_file_path):
+        metrics = encoder_metrics.EncoderMetrics(encoder_queue, application_preferences)
+        metrics_exporter = MetricsExporter(metrics, metrics_port, metrics_file_path)
+
+        if metrics_exporter.is_enabled():
+            metrics_exporter.start()
+            encoder_metrics.set_encoder_metrics(metrics)
+        return metrics_exporter
+
+    @staticmethod
+    def _start_concurrency_controller(application_preferences, max_slots):
+        if max_slots is None:
+            return None
+
+        max_slots = max(max_slots, 1)
+        if application_preferences.tuning_profile is None:
+            application_preferences.tuning_profile = tuning_profile.get_host_profile(application_preferences)
+        number_of_slots = tuning_profile.get_parallel_tasks(application_preferences)
+
+        # The encode task queues get a worker for every slot the controller could open, and it decides how many encode.
+        application_preferences.tuning_profile = TuningProfile(max_slots,
+                                                               {codec: max_slots for codec in tuning_profile.CODECS})
+
+        concurrency_controller = ConcurrencyController(number_of_slots, max_slots)
+        concurrency_controller.start()
+        set_concurrency_controller(concurrency_controller)
+        return concurrency_controller
+
+    @staticmethod
+    def _stop_concurrency_controller(concurrency_controller):
+        if concurrency_controller is not None:
+            set_concurrency_controller(None)
+            concurrency_controller.stop()
+
+    @staticmethod
+    def _start_job_timing_log():
+        job_timing_log_file_path = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
+                                                JobTimingLog.FILE_NAME)
+        job_timing_log.set_job_timing_log(JobTimingLog(job_timing_log_file_path))
+
+    @staticmethod
+    def _stop_encoder_queue(encoder_queue):
+        encoder_queue.kill()
+        encoder_queue.job_store.close()
+
     @staticmethod
     def _load_preferences():
         application_preferences = ApplicationPreferences()
@@ -51,8 +275,22 @@ class RenderWatch:
         ApplicationPreferences.create_temp_directory(application_preferences)
         return application_preferences
 
+    @staticmethod
+    def start_profiling():
+        """
+        Profiles the application until it exits and writes the profile to a new directory in the application's
+        profiles directory.
+        """
+        profile_directory = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
+                                         'profiles',
+                                         datetime.now().strftime('%d-%m-%Y_%H:%M:%S') + '_' + str(os.getpid()))
+        profiling_helper.start_profiling(profile_directory)
+        atexit.register(profiling_helper.stop_profiling)
+
     @staticmethod
     def _run_ui(encoder_queue, application_preferences):
+        from render_watch.startup.application_ui import ApplicationUI  # Headless mode runs without GTK installed.
+
         application_ui = ApplicationUI(encoder_queue, application_preferences)
         return application_ui.setup_and_run()
 
@@ -60,10 +298,56 @@ class RenderWatch:
 def main(args=None):
     """
     Adds any application arguments and runs Render Watch if the startup requirements are met.
+    Runs without the application's UI when the --headless, --daemon, --worker, --analyze-timings, --benchmark-suite, or
+    --autotune argument is given.
+    Profiles the application when the --profile argument is given.
     """
     if args:
         sys.argv.extend(args)
 
+    if profiling_helper.PROFILE_ARG in sys.argv:
+        sys.argv.remove(profiling_helper.PROFILE_ARG)
+        RenderWatch.start_profiling()
+
+    if ApplicationTimingAnalyzer.ANALYZE_TIMINGS_ARG in sys.argv:
+        analyzer_args = ApplicationTimingAnalyzer.parse_args(sys.argv[1:])
+        sys.exit(ApplicationTimingAnalyzer(analyzer_args).run())
+
+    if ApplicationBenchmarkSuite.BENCHMARK_SUITE_ARG in sys.argv:
+        benchmark_args = ApplicationBenchmarkSuite.parse_args(sys.argv[1:])
+
+        if not ApplicationRequirements.check_startup_requirements():
+            sys.exit(1)
+        sys.exit(RenderWatch.setup_and_run_benchmark_suite(benchmark_args))
+
+    if ApplicationAutotune.AUTOTUNE_ARG in sys.argv:
+        autotune_args = ApplicationAutotune.parse_args(sys.argv[1:])
+
+        if not ApplicationRequirements.check_startup_requirements():
+            sys.exit(1)
+        sys.exit(RenderWatch.setup_and_run_autotune(autotune_args))
+
+    if ApplicationCLI.HEADLESS_ARG in sys.argv:
+        cli_args = ApplicationCLI.parse_args(sys.argv[1:])
+
+        if not ApplicationRequirements.check_startup_requirements():
+            sys.exit(1)
+        sys.exit(RenderWatch.setup_and_run_headless(cli_args))
+
+    if ApplicationDaemon.DAEMON_ARG in sys.argv:
+        daemon_args = ApplicationDaemon.parse_args(sys.argv[1:])
+
+        if not ApplicationRequirements.check_startup_requirements():
+            sys.exit(1)
+        sys.exit(RenderWatch.setup_and_run_daemon(daemon_args))
+
+    if ApplicationWorker.WORKER_ARG in sys.argv:
+        worker_args = ApplicationWorker.parse_args(sys.argv[1:])
+
+        if not ApplicationRequirements.check_startup_requirements():
+            sys.exit(1)
+        sys.exit(RenderWatch.setup_and_run_worker(worker_args))
+
     if ApplicationRequirements.check_startup_requirements():
         sys.exit(RenderWatch.setup_and_run())
 
@@ -17,14 +17,21 @@
 
 
 import threading
-import time
+
+from render_watch.helpers import directory_helper
+from render_watch.startup import GLib
 
 
 class StartAllSignal:
     """
     Handles the signal emitted from the start all button on the inputs page's options menu.
+
+    All inputs are submitted as one batch: output names are fixed in a single pass, active rows are created on the
+    main loop a few at a time, and each batch is handed to the encoder queue in one call.
     """
 
+    ACTIVE_ROWS_BATCH_SIZE = 20
+
     def __init__(self, inputs_page_handlers, main_window_handlers):
         self.inputs_page_handlers = inputs_page_handlers
         self.main_window_handlers = main_window_handlers
@@ -37,10 +44,42 @@ class StartAllSignal:
         """
         self.main_window_handlers.popdown_app_preferences_popover()
 
-        threading.Thread(target=self._start_all_tasks, args=()).start()
+        inputs_rows = self.inputs_page_handlers.get_rows()
+        taken_output_file_paths = self.main_window_handlers.active_page_handlers.get_output_file_paths()
+
+        threading.Thread(target=self._start_all_tasks, args=(inputs_rows, taken_output_file_paths)).start()
+
+    def _start_all_tasks(self, inputs_rows, taken_output_file_paths):
+        directory_helper.fix_same_name_occurences_in_batch([inputs_row.ffmpeg for inputs_row in inputs_rows],
+                                                           taken_output_file_paths,
+                                                           self.main_window_handlers.application_preferences)
+
+        for batch_index in range(0, len(inputs_rows), self.ACTIVE_ROWS_BATCH_SIZE):
+            inputs_rows_batch = inputs_rows[batch_index:batch_index + self.ACTIVE_ROWS_BATCH_SIZE]
+            active_rows_batch = self._add_batch_to_active_page(inputs_rows_batch)
+
+            encoder_rows = []
+            for inputs_row, active_row in zip(inputs_rows_batch, active_rows_batch):
+                encoder_rows.extend(inputs_row.get_encoder_rows(active_row))
+
+            self.main_window_handlers.encoder_queue.add_active_rows(encoder_rows)
+
+    def _add_batch_to_active_page(self, inputs_rows_batch):
+        # Waits for the main loop to create the batch, so the next batch isn't queued until the UI has caught up.
+        active_rows_batch = []
+        batch_added_event = threading.Event()
+
+        GLib.idle_add(self._create_active_rows_batch, inputs_rows_batch, active_rows_batch, batch_added_event)
+        batch_added_event.wait()
+
+        return active_rows_batch
 
-    def _start_all_tasks(self):
-        for row in self.inputs_page_handlers.get_rows():
-            row.signal_start_button()
+    def _create_active_rows_batch(self, inputs_rows_batch, active_rows_batch, batch_added_event):
+        try:
+            for inputs_row in inputs_rows_batch:
+                active_rows_batch.append(inputs_row.create_active_row())
+                self.inputs_page_handlers.remove_row(inputs_row)
 
-            time.sleep(.2)
+            self.main_window_handlers.active_page_handlers.add_rows(active_rows_batch)
+        finally:
+            batch_added_event.set()
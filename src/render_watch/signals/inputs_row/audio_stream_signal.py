@@ -30,29 +30,17 @@ class AudioStreamSignal:
 
         :param audio_stream_combobox: Combobox that emitted the signal.
         """
-        ffmpeg = self.input_task.ffmpeg
-        audio_stream_combobox_index = audio_stream_combobox.get_active()
-        audio_streams = list(ffmpeg.input_file_info['audio_streams'].items())
-
-
-
-        self._set_audio_stream_index(ffmpeg, audio_streams, audio_stream_combobox_index)
-        self._set_audio_stream_codec_name(ffmpeg, audio_streams, audio_stream_combobox_index)
-        self._set_audio_stream_sample_rate(ffmpeg, audio_streams, audio_stream_combobox_index)
-
+        self.set_audio_stream(self.input_task.ffmpeg, audio_stream_combobox.get_active())
         self.input_task.setup_labels()
 
     @staticmethod
-    def _set_audio_stream_index(ffmpeg, audio_streams, audio_stream_combobox_index):
-        audio_stream_index = audio_streams[audio_stream_combobox_index][0]
-        ffmpeg.audio_stream_index = audio_stream_index
-
-    @staticmethod
-    def _set_audio_stream_codec_name(ffmpeg, audio_streams, audio_streams_combobox_index):
-        codec_name = audio_streams[audio_streams_combobox_index][1]['codec_name']
-        ffmpeg.input_file_info['codec_audio'] = codec_name
+    def set_audio_stream(ffmpeg, audio_stream_combobox_index):
+        """
+        Sets the audio stream index, codec name, and sample rate of the input's ffmpeg settings.
 
-    @staticmethod
-    def _set_audio_stream_sample_rate(ffmpeg, audio_streams, audio_stream_combobox_index):
-        sample_rate = audio_streams[audio_stream_combobox_index][1]['sample_rate']
-        ffmpeg.input_file_info['sample_rate'] = sample_rate
+        :param ffmpeg: Ffmpeg settings of the input.
+        :param audio_stream_combobox_index: Position of the audio stream in the input's audio streams.
+        """
+        audio_stream = ffmpeg.media_info.audio_streams[audio_stream_combobox_index]
+        ffmpeg.audio_stream_index = audio_stream.index
+        ffmpeg.media_info = ffmpeg.media_info.with_audio_stream(audio_stream)
@@ -30,31 +30,17 @@ class VideoStreamSignal:
 
         :param video_stream_combobox: Combobox that emitted the signal.
         """
-        ffmpeg = self.input_task.ffmpeg
-        video_stream_combobox_index = video_stream_combobox.get_active()
-        video_streams = list(ffmpeg.input_file_info['video_streams'].items())
-
-        self._set_video_stream_index(ffmpeg, video_streams, video_stream_combobox_index)
-        self._set_video_stream_codec_name(ffmpeg, video_streams, video_stream_combobox_index)
-        self._set_video_stream_dimensions(ffmpeg, video_streams, video_stream_combobox_index)
-
+        self.set_video_stream(self.input_task.ffmpeg, video_stream_combobox.get_active())
         self.input_task.setup_labels()
 
     @staticmethod
-    def _set_video_stream_index(ffmpeg, video_streams, video_stream_combobox_index):
-        video_stream_index = video_streams[video_stream_combobox_index][0]
-        ffmpeg.video_stream_index = video_stream_index
-
-    @staticmethod
-    def _set_video_stream_codec_name(ffmpeg, video_streams, video_stream_combobox_index):
-        codec_name = video_streams[video_stream_combobox_index][1]['codec_name']
-        ffmpeg.input_file_info['codec_video'] = codec_name
+    def set_video_stream(ffmpeg, video_stream_combobox_index):
+        """
+        Sets the video stream index, codec name, and dimensions of the input's ffmpeg settings.
 
-    @staticmethod
-    def _set_video_stream_dimensions(ffmpeg, video_streams, video_stream_combobox_index):
-        width = video_streams[video_stream_combobox_index][1]['width']
-        height = video_streams[video_stream_combobox_index][1]['height']
-        resolution = str(width) + 'x' + str(height)
-        ffmpeg.input_file_info['width'] = width
-        ffmpeg.input_file_info['height'] = height
-        ffmpeg.input_file_info['resolution'] = resolution
+        :param ffmpeg: Ffmpeg settings of the input.
+        :param video_stream_combobox_index: Position of the video stream in the input's video streams.
+        """
+        video_stream = ffmpeg.media_info.video_streams[video_stream_combobox_index]
+        ffmpeg.video_stream_index = video_stream.index
+        ffmpeg.media_info = ffmpeg.media_info.with_video_stream(video_stream)
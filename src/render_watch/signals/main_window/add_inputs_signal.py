@@ -17,7 +17,7 @@
 
 
 import threading
-import copy
+import time
 import os
 
 from render_watch.ffmpeg.settings import Settings
@@ -31,8 +31,14 @@ from render_watch.startup import Gtk, GLib
 class AddInputsSignal:
     """
     Handles the signal emitted when the add input button is clicked.
+
+    Imported inputs are added to the inputs page in batches instead of one main loop callback per input.
     """
 
+    IMPORT_BATCH_SIZE = 50
+    IMPORT_BATCH_INTERVAL_IN_SECONDS = 0.25
+    INPUT_EXISTS_DIALOG_MAX_FILES = 10
+
     def __init__(self,
                  main_window_handlers,
                  inputs_page_handlers,
@@ -127,15 +133,17 @@ class AddInputsSignal:
         self._setup_settings_sidebar_ffmpeg_template()
 
         length_of_input_files = len(inputs)
+        imported_input_files = set()
+        existing_input_files = []
+        ffmpeg_batch = []
+        batch_start_time = time.monotonic()
 
         for index, file_path in enumerate(inputs):
-            self._setup_importing_files_widgets(file_path, index, length_of_input_files)
-
             ffmpeg = Settings()
             self._setup_input_file_paths(ffmpeg, file_path, output_dir, file_inputs_enabled)
 
-            if self._input_exists(ffmpeg):
-                GLib.idle_add(self._show_input_exists_dialog, ffmpeg)
+            if self._input_exists(ffmpeg, imported_input_files):
+                existing_input_files.append(ffmpeg.input_file)
 
                 continue
 
@@ -146,7 +154,23 @@ class AddInputsSignal:
                 self._setup_picture_settings(ffmpeg, file_inputs_enabled)
                 ffmpeg.setup_subtitles_settings()
 
-                GLib.idle_add(self._add_to_inputs_page, ffmpeg)
+                imported_input_files.add(ffmpeg.input_file)
+                ffmpeg_batch.append(ffmpeg)
+
+            batch_time = time.monotonic() - batch_start_time
+
+            if len(ffmpeg_batch) >= self.IMPORT_BATCH_SIZE or batch_time >= self.IMPORT_BATCH_INTERVAL_IN_SECONDS:
+                self._setup_importing_files_widgets(file_path, index, length_of_input_files)
+                GLib.idle_add(self._add_batch_to_inputs_page, ffmpeg_batch)
+
+                ffmpeg_batch = []
+                batch_start_time = time.monotonic()
+
+        if ffmpeg_batch:
+            GLib.idle_add(self._add_batch_to_inputs_page, ffmpeg_batch)
+
+        if existing_input_files:
+            GLib.idle_add(self._show_input_exists_dialog, existing_input_files)
 
         GLib.idle_add(lambda: self.main_window_handlers.set_processing_inputs_state(False, None))
 
@@ -170,18 +194,32 @@ class AddInputsSignal:
 
         ffmpeg.output_directory = output_dir + '/'
 
-    def _input_exists(self, ffmpeg):
-        for listbox_row in self.inputs_page_handlers.get_rows():
-            if ffmpeg.input_file == listbox_row.ffmpeg.input_file:
-                return True
-        return False
+    def _input_exists(self, ffmpeg, imported_input_files):
+        input_file = ffmpeg.input_file
+        return input_file in imported_input_files or self.inputs_page_handlers.is_input_file_imported(input_file)
+
+    def _show_input_exists_dialog(self, existing_input_files):
+        if len(existing_input_files) == 1:
+            message_text = 'File \"' + existing_input_files[0] + '\" is already imported'
+        else:
+            message_text = str(len(existing_input_files)) + ' files are already imported'
 
-    def _show_input_exists_dialog(self, ffmpeg):
         message_dialog = Gtk.MessageDialog(self.main_window_handlers.main_window,
                                            Gtk.DialogFlags.DESTROY_WITH_PARENT,
                                            Gtk.MessageType.WARNING,
                                            Gtk.ButtonsType.OK,
-                                           'File \"' + ffmpeg.input_file + '\" is already imported')
+                                           message_text)
+
+        if len(existing_input_files) > 1:
+            shown_input_files = existing_input_files[:self.INPUT_EXISTS_DIALOG_MAX_FILES]
+            hidden_input_files_count = len(existing_input_files) - len(shown_input_files)
+            secondary_text = '\n'.join(shown_input_files)
+
+            if hidden_input_files_count:
+                secondary_text += '\n... and ' + str(hidden_input_files_count) + ' more'
+
+            message_dialog.format_secondary_text(secondary_text)
+
         message_dialog.run()
         message_dialog.destroy()
 
@@ -196,14 +234,14 @@ class AddInputsSignal:
     @staticmethod
     def _apply_ffmpeg_template_video_settings(ffmpeg, ffmpeg_template):
         if ffmpeg_template.video_settings:
-            ffmpeg.video_settings = copy.deepcopy(ffmpeg_template.video_settings)
+            ffmpeg.video_settings = ffmpeg_template.video_settings.copy()
         else:
             ffmpeg.video_settings = None
 
     @staticmethod
     def _apply_ffmpeg_template_audio_settings(ffmpeg, ffmpeg_template):
-        if ffmpeg_template.audio_settings and ffmpeg.input_file_info['audio_streams']:
-            ffmpeg.audio_settings = copy.deepcopy(ffmpeg_template.audio_settings)
+        if ffmpeg_template.audio_settings and ffmpeg.media_info.audio_streams:
+            ffmpeg.audio_settings = ffmpeg_template.audio_settings.copy()
         else:
             ffmpeg.audio_settings = None
 
@@ -226,11 +264,16 @@ class AddInputsSignal:
             else:
                 ffmpeg.folder_auto_crop = True
 
-    def _add_to_inputs_page(self, ffmpeg):
-        inputs_page_listbox_row = InputsRow(ffmpeg,
-                                            self.inputs_page_handlers,
-                                            self.active_page_handlers,
-                                            self.main_window_handlers,
-                                            self.encoder_queue,
-                                            self.application_preferences)
-        self.inputs_page_handlers.add_row(inputs_page_listbox_row)
+    def _add_batch_to_inputs_page(self, ffmpeg_batch):
+        inputs_page_listbox_rows = []
+
+        for ffmpeg in ffmpeg_batch:
+            inputs_page_listbox_row = InputsRow(ffmpeg,
+                                                self.inputs_page_handlers,
+                                                self.active_page_handlers,
+                                                self.main_window_handlers,
+                                                self.encoder_queue,
+                                                self.application_preferences)
+            inputs_page_listbox_rows.append(inputs_page_listbox_row)
+
+        self.inputs_page_handlers.add_rows(inputs_page_listbox_rows)
@@ -17,7 +17,6 @@
 
 
 import threading
-import copy
 
 from render_watch.startup import GLib
 
@@ -75,13 +74,13 @@ class ApplySettingsAllSignal:
             row_ffmpeg.general_settings.ffmpeg_args = ffmpeg_template.general_settings.ffmpeg_args.copy()
 
             if ffmpeg_template.video_settings:
-                row_ffmpeg.video_settings = copy.deepcopy(ffmpeg_template.video_settings)
+                row_ffmpeg.video_settings = ffmpeg_template.video_settings.copy()
             else:
                 row_ffmpeg.video_settings = None
 
-            if row_ffmpeg.input_file_info['audio_streams']:
+            if row_ffmpeg.media_info.audio_streams:
                 if ffmpeg_template.audio_settings:
-                    row_ffmpeg.audio_settings = copy.deepcopy(ffmpeg_template.audio_settings)
+                    row_ffmpeg.audio_settings = ffmpeg_template.audio_settings.copy()
                 else:
                     row.ffmpeg.audio_settings = None
 
@@ -49,12 +49,12 @@ class PreviewLocationSignal:
 
     def _get_input_duration_timecode(self):
         ffmpeg = self.preview_page_handlers.ffmpeg
-        input_duration_in_seconds = ffmpeg.input_file_info['duration']
+        input_duration_in_seconds = ffmpeg.duration_origin
         return format_converter.get_timecode_from_seconds(input_duration_in_seconds)
 
     def _get_input_end_time_difference(self, preview_position_scale):
         ffmpeg = self.preview_page_handlers.ffmpeg
-        input_duration_in_seconds = ffmpeg.input_file_info['duration']
+        input_duration_in_seconds = ffmpeg.duration_origin
         current_time_in_seconds = round(preview_position_scale.get_value(), 1)
         return input_duration_in_seconds - current_time_in_seconds
 
@@ -43,7 +43,7 @@ class AudioCodecSignal:
         for row in self.inputs_page_handlers.get_selected_rows():
             ffmpeg = row.ffmpeg
 
-            if not (ffmpeg.folder_state or ffmpeg.input_file_info['audio_streams']):
+            if not (ffmpeg.folder_state or ffmpeg.media_info.audio_streams):
                 continue
 
             ffmpeg.audio_settings = audio_settings
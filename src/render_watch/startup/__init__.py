@@ -15,9 +15,13 @@
 # You should have received a copy of the GNU General Public License
 # along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
 
-import gi
+try:
+    import gi
 
-gi.require_version("Gtk", "3.0")
+    gi.require_version("Gtk", "3.0")
 
-# Needed because the rest of the application will import gi modules from this file
-from gi.repository import Gtk, GLib, Gdk, GdkPixbuf
+    # Needed because the rest of the application will import gi modules from this file
+    from gi.repository import Gtk, GLib, Gdk, GdkPixbuf
+except (ImportError, ValueError):
+    # Headless mode runs the encoding engine on machines without GTK, nothing that builds widgets is imported there
+    Gtk = GLib = Gdk = GdkPixbuf = None
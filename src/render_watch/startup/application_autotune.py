@@ -0,0 +1,193 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+from datetime import datetime
+
+from render_watch.encoding.tuning_profile import TuningProfile
+from render_watch.helpers import autotune_helper, benchmark_suite_helper
+from render_watch.startup.application_benchmark_suite import ApplicationBenchmarkSuite
+
+
+class ApplicationAutotune(ApplicationBenchmarkSuite):
+    """
+    Finds how many tasks this host should run at the same time, without the application's UI.
+
+    For every codec, short synthetic sources are encoded in parallel at an increasing number of tasks, one source per
+    task, until the aggregate fps stops getting higher. The knee of each codec's throughput curve, the fewest tasks
+    that get close to its best fps, is saved to this host's tuning profile, which the encoder queue uses instead of the
+    preferences' parallel tasks.
+    """
+
+    AUTOTUNE_ARG = '--autotune'
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's autotune options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --autotune',
+                                                  description='Find how many tasks this host should run at the same '
+                                                              'time and save them to its tuning profile.')
+        argument_parser.add_argument(ApplicationAutotune.AUTOTUNE_ARG, action='store_true', help=argparse.SUPPRESS)
+        argument_parser.add_argument('--debug', action='store_true', help='write a debug log')
+        argument_parser.add_argument('--codecs',
+                                     type=ApplicationBenchmarkSuite._get_list_type(
+                                         benchmark_suite_helper.CODEC_SETTINGS),
+                                     default=list(benchmark_suite_helper.CODEC_SETTINGS),
+                                     help='comma separated codecs to tune (default: all of '
+                                          + ','.join(benchmark_suite_helper.CODEC_SETTINGS) + ')')
+        argument_parser.add_argument('--resolution',
+                                     choices=list(benchmark_suite_helper.RESOLUTIONS),
+                                     default='1080p',
+                                     help='resolution of the sources, pick the one that\'s encoded the most '
+                                          '(default: 1080p)')
+        argument_parser.add_argument('--duration',
+                                     type=int,
+                                     default=10,
+                                     help='length of the sources in seconds (default: 10)')
+        argument_parser.add_argument('--max-tasks',
+                                     type=ApplicationBenchmarkSuite._get_number_of_tasks,
+                                     default=os.cpu_count() or 1,
+                                     help='most tasks to try at the same time (default: the number of CPUs, '
+                                          + str(os.cpu_count() or 1) + ')')
+        argument_parser.add_argument('--min-gain',
+                                     type=float,
+                                     default=5.0,
+                                     metavar='PERCENT',
+                                     help='how much faster more tasks have to encode to be worth running (default: 5)')
+        argument_parser.add_argument('--sources-dir',
+                                     default=os.path.join(ApplicationBenchmarkSuite.BENCHMARKS_DIRECTORY, 'sources'),
+                                     help='directory that keeps the generated sources between runs (default: '
+                                          + os.path.join(ApplicationBenchmarkSuite.BENCHMARKS_DIRECTORY, 'sources')
+                                          + ')')
+        argument_parser.add_argument('--output',
+                                     metavar='FILE',
+                                     default=TuningProfile.get_host_profile_path(),
+                                     help='tuning profile to write (default: ' + TuningProfile.get_host_profile_path()
+                                          + ')')
+        return argument_parser.parse_args(args)
+
+    def run(self):
+        """
+        Measures every codec's throughput curve, saves the tuning profile, and returns the exit code: 0 when the
+        profile was saved, 1 when a task failed or the profile couldn't be written, and 2 when the sources couldn't be
+        generated.
+        """
+        # Resumable encodes would send single pass tasks through the segment muxer, which isn't what's measured here.
+        self.application_preferences.is_resumable_encodes_enabled = False
+
+        concurrency_ladder = autotune_helper.get_concurrency_ladder(self.benchmark_args.max_tasks)
+        min_gain = self.benchmark_args.min_gain / 100
+
+        os.makedirs(self.benchmark_args.sources_dir, exist_ok=True)
+        work_directory = tempfile.mkdtemp(prefix='.work_', dir=self.benchmark_args.sources_dir)
+
+        try:
+            input_file_paths = self._get_input_file_paths(self.benchmark_args.resolution,
+                                                          concurrency_ladder[-1],
+                                                          work_directory)
+            if input_file_paths is None:
+                return 2
+
+            codec_cases = {}
+            for codec in self.benchmark_args.codecs:
+                cases = self._run_codec_cases(codec, concurrency_ladder, min_gain, input_file_paths, work_directory)
+                if cases is None:
+                    return 1
+
+                codec_cases[codec] = cases
+        finally:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+        tuning_profile = self._get_tuning_profile(codec_cases, min_gain)
+        try:
+            tuning_profile.save(self.benchmark_args.output)
+        except OSError as exception:
+            print('render-watch: can\'t write the tuning profile: ' + str(exception), file=sys.stderr)
+            return 1
+
+        print('\nparallel tasks: ' + str(tuning_profile.parallel_tasks))
+        for codec, number_of_tasks in tuning_profile.per_codec_parallel_tasks.items():
+            print(codec + ' tasks: ' + str(number_of_tasks))
+        print('tuning profile written to ' + self.benchmark_args.output)
+        return 0
+
+    def _run_codec_cases(self, codec, concurrency_ladder, min_gain, input_file_paths, work_directory):
+        cases = []
+        curve = []
+
+        for number_of_tasks in concurrency_ladder:
+            self.application_preferences.tuning_profile = TuningProfile(number_of_tasks)
+
+            case = self._run_case(self.benchmark_args.resolution,
+                                  codec,
+                                  benchmark_suite_helper.PARALLEL_MODE,
+                                  input_file_paths[:number_of_tasks],
+                                  work_directory)
+            case['name'] += '/' + str(number_of_tasks)
+            cases.append(case)
+
+            self._print_case(case)
+
+            if case['failed_tasks']:
+                print('render-watch: ' + case['name'] + ' failed, see the log', file=sys.stderr)
+                return None
+
+            curve.append((number_of_tasks, case['aggregate_fps']))
+            if autotune_helper.is_climb_finished(curve, min_gain):
+                break
+
+        return cases
+
+    def _get_tuning_profile(self, codec_cases, min_gain):
+        curves = {codec: [(case['tasks'], case['aggregate_fps']) for case in cases]
+                  for codec, cases in codec_cases.items()}
+        per_codec_parallel_tasks = {codec: autotune_helper.get_knee(curve, min_gain) for codec, curve in curves.items()}
+        parallel_tasks = autotune_helper.get_knee(autotune_helper.get_combined_curve(list(curves.values())), min_gain)
+
+        details = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': self._get_environment(),
+            'resolution': self.benchmark_args.resolution,
+            'min_gain': self.benchmark_args.min_gain,
+            'curves': {codec: [{'tasks': case['tasks'],
+                                'aggregate_fps': case['aggregate_fps'],
+                                'cpu_utilization': case['cpu_utilization'],
+                                'wall_time': case['wall_time']}
+                               for case in cases]
+                       for codec, cases in codec_cases.items()}
+        }
+        return TuningProfile(parallel_tasks, per_codec_parallel_tasks, details)
+
+    def _get_environment(self):
+        return {
+            'ffmpeg': self._get_ffmpeg_version(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'duration': self.benchmark_args.duration
+        }
@@ -0,0 +1,435 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from datetime import datetime
+
+from render_watch.encoding.encoder_queue import EncoderQueue
+from render_watch.encoding.headless_task import HeadlessTask
+from render_watch.encoding.job_store import JobStore
+from render_watch.encoding import tuning_profile
+from render_watch.encoding.tuning_profile import TuningProfile
+from render_watch.ffmpeg.settings import Settings
+from render_watch.helpers import benchmark_suite_helper, directory_helper, input_helper, settings_file_helper
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class ApplicationBenchmarkSuite:
+    """
+    Measures the encoding pipeline's throughput on synthetic sources, without the application's UI.
+
+    Every case encodes the same sources at one resolution with one codec, at a fixed preset, in one of the encoder
+    queue's modes: one task at a time, parallel tasks, per codec parallel tasks, or parallel chunks. The wall time,
+    aggregate fps, CPU use, and peak temp directory use of every case are written to a JSON results file, which can be
+    compared with the results of an earlier release to find scheduling regressions.
+    """
+
+    BENCHMARK_SUITE_ARG = '--benchmark-suite'
+    BENCHMARKS_DIRECTORY = os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY, 'benchmarks')
+    TEMP_DISK_SAMPLE_INTERVAL_IN_SECONDS = 0.25
+
+    def __init__(self, application_preferences, benchmark_args):
+        """
+        :param application_preferences: Application's preferences.
+        :param benchmark_args: Options returned by parse_args().
+        """
+        self.application_preferences = application_preferences
+        self.benchmark_args = benchmark_args
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's benchmark options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --benchmark-suite',
+                                                  description='Measure encoding throughput on synthetic sources.')
+        argument_parser.add_argument(ApplicationBenchmarkSuite.BENCHMARK_SUITE_ARG,
+                                     action='store_true',
+                                     help=argparse.SUPPRESS)
+        argument_parser.add_argument('--debug', action='store_true', help='write a debug log')
+        argument_parser.add_argument('--resolutions',
+                                     type=ApplicationBenchmarkSuite._get_list_type(benchmark_suite_helper.RESOLUTIONS),
+                                     default=list(benchmark_suite_helper.RESOLUTIONS),
+                                     help='comma separated resolutions to run (default: all of '
+                                          + ','.join(benchmark_suite_helper.RESOLUTIONS) + ')')
+        argument_parser.add_argument('--codecs',
+                                     type=ApplicationBenchmarkSuite._get_list_type(
+                                         benchmark_suite_helper.CODEC_SETTINGS),
+                                     default=list(benchmark_suite_helper.CODEC_SETTINGS),
+                                     help='comma separated codecs to run (default: all of '
+                                          + ','.join(benchmark_suite_helper.CODEC_SETTINGS) + ')')
+        argument_parser.add_argument('--modes',
+                                     type=ApplicationBenchmarkSuite._get_list_type(benchmark_suite_helper.MODES),
+                                     default=list(benchmark_suite_helper.MODES),
+                                     help='comma separated modes to run (default: all of '
+                                          + ','.join(benchmark_suite_helper.MODES) + ')')
+        argument_parser.add_argument('--duration',
+                                     type=int,
+                                     default=30,
+                                     help='length of the sources in seconds, chunks are at least 10 seconds long '
+                                          '(default: 30)')
+        argument_parser.add_argument('--inputs',
+                                     type=int,
+                                     default=4,
+                                     help='number of sources every case encodes (default: 4)')
+        argument_parser.add_argument('--parallel-tasks',
+                                     type=ApplicationBenchmarkSuite._get_number_of_tasks,
+                                     help='tasks that run at the same time in the parallel and chunks modes, and for '
+                                          'each codec in the per codec mode (default: the preferences\' value)')
+        argument_parser.add_argument('--sources-dir',
+                                     default=os.path.join(ApplicationBenchmarkSuite.BENCHMARKS_DIRECTORY, 'sources'),
+                                     help='directory that keeps the generated sources between runs (default: '
+                                          + os.path.join(ApplicationBenchmarkSuite.BENCHMARKS_DIRECTORY, 'sources')
+                                          + ')')
+        argument_parser.add_argument('--output',
+                                     metavar='FILE',
+                                     help='JSON file to write the results to (default: a new file in '
+                                          + ApplicationBenchmarkSuite.BENCHMARKS_DIRECTORY + ')')
+        argument_parser.add_argument('--compare',
+                                     metavar='FILE',
+                                     help='results of an earlier run to compare with, exits with 1 if a case got '
+                                          'slower by more than --max-regression')
+        argument_parser.add_argument('--max-regression',
+                                     type=float,
+                                     default=10.0,
+                                     metavar='PERCENT',
+                                     help='how much slower a case can get before it\'s a regression (default: 10)')
+        return argument_parser.parse_args(args)
+
+    @staticmethod
+    def _get_number_of_tasks(value):
+        try:
+            number_of_tasks = int(value)
+        except ValueError:
+            number_of_tasks = 0
+
+        if number_of_tasks < 1:
+            raise argparse.ArgumentTypeError('expected a number of tasks, like 4, not "' + value + '"')
+        return number_of_tasks
+
+    @staticmethod
+    def _get_list_type(choices):
+        def get_list(value):
+            values = [list_value.strip() for list_value in value.split(',') if list_value.strip()]
+
+            for list_value in values:
+                if list_value not in choices:
+                    raise argparse.ArgumentTypeError('unknown value "' + list_value + '", expected one of: '
+                                                     + ', '.join(choices))
+            return values
+
+        return get_list
+
+    def run(self):
+        """
+        Runs the benchmark cases, writes the results, and returns the exit code: 0 when every case finished, 1 when
+        a task failed or a case got slower than the compared results allow, and 2 when the sources couldn't be
+        generated.
+        """
+        self._setup_preferences()
+
+        baseline_results = None
+        if self.benchmark_args.compare is not None:
+            try:
+                with open(self.benchmark_args.compare) as baseline_file:
+                    baseline_results = json.load(baseline_file)
+            except (OSError, ValueError) as exception:
+                print('render-watch: can\'t read results to compare with: ' + str(exception), file=sys.stderr)
+                return 2
+
+        # Kept next to the sources so inputs can be hard links, and outside the temp directory that's measured.
+        os.makedirs(self.benchmark_args.sources_dir, exist_ok=True)
+        work_directory = tempfile.mkdtemp(prefix='.work_', dir=self.benchmark_args.sources_dir)
+
+        try:
+            cases = []
+
+            for resolution in self.benchmark_args.resolutions:
+                input_file_paths = self._get_input_file_paths(resolution, self.benchmark_args.inputs, work_directory)
+                if input_file_paths is None:
+                    return 2
+
+                for codec in self.benchmark_args.codecs:
+                    for mode in self.benchmark_args.modes:
+                        case = self._run_case(resolution, codec, mode, input_file_paths, work_directory)
+                        cases.append(case)
+
+                        self._print_case(case)
+        finally:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+        results = {
+            'version': benchmark_suite_helper.RESULTS_FORMAT_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': self._get_environment(),
+            'cases': cases
+        }
+        results_file_path = self._write_results(results)
+        if results_file_path is None:
+            return 1
+
+        print('results written to ' + results_file_path)
+
+        is_regressed = baseline_results is not None and self._print_comparison(baseline_results, results)
+        if is_regressed or any(case['failed_tasks'] for case in cases):
+            return 1
+        return 0
+
+    def _setup_preferences(self):
+        # Resumable encodes would send single pass tasks through the segment muxer, which isn't what's measured here.
+        self.application_preferences.is_resumable_encodes_enabled = False
+        self.application_preferences.is_parallel_chunks_enabled = True
+
+        # Every mode runs the same number of tasks, which can be higher than the preferences allow.
+        number_of_tasks = self.benchmark_args.parallel_tasks
+        if number_of_tasks is None:
+            self.application_preferences.tuning_profile = tuning_profile.get_host_profile(self.application_preferences)
+            number_of_tasks = tuning_profile.get_parallel_tasks(self.application_preferences)
+
+        self.application_preferences.tuning_profile = TuningProfile(number_of_tasks,
+                                                                    {codec: number_of_tasks
+                                                                     for codec in tuning_profile.CODECS})
+
+    def _get_input_file_paths(self, resolution, number_of_inputs, work_directory):
+        input_file_paths = []
+
+        for input_number in range(number_of_inputs):
+            pattern = benchmark_suite_helper.SOURCE_PATTERNS[input_number % len(benchmark_suite_helper.SOURCE_PATTERNS)]
+            source_file_name = benchmark_suite_helper.get_source_file_name(pattern,
+                                                                           resolution,
+                                                                           self.benchmark_args.duration)
+            source_file_path = os.path.join(self.benchmark_args.sources_dir, source_file_name)
+
+            if not os.path.isfile(source_file_path) and not self._generate_source(pattern,
+                                                                                  resolution,
+                                                                                  source_file_path):
+                return None
+
+            # Every task gets its own input file, like a batch of different videos.
+            input_file_path = os.path.join(work_directory, str(input_number) + '_' + source_file_name)
+            try:
+                os.link(source_file_path, input_file_path)
+            except OSError:
+                shutil.copyfile(source_file_path, input_file_path)
+            input_file_paths.append(input_file_path)
+
+        return input_file_paths
+
+    def _generate_source(self, pattern, resolution, source_file_path):
+        print('generating ' + source_file_path, flush=True)
+
+        temp_file_path = source_file_path + '.part.mkv'
+        ffmpeg_args = benchmark_suite_helper.get_source_args(pattern,
+                                                             resolution,
+                                                             self.benchmark_args.duration,
+                                                             temp_file_path)
+
+        with subprocess.Popen(ffmpeg_args,
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT,
+                              universal_newlines=True) as process:
+            stdout_log = process.stdout.read()
+
+        if process.returncode:
+            logging.error('--- FAILED TO GENERATE BENCHMARK SOURCE: ' + source_file_path + ' ---\n' + stdout_log)
+            print('render-watch: can\'t generate ' + source_file_path + ', see the log', file=sys.stderr)
+
+            return False
+
+        os.replace(temp_file_path, source_file_path)
+        return True
+
+    def _run_case(self, resolution, codec, mode, input_file_paths, work_directory):
+        output_directory = os.path.join(work_directory, 'outputs')
+        os.makedirs(output_directory)
+
+        self.application_preferences.is_per_codec_parallel_tasks_enabled = mode == benchmark_suite_helper.PER_CODEC_MODE
+        encoder_queue = EncoderQueue(self.application_preferences, job_store=JobStore(':memory:'))
+        encoder_queue.is_parallel_tasks_enabled = mode != benchmark_suite_helper.STANDARD_MODE
+
+        try:
+            tasks = self._create_tasks(codec, input_file_paths, output_directory, encoder_queue)
+
+            encoder_tasks = []
+            for task in tasks:
+                encoder_tasks.extend(task.get_encoder_tasks(mode == benchmark_suite_helper.CHUNKS_MODE))
+
+            temp_disk_sampler = _TempDiskSampler(self.application_preferences.temp_directory,
+                                                 self.TEMP_DISK_SAMPLE_INTERVAL_IN_SECONDS)
+            temp_disk_sampler.start()
+
+            start_cpu_time = benchmark_suite_helper.get_cpu_time()
+            start_time = time.monotonic()
+
+            encoder_queue.add_active_rows(encoder_tasks)
+            for task in tasks:
+                task.finished_event.wait()
+
+            wall_time = time.monotonic() - start_time
+            cpu_time = benchmark_suite_helper.get_cpu_time() - start_cpu_time
+            peak_temp_disk_use = temp_disk_sampler.stop()
+            output_size = benchmark_suite_helper.get_directory_size(output_directory)
+        finally:
+            encoder_queue.kill()
+            encoder_queue.job_store.close()
+            shutil.rmtree(output_directory, ignore_errors=True)
+
+        frames = len(tasks) * self.benchmark_args.duration * benchmark_suite_helper.SOURCE_FRAME_RATE
+        return {
+            'name': benchmark_suite_helper.get_case_name(resolution, codec, mode),
+            'resolution': resolution,
+            'codec': codec,
+            'mode': mode,
+            'tasks': len(tasks),
+            'chunked_tasks': sum(1 for task in tasks if task.chunk_list),
+            'failed_tasks': (len(input_file_paths) - len(tasks)) + sum(1 for task in tasks if task.failed),
+            'frames': frames,
+            'wall_time': round(wall_time, 3),
+            'aggregate_fps': round(frames / wall_time, 2) if wall_time else 0.0,
+            'cpu_time': round(cpu_time, 3),
+            'cpu_utilization': round(cpu_time / (wall_time * (os.cpu_count() or 1)), 4) if wall_time else 0.0,
+            'peak_temp_disk_use': peak_temp_disk_use,
+            'output_size': output_size
+        }
+
+    def _create_tasks(self, codec, input_file_paths, output_directory, encoder_queue):
+        ffmpeg_template = settings_file_helper.get_ffmpeg_template(benchmark_suite_helper.get_ffmpeg_settings(codec))
+        ffmpeg_batch = []
+
+        for input_file_path in input_file_paths:
+            ffmpeg = input_helper.create_ffmpeg(input_file_path,
+                                                ffmpeg_template,
+                                                output_directory,
+                                                self.application_preferences)
+            if ffmpeg is not None:
+                ffmpeg_batch.append(ffmpeg)
+
+        directory_helper.fix_same_name_occurences_in_batch(ffmpeg_batch, set(), self.application_preferences)
+
+        return [HeadlessTask(ffmpeg, self.application_preferences, encoder_queue.job_store) for ffmpeg in ffmpeg_batch]
+
+    def _get_environment(self):
+        return {
+            'ffmpeg': self._get_ffmpeg_version(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'duration': self.benchmark_args.duration,
+            'inputs': self.benchmark_args.inputs,
+            'parallel_tasks': tuning_profile.get_parallel_tasks(self.application_preferences)
+        }
+
+    @staticmethod
+    def _get_ffmpeg_version():
+        try:
+            with subprocess.Popen([Settings.FFMPEG_BINARY, '-version'],
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT,
+                                  universal_newlines=True) as process:
+                return process.stdout.readline().strip()
+        except OSError:
+            return None
+
+    def _write_results(self, results):
+        results_file_path = self.benchmark_args.output
+        if results_file_path is None:
+            results_file_path = os.path.join(self.BENCHMARKS_DIRECTORY,
+                                             datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.json')
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(results_file_path)), exist_ok=True)
+
+            with open(results_file_path, 'w') as results_file:
+                json.dump(results, results_file, indent=2)
+        except OSError as exception:
+            print('render-watch: can\'t write results: ' + str(exception), file=sys.stderr)
+            return None
+
+        return results_file_path
+
+    @staticmethod
+    def _print_case(case):
+        print(case['name'].ljust(24)
+              + ' ' + ('%.2fs' % case['wall_time']).rjust(9)
+              + ' ' + ('%.1f fps' % case['aggregate_fps']).rjust(12)
+              + ' ' + ('cpu %d%%' % round(case['cpu_utilization'] * 100)).rjust(8)
+              + ' ' + ('temp %.1fMB' % (case['peak_temp_disk_use'] / 1000000)).rjust(14)
+              + (' (' + str(case['failed_tasks']) + ' failed)' if case['failed_tasks'] else ''),
+              flush=True)
+
+    def _print_comparison(self, baseline_results, results):
+        comparisons, regressions = benchmark_suite_helper.compare_results(baseline_results,
+                                                                          results,
+                                                                          self.benchmark_args.max_regression / 100)
+
+        print('\ncompared with ' + self.benchmark_args.compare)
+        for case_name, baseline_wall_time, wall_time, change in comparisons:
+            print(case_name.ljust(24)
+                  + ' ' + ('%.2fs' % baseline_wall_time).rjust(9)
+                  + ' ' + ('%.2fs' % wall_time).rjust(9)
+                  + ' ' + ('%+.1f%%' % (change * 100)).rjust(8)
+                  + ('  REGRESSION' if case_name in regressions else ''))
+
+        return bool(regressions)
+
+
+class _TempDiskSampler:
+    """
+    Samples how much the temp directory grows while a benchmark case runs and keeps the peak.
+    """
+
+    def __init__(self, temp_directory, interval_in_seconds):
+        self.temp_directory = temp_directory
+        self.interval_in_seconds = interval_in_seconds
+        self.start_size = benchmark_suite_helper.get_directory_size(temp_directory)
+        self.peak_size = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_in_seconds):
+            self._sample()
+
+    def _sample(self):
+        self.peak_size = max(self.peak_size,
+                             benchmark_suite_helper.get_directory_size(self.temp_directory) - self.start_size)
+
+    def stop(self):
+        """
+        Stops sampling and returns the peak growth of the temp directory in bytes.
+        """
+        self._stop_event.set()
+        self._thread.join()
+        self._sample()
+        return self.peak_size
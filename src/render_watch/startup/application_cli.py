@@ -0,0 +1,250 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from render_watch.encoding.headless_task import HeadlessTask
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log
+from render_watch.encoding.task_reporter import TaskReporter
+from render_watch.app_formatting import format_converter
+from render_watch.helpers import directory_helper, input_helper, settings_file_helper
+
+
+class ApplicationCLI:
+    """
+    Runs inputs through the encoder queue from the command line, without the application's UI.
+
+    Every input uses the settings from a settings file or preset, the same way the settings sidebar's settings are
+    used when apply to all is selected. Progress is printed to stdout as text or as one JSON object per line.
+    """
+
+    HEADLESS_ARG = '--headless'
+    PROGRESS_INTERVAL_IN_SECONDS = 1
+
+    SKIPPED_EVENT = 'skipped'
+
+    def __init__(self, encoder_queue, application_preferences, cli_args):
+        """
+        Sets up the encoder queue for the command line's options.
+
+        :param encoder_queue: Queue that the encoder pulls from.
+        :param application_preferences: Application's preferences.
+        :param cli_args: Options returned by parse_args().
+        """
+        self.encoder_queue = encoder_queue
+        self.application_preferences = application_preferences
+        self.cli_args = cli_args
+        self.task_reporter = TaskReporter()
+
+        self._setup_encoder_queue()
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --headless',
+                                                  description='Encode inputs without the Render Watch UI.')
+        argument_parser.add_argument(ApplicationCLI.HEADLESS_ARG, action='store_true', help=argparse.SUPPRESS)
+        argument_parser.add_argument('--debug', action='store_true', help='write a debug log')
+        argument_parser.add_argument('inputs', nargs='+', metavar='INPUT', help='input files or folders')
+
+        settings_group = argument_parser.add_mutually_exclusive_group(required=True)
+        settings_group.add_argument('--settings', metavar='FILE', help='JSON settings file to encode with')
+        settings_group.add_argument('--preset',
+                                    metavar='NAME',
+                                    help='settings file in ' + settings_file_helper.PRESETS_DIRECTORY + ' to encode with')
+
+        argument_parser.add_argument('--output-dir',
+                                     default=os.getcwd(),
+                                     help='directory to write outputs to (default: current directory)')
+        argument_parser.add_argument('--parallel', action='store_true', help='run tasks in parallel')
+        argument_parser.add_argument('--per-codec',
+                                     action='store_true',
+                                     help='run tasks in parallel with the per codec limits (implies --parallel)')
+        argument_parser.add_argument('--chunks', action='store_true', help='split tasks into chunks')
+        argument_parser.add_argument('--watch', action='store_true', help='watch input folders for new files')
+        argument_parser.add_argument('--recursive', action='store_true', help='include sub-folders of input folders')
+        argument_parser.add_argument('--auto-crop', action='store_true', help='crop black bars from inputs')
+        argument_parser.add_argument('--json', action='store_true', help='print progress as JSON lines')
+        argument_parser.add_argument('--coordinator',
+                                     metavar='HOST:PORT',
+                                     help='listen for chunk workers and encode chunks on them (use with --chunks)')
+        argument_parser.add_argument('--token',
+                                     default=os.environ.get('RENDER_WATCH_TOKEN'),
+                                     help='token that chunk workers must use, required unless listening on loopback '
+                                          '(default: $RENDER_WATCH_TOKEN)')
+        argument_parser.add_argument('--metrics-port',
+                                     type=int,
+                                     default=os.environ.get('RENDER_WATCH_METRICS_PORT'),
+                                     help='serve Prometheus metrics on this localhost port '
+                                          '(default: $RENDER_WATCH_METRICS_PORT)')
+        argument_parser.add_argument('--metrics-file',
+                                     default=os.environ.get('RENDER_WATCH_METRICS_FILE'),
+                                     help='write Prometheus metrics to this file every few seconds '
+                                          '(default: $RENDER_WATCH_METRICS_FILE)')
+        argument_parser.add_argument('--adaptive-concurrency',
+                                     type=int,
+                                     nargs='?',
+                                     const=os.cpu_count() or 1,
+                                     metavar='MAX_SLOTS',
+                                     help='adjust how many tasks encode at the same time to the measured '
+                                          'throughput, up to MAX_SLOTS (default: the number of CPUs)')
+        return argument_parser.parse_args(args)
+
+    def _setup_encoder_queue(self):
+        if self.cli_args.per_codec:
+            self.application_preferences.is_per_codec_parallel_tasks_enabled = True
+            self.encoder_queue.is_per_codec_parallel_tasks_enabled = True
+
+        self.encoder_queue.is_parallel_tasks_enabled = self.cli_args.parallel or self.cli_args.per_codec
+
+    def run(self):
+        """
+        Encodes the command line's inputs and returns the exit code: 0 when every task finished, 1 when a task failed,
+        2 when there was nothing to encode, and 130 when stopped with Ctrl+C. Watch folder tasks run until stopped.
+        """
+        try:
+            ffmpeg_template = settings_file_helper.load_ffmpeg_template(self._get_settings_file_path())
+        except (OSError, ValueError) as exception:
+            print('render-watch: invalid settings: ' + str(exception), file=sys.stderr)
+            self._stop_encoder_queue()
+
+            return 2
+
+        tasks = self._create_tasks(ffmpeg_template)
+        if not tasks:
+            print('render-watch: no inputs to encode', file=sys.stderr)
+            self._stop_encoder_queue()
+
+            return 2
+
+        encoder_tasks = []
+        for task in tasks:
+            encoder_tasks.extend(task.get_encoder_tasks(self.cli_args.chunks))
+        self.encoder_queue.add_active_rows(encoder_tasks)
+
+        try:
+            self._wait_for_tasks(tasks)
+        except KeyboardInterrupt:
+            self._report_stopped_tasks(tasks)
+
+            return 130
+        finally:
+            self._stop_encoder_queue()
+
+        if any(task.failed for task in tasks):
+            return 1
+        return 0
+
+    def _stop_encoder_queue(self):
+        # The encode task queues keep the process running until they're stopped.
+        self.encoder_queue.kill()
+        self.encoder_queue.job_store.close()
+
+    def _get_settings_file_path(self):
+        if self.cli_args.preset is not None:
+            return settings_file_helper.get_preset_file_path(self.cli_args.preset)
+        return self.cli_args.settings
+
+    def _create_tasks(self, ffmpeg_template):
+        ffmpeg_batch = []
+        job_timings = []
+
+        for input_path in self.cli_args.inputs:
+            job_timing = JobTiming()
+            ffmpeg = input_helper.create_ffmpeg(os.path.abspath(input_path),
+                                                ffmpeg_template,
+                                                os.path.abspath(self.cli_args.output_dir),
+                                                self.application_preferences,
+                                                watch_folder=self.cli_args.watch,
+                                                recursive_folder=self.cli_args.recursive,
+                                                auto_crop=self.cli_args.auto_crop,
+                                                job_timing=job_timing)
+
+            if ffmpeg is None:
+                self._print_message(self.SKIPPED_EVENT, input_path, {})
+            else:
+                ffmpeg_batch.append(ffmpeg)
+                job_timings.append(job_timing)
+
+        directory_helper.fix_same_name_occurences_in_batch(ffmpeg_batch, set(), self.application_preferences)
+
+        tasks = [HeadlessTask(ffmpeg, self.application_preferences, self.encoder_queue.job_store)
+                 for ffmpeg in ffmpeg_batch]
+
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            for task, job_timing in zip(tasks, job_timings):
+                job_timing_log.add_job(task, job_timing)
+
+        return tasks
+
+    def _wait_for_tasks(self, tasks):
+        # Watch folder tasks don't finish on their own, so the tasks are reported until Ctrl+C is pressed.
+        is_watching_folders = any(task.ffmpeg.watch_folder for task in tasks)
+
+        while True:
+            self._report_tasks(tasks)
+
+            if not is_watching_folders and all(task.finished for task in tasks):
+                break
+
+            time.sleep(self.PROGRESS_INTERVAL_IN_SECONDS)
+
+    def _report_tasks(self, tasks):
+        for event, task in self.task_reporter.get_events(tasks):
+            self._print_task_event(event, task)
+
+    def _report_stopped_tasks(self, tasks):
+        for task in tasks:
+            if not task.finished:
+                task.stop()
+        self._report_tasks(tasks)
+
+    def _print_task_event(self, event, task):
+        self._print_message(event, task.ffmpeg.input_file, TaskReporter.get_task_status(task))
+
+    def _print_message(self, event, input_path, task_status):
+        if self.cli_args.json:
+            message = {'event': event, 'input': input_path}
+            message.update(task_status)
+            print(json.dumps(message), flush=True)
+        else:
+            print(self._get_console_message(event, input_path, task_status), flush=True)
+
+    @staticmethod
+    def _get_console_message(event, input_path, task_status):
+        message = event.ljust(8) + ' ' + input_path
+
+        if event == TaskReporter.PROGRESS_EVENT:
+            message += ' ' + str(int(task_status['progress'] * 100)) + '%' \
+                       + ' speed=' + str(task_status['speed']) + 'x' \
+                       + ' bitrate=' + str(task_status['bitrate']) + 'kbits/s' \
+                       + ' size=' + format_converter.get_file_size_from_bytes(task_status['file_size']) \
+                       + ' left=' + format_converter.get_timecode_from_seconds(task_status['time_left'])
+        elif event == TaskReporter.FINISHED_EVENT:
+            message += ' -> ' + task_status['output']
+
+        return message
@@ -0,0 +1,427 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import logging
+import os
+import pickle
+import signal
+import socketserver
+import sys
+import threading
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.headless_task import HeadlessTask
+from render_watch.encoding.job_timing_log import JobTiming, get_job_timing_log
+from render_watch.encoding.task_reporter import TaskReporter
+from render_watch.helpers import directory_helper, input_helper, settings_file_helper
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads a connection's requests and writes the daemon's responses, one JSON object per line.
+    """
+
+    def handle(self):
+        application_daemon = self.server.application_daemon
+
+        while True:
+            try:
+                request = daemon_client.read_message(self.rfile)
+            except ValueError:
+                daemon_client.write_message(self.wfile, {'ok': False, 'error': 'request isn\'t valid JSON'})
+                continue
+            except OSError:
+                return
+
+            if request is None:
+                return
+
+            if isinstance(request, dict) and request.get('command') == 'events':
+                application_daemon.stream_events(self.rfile, self.wfile)
+                return
+
+            daemon_client.write_message(self.wfile, application_daemon.handle_request(request))
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        super().server_bind()
+
+        # Only this user can connect. Changed before the socket listens, so there's no moment it's open to others.
+        os.chmod(self.server_address, 0o600)
+
+
+class ApplicationDaemon:
+    """
+    Runs the encoder queue as a long-lived service that takes jobs over a Unix socket, without the application's UI.
+
+    Requests are JSON objects with a "command" key, sent one per line. Every request gets a JSON response with an
+    "ok" key, and an "error" key when it failed. Commands:
+        submit: Adds jobs from "inputs" with "settings" or "preset", "output_dir", "watch", "recursive", and
+                "auto_crop", or from "ffmpeg" (a list of encoded ffmpeg settings). "chunks" splits the jobs into chunks.
+                Responds with "job_ids" and the "skipped" inputs.
+        list: Responds with "jobs", "include_settings" adds each job's encoded ffmpeg settings.
+        pause, resume, stop: Changes the job with the "job_id".
+        reprioritize: Moves the queued job with the "job_id" to "position" in its encode queue.
+        set_parallel: Turns parallel tasks on or off with "enabled" and optionally "per_codec".
+        events: Streams progress events as JSON objects with an "event" key until the connection is closed.
+
+    Unfinished jobs are kept in the daemon's job store and started again when the daemon restarts. The socket is only
+    accessible by the user running the daemon, because submitted ffmpeg settings are pickled.
+    """
+
+    DAEMON_ARG = '--daemon'
+    JOB_STORE_FILE_NAME = 'daemon_jobs.db'
+    EVENTS_INTERVAL_IN_SECONDS = 1
+    FINISHED_JOBS_LIMIT = 100
+
+    def __init__(self, encoder_queue, application_preferences, daemon_args):
+        """
+        :param encoder_queue: Queue that the encoder pulls from.
+        :param application_preferences: Application's preferences.
+        :param daemon_args: Options returned by parse_args().
+        """
+        self.encoder_queue = encoder_queue
+        self.application_preferences = application_preferences
+        self.socket_path = daemon_args.socket
+        self.task_reporter = TaskReporter()
+        self._tasks = {}
+        self._tasks_lock = threading.Lock()
+        self._events_files = []
+        self._events_lock = threading.Lock()
+        self._stopped_event = threading.Event()
+        self._request_handlers = {
+            'submit': self._submit,
+            'list': self._list,
+            'pause': self._pause,
+            'resume': self._resume,
+            'stop': self._stop,
+            'reprioritize': self._reprioritize,
+            'set_parallel': self._set_parallel
+        }
+
+        self._set_parallel({'enabled': daemon_args.parallel or daemon_args.per_codec,
+                            'per_codec': daemon_args.per_codec or None})
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's daemon options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --daemon',
+                                                  description='Run Render Watch as a service that takes jobs over a '
+                                                              'Unix socket.')
+        argument_parser.add_argument(ApplicationDaemon.DAEMON_ARG, action='store_true', help=argparse.SUPPRESS)
+        argument_parser.add_argument('--debug', action='store_true', help='write a debug log')
+        argument_parser.add_argument('--socket',
+                                     default=daemon_client.get_default_socket_path(),
+                                     help='path of the Unix socket (default: %(default)s)')
+        argument_parser.add_argument('--parallel', action='store_true', help='run jobs in parallel')
+        argument_parser.add_argument('--per-codec',
+                                     action='store_true',
+                                     help='run jobs in parallel with the per codec limits (implies --parallel)')
+        argument_parser.add_argument('--coordinator',
+                                     metavar='HOST:PORT',
+                                     help='listen for chunk workers and encode chunked jobs on them')
+        argument_parser.add_argument('--token',
+                                     default=os.environ.get('RENDER_WATCH_TOKEN'),
+                                     help='token that chunk workers must use, required unless listening on loopback '
+                                          '(default: $RENDER_WATCH_TOKEN)')
+        argument_parser.add_argument('--metrics-port',
+                                     type=int,
+                                     default=os.environ.get('RENDER_WATCH_METRICS_PORT'),
+                                     help='serve Prometheus metrics on this localhost port '
+                                          '(default: $RENDER_WATCH_METRICS_PORT)')
+        argument_parser.add_argument('--metrics-file',
+                                     default=os.environ.get('RENDER_WATCH_METRICS_FILE'),
+                                     help='write Prometheus metrics to this file every few seconds '
+                                          '(default: $RENDER_WATCH_METRICS_FILE)')
+        argument_parser.add_argument('--adaptive-concurrency',
+                                     type=int,
+                                     nargs='?',
+                                     const=os.cpu_count() or 1,
+                                     metavar='MAX_SLOTS',
+                                     help='adjust how many jobs encode at the same time to the measured '
+                                          'throughput, up to MAX_SLOTS (default: the number of CPUs)')
+        return argument_parser.parse_args(args)
+
+    def run(self):
+        """
+        Serves requests until the daemon gets SIGTERM or SIGINT, and returns the exit code. Jobs that haven't finished
+        are stopped and started again the next time the daemon runs.
+        """
+        if daemon_client.DaemonClient.is_daemon_running(self.socket_path):
+            print('render-watch: daemon already running: ' + self.socket_path, file=sys.stderr)
+            self._stop_encoder_queue()
+
+            return 1
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left behind by a daemon that didn't shut down.
+
+        self._restore_jobs()
+
+        server = _DaemonServer(self.socket_path, _DaemonRequestHandler)
+        server.application_daemon = self
+
+        signal.signal(signal.SIGTERM, self._on_terminate_signal)
+        threading.Thread(target=self._run_events_thread, daemon=True).start()
+        logging.info('--- DAEMON LISTENING: ' + self.socket_path + ' ---')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stopped_event.set()
+            server.server_close()
+            os.remove(self.socket_path)
+            self._stop_encoder_queue()
+
+        return 0
+
+    def _stop_encoder_queue(self):
+        # Closed first so the jobs that kill() stops are restored the next time the daemon runs.
+        self.encoder_queue.job_store.close()
+        self.encoder_queue.kill()
+
+    @staticmethod
+    def _on_terminate_signal(signal_number, frame):  # Unused parameters needed for this signal handler
+        raise KeyboardInterrupt
+
+    def _restore_jobs(self):
+        encoder_tasks = []
+
+        for job in self.encoder_queue.get_unfinished_jobs():
+            task = HeadlessTask(job.ffmpeg, self.application_preferences, self.encoder_queue.job_store)
+            task.job_id = job.job_id
+            self._tasks[job.job_id] = task
+            encoder_tasks.extend(task.get_encoder_tasks(job.is_chunked))
+
+        if encoder_tasks:
+            logging.info('--- RESTORING ' + str(len(self._tasks)) + ' UNFINISHED JOBS ---')
+
+            self.encoder_queue.add_active_rows(encoder_tasks)
+
+    def handle_request(self, request):
+        """
+        Runs a request's command and returns the response.
+
+        :param request: Dictionary read from a connection.
+        """
+        if not isinstance(request, dict) or request.get('command') not in self._request_handlers:
+            return {'ok': False, 'error': 'unknown command'}
+
+        try:
+            response = self._request_handlers[request['command']](request)
+        except (KeyError, TypeError, ValueError, EOFError, OSError, pickle.UnpicklingError) as exception:
+            return {'ok': False, 'error': str(exception)}
+
+        response['ok'] = True
+        return response
+
+    def _submit(self, request):
+        is_chunked = bool(request.get('chunks'))
+
+        if request.get('ffmpeg') is not None:
+            ffmpeg_batch = [daemon_client.decode_ffmpeg(encoded_ffmpeg) for encoded_ffmpeg in request['ffmpeg']]
+            skipped_inputs = []
+            job_timings = []
+        else:
+            ffmpeg_batch, skipped_inputs, job_timings = self._get_inputs_ffmpeg_batch(request)
+
+        tasks = [HeadlessTask(ffmpeg, self.application_preferences, self.encoder_queue.job_store)
+                 for ffmpeg in ffmpeg_batch]
+
+        job_timing_log = get_job_timing_log()
+        if job_timing_log is not None:
+            for task, job_timing in zip(tasks, job_timings):
+                job_timing_log.add_job(task, job_timing)
+
+        encoder_tasks = []
+        for task in tasks:
+            encoder_tasks.extend(task.get_encoder_tasks(is_chunked))
+
+        with self._tasks_lock:
+            self.encoder_queue.add_active_rows(encoder_tasks)
+
+            for task in tasks:
+                self._tasks[task.job_id] = task
+
+        return {'job_ids': [task.job_id for task in tasks], 'skipped': skipped_inputs}
+
+    def _get_inputs_ffmpeg_batch(self, request):
+        if request.get('preset') is not None:
+            ffmpeg_template = settings_file_helper.load_ffmpeg_template(
+                settings_file_helper.get_preset_file_path(request['preset']))
+        else:
+            ffmpeg_template = settings_file_helper.get_ffmpeg_template(request['settings'])
+
+        output_directory = request['output_dir']
+        if not os.path.isabs(output_directory):
+            raise ValueError('output_dir must be an absolute path')
+
+        ffmpeg_batch = []
+        skipped_inputs = []
+        job_timings = []
+        for input_path in request['inputs']:
+            job_timing = JobTiming()
+            ffmpeg = input_helper.create_ffmpeg(input_path,
+                                                ffmpeg_template,
+                                                output_directory,
+                                                self.application_preferences,
+                                                watch_folder=bool(request.get('watch')),
+                                                recursive_folder=bool(request.get('recursive')),
+                                                auto_crop=bool(request.get('auto_crop')),
+                                                job_timing=job_timing)
+
+            if ffmpeg is None:
+                skipped_inputs.append(input_path)
+            else:
+                ffmpeg_batch.append(ffmpeg)
+                job_timings.append(job_timing)
+
+        directory_helper.fix_same_name_occurences_in_batch(ffmpeg_batch,
+                                                           self._get_output_file_paths(),
+                                                           self.application_preferences)
+        return ffmpeg_batch, skipped_inputs, job_timings
+
+    def _get_output_file_paths(self):
+        with self._tasks_lock:
+            return {TaskReporter.get_task_status(task)['output']
+                    for task in self._tasks.values() if not task.finished}
+
+    def _list(self, request):
+        jobs = []
+
+        with self._tasks_lock:
+            tasks = list(self._tasks.items())
+
+        for job_id, task in tasks:
+            job = self._get_job_message(job_id, task)
+            job['state'] = TaskReporter.get_task_state(task)
+
+            if request.get('include_settings'):
+                job['ffmpeg'] = daemon_client.encode_ffmpeg(task.ffmpeg)
+                job['is_chunked'] = bool(task.chunk_list)
+
+            jobs.append(job)
+
+        return {'jobs': jobs}
+
+    def _pause(self, request):
+        self._get_unfinished_task(request).pause()
+        return {}
+
+    def _resume(self, request):
+        self._get_unfinished_task(request).resume()
+        return {}
+
+    def _stop(self, request):
+        self._get_unfinished_task(request).stop()
+        return {}
+
+    def _reprioritize(self, request):
+        task = self._get_unfinished_task(request)
+
+        if not self.encoder_queue.move_queued_task(task, int(request['position'])):
+            raise ValueError('job ' + str(request['job_id']) + ' isn\'t queued')
+        return {}
+
+    def _set_parallel(self, request):
+        if request.get('per_codec') is not None:
+            self.application_preferences.is_per_codec_parallel_tasks_enabled = bool(request['per_codec'])
+            self.encoder_queue.is_per_codec_parallel_tasks_enabled = bool(request['per_codec'])
+
+        self.encoder_queue.is_parallel_tasks_enabled = bool(request['enabled'])
+        return {}
+
+    def _get_unfinished_task(self, request):
+        with self._tasks_lock:
+            task = self._tasks.get(request['job_id'])
+
+        if task is None:
+            raise ValueError('unknown job ' + str(request['job_id']))
+        if task.finished:
+            raise ValueError('job ' + str(request['job_id']) + ' already finished')
+        return task
+
+    @staticmethod
+    def _get_job_message(job_id, task):
+        job_message = {'job_id': job_id, 'input': task.ffmpeg.input_file}
+        job_message.update(TaskReporter.get_task_status(task))
+
+        chunks_status = TaskReporter.get_chunks_status(task)
+        if chunks_status:
+            job_message['chunks'] = chunks_status
+
+        return job_message
+
+    def stream_events(self, rfile, wfile):
+        """
+        Sends progress events to a connection until it's closed.
+
+        :param rfile: Readable binary file of the connection.
+        :param wfile: Writable binary file of the connection.
+        """
+        with self._events_lock:
+            daemon_client.write_message(wfile, {'ok': True})
+            self._events_files.append(wfile)
+
+        try:
+            while rfile.readline():  # Waits for the client to close the connection.
+                pass
+        except OSError:
+            pass
+        finally:
+            with self._events_lock:
+                if wfile in self._events_files:  # Already removed if sending an event failed.
+                    self._events_files.remove(wfile)
+
+    def _run_events_thread(self):
+        while not self._stopped_event.wait(self.EVENTS_INTERVAL_IN_SECONDS):
+            with self._tasks_lock:
+                tasks = list(self._tasks.items())
+
+            job_ids = {task: job_id for job_id, task in tasks}
+            for event, task in self.task_reporter.get_events([task for job_id, task in tasks]):
+                event_message = {'event': event}
+                event_message.update(self._get_job_message(job_ids[task], task))
+                self._send_event(event_message)
+
+            self._remove_old_finished_tasks()
+
+    def _send_event(self, event_message):
+        with self._events_lock:
+            for wfile in list(self._events_files):
+                try:
+                    daemon_client.write_message(wfile, event_message)
+                except OSError:
+                    self._events_files.remove(wfile)
+
+    def _remove_old_finished_tasks(self):
+        with self._tasks_lock:
+            finished_job_ids = [job_id for job_id, task in self._tasks.items() if task.finished]
+
+            for job_id in finished_job_ids[:-self.FINISHED_JOBS_LIMIT]:
+                self.task_reporter.forget_task(self._tasks.pop(job_id))
@@ -32,6 +32,7 @@ class ApplicationPreferences:
     PARALLEL_TASKS_VALUES = ('2', '3', '4', '6', '8', '10', '12', '14', '16')
     PER_CODEC_TASKS_VALUES = ('1', '2', '3', '4', '6', '8', '10', '12', '14', '16')
     CONCURRENT_NVENC_VALUES = ('auto', '1', '2', '3', '4', '5', '6', '7', '8')
+    UI_REFRESH_RATE_VALUES = ('1', '2', '4', '10')
     DEFAULT_APPLICATION_DATA_DIRECTORY = os.path.join(os.getenv('HOME'), '.config', 'Render Watch')
     DEFAULT_APPLICATION_TEMP_DIRECTORY = os.path.join(DEFAULT_APPLICATION_DATA_DIRECTORY, 'temp')
 
@@ -46,6 +47,7 @@ class ApplicationPreferences:
             'vp9': 1
         }
         self.is_parallel_tasks_enabled = False
+        self.is_tuning_profile_enabled = True
         self.is_parallel_chunks_enabled = False
         self.is_auto_crop_inputs_enabled = True
         self.is_concurrent_watch_folder_enabled = False
@@ -55,12 +57,16 @@ class ApplicationPreferences:
         self._new_temp_directory = None
         self.is_clear_temp_directory_enabled = False
         self.is_overwrite_outputs_enabled = True
+        self.is_resumable_encodes_enabled = False
         self.output_directory = os.getenv('HOME')
         self.is_dark_mode_enabled = True
         self.is_encode_preview_enabled = True
+        self.is_vid_preview_loop_enabled = False
+        self._ui_refresh_rate_value = 1
         self.window_dimensions = (1000, 600)
         self.is_window_maximized = False
         self.settings_sidebar_position = -1
+        self.tuning_profile = None  # Set by the encoder queue, isn't saved with the preferences
 
         directory_helper.create_application_config_directory(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY,
                                                              self._temp_directory)
@@ -98,6 +104,15 @@ class ApplicationPreferences:
         if value in self.PARALLEL_TASKS_VALUES:
             self._parallel_tasks_value = int(value)
 
+    @property
+    def ui_refresh_rate(self):
+        return self._ui_refresh_rate_value
+
+    @ui_refresh_rate.setter
+    def ui_refresh_rate(self, value):
+        if value in self.UI_REFRESH_RATE_VALUES:
+            self._ui_refresh_rate_value = int(value)
+
     def get_concurrent_nvenc_value(self, string=False):
         if string:
             return self._get_concurrent_nvenc_value_as_string()
@@ -160,11 +175,13 @@ class ApplicationPreferences:
             ApplicationPreferences._get_temp_directory_arg(application_preferences),
             ApplicationPreferences._get_clearing_temp_directory_arg(application_preferences),
             ApplicationPreferences._get_overwriting_outputs_arg(application_preferences),
+            ApplicationPreferences._get_resumable_encodes_arg(application_preferences),
             ApplicationPreferences._get_output_directory_arg(application_preferences),
             ApplicationPreferences._get_parallel_tasks_arg(application_preferences),
             ApplicationPreferences._get_per_codec_parallel_tasks_enabled_arg(application_preferences),
             ApplicationPreferences._get_per_codec_parallel_tasks_arg(application_preferences),
             ApplicationPreferences._get_parallel_tasks_enabled_arg(application_preferences),
+            ApplicationPreferences._get_tuning_profile_enabled_arg(application_preferences),
             ApplicationPreferences._get_parallel_chunks_enabled_arg(application_preferences),
             ApplicationPreferences._get_concurrent_nvenc_arg(application_preferences),
             ApplicationPreferences._get_concurrent_nvenc_value_arg(application_preferences),
@@ -174,6 +191,8 @@ class ApplicationPreferences:
             ApplicationPreferences._get_watch_folder_wait_for_tasks_arg(application_preferences),
             ApplicationPreferences._get_use_dark_mode_arg(application_preferences),
             ApplicationPreferences._get_encode_preview_enabled_arg(application_preferences),
+            ApplicationPreferences._get_vid_preview_loop_enabled_arg(application_preferences),
+            ApplicationPreferences._get_ui_refresh_rate_arg(application_preferences),
             ApplicationPreferences._get_window_dimensions_arg(application_preferences),
             ApplicationPreferences._get_window_maximized_arg(application_preferences),
             ApplicationPreferences._get_settings_sidebar_position_arg(application_preferences)
@@ -206,6 +225,10 @@ class ApplicationPreferences:
     def _get_parallel_tasks_enabled_arg(application_preferences):
         return 'parallel_tasks_enabled=' + str(application_preferences.is_parallel_tasks_enabled) + '\n'
 
+    @staticmethod
+    def _get_tuning_profile_enabled_arg(application_preferences):
+        return 'tuning_profile_enabled=' + str(application_preferences.is_tuning_profile_enabled) + '\n'
+
     @staticmethod
     def _get_concurrent_nvenc_value_arg(application_preferences):
         return 'concurrent_nvenc_value=' + application_preferences.get_concurrent_nvenc_value(string=True) + '\n'
@@ -263,10 +286,22 @@ class ApplicationPreferences:
     def _get_overwriting_outputs_arg(application_preferences):
         return 'overwrite_outputs=' + str(application_preferences.is_overwrite_outputs_enabled) + '\n'
 
+    @staticmethod
+    def _get_resumable_encodes_arg(application_preferences):
+        return 'resumable_encodes=' + str(application_preferences.is_resumable_encodes_enabled) + '\n'
+
     @staticmethod
     def _get_encode_preview_enabled_arg(application_preferences):
         return 'encode_preview_enabled=' + str(application_preferences.is_encode_preview_enabled) + '\n'
 
+    @staticmethod
+    def _get_vid_preview_loop_enabled_arg(application_preferences):
+        return 'vid_preview_loop_enabled=' + str(application_preferences.is_vid_preview_loop_enabled) + '\n'
+
+    @staticmethod
+    def _get_ui_refresh_rate_arg(application_preferences):
+        return 'ui_refresh_rate=' + str(application_preferences.ui_refresh_rate) + '\n'
+
     @staticmethod
     def load_preferences(application_preferences):
         """
@@ -312,6 +347,10 @@ class ApplicationPreferences:
             return
         if ApplicationPreferences._set_encode_preview_enabled(split_arg, application_preferences):
             return
+        if ApplicationPreferences._set_vid_preview_loop_enabled(split_arg, application_preferences):
+            return
+        if ApplicationPreferences._set_ui_refresh_rate_arg(split_arg, application_preferences):
+            return
         if ApplicationPreferences._set_window_dimensions_arg(split_arg, application_preferences):
             return
         if ApplicationPreferences._set_window_maximized_arg(split_arg, application_preferences):
@@ -324,6 +363,10 @@ class ApplicationPreferences:
             return
         if ApplicationPreferences._set_overwriting_outputs_arg(split_arg, application_preferences):
             return
+        if ApplicationPreferences._set_resumable_encodes_arg(split_arg, application_preferences):
+            return
+        if ApplicationPreferences._set_tuning_profile_enabled_arg(split_arg, application_preferences):
+            return
 
     @staticmethod
     def _set_temp_directory_arg(split_arg, application_preferences):
@@ -511,6 +554,30 @@ class ApplicationPreferences:
         except:
             return False
 
+    @staticmethod
+    def _set_vid_preview_loop_enabled(split_arg, application_preferences):
+        try:
+            if 'vid_preview_loop_enabled' in split_arg:
+                application_preferences.is_vid_preview_loop_enabled = split_arg[1] == 'True'
+
+                return True
+            else:
+                return False
+        except:
+            return False
+
+    @staticmethod
+    def _set_ui_refresh_rate_arg(split_arg, application_preferences):
+        try:
+            if 'ui_refresh_rate' in split_arg:
+                application_preferences.ui_refresh_rate = split_arg[1]
+
+                return True
+            else:
+                return False
+        except:
+            return False
+
     @staticmethod
     def _set_window_dimensions_arg(split_arg, application_preferences):
         try:
@@ -583,3 +650,27 @@ class ApplicationPreferences:
                 return False
         except:
             return False
+
+    @staticmethod
+    def _set_resumable_encodes_arg(split_arg, application_preferences):
+        try:
+            if 'resumable_encodes' in split_arg:
+                application_preferences.is_resumable_encodes_enabled = split_arg[1] == 'True'
+
+                return True
+            else:
+                return False
+        except:
+            return False
+
+    @staticmethod
+    def _set_tuning_profile_enabled_arg(split_arg, application_preferences):
+        try:
+            if 'tuning_profile_enabled' in split_arg:
+                application_preferences.is_tuning_profile_enabled = split_arg[1] == 'True'
+
+                return True
+            else:
+                return False
+        except:
+            return False
@@ -0,0 +1,133 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import json
+import os
+import sys
+
+from render_watch.app_formatting import format_converter
+from render_watch.encoding.job_timing_log import JobTimingLog
+from render_watch.helpers import job_timing_helper
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class ApplicationTimingAnalyzer:
+    """
+    Summarizes where the jobs in the job timing log spent their wall time, without the application's UI.
+    """
+
+    ANALYZE_TIMINGS_ARG = '--analyze-timings'
+    SLOWEST_JOBS = 5
+
+    def __init__(self, analyzer_args):
+        """
+        :param analyzer_args: Options returned by parse_args().
+        """
+        self.analyzer_args = analyzer_args
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's analyzer options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --analyze-timings',
+                                                  description='Summarize where encode jobs spent their time.')
+        argument_parser.add_argument(ApplicationTimingAnalyzer.ANALYZE_TIMINGS_ARG,
+                                     action='store_true',
+                                     help=argparse.SUPPRESS)
+        argument_parser.add_argument('files',
+                                     nargs='*',
+                                     metavar='FILE',
+                                     help='job timing logs (default: the job timing log and its backups in '
+                                          + ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY + ')')
+        argument_parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+        return argument_parser.parse_args(args)
+
+    def run(self):
+        """
+        Prints the summary and returns the exit code.
+        """
+        file_paths = self.analyzer_args.files or job_timing_helper.get_log_file_paths(
+            os.path.join(ApplicationPreferences.DEFAULT_APPLICATION_DATA_DIRECTORY, JobTimingLog.FILE_NAME),
+            JobTimingLog.BACKUP_COUNT)
+
+        try:
+            job_records = job_timing_helper.read_job_records(file_paths)
+        except OSError as exception:
+            print('render-watch: ' + str(exception), file=sys.stderr)
+            return 1
+
+        if not job_records:
+            print('render-watch: no job timings found', file=sys.stderr)
+            return 1
+
+        summary = job_timing_helper.summarize_job_records(job_records)
+        slowest_job_records = job_timing_helper.get_slowest_job_records(job_records, self.SLOWEST_JOBS)
+
+        if self.analyzer_args.json:
+            summary['slowest'] = [self._get_slowest_job(job_record) for job_record in slowest_job_records]
+            print(json.dumps(summary))
+        else:
+            self._print_summary(summary, slowest_job_records)
+
+        return 0
+
+    @staticmethod
+    def _get_slowest_job(job_record):
+        phase_totals = {}
+        for phase_record in job_record['phases']:
+            phase_totals[phase_record['phase']] = phase_totals.get(phase_record['phase'], 0.0) \
+                                                  + phase_record['duration']
+
+        return {
+            'input': job_record.get('input'),
+            'status': job_record.get('status'),
+            'wall_time': job_record.get('wall_time', 0.0),
+            'longest_phase': max(phase_totals, key=phase_totals.get) if phase_totals else None
+        }
+
+    def _print_summary(self, summary, slowest_job_records):
+        statuses = ', '.join(str(count) + ' ' + status for status, count in sorted(summary['statuses'].items()))
+        print('jobs: ' + str(summary['jobs']) + ' (' + statuses + ')')
+        print('wall time: ' + format_converter.get_timecode_from_seconds(summary['wall_time'])
+              + ' total, ' + format_converter.get_timecode_from_seconds(summary['wall_time'] / summary['jobs'])
+              + ' mean per job')
+        print()
+        print('{:<16}{:>14}{:>8}{:>6}{:>14}{:>14}'.format('phase', 'total', 'share', 'jobs', 'mean', 'max'))
+
+        for phase in summary['phases']:
+            print('{:<16}{:>14}{:>7.1f}%{:>6}{:>14}{:>14}'.format(
+                phase['phase'],
+                format_converter.get_timecode_from_seconds(phase['total']),
+                phase['share'] * 100,
+                phase['jobs'],
+                format_converter.get_timecode_from_seconds(phase['mean']),
+                format_converter.get_timecode_from_seconds(phase['max'])))
+
+        print()
+        print('slowest jobs:')
+
+        for job_record in slowest_job_records:
+            slowest_job = self._get_slowest_job(job_record)
+            print('  ' + format_converter.get_timecode_from_seconds(slowest_job['wall_time'])
+                  + '  ' + str(slowest_job['status'])
+                  + '  ' + str(slowest_job['input'])
+                  + '  (longest phase: ' + str(slowest_job['longest_phase']) + ')')
@@ -31,7 +31,8 @@ from render_watch.app_handlers.handlers_manager import HandlersManager
 from render_watch.startup.application_preferences import ApplicationPreferences
 from render_watch.helpers.ui_helper import UIHelper
 from render_watch.helpers.nvidia_helper import NvidiaHelper
-from render_watch.startup import Gtk
+from render_watch.helpers import main_loop_helper
+from render_watch.startup import Gtk, GLib
 
 
 class ApplicationUI:
@@ -51,6 +52,8 @@ class ApplicationUI:
         self._setup_gtk_builder()
         self.gtk_settings = Gtk.Settings.get_default()
 
+        main_loop_helper.set_main_loop(GLib.idle_add)
+
     def _setup_gtk_builder(self):
         working_directory = os.path.dirname(os.path.abspath(__file__))
         glade_file_path = os.path.join(working_directory, '../render_watch_data/rw_ui.glade')
@@ -337,6 +340,7 @@ class ApplicationUI:
 
     def _on_main_window_destroy(self, application_window):
         self._save_application_preferences(application_window)
+        self.encoder_queue.job_store.close()  # Closed first so the jobs that kill() stops are restored next time.
         self.encoder_queue.kill()
         Gtk.main_quit()
 
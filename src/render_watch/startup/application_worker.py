@@ -0,0 +1,109 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+
+from render_watch.encoding.chunk_worker import ChunkWorker, InputCache
+
+
+class ApplicationWorker:
+    """
+    Runs chunk workers that encode chunks for a coordinator on another machine, without the application's UI.
+    """
+
+    WORKER_ARG = '--worker'
+    STOP_TIMEOUT_IN_SECONDS = 10
+
+    def __init__(self, application_preferences, worker_args):
+        """
+        :param application_preferences: Application's preferences.
+        :param worker_args: Options returned by parse_args().
+        """
+        self.application_preferences = application_preferences
+        self.worker_args = worker_args
+
+    @staticmethod
+    def parse_args(args):
+        """
+        Returns the command line's worker options. Exits with a usage message if they aren't valid.
+
+        :param args: Command line arguments, without the program name.
+        """
+        argument_parser = argparse.ArgumentParser(prog='render-watch --worker',
+                                                  description='Encode chunks for a Render Watch coordinator.')
+        argument_parser.add_argument(ApplicationWorker.WORKER_ARG,
+                                     dest='coordinator',
+                                     required=True,
+                                     metavar='HOST:PORT',
+                                     help='address of the coordinator')
+        argument_parser.add_argument('--debug', action='store_true', help='write a debug log')
+        argument_parser.add_argument('--slots', type=int, default=1, help='chunks to encode at once (default: 1)')
+        argument_parser.add_argument('--token',
+                                     default=os.environ.get('RENDER_WATCH_TOKEN'),
+                                     help='token to register with (default: $RENDER_WATCH_TOKEN)')
+        argument_parser.add_argument('--stream-inputs',
+                                     action='store_true',
+                                     help='receive inputs from the coordinator even if they\'re found at the same path')
+        return argument_parser.parse_args(args)
+
+    def run(self):
+        """
+        Encodes the coordinator's chunks until the worker gets SIGTERM or SIGINT, and returns the exit code.
+        """
+        work_directory = tempfile.mkdtemp(prefix='worker_', dir=self.application_preferences.temp_directory)
+        input_cache = InputCache(os.path.join(work_directory, 'inputs'))
+        worker_name = socket.gethostname() + ':' + str(os.getpid())
+        chunk_workers = [ChunkWorker(self.worker_args.coordinator,
+                                     worker_name,
+                                     os.path.join(work_directory, 'slot_' + str(slot)),
+                                     input_cache,
+                                     token=self.worker_args.token,
+                                     stream_inputs=self.worker_args.stream_inputs)
+                         for slot in range(max(self.worker_args.slots, 1))]
+        worker_threads = [threading.Thread(target=chunk_worker.run, daemon=True) for chunk_worker in chunk_workers]
+
+        signal.signal(signal.SIGTERM, self._on_terminate_signal)
+        logging.info('--- CHUNK WORKER STARTED: ' + worker_name + ' ---')
+
+        try:
+            for worker_thread in worker_threads:
+                worker_thread.start()
+            for worker_thread in worker_threads:
+                worker_thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for chunk_worker in chunk_workers:
+                chunk_worker.stop()
+            for worker_thread in worker_threads:
+                worker_thread.join(self.STOP_TIMEOUT_IN_SECONDS)
+
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+        return 0
+
+    @staticmethod
+    def _on_terminate_signal(signal_number, frame):  # Unused parameters needed for this signal handler
+        raise KeyboardInterrupt
@@ -0,0 +1,187 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import argparse
+import io
+import os
+import stat
+import tempfile
+import unittest
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.job_store import JobStore
+from render_watch.ffmpeg.settings import Settings
+from render_watch.startup.application_daemon import ApplicationDaemon, _DaemonRequestHandler, _DaemonServer
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class _EncoderQueue:
+    """Keeps the daemon's tasks in a list instead of encoding them."""
+
+    def __init__(self):
+        self.job_store = JobStore(':memory:')
+        self.is_parallel_tasks_enabled = False
+        self.is_per_codec_parallel_tasks_enabled = False
+        self.queued_tasks = []
+
+    def add_active_rows(self, active_rows):
+        for active_row in active_rows:
+            active_row.job_id = self.job_store.add_job(active_row.ffmpeg, False)
+            self.queued_tasks.append(active_row)
+
+    def move_queued_task(self, active_row, position):
+        if active_row not in self.queued_tasks:
+            return False
+
+        self.queued_tasks.remove(active_row)
+        self.queued_tasks.insert(position, active_row)
+        return True
+
+
+def _get_encoded_ffmpeg(input_file):
+    ffmpeg = Settings()
+    ffmpeg.input_file = input_file
+    ffmpeg.output_directory = '/tmp/'
+    return daemon_client.encode_ffmpeg(ffmpeg)
+
+
+class TestApplicationDaemon(unittest.TestCase):
+    """Tests the daemon's job API without a socket."""
+
+    def setUp(self):
+        self.encoder_queue = _EncoderQueue()
+        daemon_args = argparse.Namespace(socket='/tmp/daemon.sock', parallel=False, per_codec=False)
+        self.application_daemon = ApplicationDaemon(self.encoder_queue, ApplicationPreferences(), daemon_args)
+
+    def tearDown(self):
+        self.encoder_queue.job_store.close()
+
+    def _submit(self, *input_files):
+        return self.application_daemon.handle_request({
+            'command': 'submit',
+            'ffmpeg': [_get_encoded_ffmpeg(input_file) for input_file in input_files]
+        })
+
+    def _get_jobs_state(self):
+        jobs = self.application_daemon.handle_request({'command': 'list'})['jobs']
+        return [(job['input'], job['state']) for job in jobs]
+
+    def test_submit_and_list(self):
+        """Tests that submitted jobs are listed as queued in the order they were submitted."""
+        response = self._submit('/tmp/a.mkv', '/tmp/b.mkv')
+
+        self.assertTrue(response['ok'])
+        self.assertEqual(len(response['job_ids']), 2)
+        self.assertEqual(self._get_jobs_state(), [('/tmp/a.mkv', 'queued'), ('/tmp/b.mkv', 'queued')])
+
+    def test_list_include_settings(self):
+        """Tests that listed jobs can include their ffmpeg settings."""
+        self._submit('/tmp/a.mkv')
+
+        job = self.application_daemon.handle_request({'command': 'list', 'include_settings': True})['jobs'][0]
+
+        self.assertEqual(daemon_client.decode_ffmpeg(job['ffmpeg']).input_file, '/tmp/a.mkv')
+        self.assertFalse(job['is_chunked'])
+
+    def test_pause_resume_and_stop(self):
+        """Tests that jobs are paused, resumed, and stopped by their job IDs."""
+        first_job_id, second_job_id = self._submit('/tmp/a.mkv', '/tmp/b.mkv')['job_ids']
+        self.application_daemon._tasks[first_job_id].started = True
+
+        self.application_daemon.handle_request({'command': 'pause', 'job_id': first_job_id})
+        self.assertEqual(self._get_jobs_state()[0], ('/tmp/a.mkv', 'paused'))
+
+        self.application_daemon.handle_request({'command': 'resume', 'job_id': first_job_id})
+        self.assertEqual(self._get_jobs_state()[0], ('/tmp/a.mkv', 'running'))
+
+        self.assertTrue(self.application_daemon.handle_request({'command': 'stop', 'job_id': second_job_id})['ok'])
+        self.assertEqual(self._get_jobs_state()[1], ('/tmp/b.mkv', 'stopped'))
+        self.assertEqual(self.encoder_queue.job_store.get_unfinished_jobs()[0].job_id, first_job_id)
+
+        response = self.application_daemon.handle_request({'command': 'stop', 'job_id': second_job_id})
+        self.assertFalse(response['ok'])
+
+    def test_reprioritize(self):
+        """Tests that a queued job is moved to the front of the encoder queue."""
+        job_ids = self._submit('/tmp/a.mkv', '/tmp/b.mkv', '/tmp/c.mkv')['job_ids']
+
+        response = self.application_daemon.handle_request({'command': 'reprioritize',
+                                                           'job_id': job_ids[2],
+                                                           'position': 0})
+
+        self.assertTrue(response['ok'])
+        self.assertEqual([task.job_id for task in self.encoder_queue.queued_tasks],
+                         [job_ids[2], job_ids[0], job_ids[1]])
+
+    def test_invalid_requests(self):
+        """Tests that invalid requests get an error response instead of stopping the daemon."""
+        self.assertFalse(self.application_daemon.handle_request({'command': 'format_disk'})['ok'])
+        self.assertFalse(self.application_daemon.handle_request(['list'])['ok'])
+        self.assertFalse(self.application_daemon.handle_request({'command': 'pause', 'job_id': 123})['ok'])
+        self.assertFalse(self.application_daemon.handle_request({'command': 'pause'})['ok'])
+
+        for encoded_ffmpeg in ('bm90IGEgcGlja2xl', ''):  # Not a pickle, and an empty one.
+            self.assertFalse(self.application_daemon.handle_request({'command': 'submit',
+                                                                    'ffmpeg': [encoded_ffmpeg]})['ok'])
+
+    def test_set_parallel(self):
+        """Tests that parallel tasks are turned on in the encoder queue."""
+        self.application_daemon.handle_request({'command': 'set_parallel', 'enabled': True, 'per_codec': True})
+
+        self.assertTrue(self.encoder_queue.is_parallel_tasks_enabled)
+        self.assertTrue(self.encoder_queue.is_per_codec_parallel_tasks_enabled)
+
+    def test_events_client_disconnected(self):
+        """Tests that an events connection that failed while an event was sent is closed without an error."""
+        application_daemon = self.application_daemon
+
+        class _EventsFile(io.BytesIO):
+            def write(self, data):
+                if self.tell():
+                    raise BrokenPipeError()
+                return super().write(data)
+
+        class _ClosingFile:
+            def readline(self):
+                application_daemon._send_event({'event': 'test'})
+                return b''
+
+        events_file = _EventsFile()
+        application_daemon.stream_events(_ClosingFile(), events_file)
+
+        self.assertEqual(application_daemon._events_files, [])
+
+    def test_socket_permissions(self):
+        """Tests that only the daemon's user can connect to its socket, without changing the process's umask."""
+        umask = os.umask(0o022)
+        try:
+            with tempfile.TemporaryDirectory() as temp_directory:
+                socket_path = os.path.join(temp_directory, 'daemon.sock')
+                server = _DaemonServer(socket_path, _DaemonRequestHandler)
+
+                try:
+                    self.assertEqual(stat.S_IMODE(os.stat(socket_path).st_mode), 0o600)
+                    self.assertEqual(os.umask(0o022), 0o022)
+                finally:
+                    server.server_close()
+        finally:
+            os.umask(umask)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from render_watch.encoding import tuning_profile
+from render_watch.encoding.tuning_profile import TuningProfile
+from render_watch.helpers import autotune_helper
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class TestAutotuneHelper(unittest.TestCase):
+    """Tests the autotune's concurrency steps and how it finds the knee of a throughput curve."""
+
+    def test_concurrency_ladder(self):
+        """Tests that the steps end at the max tasks and get further apart above 16 tasks."""
+        self.assertEqual(autotune_helper.get_concurrency_ladder(1), [1])
+        self.assertEqual(autotune_helper.get_concurrency_ladder(5), [1, 2, 3, 4, 5])
+        self.assertEqual(autotune_helper.get_concurrency_ladder(64), [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64])
+        self.assertEqual(autotune_helper.get_concurrency_ladder(100)[-3:], [64, 96, 100])
+
+    def test_knee(self):
+        """Tests that the knee is the fewest tasks within the min gain of the best throughput."""
+        curve = [(1, 100.0), (2, 190.0), (4, 300.0), (6, 310.0), (8, 305.0)]
+
+        self.assertEqual(autotune_helper.get_knee(curve, 0.05), 4)
+        self.assertEqual(autotune_helper.get_knee(curve, 0.0), 6)
+        self.assertIsNone(autotune_helper.get_knee([], 0.05))
+
+    def test_climb_finished(self):
+        """Tests that the climb stops after two steps in a row that don't beat the best throughput by the min gain."""
+        curve = [(1, 100.0), (2, 190.0), (4, 300.0), (6, 310.0)]
+
+        self.assertFalse(autotune_helper.is_climb_finished(curve, 0.05))
+        self.assertTrue(autotune_helper.is_climb_finished(curve + [(8, 305.0)], 0.05))
+        self.assertFalse(autotune_helper.is_climb_finished(curve + [(8, 400.0)], 0.05))
+
+    def test_combined_curve(self):
+        """Tests that codecs are weighted the same no matter how fast they encode."""
+        combined_curve = autotune_helper.get_combined_curve([[(1, 1000.0), (2, 2000.0), (4, 2000.0)],
+                                                             [(1, 10.0), (2, 10.0)]])
+
+        self.assertEqual(combined_curve, [(1, 0.75), (2, 1.0)])
+
+
+class TestTuningProfile(unittest.TestCase):
+    """Tests saving and loading tuning profiles, and how their values replace the preferences'."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.profile_file_path = os.path.join(self.temp_directory.name, 'tuning', 'host.json')
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def test_save_and_load(self):
+        """Tests that a saved profile loads with the same values, including values the preferences don't allow."""
+        TuningProfile(24, {'x264': 32, 'vp9': 6}, {'resolution': '1080p'}).save(self.profile_file_path)
+
+        loaded_tuning_profile = TuningProfile.load(self.profile_file_path)
+
+        self.assertEqual(loaded_tuning_profile.parallel_tasks, 24)
+        self.assertEqual(loaded_tuning_profile.per_codec_parallel_tasks, {'x264': 32, 'vp9': 6})
+        self.assertEqual(loaded_tuning_profile.details, {'resolution': '1080p'})
+
+    def test_invalid_profiles(self):
+        """Tests that missing files and profiles with invalid values aren't loaded."""
+        self.assertIsNone(TuningProfile.load(self.profile_file_path))
+
+        for profile_contents in ('{"version": 1, "parallel_tasks": 0}',
+                                 '{"version": 1, "per_codec_parallel_tasks": {"x264": "4"}}',
+                                 '{"version": 2, "parallel_tasks": 4}',
+                                 'not json'):
+            os.makedirs(os.path.dirname(self.profile_file_path), exist_ok=True)
+            with open(self.profile_file_path, 'w') as profile_file:
+                profile_file.write(profile_contents)
+
+            with self.assertLogs(level='ERROR'):
+                self.assertIsNone(TuningProfile.load(self.profile_file_path))
+
+    def test_preferences_fallback(self):
+        """Tests that the preferences' values are used when there's no profile or it doesn't have a value."""
+        application_preferences = ApplicationPreferences()
+        application_preferences.parallel_tasks = '4'
+        application_preferences.per_codec_parallel_tasks['x265'] = '3'
+
+        self.assertEqual(tuning_profile.get_parallel_tasks(application_preferences), 4)
+        self.assertEqual(tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x265'), 3)
+
+        application_preferences.tuning_profile = TuningProfile(per_codec_parallel_tasks={'x264': 20})
+
+        self.assertEqual(tuning_profile.get_parallel_tasks(application_preferences), 4)
+        self.assertEqual(tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x264'), 20)
+        self.assertEqual(tuning_profile.get_per_codec_parallel_tasks(application_preferences, 'x265'), 3)
+
+    def test_host_profile_preference(self):
+        """Tests that the host's profile is only used while the preferences' Use Tuned Values option is on."""
+        TuningProfile(24).save(self.profile_file_path)
+        application_preferences = ApplicationPreferences()
+
+        with mock.patch.object(TuningProfile, 'get_host_profile_path', return_value=self.profile_file_path):
+            self.assertEqual(tuning_profile.get_host_profile(application_preferences).parallel_tasks, 24)
+
+            application_preferences.is_tuning_profile_enabled = False
+
+            self.assertIsNone(tuning_profile.get_host_profile(application_preferences))
@@ -0,0 +1,79 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from render_watch.helpers import benchmark_suite_helper, settings_file_helper
+
+
+class TestBenchmarkSuiteHelper(unittest.TestCase):
+    """Tests the benchmark suite's sources, settings, and result comparisons."""
+
+    @staticmethod
+    def _get_results(wall_times, failed_case_name=None):
+        return {
+            'cases': [{'name': case_name, 'wall_time': wall_time, 'failed_tasks': int(case_name == failed_case_name)}
+                      for case_name, wall_time in wall_times.items()]
+        }
+
+    def test_codec_settings_are_valid(self):
+        """Tests that every codec's fixed preset can be loaded like a settings file."""
+        for codec in benchmark_suite_helper.CODEC_SETTINGS:
+            ffmpeg_template = settings_file_helper.get_ffmpeg_template(benchmark_suite_helper.get_ffmpeg_settings(codec))
+
+            self.assertEqual(ffmpeg_template.video_settings.codec_name,
+                             settings_file_helper.VIDEO_CODECS[codec]().codec_name)
+            self.assertIsNotNone(ffmpeg_template.audio_settings)
+
+    def test_source_args(self):
+        """Tests that sources are generated from the lavfi pattern at the resolution's size and the given length."""
+        source_args = benchmark_suite_helper.get_source_args('mandelbrot', '2160p', 30, 'source.mkv')
+
+        self.assertIn('mandelbrot=size=3840x2160:rate=30', source_args)
+        self.assertEqual(source_args[source_args.index('-t') + 1], '30')
+        self.assertEqual(source_args[-1], 'source.mkv')
+
+    def test_directory_size(self):
+        """Tests that files in sub-directories are counted."""
+        with tempfile.TemporaryDirectory() as temp_directory:
+            os.makedirs(os.path.join(temp_directory, 'chunks'))
+
+            for file_path, file_size in (('a', 100), (os.path.join('chunks', 'b'), 50)):
+                with open(os.path.join(temp_directory, file_path), 'wb') as temp_file:
+                    temp_file.write(b'0' * file_size)
+
+            self.assertEqual(benchmark_suite_helper.get_directory_size(temp_directory), 150)
+
+    def test_compare_results(self):
+        """Tests that only cases that got slower than the max regression are regressions."""
+        baseline_results = self._get_results({'480p/x264/standard': 10.0,
+                                              '480p/x264/parallel': 10.0,
+                                              '480p/x264/chunks': 10.0})
+        results = self._get_results({'480p/x264/standard': 10.5,
+                                     '480p/x264/parallel': 12.0,
+                                     '480p/x264/chunks': 20.0,
+                                     '480p/vp9/standard': 5.0},
+                                    failed_case_name='480p/x264/chunks')
+
+        comparisons, regressions = benchmark_suite_helper.compare_results(baseline_results, results, 0.1)
+
+        self.assertEqual([comparison[0] for comparison in comparisons], ['480p/x264/standard', '480p/x264/parallel'])
+        self.assertAlmostEqual(comparisons[1][3], 0.2)
+        self.assertEqual(regressions, ['480p/x264/parallel'])
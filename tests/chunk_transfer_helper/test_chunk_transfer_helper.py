@@ -0,0 +1,83 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import io
+import os
+import tempfile
+import unittest
+
+from render_watch.helpers import chunk_transfer_helper
+
+
+class TestChunkTransferHelper(unittest.TestCase):
+    """Tests the helpers that chunk coordinators and workers send files with."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def test_parse_address(self):
+        """Tests that addresses are split into a host and port, with the default port when it's left out."""
+        self.assertEqual(chunk_transfer_helper.parse_address('192.168.1.10:8000'), ('192.168.1.10', 8000))
+        self.assertEqual(chunk_transfer_helper.parse_address('render-box'),
+                         ('render-box', chunk_transfer_helper.DEFAULT_PORT))
+        self.assertEqual(chunk_transfer_helper.parse_address(':8000'), ('localhost', 8000))
+
+        with self.assertRaises(ValueError):
+            chunk_transfer_helper.parse_address('render-box:http')
+
+    def test_send_and_receive_file(self):
+        """Tests that a file is received with the same contents that were sent."""
+        input_file_path = os.path.join(self.temp_directory.name, 'chunk.mp4')
+        output_file_path = os.path.join(self.temp_directory.name, 'received.mp4')
+        contents = os.urandom(chunk_transfer_helper.TRANSFER_BUFFER_SIZE + 123)
+        with open(input_file_path, 'wb') as input_file:
+            input_file.write(contents)
+
+        socket_file = io.BytesIO()
+        chunk_transfer_helper.send_file(socket_file, input_file_path)
+        socket_file.write(b'{"event": "next"}\n')
+        socket_file.seek(0)
+        chunk_transfer_helper.receive_file(socket_file, len(contents), output_file_path)
+
+        with open(output_file_path, 'rb') as output_file:
+            self.assertEqual(output_file.read(), contents)
+        self.assertEqual(socket_file.readline(), b'{"event": "next"}\n')
+
+    def test_receive_file_connection_closed(self):
+        """Tests that a transfer cut short doesn't leave a file at the output path."""
+        output_file_path = os.path.join(self.temp_directory.name, 'received.mp4')
+
+        with self.assertRaises(ConnectionError):
+            chunk_transfer_helper.receive_file(io.BytesIO(b'partial'), 100, output_file_path)
+
+        self.assertEqual(os.listdir(self.temp_directory.name), [])
+
+    def test_input_cache_file_name(self):
+        """Tests that streamed inputs are cached by path and size and keep their extension."""
+        cache_file_name = chunk_transfer_helper.get_input_cache_file_name('/videos/input.mkv', 1000)
+
+        self.assertTrue(cache_file_name.endswith('.mkv'))
+        self.assertEqual(cache_file_name, chunk_transfer_helper.get_input_cache_file_name('/videos/input.mkv', 1000))
+        self.assertNotEqual(cache_file_name, chunk_transfer_helper.get_input_cache_file_name('/videos/input.mkv', 2000))
+
+
+if __name__ == '__main__':
+    unittest.main()
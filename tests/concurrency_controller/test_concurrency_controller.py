@@ -0,0 +1,188 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import threading
+import unittest
+
+from render_watch.encoding.concurrency_controller import ConcurrencyController, ControllerSample, get_pixels_per_frame
+from render_watch.ffmpeg.settings import Settings
+
+
+class _ActiveRow:
+    def __init__(self, input_file):
+        self.ffmpeg = Settings()
+        self.ffmpeg.input_file = input_file
+        self.stopped = False
+
+
+class TestConcurrencyController(unittest.TestCase):
+    """Tests how the concurrency controller changes its slots and admits and throttles encodes."""
+
+    def setUp(self):
+        self.concurrency_controller = ConcurrencyController(4, 8)
+
+    def _decide(self, throughput, cpu_utilization=0.5, memory_available=0.5, demand=10):
+        return self.concurrency_controller._decide(ControllerSample(throughput,
+                                                                    cpu_utilization,
+                                                                    memory_available,
+                                                                    demand))
+
+    def _probe(self, throughput):
+        self._decide(throughput)
+        decision = self._decide(throughput)
+        self.concurrency_controller._set_number_of_slots(decision[0])
+        self._decide(throughput)  # Settling interval
+
+        return decision
+
+    def test_probe_kept_on_gain(self):
+        """Tests that a slot is added while encodes wait, and another one when the first one paid off."""
+        self.assertEqual(self._probe(100.0), (5, 'probe'))
+
+        self.assertIsNone(self._decide(120.0))
+        self.assertEqual(self._decide(120.0), (6, 'probe'))
+
+    def test_probe_reverted_without_gain(self):
+        """Tests that a slot that didn't make the throughput higher is taken away, and no probe follows right away."""
+        self._probe(100.0)
+
+        self.assertIsNone(self._decide(102.0))
+        self.assertEqual(self._decide(102.0), (4, 'no throughput gain'))
+
+        self.concurrency_controller._set_number_of_slots(4)
+        for _ in range(ConcurrencyController.PROBE_BACKOFF_INTERVALS - 2):
+            self.assertIsNone(self._decide(100.0))
+
+    def test_throughput_drop(self):
+        """Tests that the slots are cut by the decrease factor when a probe made the throughput drop."""
+        self._probe(100.0)
+
+        self._decide(80.0)
+        self.assertEqual(self._decide(80.0), (3, 'throughput dropped'))
+
+    def test_hysteresis(self):
+        """Tests that a probe is judged on the average of the hysteresis intervals, not on one spike."""
+        self._probe(100.0)
+
+        self._decide(80.0)
+        self.assertEqual(self._decide(130.0), (6, 'probe'))
+
+    def test_no_probe(self):
+        """Tests that no slot is added when the CPU is saturated, memory is low, or nothing is waiting."""
+        for sample_values in ({'cpu_utilization': 0.99}, {'memory_available': 0.15}, {'demand': 4}):
+            self.setUp()
+
+            self._decide(100.0, **sample_values)
+            self.assertIsNone(self._decide(100.0, **sample_values))
+
+    def test_memory_pressure(self):
+        """Tests that the slots are cut when memory runs low, and only again once the encodes over them finished."""
+        active_rows = [_ActiveRow('input_' + str(index)) for index in range(4)]
+        for active_row in active_rows:
+            self.concurrency_controller.admit_task(active_row)
+
+        decision = self._decide(100.0, memory_available=0.05)
+        self.assertEqual(decision, (3, 'memory pressure'))
+        self.concurrency_controller._set_number_of_slots(decision[0], is_throttling=False)
+
+        for _ in range(3):
+            self.assertIsNone(self._decide(100.0, memory_available=0.05))
+
+        self.concurrency_controller.task_finished(active_rows[0])
+
+        self.assertEqual(self._decide(100.0, memory_available=0.05), (2, 'memory pressure'))
+
+    def test_memory_pressure_admission(self):
+        """Tests that slots cut for memory pressure don't throttle running encodes but keep new ones waiting."""
+        active_rows = [_ActiveRow('input_' + str(index)) for index in range(5)]
+        for active_row in active_rows[:4]:
+            self.concurrency_controller.admit_task(active_row)
+
+        self.concurrency_controller._set_number_of_slots(2, is_throttling=False)
+
+        self.assertFalse(any(self.concurrency_controller.is_task_throttled(active_row)
+                             for active_row in active_rows[:4]))
+
+        admitted_event = threading.Event()
+
+        def admit_task():
+            self.concurrency_controller.admit_task(active_rows[4])
+            admitted_event.set()
+
+        threading.Thread(target=admit_task, daemon=True).start()
+
+        for active_row in active_rows[:2]:
+            self.concurrency_controller.task_finished(active_row)
+
+        self.assertFalse(admitted_event.wait(0.1))
+        self.assertFalse(self.concurrency_controller.is_task_throttled(active_rows[3]))
+
+        self.concurrency_controller.task_finished(active_rows[2])
+
+        self.assertTrue(admitted_event.wait(5))
+
+    def test_throttling(self):
+        """Tests that the newest encodes are throttled when the slots are cut, and resumed before new encodes start."""
+        active_rows = [_ActiveRow('input_' + str(index)) for index in range(5)]
+        for active_row in active_rows[:4]:
+            self.concurrency_controller.admit_task(active_row)
+
+        admitted_event = threading.Event()
+
+        def admit_task():
+            self.concurrency_controller.admit_task(active_rows[4])
+            admitted_event.set()
+
+        threading.Thread(target=admit_task, daemon=True).start()
+        self.assertFalse(admitted_event.wait(0.1))
+
+        self.concurrency_controller._set_number_of_slots(2)
+
+        self.assertEqual([self.concurrency_controller.is_task_throttled(active_row) for active_row in active_rows[:4]],
+                         [False, False, True, True])
+
+        self.concurrency_controller.task_finished(active_rows[0])
+
+        self.assertFalse(self.concurrency_controller.is_task_throttled(active_rows[2]))
+        self.assertTrue(self.concurrency_controller.is_task_throttled(active_rows[3]))
+        self.assertFalse(admitted_event.wait(0.1))
+
+        self.concurrency_controller._set_number_of_slots(4)
+
+        self.assertTrue(admitted_event.wait(5))
+        self.assertFalse(self.concurrency_controller.is_task_throttled(active_rows[3]))
+
+    def test_throughput_sample(self):
+        """Tests that throughput counts each encode's new frames at its resolution, including finished encodes."""
+        active_rows = [_ActiveRow('input_0'), _ActiveRow('input_1')]
+        active_rows[0].ffmpeg.picture_settings.scale = (1280, 720)
+
+        for active_row in active_rows:
+            self.concurrency_controller.admit_task(active_row)
+        self.concurrency_controller.set_task_frame(active_rows[0], 100)
+        self.concurrency_controller.set_task_frame(active_rows[1], 10)
+        self.concurrency_controller.task_finished(active_rows[1])
+
+        sample = self.concurrency_controller._get_sample(None, None, 10.0)
+
+        self.assertEqual(sample.throughput, (100 * 1280 * 720 + 10 * get_pixels_per_frame(active_rows[1].ffmpeg)) / 10)
+        self.assertEqual(sample.demand, 1)
+
+        self.concurrency_controller.set_task_frame(active_rows[0], 150)
+
+        self.assertEqual(self.concurrency_controller._get_sample(None, None, 10.0).throughput, 50 * 1280 * 720 / 10)
@@ -0,0 +1,65 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import copy
+import unittest
+
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.x264 import X264
+
+
+class TestCopyOnWriteSettings(unittest.TestCase):
+    """Tests that codec settings copies share their args until one of them changes."""
+
+    def test_copy_shares_args(self):
+        """Tests that a copy points at the same args as the original."""
+        x264 = X264()
+        x264.keyint = 100
+        x264_copy = x264.copy()
+        self.assertIs(x264_copy.ffmpeg_args, x264.ffmpeg_args)
+        self.assertEqual(x264_copy.keyint, 100)
+        self.assertIsInstance(x264_copy, X264)
+
+    def test_copy_on_write(self):
+        """Tests that changing a copy or the original doesn't change the other."""
+        x264 = X264()
+        x264_copy = x264.copy()
+        x264_copy.crf = 30
+        x264_copy.keyint = 60
+        self.assertEqual(x264.crf, 20.0)
+        self.assertEqual(x264.keyint, 250)
+        self.assertEqual(x264_copy.crf, 30.0)
+        self.assertEqual(x264_copy.keyint, 60)
+
+        x264.advanced_enabled = True
+        x264.bitrate = 2000
+        self.assertFalse(x264_copy.advanced_enabled)
+        self.assertIsNone(x264_copy.bitrate)
+        self.assertEqual(x264_copy.crf, 30.0)
+
+    def test_deepcopy(self):
+        """Tests that deepcopy makes a copy on write copy."""
+        aac = Aac()
+        aac_copy = copy.deepcopy(aac)
+        aac_copy.bitrate = 96
+        self.assertEqual(aac_copy.bitrate, 96)
+        self.assertNotEqual(aac.bitrate, 96)
+
+
+if __name__ == '__main__':
+    unittest.main()
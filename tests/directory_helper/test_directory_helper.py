@@ -0,0 +1,77 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from types import SimpleNamespace
+
+from render_watch.helpers import directory_helper
+
+
+def _create_ffmpeg(input_file, output_directory, filename):
+    return SimpleNamespace(input_file=input_file,
+                           output_directory=output_directory,
+                           filename=filename,
+                           output_container='.mkv')
+
+
+class TestDirectoryHelper(unittest.TestCase):
+    """Tests fixing output file names for a batch of tasks."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.output_directory = self.temp_directory.name + '/'
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def test_batch_name_collisions(self):
+        """Tests that tasks in the same batch and already running tasks get unique output file names."""
+        application_preferences = SimpleNamespace(is_overwrite_outputs_enabled=True)
+        ffmpeg_batch = [_create_ffmpeg('/in/a.mp4', self.output_directory, 'a') for _ in range(3)]
+        taken_output_file_paths = {self.output_directory + 'a.mkv'}
+
+        directory_helper.fix_same_name_occurences_in_batch(ffmpeg_batch,
+                                                           taken_output_file_paths,
+                                                           application_preferences)
+        self.assertListEqual([ffmpeg.filename for ffmpeg in ffmpeg_batch], ['a_0', 'a_1', 'a_2'])
+        self.assertEqual(len(taken_output_file_paths), 4)
+
+    def test_batch_existing_and_input_files(self):
+        """Tests that existing files are only avoided when overwriting is disabled, and inputs are never overwritten."""
+        open(os.path.join(self.temp_directory.name, 'b.mkv'), 'w').close()
+        input_file = self.output_directory + 'c.mkv'
+
+        overwrite_batch = [_create_ffmpeg('/in/b.mp4', self.output_directory, 'b'),
+                           _create_ffmpeg(input_file, self.output_directory, 'c')]
+        directory_helper.fix_same_name_occurences_in_batch(overwrite_batch,
+                                                           set(),
+                                                           SimpleNamespace(is_overwrite_outputs_enabled=True))
+        self.assertListEqual([ffmpeg.filename for ffmpeg in overwrite_batch], ['b', 'c_0'])
+
+        no_overwrite_batch = [_create_ffmpeg('/in/b.mp4', self.output_directory, 'b')]
+        directory_helper.fix_same_name_occurences_in_batch(no_overwrite_batch,
+                                                           set(),
+                                                           SimpleNamespace(is_overwrite_outputs_enabled=False))
+        self.assertEqual(no_overwrite_batch[0].filename, 'b_0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from render_watch.encoding import daemon_client
+from render_watch.encoding.chunk_worker import ChunkWorker, InputCache
+from render_watch.encoding.distributed_encode_task import DistributedEncodeTask
+from render_watch.ffmpeg.media_info import MediaInfo
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.x264 import X264
+from render_watch.helpers import fake_ffmpeg
+
+
+TESTS_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(TESTS_DIRECTORY), 'src')
+FAKE_FFMPEG_PATH = os.path.join(TESTS_DIRECTORY, 'fake_ffmpeg', 'bin', 'ffmpeg')
+FAKE_FFMPEG_INIT_ARGS = [FAKE_FFMPEG_PATH, '-hide_banner', '-stats', '-y']
+TIMEOUT_IN_SECONDS = 30
+
+
+class _ChunkRow:
+    """Chunk row that only keeps the state the coordinator sets."""
+
+    def __init__(self, ffmpeg):
+        self.ffmpeg = ffmpeg
+        self.progress = 0.0
+        self.speed = None
+        self.bitrate = None
+        self.file_size = None
+        self.time = None
+        self.current_time = None
+        self.paused = False
+        self.stopped = False
+        self.failed = False
+        self.finished_event = threading.Event()
+
+    def set_start_state(self):
+        pass
+
+    def set_finished_state(self):
+        self.finished_event.set()
+
+
+class _EncoderQueue:
+    """Encoder queue that records the chunks the coordinator runs locally instead of encoding them."""
+
+    def __init__(self):
+        self.local_chunk_rows = []
+
+    def add_to_running_tasks(self, chunk_row):
+        pass
+
+    def remove_from_running_tasks(self, chunk_row):
+        pass
+
+    def run_encode_task(self, chunk_row):
+        self.local_chunk_rows.append(chunk_row)
+        chunk_row.set_finished_state()
+
+
+class TestDistributedEncodeTask(unittest.TestCase):
+    """Tests encoding chunks on chunk workers that connect to a coordinator on localhost, with the fake ffmpeg."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_directory.cleanup)
+        self.input_file_path = os.path.join(self.temp_directory.name, 'input.mkv')
+        self.output_directory = os.path.join(self.temp_directory.name, 'output', '')
+
+        os.makedirs(self.output_directory)
+        with open(self.input_file_path, 'w') as input_file:
+            input_file.write('duration=2\n')
+
+        python_path = os.pathsep.join(filter(None, (SOURCE_DIRECTORY, os.environ.get('PYTHONPATH'))))
+        for patcher in (mock.patch.dict(os.environ, {'PYTHONPATH': python_path,
+                                                     fake_ffmpeg.SPEED_ENV: '100',
+                                                     fake_ffmpeg.STATS_INTERVAL_ENV: '0.01',
+                                                     fake_ffmpeg.FAIL_ENV: 'failing_worker'}),
+                        mock.patch.object(Settings, 'FFMPEG_INIT_ARGS', FAKE_FFMPEG_INIT_ARGS),
+                        mock.patch.object(DistributedEncodeTask, 'RETRY_DELAY_IN_SECONDS', 0.01)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.encoder_queue = _EncoderQueue()
+        self.distributed_encode_task = DistributedEncodeTask(self.encoder_queue, '127.0.0.1:0')
+        self.addCleanup(self.distributed_encode_task.set_stop_state)
+        self.coordinator_address = '127.0.0.1:' + str(self.distributed_encode_task.address[1])
+
+    def _start_chunk_worker(self, worker_name, stream_inputs=False):
+        # Encodes that are written into the failing worker's directory match the fake ffmpeg's fail pattern.
+        work_directory = os.path.join(self.temp_directory.name, worker_name)
+        chunk_worker = ChunkWorker(self.coordinator_address,
+                                   worker_name,
+                                   work_directory,
+                                   InputCache(os.path.join(work_directory, 'inputs')),
+                                   stream_inputs=stream_inputs)
+        worker_thread = threading.Thread(target=chunk_worker.run, daemon=True)
+        worker_thread.start()
+
+        self.addCleanup(worker_thread.join, TIMEOUT_IN_SECONDS)
+        self.addCleanup(chunk_worker.stop)
+
+    def _wait_for_worker_names(self, worker_names):
+        end_time = time.monotonic() + TIMEOUT_IN_SECONDS
+
+        while self.distributed_encode_task.get_worker_names() != worker_names:
+            self.assertLess(time.monotonic(), end_time, 'chunk workers didn\'t connect')
+            time.sleep(0.01)
+
+    def _add_chunk_row(self, chunk_number):
+        ffmpeg = Settings()
+        ffmpeg.input_file = self.input_file_path
+        ffmpeg.filename = 'input_' + str(chunk_number)
+        ffmpeg.temp_file_name = 'input'
+        ffmpeg.output_directory = self.output_directory
+        ffmpeg.output_container = '.mp4'
+        ffmpeg.media_info = MediaInfo(duration=2.0)
+        ffmpeg.no_audio = True
+        ffmpeg.video_settings = X264()
+
+        chunk_row = _ChunkRow(ffmpeg)
+        self.distributed_encode_task.add_task(chunk_row)
+        return chunk_row
+
+    def _assert_chunk_rows_finished_on_workers(self, chunk_rows):
+        for chunk_row in chunk_rows:
+            self.assertTrue(chunk_row.finished_event.wait(TIMEOUT_IN_SECONDS), 'chunk didn\'t finish')
+            self.assertFalse(chunk_row.failed)
+            self.assertTrue(os.path.isfile(self.output_directory + chunk_row.ffmpeg.filename + '.mp4'))
+
+        self.assertEqual(self.encoder_queue.local_chunk_rows, [])
+
+    def test_chunk_failed_on_worker_is_retried(self):
+        """Tests that chunks that fail on one worker are encoded by the other worker."""
+        self._start_chunk_worker('failing_worker')
+        self._start_chunk_worker('streaming_worker', stream_inputs=True)
+        self._wait_for_worker_names({'failing_worker', 'streaming_worker'})
+
+        with self.assertLogs(level='WARNING') as logs:
+            chunk_rows = [self._add_chunk_row(chunk_number) for chunk_number in range(1, 5)]
+            self._assert_chunk_rows_finished_on_workers(chunk_rows)
+
+        self.assertTrue(any('CHUNK FAILED ON WORKER failing_worker' in line for line in logs.output))
+
+    def test_invalid_worker_message(self):
+        """Tests that a worker that sends an invalid message is disconnected and its chunk is retried."""
+        host, port = self.distributed_encode_task.address
+
+        with socket.create_connection((host, port)) as worker_socket, worker_socket.makefile('rwb') as socket_file:
+            daemon_client.write_message(socket_file, {'command': 'register', 'name': 'broken_worker'})
+            self.assertTrue(daemon_client.read_message(socket_file)['ok'])
+
+            chunk_row = self._add_chunk_row(1)
+            self.assertEqual(daemon_client.read_message(socket_file)['command'], 'encode')
+
+            with self.assertLogs(level='ERROR'):
+                socket_file.write(b'not json\n')
+                socket_file.flush()
+                self.assertEqual(socket_file.readline(), b'')
+
+        self._start_chunk_worker('streaming_worker', stream_inputs=True)
+        self._assert_chunk_rows_finished_on_workers([chunk_row])
+
+    def test_chunks_encoded_locally_without_workers(self):
+        """Tests that chunks are encoded locally when no worker is connected, and after the last one disconnected."""
+        host, port = self.distributed_encode_task.address
+
+        with mock.patch.object(DistributedEncodeTask, 'NO_WORKERS_TIMEOUT_IN_SECONDS', 0.05):
+            with self.assertLogs(level='ERROR'):
+                with socket.create_connection((host, port)) as worker_socket, \
+                        worker_socket.makefile('rwb') as socket_file:
+                    daemon_client.write_message(socket_file, {'command': 'register', 'name': 'leaving_worker'})
+                    self.assertTrue(daemon_client.read_message(socket_file)['ok'])
+
+                    chunk_row = self._add_chunk_row(1)
+                    self.assertEqual(daemon_client.read_message(socket_file)['command'], 'encode')
+
+                self.assertTrue(chunk_row.finished_event.wait(TIMEOUT_IN_SECONDS), 'chunk didn\'t finish')
+
+            other_chunk_row = self._add_chunk_row(2)
+            self.assertTrue(other_chunk_row.finished_event.wait(TIMEOUT_IN_SECONDS), 'chunk didn\'t finish')
+
+        self.assertEqual(self.encoder_queue.local_chunk_rows, [chunk_row, other_chunk_row])
+
+    def test_token_required_off_loopback(self):
+        """Tests that the coordinator only listens on addresses other than loopback when it has a token."""
+        with self.assertRaises(ValueError):
+            DistributedEncodeTask(self.encoder_queue, '0.0.0.0:0')
+
+        distributed_encode_task = DistributedEncodeTask(self.encoder_queue, '0.0.0.0:0', 'token')
+        distributed_encode_task.set_stop_state()
@@ -0,0 +1,135 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import queue
+import unittest
+
+from render_watch.encoding.encoder_metrics import EncoderMetrics, _Histogram
+from render_watch.encoding.headless_task import HeadlessTask
+from render_watch.ffmpeg.settings import Settings
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+class _EncodeTask:
+    def __init__(self):
+        self.tasks_queue = queue.Queue()
+
+    def get_queues(self):
+        return (self.tasks_queue,)
+
+
+class _EncoderQueue:
+    """Keeps the running tasks in a list and has one encode task."""
+
+    def __init__(self):
+        self.is_parallel_tasks_enabled = True
+        self.is_per_codec_parallel_tasks_enabled = False
+        self.distributed_encode_task = None
+        self.running_tasks = []
+        self.standard_encode_task = _EncodeTask()
+
+    def get_running_tasks(self):
+        return list(self.running_tasks)
+
+    def get_encode_tasks(self):
+        return {'standard': self.standard_encode_task}
+
+
+def _get_task(input_file, filename):
+    ffmpeg = Settings()
+    ffmpeg.input_file = input_file
+    ffmpeg.output_directory = '/tmp/'
+    ffmpeg.filename = filename
+    ffmpeg.output_container = '.mkv'
+    return HeadlessTask(ffmpeg, ApplicationPreferences())
+
+
+class TestEncoderMetrics(unittest.TestCase):
+    """Tests the encoder's metrics in the Prometheus text format."""
+
+    def setUp(self):
+        self.encoder_queue = _EncoderQueue()
+        self.encoder_metrics = EncoderMetrics(self.encoder_queue, ApplicationPreferences())
+
+    def _get_samples(self):
+        samples = {}
+        for line in self.encoder_metrics.get_text().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_histogram(self):
+        """Tests that histogram buckets count every value that's less than or equal to them."""
+        histogram = _Histogram((1, 5))
+        histogram.observe(0.5)
+        histogram.observe(3)
+        histogram.observe(10)
+
+        self.assertEqual(histogram.get_lines('wait'), ['wait_bucket{le="1"} 1',
+                                                       'wait_bucket{le="5"} 2',
+                                                       'wait_bucket{le="+Inf"} 3',
+                                                       'wait_sum 13.5',
+                                                       'wait_count 3'])
+
+    def test_running_task_metrics(self):
+        """Tests that running tasks are labelled by their input and output and added to the totals."""
+        task = _get_task('/tmp/in "1".mkv', 'out')
+        task.speed = 1.5
+        task.file_size = 2048
+        self.encoder_queue.running_tasks.append(task)
+        self.encoder_metrics.set_task_fps(task, 48.0)
+        self.encoder_metrics.process_started()
+
+        samples = self._get_samples()
+        labels = '{input="/tmp/in \\"1\\".mkv",output="out.mkv"}'
+
+        self.assertEqual(samples['render_watch_task_speed' + labels], 1.5)
+        self.assertEqual(samples['render_watch_task_bytes_written' + labels], 2048.0)
+        self.assertEqual(samples['render_watch_task_fps' + labels], 48.0)
+        self.assertEqual(samples['render_watch_running_tasks'], 1.0)
+        self.assertEqual(samples['render_watch_fps'], 48.0)
+        self.assertEqual(samples['render_watch_slots'], 2.0)
+        self.assertEqual(samples['render_watch_slot_utilization'], 0.5)
+        self.assertEqual(samples['render_watch_ffmpeg_processes'], 1.0)
+
+    def test_queue_depth_and_task_results(self):
+        """Tests that queued tasks are counted per encode task and ended tasks are counted by their result."""
+        finished_task = _get_task('/tmp/a.mkv', 'a')
+        failed_task = _get_task('/tmp/b.mkv', 'b')
+        queued_task = _get_task('/tmp/c.mkv', 'c')
+        self.encoder_queue.standard_encode_task.tasks_queue.put(queued_task)
+
+        for task in (finished_task, failed_task, queued_task):
+            self.encoder_metrics.task_queued(task)
+        for task in (finished_task, failed_task):
+            self.encoder_metrics.task_started(task)
+
+        finished_task.file_size = 1000
+        failed_task.failed = True
+        self.encoder_metrics.task_finished(finished_task)
+        self.encoder_metrics.task_finished(failed_task)
+
+        samples = self._get_samples()
+
+        self.assertEqual(samples['render_watch_queue_depth{encode_task="standard"}'], 1.0)
+        self.assertEqual(samples['render_watch_tasks_total{result="finished"}'], 1.0)
+        self.assertEqual(samples['render_watch_tasks_total{result="failed"}'], 1.0)
+        self.assertEqual(samples['render_watch_bytes_written_total'], 1000.0)
+        self.assertEqual(samples['render_watch_task_wait_seconds_count'], 2.0)
+        self.assertEqual(samples['render_watch_task_run_seconds_count'], 2.0)
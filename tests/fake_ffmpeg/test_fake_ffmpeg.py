@@ -0,0 +1,154 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from render_watch.helpers import fake_ffmpeg, segment_helper
+
+
+FAKE_BINARIES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin')
+
+class TestFakeFfmpeg(unittest.TestCase):
+    """Tests the fake ffmpeg and ffprobe used for load testing."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.input_file_path = os.path.join(self.temp_directory.name, 'input.mkv')
+
+        with open(self.input_file_path, 'w') as input_file:
+            input_file.write('duration=300\n')
+
+        environ_patcher = mock.patch.dict(os.environ, {fake_ffmpeg.SPEED_ENV: '100000'})
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def _run_ffmpeg(self, args):
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            return_code = fake_ffmpeg.run_ffmpeg(args)
+
+        return return_code, stderr.getvalue()
+
+    def test_encode_duration_honours_trim_args(self):
+        """Tests that -ss before the input and -to after it limit the encode like they do for ffmpeg."""
+        fake_args = fake_ffmpeg.FakeArgs(['-y', '-ss', '100', '-i', self.input_file_path, '-to', '00:01:30.5',
+                                          'output.mkv'])
+        self.assertEqual(fake_ffmpeg.get_encode_duration(fake_args), 90.5)
+
+        fake_args = fake_ffmpeg.FakeArgs(['-y', '-ss', '250', '-i', self.input_file_path, '-to', '90', 'output.mkv'])
+        self.assertEqual(fake_ffmpeg.get_encode_duration(fake_args), 50)
+
+        fake_args = fake_ffmpeg.FakeArgs(['-y', '-i', self.input_file_path, '-vframes', '48', '-f', 'null', '-'])
+        self.assertEqual(fake_ffmpeg.get_encode_duration(fake_args), 2)
+
+    def test_encode_prints_stats_and_writes_output(self):
+        """Tests that an encode ends with a stats line at the end of the input and leaves a probeable output."""
+        output_file_path = os.path.join(self.temp_directory.name, 'output.mkv')
+        return_code, stderr = self._run_ffmpeg(['-hide_banner', '-stats', '-y', '-ss', '60', '-i',
+                                                self.input_file_path, '-c:v', 'libx264', output_file_path])
+
+        self.assertEqual(return_code, 0)
+        self.assertIn('time=00:04:00.00 bitrate=4000.0kbits/s speed=100000.00x\n', stderr)
+
+        fake_args = fake_ffmpeg.FakeArgs(['-i', output_file_path])
+        self.assertEqual(fake_ffmpeg.get_input_duration(*fake_args.inputs[0]), 240)
+        self.assertEqual(os.path.getsize(output_file_path), fake_ffmpeg.PLACEHOLDER_SIZE)
+
+    def test_failing_encodes(self):
+        """Tests that encodes matching the fail pattern fail halfway through and that missing inputs fail."""
+        output_file_path = os.path.join(self.temp_directory.name, 'output.mkv')
+
+        with mock.patch.dict(os.environ, {fake_ffmpeg.FAIL_ENV: 'input'}):
+            return_code, stderr = self._run_ffmpeg(['-y', '-i', self.input_file_path, output_file_path])
+
+        self.assertEqual(return_code, 1)
+        self.assertIn('time=00:02:30.00', stderr)
+        self.assertTrue(stderr.endswith('Conversion failed!\n'))
+
+        return_code, stderr = self._run_ffmpeg(['-y', '-i', 'missing.mkv', output_file_path])
+        self.assertEqual(return_code, 1)
+
+    def test_segments_are_listed_like_the_segment_muxer(self):
+        """Tests that the segments written for a resumable encode are found by the segment helper."""
+        segments_directory = os.path.join(self.temp_directory.name, 'segments')
+        os.makedirs(segments_directory)
+
+        fake_args = ['-y', '-ss', '30', '-i', self.input_file_path,
+                     '-f', 'segment', '-segment_time', '60', '-segment_start_number', '0',
+                     '-segment_list_type', 'csv',
+                     '-segment_list', os.path.join(segments_directory, segment_helper.SEGMENT_LIST_FILE_NAME_FORMAT % 0),
+                     os.path.join(segments_directory, segment_helper.SEGMENT_FILE_NAME_FORMAT)]
+        return_code, _ = self._run_ffmpeg(fake_args)
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(segment_helper.get_completed_segments(segments_directory), 5)
+        self.assertEqual(len(os.listdir(segments_directory)), 6)
+
+    def test_ffprobe_output(self):
+        """Tests that the fake ffprobe reports the input's duration."""
+        stdout = io.StringIO()
+
+        with contextlib.redirect_stdout(stdout):
+            return_code = fake_ffmpeg.run_ffprobe(['-hide_banner', '-show_entries', 'format=duration',
+                                                   self.input_file_path])
+
+        self.assertEqual(return_code, 0)
+        self.assertIn('codec_type=video\n', stdout.getvalue())
+        self.assertIn('[FORMAT]\nduration=300.000000\n[/FORMAT]', stdout.getvalue())
+
+    def test_concatenation_duration(self):
+        """Tests that joining files with the concat demuxer takes as long as the listed files."""
+        concatenation_file_path = os.path.join(self.temp_directory.name, 'concat')
+
+        with open(concatenation_file_path, 'w') as concatenation_file:
+            concatenation_file.write('file \'input.mkv\'\nfile \'input.mkv\'\n')
+
+        fake_args = fake_ffmpeg.FakeArgs(['-y', '-f', 'concat', '-safe', '0', '-i', concatenation_file_path,
+                                          '-c', 'copy', 'output.mkv'])
+        self.assertEqual(fake_ffmpeg.get_encode_duration(fake_args), 600)
+
+    def test_module_runs_as_ffmpeg_and_ffprobe(self):
+        """Tests that running the module, like the scripts in bin do, picks ffprobe with its first arg."""
+        source_directory = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(fake_ffmpeg.__file__))))
+        environ = dict(os.environ, PYTHONPATH=source_directory)
+        output_file_path = os.path.join(self.temp_directory.name, 'output.mkv')
+
+        ffmpeg_process = subprocess.run([sys.executable, '-m', 'render_watch.helpers.fake_ffmpeg', '-y', '-i',
+                                         self.input_file_path, output_file_path],
+                                        env=environ, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        ffprobe_process = subprocess.run([sys.executable, '-m', 'render_watch.helpers.fake_ffmpeg', 'ffprobe',
+                                          '-show_entries', 'format=duration', self.input_file_path],
+                                         env=environ, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        self.assertEqual(ffmpeg_process.returncode, 0)
+        self.assertTrue(os.path.exists(output_file_path))
+        self.assertEqual(ffprobe_process.returncode, 0)
+        self.assertIn(b'duration=300.000000', ffprobe_process.stdout)
+        self.assertTrue(os.access(os.path.join(FAKE_BINARIES_DIRECTORY, 'ffmpeg'), os.X_OK))
+        self.assertTrue(os.access(os.path.join(FAKE_BINARIES_DIRECTORY, 'ffprobe'), os.X_OK))
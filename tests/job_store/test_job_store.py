@@ -0,0 +1,136 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+
+from render_watch.encoding.job_store import JobStore
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
+from render_watch.ffmpeg.x264 import X264
+
+
+def _get_x264_settings(bitrate):
+    x264 = X264()
+    x264.bitrate = bitrate
+    x264.preset = 6
+    return x264
+
+
+class TestJobStore(unittest.TestCase):
+    """Tests that the job store keeps unfinished jobs between runs."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.database_file_path = os.path.join(self.temp_directory.name, JobStore.DATABASE_FILE_NAME)
+        self.job_store = JobStore(self.database_file_path)
+
+    def tearDown(self):
+        self.job_store.close()
+        self.temp_directory.cleanup()
+
+    def _reopen_job_store(self):
+        self.job_store.close()
+        self.job_store = JobStore(self.database_file_path)
+
+    def test_jobs_survive_restart(self):
+        """Tests that unfinished jobs come back in the order they were added, with their settings."""
+        job_ids = self.job_store.add_jobs([(_get_x264_settings(2000), False), (_get_x264_settings(4000), True)])
+        third_job_id = self.job_store.add_job(_get_x264_settings(6000), False)
+
+        self._reopen_job_store()
+        jobs = self.job_store.get_unfinished_jobs()
+
+        self.assertEqual([job.job_id for job in jobs], job_ids + [third_job_id])
+        self.assertEqual([job.ffmpeg.ffmpeg_args for job in jobs],
+                         [_get_x264_settings(bitrate).ffmpeg_args for bitrate in (2000, 4000, 6000)])
+        self.assertEqual([job.is_chunked for job in jobs], [False, True, False])
+
+    def test_finished_jobs_are_removed(self):
+        """Tests that removed jobs don't come back."""
+        first_job_id, second_job_id = self.job_store.add_jobs([(_get_x264_settings(2000), False),
+                                                               (_get_x264_settings(4000), False)])
+        self.job_store.remove_job(first_job_id)
+
+        self._reopen_job_store()
+
+        self.assertEqual([job.job_id for job in self.job_store.get_unfinished_jobs()], [second_job_id])
+
+    def test_running_jobs_are_queued_again(self):
+        """Tests that jobs that were running when the store was closed are queued again."""
+        job_id = self.job_store.add_job(_get_x264_settings(2000), False)
+        self.job_store.set_job_state(job_id, JobStore.RUNNING_STATE)
+
+        self._reopen_job_store()
+        self.job_store.get_unfinished_jobs()
+
+        with sqlite3.connect(self.database_file_path) as connection:
+            state = connection.execute('SELECT state FROM jobs WHERE job_id = ?', (job_id,)).fetchone()[0]
+        self.assertEqual(state, JobStore.QUEUED_STATE)
+
+    def test_progress_is_written_on_close(self):
+        """Tests that progress waiting for the next batch isn't lost when the store closes."""
+        job_id = self.job_store.add_job(_get_x264_settings(2000), False)
+        self.job_store.set_job_progress(job_id, 0.25)
+        self.job_store.set_job_progress(job_id, 0.5)
+
+        self._reopen_job_store()
+
+        self.assertEqual(self.job_store.get_unfinished_jobs()[0].progress, 0.5)
+
+    def test_closed_store_keeps_jobs(self):
+        """Tests that a closed store ignores changes, so jobs stopped while closing are restored."""
+        job_id = self.job_store.add_job(_get_x264_settings(2000), False)
+        self.job_store.close()
+        self.job_store.remove_job(job_id)
+        self.job_store.set_job_progress(job_id, 0.5)
+
+        self._reopen_job_store()
+
+        self.assertEqual([job.job_id for job in self.job_store.get_unfinished_jobs()], [job_id])
+
+    def test_unreadable_jobs_are_dropped(self):
+        """Tests that jobs with settings that can't be loaded are removed instead of stopping the restore."""
+        job_id = self.job_store.add_job(_get_x264_settings(2000), False)
+        self.job_store.close()
+
+        with sqlite3.connect(self.database_file_path) as connection:
+            connection.execute('UPDATE jobs SET settings = ? WHERE job_id = ?', (b'not a pickle', job_id))
+        self.job_store = JobStore(self.database_file_path)
+
+        with self.assertLogs(level='ERROR'):
+            self.assertEqual(self.job_store.get_unfinished_jobs(), [])
+        self._reopen_job_store()
+        self.assertEqual(self.job_store.get_unfinished_jobs(), [])
+
+    def test_settings_pickle(self):
+        """Tests that stored settings pickle with their media info and get a new revision when loaded."""
+        stream = StreamInfo(index='0', codec_name='h264', width=1920, height=1080, frame_rate='23.98', info='h264')
+        media_info = MediaInfo(resolution='1920x1080', width=1920, height=1080, video_streams=(stream,))
+        x264 = _get_x264_settings(2000)
+
+        self.assertEqual(pickle.loads(pickle.dumps(media_info)), media_info)
+        loaded_x264 = pickle.loads(pickle.dumps(x264))
+        self.assertEqual(loaded_x264.ffmpeg_args, x264.ffmpeg_args)
+        self.assertNotEqual(loaded_x264.revision, x264.revision)
+
+
+if __name__ == '__main__':
+    unittest.main()
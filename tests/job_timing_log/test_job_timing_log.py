@@ -0,0 +1,129 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from render_watch.encoding.headless_task import HeadlessChunk, HeadlessTask
+from render_watch.encoding.job_timing_log import JobTiming, JobTimingLog
+from render_watch.ffmpeg.settings import Settings
+from render_watch.helpers import job_timing_helper
+from render_watch.startup.application_preferences import ApplicationPreferences
+
+
+def _get_task(input_file):
+    ffmpeg = Settings()
+    ffmpeg.input_file = input_file
+    ffmpeg.output_directory = '/tmp/'
+    ffmpeg.output_container = '.mkv'
+    return HeadlessTask(ffmpeg, ApplicationPreferences())
+
+
+class TestJobTimingLog(unittest.TestCase):
+    """Tests the job lines that are written to the job timing log and the summary of them."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.log_file_path = os.path.join(self.temp_directory.name, JobTimingLog.FILE_NAME)
+        self.job_timing_log = JobTimingLog(self.log_file_path)
+
+    def tearDown(self):
+        self.job_timing_log.close()
+        self.temp_directory.cleanup()
+
+    def _read_job_records(self):
+        return job_timing_helper.read_job_records([self.log_file_path])
+
+    def test_job_phases(self):
+        """Tests that phases timed before and after a task was created are written in the order they started."""
+        task = _get_task('/tmp/a.mkv')
+        job_timing = JobTiming()
+        job_timing.add_phase(JobTiming.PROBE_PHASE, 1.0, 2.0)
+        self.job_timing_log.add_job(task, job_timing)
+
+        self.job_timing_log.add_phase(task, JobTiming.PASS_PHASE_FORMAT % 2, 5.0, 9.0)
+        self.job_timing_log.add_phase(task, JobTiming.PASS_PHASE_FORMAT % 1, 3.0, 5.0)
+        task.speed = 2.5
+        self.job_timing_log.write_job(task)
+
+        job_record = self._read_job_records()[0]
+
+        self.assertEqual(job_record['input'], '/tmp/a.mkv')
+        self.assertEqual(job_record['status'], 'finished')
+        self.assertEqual(job_record['speed'], 2.5)
+        self.assertEqual(job_record['start'], 1.0)
+        self.assertEqual([(phase['phase'], phase['duration']) for phase in job_record['phases']],
+                         [('probe', 1.0), ('pass_1', 2.0), ('pass_2', 4.0)])
+
+    def test_queue_wait_ends_at_next_phase(self):
+        """Tests that a chunk's queue wait ends when another one of its phases starts and is timed with its task."""
+        task = _get_task('/tmp/a.mkv')
+        chunk = HeadlessChunk(task.ffmpeg, 2, task)
+
+        self.job_timing_log.task_queued(chunk)
+        self.job_timing_log.add_phase(chunk, JobTiming.NVENC_WAIT_PHASE, 10.0 ** 9, 10.0 ** 9 + 1)
+        self.job_timing_log.task_started(chunk)
+        self.job_timing_log.write_job(task)
+
+        phases = self._read_job_records()[0]['phases']
+
+        self.assertEqual([phase['phase'] for phase in phases], ['queue_wait', 'nvenc_wait'])
+        self.assertEqual(phases[0]['end'], 10.0 ** 9)
+        self.assertEqual(phases[1]['chunk'], 2)
+
+    def test_stopped_job_written_once(self):
+        """Tests that a stopped task's line isn't written again when its encode process ends."""
+        task = _get_task('/tmp/a.mkv')
+        task.stop()
+        self.job_timing_log.write_job(task)
+        self.job_timing_log.add_phase(task, JobTiming.PASS_PHASE_FORMAT % 1, 1.0, 2.0)
+        self.job_timing_log.write_job(task)
+
+        job_records = self._read_job_records()
+
+        self.assertEqual(len(job_records), 1)
+        self.assertEqual(job_records[0]['status'], 'stopped')
+
+    def test_summarize_job_records(self):
+        """Tests that phases are totaled across jobs and sorted by their total."""
+        job_records = [
+            {'status': 'finished', 'wall_time': 10.0, 'phases': [{'phase': 'probe', 'duration': 1.0},
+                                                                 {'phase': 'pass_1', 'duration': 9.0}]},
+            {'status': 'failed', 'wall_time': 5.0, 'phases': [{'phase': 'pass_1', 'duration': 3.0},
+                                                              {'phase': 'pass_1', 'duration': 2.0}]}
+        ]
+
+        summary = job_timing_helper.summarize_job_records(job_records)
+
+        self.assertEqual(summary['jobs'], 2)
+        self.assertEqual(summary['statuses'], {'finished': 1, 'failed': 1})
+        self.assertEqual(summary['wall_time'], 15.0)
+        self.assertEqual(summary['phases'][0], {'phase': 'pass_1', 'total': 14.0, 'share': 14.0 / 15.0, 'jobs': 2,
+                                                'mean': 7.0, 'max': 9.0})
+        self.assertEqual(summary['phases'][1]['phase'], 'probe')
+
+    def test_get_log_file_paths(self):
+        """Tests that rotated backups are listed before the current log, oldest first."""
+        for file_name in (JobTimingLog.FILE_NAME, JobTimingLog.FILE_NAME + '.1', JobTimingLog.FILE_NAME + '.2'):
+            open(os.path.join(self.temp_directory.name, file_name), 'w').close()
+
+        file_paths = job_timing_helper.get_log_file_paths(self.log_file_path, JobTimingLog.BACKUP_COUNT)
+
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths],
+                         [JobTimingLog.FILE_NAME + '.2', JobTimingLog.FILE_NAME + '.1', JobTimingLog.FILE_NAME])
@@ -0,0 +1,81 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import copy
+import unittest
+
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
+
+
+def _get_media_info():
+    video_streams = (StreamInfo(index='0', codec_name='h264', width=1920, height=1080, frame_rate='23.98',
+                                info='h264,1920x1080(23.98)'),
+                     StreamInfo(index='1', codec_name='hevc', width=3840, height=2160, frame_rate='23.98',
+                                info='hevc,3840x2160(23.98)'))
+    audio_streams = (StreamInfo(index='2', codec_name='ac3', channels='6', sample_rate='48000',
+                                info='ac3,6 channels,48000hz'),)
+    return MediaInfo(resolution='1920x1080', width=1920, height=1080, fps='23.98', duration=60, file_size='1.0GB',
+                     codec_video='h264', codec_audio='ac3', channels='6', sample_rate='48000',
+                     video_streams=video_streams, audio_streams=audio_streams)
+
+
+class TestMediaInfo(unittest.TestCase):
+    """Tests the media info records that ffmpeg settings share."""
+
+    def test_frozen(self):
+        """Tests that records can't be changed or given new fields."""
+        media_info = _get_media_info()
+        with self.assertRaises(AttributeError):
+            media_info.width = 1280
+        with self.assertRaises(AttributeError):
+            media_info.video_streams[0].codec_name = 'vp9'
+        with self.assertRaises(AttributeError):
+            del media_info.duration
+        with self.assertRaises(TypeError):
+            MediaInfo(bitrate=5000)
+        self.assertFalse(hasattr(media_info, '__dict__'))
+
+    def test_copies_are_shared(self):
+        """Tests that copying a record returns the same record."""
+        media_info = _get_media_info()
+        self.assertIs(copy.copy(media_info), media_info)
+        self.assertIs(copy.deepcopy(media_info), media_info)
+        self.assertIs(copy.deepcopy({'streams': media_info.video_streams})['streams'][1], media_info.video_streams[1])
+
+    def test_with_streams(self):
+        """Tests that choosing a stream makes a new record and leaves the original alone."""
+        media_info = _get_media_info()
+        hevc_media_info = media_info.with_video_stream(media_info.video_streams[1])
+        self.assertEqual(hevc_media_info.resolution, '3840x2160')
+        self.assertEqual((hevc_media_info.width, hevc_media_info.height), (3840, 2160))
+        self.assertEqual(hevc_media_info.codec_video, 'hevc')
+        self.assertIs(hevc_media_info.video_streams, media_info.video_streams)
+        self.assertEqual(media_info.codec_video, 'h264')
+        self.assertEqual(media_info.with_video_stream(media_info.video_streams[0]), media_info)
+        self.assertEqual(media_info.with_audio_stream(media_info.audio_streams[0]).sample_rate, '48000')
+
+    def test_empty(self):
+        """Tests that a record without any information has no streams."""
+        media_info = MediaInfo()
+        self.assertIsNone(media_info.duration)
+        self.assertEqual(media_info.audio_streams, ())
+        self.assertFalse(media_info.subtitle_streams)
+
+
+if __name__ == '__main__':
+    unittest.main()
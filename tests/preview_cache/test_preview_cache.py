@@ -0,0 +1,91 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from render_watch.encoding.preview_cache import PreviewCache
+from render_watch.helpers import ffmpeg_helper
+
+
+class TestPreviewCache(unittest.TestCase):
+    """Tests the preview cache's keys and eviction."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.cache_directory = os.path.join(self.temp_directory.name, PreviewCache.CACHE_DIRECTORY_NAME)
+        self.input_file_path = os.path.join(self.temp_directory.name, 'input.mkv')
+        with open(self.input_file_path, 'wb') as input_file:
+            input_file.write(b'input')
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def _create_preview_file(self, file_name, size_in_bytes):
+        file_path = os.path.join(self.temp_directory.name, file_name)
+        with open(file_path, 'wb') as preview_file:
+            preview_file.write(b'0' * size_in_bytes)
+        return file_path
+
+    def test_canonical_args(self):
+        """Tests that output paths and temp file names don't change the canonical args."""
+        first_args = ['ffmpeg', '-i', 'in.mkv', '-crf', '20', '/tmp/a1_preview.mp4']
+        second_args = ['ffmpeg', '-i', 'in.mkv', '-crf', '20', '/tmp/b2_preview.mp4']
+        self.assertListEqual(ffmpeg_helper.get_canonical_ffmpeg_args(first_args, '/tmp', 'a1'),
+                             ffmpeg_helper.get_canonical_ffmpeg_args(second_args, '/tmp', 'b2'))
+
+    def test_key(self):
+        """Tests that the key changes with the settings and start time."""
+        args_list = [['ffmpeg', '-crf', '20']]
+        key = PreviewCache.get_key(args_list, self.input_file_path, 10)
+        self.assertEqual(key, PreviewCache.get_key(args_list, self.input_file_path, 10))
+        self.assertNotEqual(key, PreviewCache.get_key([['ffmpeg', '-crf', '21']], self.input_file_path, 10))
+        self.assertNotEqual(key, PreviewCache.get_key(args_list, self.input_file_path, 11))
+
+    def test_get_and_put(self):
+        """Tests that a stored preview is returned for the same key."""
+        preview_cache = PreviewCache(self.cache_directory)
+        self.assertIsNone(preview_cache.get('key', '.tiff'))
+
+        cached_file_path = preview_cache.put('key', self._create_preview_file('preview.tiff', 10))
+        self.assertEqual(preview_cache.get('key', '.tiff'), cached_file_path)
+        self.assertTrue(os.path.exists(cached_file_path))
+        self.assertEqual(preview_cache.size_in_bytes, 10)
+
+    def test_least_recently_used_eviction(self):
+        """Tests that the least recently used preview is removed when the size limit is passed."""
+        preview_cache = PreviewCache(self.cache_directory, max_size_in_bytes=25)
+        first_file_path = preview_cache.put('first', self._create_preview_file('first.tiff', 10))
+        preview_cache.put('second', self._create_preview_file('second.tiff', 10))
+        preview_cache.get('first', '.tiff')
+        preview_cache.put('third', self._create_preview_file('third.tiff', 10))
+
+        self.assertEqual(preview_cache.get('first', '.tiff'), first_file_path)
+        self.assertIsNone(preview_cache.get('second', '.tiff'))
+        self.assertIsNotNone(preview_cache.get('third', '.tiff'))
+        self.assertEqual(len(preview_cache), 2)
+
+    def test_existing_entries_loaded(self):
+        """Tests that previews cached by a previous session are reused."""
+        cached_file_path = PreviewCache(self.cache_directory).put('key', self._create_preview_file('key.tiff', 10))
+        self.assertEqual(PreviewCache(self.cache_directory).get('key', '.tiff'), cached_file_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import copy
+import pickle
+import unittest
+
+from render_watch.ffmpeg.general_settings import GeneralSettings
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.subtitles_settings import SubtitlesSettings
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.ffmpeg.x264 import X264
+
+
+class TestRevisionedSettings(unittest.TestCase):
+    """Tests that settings get a new revision whenever they're changed."""
+
+    def test_changes(self):
+        """Tests that setting a property gives the settings a new revision."""
+        trim_settings = TrimSettings()
+        revision = trim_settings.revision
+        trim_settings.start_time = 10
+        self.assertNotEqual(trim_settings.revision, revision)
+
+        general_settings = GeneralSettings()
+        revision = general_settings.revision
+        general_settings.fast_start = True
+        self.assertNotEqual(general_settings.revision, revision)
+        self.assertNotEqual(general_settings.revision, trim_settings.revision)
+
+    def test_subtitle_streams(self):
+        """Tests that using and removing subtitle streams gives the settings a new revision."""
+        subtitle_stream = StreamInfo(index='2', codec_name='hdmv_pgs_subtitle', language='eng',
+                                     info='[2]eng:hdmv_pgs_subtitle')
+        subtitles_settings = SubtitlesSettings(MediaInfo(subtitle_streams=(subtitle_stream,)))
+        revision = subtitles_settings.revision
+        subtitles_settings.use_stream(subtitle_stream.info)
+        self.assertNotEqual(subtitles_settings.revision, revision)
+
+        revision = subtitles_settings.revision
+        subtitles_settings.remove_stream(subtitle_stream.info)
+        self.assertNotEqual(subtitles_settings.revision, revision)
+
+    def test_copies(self):
+        """Tests that copies keep the original's revision until one of them is changed."""
+        x264 = X264()
+        x264.preset = 4
+        x264_copy = x264.copy()
+        self.assertEqual(x264_copy.revision, x264.revision)
+        self.assertEqual(copy.deepcopy(x264).revision, x264.revision)
+
+        x264_copy.stats = '/tmp/stats.log'
+        x264_copy.encode_pass = 2
+        self.assertNotEqual(x264_copy.revision, x264.revision)
+        self.assertEqual(x264.get_ffmpeg_advanced_args(), {'-x264-params': None})
+        self.assertEqual(x264_copy.get_ffmpeg_advanced_args(), {'-x264-params': 'pass=2:stats=/tmp/stats.log'})
+
+    def test_pickled_settings(self):
+        """Tests that compiled args aren't pickled, so a restored task never reuses another process's args."""
+        ffmpeg = Settings()
+        ffmpeg.input_file = '/tmp/input.mkv'
+        ffmpeg.output_directory = '/tmp/'
+        ffmpeg.filename = 'output'
+        ffmpeg.output_container = '.mkv'
+        ffmpeg_args = ffmpeg.get_args()
+
+        pickled_ffmpeg = pickle.dumps(ffmpeg)
+        self.assertNotIn(b'_compiled_args', pickled_ffmpeg)
+
+        restored_ffmpeg = pickle.loads(pickled_ffmpeg)
+        self.assertEqual(restored_ffmpeg._compiled_args, {})
+        self.assertEqual(restored_ffmpeg.get_args(), ffmpeg_args)
+
+        restored_ffmpeg.filename = 'restored'
+        self.assertEqual(restored_ffmpeg.get_args()[-1], '/tmp/restored.mkv')
+
+
+if __name__ == '__main__':
+    unittest.main()
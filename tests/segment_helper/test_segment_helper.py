@@ -0,0 +1,154 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import unittest
+
+from render_watch.ffmpeg.aac import Aac
+from render_watch.ffmpeg.media_info import MediaInfo
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.ffmpeg.vp9 import VP9
+from render_watch.ffmpeg.x264 import X264
+from render_watch.helpers import segment_helper
+
+
+def _get_ffmpeg(video_settings):
+    ffmpeg = Settings()
+    ffmpeg.input_file = '/tmp/input.mkv'
+    ffmpeg.output_directory = '/tmp/'
+    ffmpeg.filename = 'output'
+    ffmpeg.output_container = '.mkv'
+    ffmpeg.media_info = MediaInfo(duration=300.0)
+    ffmpeg.setup_subtitles_settings()
+    ffmpeg.video_settings = video_settings
+    ffmpeg.audio_settings = Aac()
+    ffmpeg.audio_stream_index = 1
+    return ffmpeg
+
+
+class TestSegmentHelper(unittest.TestCase):
+    """Tests how the segments a stopped task already encoded are found, encoded, and joined."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.segments_directory = self.temp_directory.name
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def _write_segment_list(self, first_segment_number, segment_numbers):
+        segment_list_file_name = segment_helper.SEGMENT_LIST_FILE_NAME_FORMAT % first_segment_number
+
+        with open(os.path.join(self.segments_directory, segment_list_file_name), 'w') as segment_list_file:
+            for segment_number in segment_numbers:
+                segment_file_name = segment_helper.SEGMENT_FILE_NAME_FORMAT % segment_number
+                start_time = segment_number * segment_helper.SEGMENT_DURATION_IN_SECONDS
+                end_time = start_time + segment_helper.SEGMENT_DURATION_IN_SECONDS
+                segment_list_file.write(segment_file_name + ',' + str(start_time) + ',' + str(end_time) + '\n')
+
+    def test_no_segments(self):
+        """Tests that a task without any segment lists starts from the first segment."""
+        self.assertEqual(segment_helper.get_completed_segments(self.segments_directory), 0)
+        self.assertEqual(segment_helper.get_completed_segments(os.path.join(self.segments_directory, 'missing')), 0)
+
+    def test_segments_from_every_run_are_counted(self):
+        """Tests that segments listed by earlier runs and resumed runs are counted together."""
+        self._write_segment_list(0, range(0, 3))
+        self._write_segment_list(3, range(3, 5))
+
+        self.assertEqual(segment_helper.get_completed_segments(self.segments_directory), 5)
+
+    def test_only_contiguous_segments_are_counted(self):
+        """Tests that segments after a missing segment are encoded again."""
+        self._write_segment_list(0, (0, 1, 3, 4))
+
+        self.assertEqual(segment_helper.get_completed_segments(self.segments_directory), 2)
+
+    def _get_segment_args(self, segment_encode_args):
+        return segment_encode_args[segment_encode_args.index('-f'):]
+
+    def test_x264_segment_encode_args(self):
+        """Tests that x264 segments start on forced IDR frames after the completed segments, without audio."""
+        ffmpeg = _get_ffmpeg(X264())
+        segment_encode_args = segment_helper.get_segment_encode_args(ffmpeg, self.segments_directory, 2)
+
+        self.assertEqual(segment_encode_args[segment_encode_args.index('-ss') + 1], '120')
+        self.assertEqual(segment_encode_args[segment_encode_args.index('-to') + 1], '180.0')
+        self.assertIn('-an', segment_encode_args)
+        self.assertNotIn('/tmp/output.mkv', segment_encode_args)
+        self.assertEqual(segment_encode_args[segment_encode_args.index('-force_key_frames'):][:4],
+                         ['-force_key_frames', 'expr:gte(t,n_forced*60)', '-forced-idr', '1'])
+        self.assertEqual(self._get_segment_args(segment_encode_args), [
+            '-f', 'segment',
+            '-segment_time', '60',
+            '-segment_start_number', '2',
+            '-reset_timestamps', '1',
+            '-segment_list_type', 'csv',
+            '-segment_list', os.path.join(self.segments_directory, 'segments_00002.csv'),
+            os.path.join(self.segments_directory, 'segment_%05d.mkv')
+        ])
+        self.assertIsNotNone(ffmpeg.audio_settings)
+
+    def test_vp9_segment_encode_args(self):
+        """Tests that VP9 segments force key frames without the x264/x265 IDR option."""
+        segment_encode_args = segment_helper.get_segment_encode_args(_get_ffmpeg(VP9()), self.segments_directory, 0)
+
+        self.assertEqual(segment_encode_args[segment_encode_args.index('-force_key_frames') + 2], '-f')
+        self.assertNotIn('-forced-idr', segment_encode_args)
+        self.assertEqual(segment_encode_args[segment_encode_args.index('-ss') + 1], '0')
+        self.assertEqual(self._get_segment_args(segment_encode_args)[:6],
+                         ['-f', 'segment', '-segment_time', '60', '-segment_start_number', '0'])
+
+    def test_join_segments_args(self):
+        """Tests that the segments are joined without re-encoding and muxed with audio encoded from the input."""
+        ffmpeg = _get_ffmpeg(X264())
+        concatenation_file_path = os.path.join(self.segments_directory, segment_helper.CONCATENATION_FILE_NAME)
+
+        self.assertEqual(segment_helper.get_join_segments_args(ffmpeg, concatenation_file_path)[1:], [
+            '-y', '-f', 'concat', '-safe', '0', '-i', concatenation_file_path,
+            '-i', '/tmp/input.mkv',
+            '-map', '0:v:0', '-c:v', 'copy',
+            '-map', '1:1', '-c:a', 'aac', '-b:a', '128k',
+            '/tmp/output.mkv'
+        ])
+
+        ffmpeg.trim_settings = TrimSettings()
+        ffmpeg.trim_settings.start_time = 30
+        ffmpeg.trim_settings.trim_duration = 200
+        ffmpeg.audio_settings = None
+
+        self.assertEqual(segment_helper.get_join_segments_args(ffmpeg, concatenation_file_path)[8:], [
+            '-ss', '30', '-t', '200', '-i', '/tmp/input.mkv',
+            '-map', '0:v:0', '-c:v', 'copy',
+            '-map', '1:1', '-c:a', 'copy',
+            '/tmp/output.mkv'
+        ])
+
+    def test_join_segments_args_without_audio(self):
+        """Tests that only the joined video is muxed when the task has no audio."""
+        ffmpeg = _get_ffmpeg(X264())
+        ffmpeg.no_audio = True
+
+        self.assertEqual(segment_helper.get_join_segments_args(ffmpeg, 'concat')[8:],
+                         ['-map', '0:v:0', '-c:v', 'copy', '/tmp/output.mkv'])
+
+
+if __name__ == '__main__':
+    unittest.main()
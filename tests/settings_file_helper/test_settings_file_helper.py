@@ -0,0 +1,139 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import tempfile
+import unittest
+
+from render_watch.ffmpeg.media_info import MediaInfo, StreamInfo
+from render_watch.ffmpeg.settings import Settings
+from render_watch.ffmpeg.trim_settings import TrimSettings
+from render_watch.ffmpeg.x264 import X264
+from render_watch.ffmpeg.aac import Aac
+from render_watch.helpers import settings_file_helper
+
+
+class TestSettingsFileHelper(unittest.TestCase):
+    """Tests how headless mode's settings files are turned into ffmpeg templates."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.settings_file_path = os.path.join(self.temp_directory.name, 'settings.json')
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def _load_ffmpeg_template(self, settings):
+        with open(self.settings_file_path, 'w') as settings_file:
+            json.dump(settings, settings_file)
+
+        return settings_file_helper.load_ffmpeg_template(self.settings_file_path)
+
+    def test_codec_settings(self):
+        """Tests that codecs and their properties are set the same way the settings sidebar sets them."""
+        ffmpeg_template = self._load_ffmpeg_template({'output_container': '.mkv',
+                                                      'video_codec': 'x264',
+                                                      'video_settings': {'crf': 22, 'preset': 5},
+                                                      'audio_codec': 'aac',
+                                                      'audio_settings': {'bitrate': 160}})
+
+        self.assertEqual(ffmpeg_template.output_container, '.mkv')
+        self.assertIsInstance(ffmpeg_template.video_settings, X264)
+        self.assertEqual(ffmpeg_template.video_settings.ffmpeg_args['-crf'], '22')
+        self.assertEqual(ffmpeg_template.video_settings.ffmpeg_args['-preset'], 'fast')
+        self.assertIsInstance(ffmpeg_template.audio_settings, Aac)
+        self.assertEqual(ffmpeg_template.audio_settings.ffmpeg_args['-b:a'], '160k')
+
+    def test_copy_and_none_codecs(self):
+        """Tests that codecs default to copy and that none removes the stream."""
+        ffmpeg_template = self._load_ffmpeg_template({'audio_codec': 'none'})
+
+        self.assertIsNone(ffmpeg_template.video_settings)
+        self.assertFalse(ffmpeg_template.no_video)
+        self.assertIsNone(ffmpeg_template.audio_settings)
+        self.assertTrue(ffmpeg_template.no_audio)
+
+    def test_invalid_settings(self):
+        """Tests that unknown codecs, properties, and containers are rejected."""
+        for settings in ({'video_codec': 'mpeg2'},
+                         {'video_codec': 'x264', 'video_settings': {'not_a_setting': 1}},
+                         {'video_codec': 'x264', 'video_settings': {'ffmpeg_args': {}}},
+                         {'output_container': '.avi'},
+                         ['x264']):
+            with self.assertRaises(ValueError):
+                self._load_ffmpeg_template(settings)
+
+    @staticmethod
+    def _get_chunk_ffmpeg():
+        ffmpeg = Settings()
+        ffmpeg.input_file = '/videos/my movie.mkv'
+        ffmpeg.filename = 'my_movie_1'
+        ffmpeg.temp_file_name = 'my_movie'
+        ffmpeg.output_directory = '/tmp/render-watch/'
+        ffmpeg.output_container = '.mkv'
+        ffmpeg.media_info = MediaInfo(duration=120.0,
+                                      subtitle_streams=(StreamInfo(index='3',
+                                                                   codec_name='hdmv_pgs_subtitle',
+                                                                   language='eng',
+                                                                   info='[3]eng:hdmv_pgs_subtitle'),))
+        ffmpeg.setup_subtitles_settings()
+        ffmpeg.video_settings = X264()
+        ffmpeg.video_settings.encode_pass = 1
+        ffmpeg.video_settings.stats = '/tmp/render-watch/my_movie.log'
+        ffmpeg.video_settings.bitrate = 5000
+        ffmpeg.audio_settings = Aac()
+        ffmpeg.trim_settings = TrimSettings()
+        ffmpeg.trim_settings.start_time = 10
+        ffmpeg.trim_settings.trim_duration = 60
+        ffmpeg.picture_settings.crop = (1920, 800, 0, 140)
+        ffmpeg.subtitles_settings.use_stream('[3]eng:hdmv_pgs_subtitle')
+        ffmpeg.subtitles_settings.set_stream_method_burn_in('[3]eng:hdmv_pgs_subtitle')
+        return ffmpeg
+
+    def test_ffmpeg_state(self):
+        """Tests that ffmpeg settings sent as JSON are made again with the same args."""
+        ffmpeg = self._get_chunk_ffmpeg()
+        ffmpeg_state = json.loads(json.dumps(settings_file_helper.get_ffmpeg_state(ffmpeg)))
+        ffmpeg_copy = settings_file_helper.get_ffmpeg_from_state(ffmpeg_state)
+
+        self.assertEqual(ffmpeg_copy.filename, 'my_movie_1')
+        self.assertEqual(ffmpeg_copy.input_file, '/videos/my movie.mkv')
+        self.assertIsInstance(ffmpeg_copy.video_settings, X264)
+        self.assertEqual(ffmpeg_copy.get_args(), ffmpeg.get_args())
+        self.assertEqual(ffmpeg_copy.get_args(True), ffmpeg.get_args(True))
+
+    def test_invalid_ffmpeg_state(self):
+        """Tests that states with unknown codecs, values, or values of the wrong kind are rejected."""
+        ffmpeg_state = json.loads(json.dumps(settings_file_helper.get_ffmpeg_state(self._get_chunk_ffmpeg())))
+        invalid_changes = ({'video_codec': 'mpeg2'},
+                           {'video_settings': {'__class__': 'Settings'}},
+                           {'video_settings': {'ffmpeg_args': {'-crf': ['22']}}},
+                           {'video_settings': {'advanced_enabled': 'yes'}},
+                           {'media_info': {'not_a_field': 1}},
+                           {'subtitles_settings': {'streams_in_use': {'three': 'eng'}}},
+                           {'not_a_setting': 1})
+
+        for changes in invalid_changes:
+            with self.assertRaises(ValueError):
+                settings_file_helper.get_ffmpeg_from_state(dict(ffmpeg_state, **changes))
+
+        del ffmpeg_state['input_file']
+        for invalid_ffmpeg_state in (['x264'], ffmpeg_state):
+            with self.assertRaises(ValueError):
+                settings_file_helper.get_ffmpeg_from_state(invalid_ffmpeg_state)
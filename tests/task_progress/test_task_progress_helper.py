@@ -0,0 +1,69 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from types import SimpleNamespace
+
+from render_watch.helpers import task_progress_helper
+
+
+def _create_chunk_row(progress=0.0, speed=0.0, bitrate=0.0, file_size=0.0, time=0, current_time=0):
+    return SimpleNamespace(progress=progress,
+                           speed=speed,
+                           bitrate=bitrate,
+                           file_size=file_size,
+                           time=time,
+                           current_time=current_time,
+                           finished=False,
+                           stopped=False)
+
+
+class TestTaskProgressHelper(unittest.TestCase):
+    """Tests the chunk aggregation and label snapshots used by the refresh clock."""
+
+    def test_chunk_aggregation(self):
+        """Tests the combined values of multiple chunks."""
+        chunk_rows = [
+            _create_chunk_row(progress=0.5, speed=1.25, bitrate=1000.0, file_size=100.0, time=30, current_time=10),
+            _create_chunk_row(progress=1.0, speed=0.5, bitrate=3000.0, file_size=300.0, time=60, current_time=20),
+            _create_chunk_row()
+        ]
+        self.assertEqual(task_progress_helper.get_chunks_progress(chunk_rows), 0.5)
+        self.assertEqual(task_progress_helper.get_chunks_speed(chunk_rows), 1.75)
+        self.assertEqual(task_progress_helper.get_chunks_bitrate(chunk_rows), 1333.3)
+        self.assertEqual(task_progress_helper.get_chunks_file_size(chunk_rows), 400.0)
+        self.assertEqual(task_progress_helper.get_chunks_time_estimate(chunk_rows), 120)
+        self.assertEqual(task_progress_helper.get_chunks_current_time(chunk_rows), 30)
+
+    def test_changed_labels(self):
+        """Tests that only labels with new values are returned."""
+        task_information = {'progress': 0.5, 'speed': 1.0, 'bitrate': 2000.0, 'filesize': 2048, 'time': 65}
+        applied_labels_snapshot = task_progress_helper.get_task_labels_snapshot(task_information)
+        self.assertEqual(applied_labels_snapshot['time'], '00:01:05')
+        self.assertDictEqual(task_progress_helper.get_changed_labels(applied_labels_snapshot,
+                                                                     applied_labels_snapshot), {})
+
+        task_information['progress'] = 0.6
+        labels_snapshot = task_progress_helper.get_task_labels_snapshot(task_information)
+        self.assertDictEqual(task_progress_helper.get_changed_labels(labels_snapshot, applied_labels_snapshot),
+                             {'progress': 0.6})
+
+
+if __name__ == '__main__':
+    unittest.main()
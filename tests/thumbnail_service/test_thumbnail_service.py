@@ -0,0 +1,149 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+from render_watch.encoding import preview, thumbnail_service
+from render_watch.encoding.thumbnail_service import ThumbnailService
+from render_watch.ffmpeg.media_info import MediaInfo
+from render_watch.ffmpeg.settings import Settings
+
+
+class TestThumbnailService(unittest.TestCase):
+    """Tests the order thumbnails are made in, cancelled requests, and the thumbnail cache."""
+
+    def setUp(self):
+        self.temp_directory = tempfile.TemporaryDirectory()
+        self.application_preferences = types.SimpleNamespace(temp_directory=self.temp_directory.name)
+        self.thumbnail_service = ThumbnailService(os.path.join(self.temp_directory.name, 'thumbnail_cache'))
+        self.input_file_path = os.path.join(self.temp_directory.name, 'input.mkv')
+
+        with open(self.input_file_path, 'w') as input_file:
+            input_file.write('input')
+
+        glib_patcher = mock.patch.object(thumbnail_service, 'GLib')
+        glib = glib_patcher.start()
+        glib.idle_add.side_effect = lambda function, *args: function(*args)
+        self.addCleanup(glib_patcher.stop)
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def _get_ffmpeg(self):
+        ffmpeg = Settings()
+        ffmpeg.input_file = self.input_file_path
+        ffmpeg.temp_file_name = 'temp'
+        ffmpeg.media_info = MediaInfo(width=1920, height=1080, duration=100)
+        ffmpeg.setup_subtitles_settings()
+        return ffmpeg
+
+    def _request_thumbnails(self, ffmpegs):
+        # Returns the thumbnail file paths once every request's callback has run.
+        thumbnail_file_paths = [None] * len(ffmpegs)
+        callbacks_done = threading.Semaphore(0)
+
+        def callback(index, thumbnail_file_path):
+            thumbnail_file_paths[index] = thumbnail_file_path
+            callbacks_done.release()
+
+        for index, ffmpeg in enumerate(ffmpegs):
+            self.thumbnail_service.request_thumbnail(ffmpeg,
+                                                     self.application_preferences,
+                                                     lambda path, index=index: callback(index, path))
+
+        for _ in ffmpegs:
+            self.assertTrue(callbacks_done.acquire(timeout=10))
+        return thumbnail_file_paths
+
+    @staticmethod
+    def _write_thumbnail(args_list, output_file):
+        with open(output_file, 'w') as thumbnail_file:
+            thumbnail_file.write(output_file)
+        return output_file
+
+    def test_visible_rows_first(self):
+        """Tests that visible rows are handled before background rows, newest first, and background rows in order."""
+        with mock.patch.object(ThumbnailService, '_start_workers'):
+            requests = [self.thumbnail_service.request_thumbnail(None, None, None, is_visible=is_visible)
+                        for is_visible in (False, True, False, True)]
+
+        queued_requests = [self.thumbnail_service._requests_queue.get()[-1] for _ in requests]
+
+        self.assertListEqual(queued_requests, [requests[3], requests[1], requests[0], requests[2]])
+
+    def test_cancel(self):
+        """Tests that cancelled requests aren't made and don't run their callback."""
+        self.thumbnail_service.worker_count = 1
+        cancelled_callback = mock.Mock()
+        ffmpeg = self._get_ffmpeg()
+
+        with mock.patch.object(ThumbnailService, '_start_workers'):
+            self.thumbnail_service.request_thumbnail(None, self.application_preferences, cancelled_callback).cancel()
+
+        with mock.patch.object(preview, 'generate_thumbnail_file', return_value='thumbnail.png') as generate_mock:
+            self.assertListEqual(self._request_thumbnails([ffmpeg]), ['thumbnail.png'])
+
+        generate_mock.assert_called_once()
+        self.assertIs(generate_mock.call_args[0][0], ffmpeg)
+        cancelled_callback.assert_not_called()
+
+        cancelled_request = thumbnail_service.ThumbnailRequest(ffmpeg, self.application_preferences, cancelled_callback)
+        cancelled_request.cancel()
+        cancelled_request.apply('thumbnail.png')
+
+        cancelled_callback.assert_not_called()
+
+    def test_cache_hit(self):
+        """Tests that a thumbnail for settings that were made before comes from the cache without running ffmpeg."""
+        with mock.patch.object(preview, '_run_preview_args_list', side_effect=self._write_thumbnail) as run_mock:
+            first_thumbnail_file_path, = self._request_thumbnails([self._get_ffmpeg()])
+            second_thumbnail_file_path, = self._request_thumbnails([self._get_ffmpeg()])
+
+        run_mock.assert_called_once()
+        self.assertEqual(second_thumbnail_file_path, first_thumbnail_file_path)
+        self.assertEqual(os.path.dirname(first_thumbnail_file_path),
+                         self.thumbnail_service.thumbnail_cache.cache_directory)
+        self.assertTrue(os.path.exists(first_thumbnail_file_path))
+
+    def test_same_settings_at_the_same_time(self):
+        """Tests that workers making thumbnails for the same settings at the same time both return a thumbnail."""
+        both_workers_running = threading.Barrier(2, timeout=10)
+
+        def write_thumbnail(args_list, output_file):
+            self._write_thumbnail(args_list, output_file)
+            both_workers_running.wait()
+            return output_file
+
+        with mock.patch.object(preview, '_run_preview_args_list', side_effect=write_thumbnail):
+            thumbnail_file_paths = self._request_thumbnails([self._get_ffmpeg(), self._get_ffmpeg()])
+
+        for thumbnail_file_path in thumbnail_file_paths:
+            self.assertIsNotNone(thumbnail_file_path)
+            self.assertTrue(os.path.exists(thumbnail_file_path))
+        self.assertEqual(len(self.thumbnail_service.thumbnail_cache), 1)
+        self.assertListEqual(os.listdir(self.thumbnail_service.thumbnail_cache.cache_directory),
+                             [os.path.basename(thumbnail_file_paths[0])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# Copyright 2021 Michael Gregory
+#
+# This file is part of Render Watch.
+#
+# Render Watch is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Render Watch is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Render Watch.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from render_watch.helpers import ui_template_helper
+
+
+def _get_top_level_object_ids(ui_fragment):
+    return [child.get('id') for child in ElementTree.fromstring(ui_fragment) if child.tag == 'object']
+
+
+class TestUITemplateHelper(unittest.TestCase):
+    """Tests the UI fragments that rows are built from."""
+
+    def test_fragment_objects(self):
+        """Tests that a fragment only keeps the requested objects and the objects they refer to."""
+        ui_fragment = ui_template_helper.get_ui_fragment('rows_ui.glade',
+                                                         'inputs_listbox_row_box',
+                                                         'active_listbox_row_box')
+        self.assertCountEqual(_get_top_level_object_ids(ui_fragment),
+                              ['inputs_listbox_row_box', 'task_info_popover',
+                               'active_listbox_row_box', 'chunks_popover'])
+        self.assertListEqual(_get_top_level_object_ids(ui_template_helper.get_ui_fragment('rows_ui.glade',
+                                                                                          'subtitle_stream_row_box')),
+                             ['subtitle_stream_row_box'])
+
+    def test_fragment_cached(self):
+        """Tests that the same fragment is returned for the same objects."""
+        ui_fragment = ui_template_helper.get_ui_fragment('chunk_ui.glade', 'chunk_listbox_row_box')
+        self.assertIs(ui_fragment, ui_template_helper.get_ui_fragment('chunk_ui.glade', 'chunk_listbox_row_box'))
+        self.assertIn('<requires', ui_fragment)
+
+    def test_unknown_object(self):
+        """Tests that asking for an object that isn't a top level object fails."""
+        with self.assertRaises(ValueError):
+            ui_template_helper.get_ui_fragment('rows_ui.glade', 'not_an_object')
+
+
+if __name__ == '__main__':
+    unittest.main()